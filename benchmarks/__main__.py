@@ -0,0 +1,113 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Command line interface of the benchmark suite, see benchmarks/README.rst
+#
+import json
+import sys
+import tempfile
+
+import click
+
+from .generate import ProjectSpec, generate_project
+from .run import SCENARIOS, BenchmarkError, compare_results, run_benchmarks
+
+
+def spec_options(command):
+    defaults = ProjectSpec()
+    for field, default in reversed(list(defaults.to_dict().items())):
+        option = "--{}".format(field.replace("_", "-"))
+        command = click.option(option, type=int, default=default, show_default=True)(command)
+    return command
+
+
+@click.group()
+def cli():
+    """BuildStream benchmark suite"""
+
+
+@cli.command()
+@spec_options
+@click.argument("directory", type=click.Path(file_okay=False))
+def generate(directory, **kwargs):
+    """Generate a synthetic project in DIRECTORY"""
+    target = generate_project(directory, ProjectSpec(**kwargs))
+    click.echo("Generated project with target {}".format(target))
+
+
+@cli.command()
+@spec_options
+@click.option("--repeat", type=int, default=3, show_default=True, help="Repetitions of every scenario")
+@click.option(
+    "--scenario",
+    "scenarios",
+    multiple=True,
+    type=click.Choice([scenario.name for scenario in SCENARIOS]),
+    help="Scenarios to run (default: all)",
+)
+@click.option(
+    "--workdir", type=click.Path(file_okay=False), help="Directory to run in (default: a temporary directory)"
+)
+@click.option("--output", "-o", type=click.Path(dir_okay=False), help="File to write the JSON results to")
+def run(repeat, scenarios, workdir, output, **kwargs):
+    """Run the benchmarks"""
+    spec = ProjectSpec(**kwargs)
+
+    def log(message):
+        click.echo(message, err=True)
+
+    with tempfile.TemporaryDirectory(prefix="bst-benchmarks-") as tempdir:
+        try:
+            results = run_benchmarks(workdir or tempdir, spec, repeat=repeat, scenarios=scenarios or None, log=log)
+        except BenchmarkError as e:
+            raise click.ClickException(str(e))
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        click.echo(text)
+
+
+@cli.command()
+@click.option(
+    "--threshold", type=float, default=0.1, show_default=True, help="Relative slowdown considered a regression"
+)
+@click.argument("base", type=click.File())
+@click.argument("new", type=click.File())
+def compare(threshold, base, new):
+    """Compare the results of two runs
+
+    Exits with an error if any scenario regressed by more than the threshold.
+    """
+    comparison = compare_results(json.load(base), json.load(new))
+
+    regressions = 0
+    click.echo("{:<20} {:>10} {:>10} {:>8}".format("scenario", "base", "new", "ratio"))
+    for name, base_median, new_median, ratio in comparison:
+        regressed = ratio > 1 + threshold
+        regressions += regressed
+        click.echo(
+            "{:<20} {:>9.3f}s {:>9.3f}s {:>7.2f}x{}".format(
+                name, base_median, new_median, ratio, "  REGRESSION" if regressed else ""
+            )
+        )
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()  # pylint: disable=no-value-for-parameter
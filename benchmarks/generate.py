@@ -0,0 +1,211 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Synthetic project generator for the benchmarks.
+#
+# Generated projects only use the plugins shipped with BuildStream and
+# never run commands in the sandbox, such that they can be built with
+# the dummy sandbox:
+#
+#   * `import` elements with `local` sources, which depend on a number
+#     of previously generated elements
+#
+#   * `compose` elements, which stage the dependencies of every
+#     few import elements
+#
+#   * A `compose` target element, which depends on every element which
+#     has no reverse dependencies
+#
+import os
+import random
+from dataclasses import asdict, dataclass
+
+from ruamel.yaml import YAML
+
+
+# ProjectSpec()
+#
+# The parameters of a synthetic project.
+#
+# Attributes:
+#    elements: The number of import elements
+#    fan_out: The maximum number of dependencies of every element
+#    window: The number of previously generated elements from which
+#            dependencies are picked, a smaller window results in a
+#            higher fan-in
+#    compose_every: Generate a compose element for every N import elements
+#    files: The number of files in every import element
+#    file_size: The size of every file in bytes
+#    include_depth: The depth of the chain of project.conf includes
+#    options: The number of boolean project options, every element
+#             has a conditional on one of them
+#    junctions: The number of junctioned subprojects
+#    junction_elements: The number of import elements in every subproject
+#    seed: The random seed
+#
+@dataclass
+class ProjectSpec:
+    elements: int = 500
+    fan_out: int = 4
+    window: int = 50
+    compose_every: int = 25
+    files: int = 4
+    file_size: int = 256
+    include_depth: int = 3
+    options: int = 4
+    junctions: int = 2
+    junction_elements: int = 50
+    seed: int = 0
+
+    # to_dict()
+    #
+    # Returns:
+    #    (dict): The spec as a dictionary, for reporting
+    #
+    def to_dict(self):
+        return asdict(self)
+
+
+# generate_project()
+#
+# Generate a synthetic project.
+#
+# Args:
+#    directory (str): The directory to generate the project in
+#    spec (ProjectSpec): The parameters of the project
+#
+# Returns:
+#    (str): The name of the target element
+#
+def generate_project(directory, spec):
+    rand = random.Random(spec.seed)
+
+    junction_targets = []
+    for index in range(spec.junctions):
+        name = "subproject{}".format(index)
+        subspec = ProjectSpec(
+            elements=spec.junction_elements,
+            fan_out=spec.fan_out,
+            window=spec.window,
+            compose_every=0,
+            files=spec.files,
+            file_size=spec.file_size,
+            include_depth=0,
+            options=0,
+            junctions=0,
+            seed=spec.seed + index + 1,
+        )
+        _generate_project(os.path.join(directory, name), name, subspec, random.Random(subspec.seed), [])
+
+        junction = "{}.bst".format(name)
+        _dump(
+            os.path.join(directory, "elements", junction),
+            {"kind": "junction", "sources": [{"kind": "local", "path": name}]},
+        )
+        junction_targets.append({"junction": junction, "filename": "target.bst"})
+
+    return _generate_project(directory, "benchmark", spec, rand, junction_targets)
+
+
+# _generate_project()
+#
+# Generate the elements, files and configuration of a single project.
+#
+def _generate_project(directory, name, spec, rand, junction_targets):
+    project_conf = {"name": name, "min-version": "2.0", "element-path": "elements"}
+
+    # Project options, every element has a conditional on one of them
+    if spec.options:
+        project_conf["options"] = {
+            "option{}".format(index): {
+                "type": "bool",
+                "description": "Synthetic option {}".format(index),
+                "default": bool(index % 2),
+            }
+            for index in range(spec.options)
+        }
+
+    # A chain of includes, every level defines a variable
+    if spec.include_depth:
+        project_conf["(@)"] = ["include/level0.yml"]
+        for level in range(spec.include_depth):
+            include = {"variables": {"level{}".format(level): "level {}".format(level)}}
+            if level + 1 < spec.include_depth:
+                include["(@)"] = ["include/level{}.yml".format(level + 1)]
+            _dump(os.path.join(directory, "include", "level{}.yml".format(level)), include)
+
+    _dump(os.path.join(directory, "project.conf"), project_conf)
+
+    # Import elements with dependencies on previous elements
+    heads = set()
+    composes = []
+    for index in range(spec.elements):
+        element_name = "element{}.bst".format(index)
+        filesdir = os.path.join("files", "element{}".format(index))
+
+        for file_index in range(spec.files):
+            path = os.path.join(directory, filesdir, "element{}".format(index), "file{}".format(file_index))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(rand.randbytes(spec.file_size))
+
+        candidates = list(range(max(0, index - spec.window), index))
+        dependencies = sorted(rand.sample(candidates, min(len(candidates), rand.randint(0, spec.fan_out))))
+        heads.difference_update(dependencies)
+        heads.add(index)
+
+        element = {
+            "kind": "import",
+            "sources": [{"kind": "local", "path": filesdir}],
+            "depends": ["element{}.bst".format(dep) for dep in dependencies],
+        }
+        if spec.options:
+            option = "option{}".format(rand.randrange(spec.options))
+            element["variables"] = {
+                "(?)": [
+                    {"{} == True".format(option): {"flavour": "enabled"}},
+                    {"{} == False".format(option): {"flavour": "disabled"}},
+                ]
+            }
+        _dump(os.path.join(directory, "elements", element_name), element)
+
+        if spec.compose_every and (index + 1) % spec.compose_every == 0:
+            compose_name = "compose{}.bst".format(index)
+            _dump(
+                os.path.join(directory, "elements", compose_name),
+                {
+                    "kind": "compose",
+                    "build-depends": [element_name],
+                    "config": {"integrate": False},
+                },
+            )
+            composes.append(compose_name)
+
+    # The target composes everything
+    target = {
+        "kind": "compose",
+        "build-depends": sorted(composes + ["element{}.bst".format(index) for index in heads]) + junction_targets,
+        "config": {"integrate": False},
+    }
+    _dump(os.path.join(directory, "elements", "target.bst"), target)
+
+    return "target.bst"
+
+
+def _dump(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    yaml = YAML()
+    yaml.default_flow_style = False
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.dump(data, f)
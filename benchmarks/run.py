@@ -0,0 +1,239 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Benchmark runner.
+#
+# Every scenario runs `bst` in a subprocess against a generated
+# project, with a private cache directory, and is timed over a
+# number of repetitions.
+#
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from ruamel.yaml import YAML
+
+from .generate import generate_project
+
+# The version of the results format
+RESULTS_VERSION = 1
+
+
+# Scenario()
+#
+# A benchmarked bst invocation.
+#
+# Args:
+#    name (str): The name of the scenario
+#    args (list): The bst arguments, "{target}" and "{checkout}" are substituted
+#    clean_cache (bool): Whether every repetition starts with an empty cache
+#    requires_build (bool): Whether the target must be built beforehand
+#    builds (bool): Whether the scenario leaves the target built
+#
+class Scenario:
+    def __init__(self, name, args, *, clean_cache=False, requires_build=False, builds=False):
+        self.name = name
+        self.args = args
+        self.clean_cache = clean_cache
+        self.requires_build = requires_build
+        self.builds = builds
+
+
+SCENARIOS = [
+    # Loading, option and include resolution and cache key calculation
+    Scenario("show", ["show", "--deps", "all", "--format", "%{name} %{key}", "{target}"], clean_cache=True),
+    # Building everything with the dummy sandbox, this exercises the
+    # scheduler, source staging and dependency staging
+    Scenario("build", ["build", "{target}"], clean_cache=True, builds=True),
+    # Cache queries of all elements against the local casd
+    Scenario(
+        "show-cached", ["show", "--deps", "all", "--format", "%{name} %{state}", "{target}"], requires_build=True
+    ),
+    # A no-op build, where everything is cached
+    Scenario("build-cached", ["build", "{target}"], requires_build=True),
+    # Checking out the artifact which composes everything
+    Scenario(
+        "artifact-checkout",
+        ["artifact", "checkout", "--directory", "{checkout}", "{target}"],
+        requires_build=True,
+    ),
+]
+
+
+# BenchmarkError()
+#
+# Raised when a benchmarked command fails.
+#
+class BenchmarkError(Exception):
+    pass
+
+
+# run_benchmarks()
+#
+# Generate a project and time all the scenarios.
+#
+# Args:
+#    workdir (str): The directory to generate the project and caches in
+#    spec (ProjectSpec): The parameters of the generated project
+#    repeat (int): The number of repetitions of every scenario
+#    scenarios (list): The names of the scenarios to run, or None for all
+#    log (callable): A function to report progress with
+#
+# Returns:
+#    (dict): The results, as written by `python -m benchmarks run`
+#
+def run_benchmarks(workdir, spec, *, repeat=3, scenarios=None, log=None):
+    project = os.path.join(workdir, "project")
+    shutil.rmtree(project, ignore_errors=True)
+    target = generate_project(project, spec)
+
+    runner = _Runner(workdir, project)
+
+    results = {}
+    for scenario in SCENARIOS:
+        if scenarios is not None and scenario.name not in scenarios:
+            continue
+
+        times = []
+        for _ in range(repeat):
+            if scenario.clean_cache:
+                runner.clean_cache()
+            elif scenario.requires_build and not runner.built:
+                runner.bst(["build", target])
+                runner.built = True
+
+            checkout = os.path.join(workdir, "checkout")
+            shutil.rmtree(checkout, ignore_errors=True)
+
+            args = [arg.replace("{target}", target).replace("{checkout}", checkout) for arg in scenario.args]
+            elapsed = runner.bst(args)
+            times.append(elapsed)
+
+            if scenario.builds:
+                runner.built = True
+
+            if log:
+                log("{:<20} {:8.3f}s".format(scenario.name, elapsed))
+
+        results[scenario.name] = {
+            "times": times,
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.mean(times),
+        }
+
+    return {
+        "version": RESULTS_VERSION,
+        "commit": _get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": int(time.time()),
+        "spec": spec.to_dict(),
+        "results": results,
+    }
+
+
+# compare_results()
+#
+# Compare the median times of two benchmark runs.
+#
+# Args:
+#    base (dict): The results to compare against
+#    new (dict): The new results
+#
+# Returns:
+#    (list): A list of (scenario, base median, new median, ratio) tuples
+#            for the scenarios present in both runs
+#
+def compare_results(base, new):
+    comparison = []
+    for name, result in new["results"].items():
+        try:
+            base_median = base["results"][name]["median"]
+        except KeyError:
+            continue
+        comparison.append((name, base_median, result["median"], result["median"] / base_median))
+
+    return comparison
+
+
+# _Runner()
+#
+# Runs bst with a private configuration and cache.
+#
+class _Runner:
+    def __init__(self, workdir, project):
+        self.project = project
+        self.cachedir = os.path.join(workdir, "cache")
+        self.built = False
+
+        self.config = os.path.join(workdir, "buildstream.conf")
+        config = {
+            "cachedir": self.cachedir,
+            "sourcedir": os.path.join(workdir, "sources"),
+            "logdir": os.path.join(workdir, "logs"),
+        }
+        with open(self.config, "w", encoding="utf-8") as f:
+            YAML().dump(config, f)
+
+    def clean_cache(self):
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+        self.built = False
+
+    # bst()
+    #
+    # Run bst and return the wall clock time it took
+    #
+    def bst(self, args):
+        command = [
+            sys.executable,
+            "-m",
+            "buildstream",
+            "--no-interactive",
+            "--config",
+            self.config,
+            "-C",
+            self.project,
+        ]
+        command += args
+
+        start = time.monotonic()
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+        elapsed = time.monotonic() - start
+
+        if process.returncode != 0:
+            raise BenchmarkError(
+                "Command failed: {}\n{}".format(" ".join(command), process.stderr.decode("utf-8", errors="replace"))
+            )
+
+        return elapsed
+
+
+def _get_commit():
+    try:
+        process = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return process.stdout.decode().strip()
@@ -31,6 +31,7 @@ from typing import Dict, Tuple
 from ._protos.buildstream.v2.artifact_pb2 import Artifact as ArtifactProto
 from . import _yaml
 from . import utils
+from ._coroutines import run_synchronously, to_thread
 from .node import Node
 from .types import _Scope
 from .storage._casbaseddirectory import CasBasedDirectory
@@ -67,6 +68,7 @@ class Artifact:
         self._metadata_dependencies = None  # Dictionary of dependency strong keys from the artifact
         self._metadata_workspaced = None  # Boolean of whether it's a workspaced artifact
         self._metadata_workspaced_dependencies = None  # List of which dependencies are workspaced from the artifact
+        self._metadata_incremental = None  # Boolean of whether it's an incrementally built artifact
         self._cached = None  # Boolean of whether the artifact is cached
 
     # strong_key():
@@ -125,6 +127,26 @@ class Artifact:
         files_digest = self._get_field_digest("files")
         return CasBasedDirectory(self._cas, digest=files_digest)
 
+    # get_files_digest():
+    #
+    # Get the digest of the artifact files directory
+    #
+    # Returns:
+    #    (Digest): The digest of the files directory
+    #
+    def get_files_digest(self):
+        return self._get_field_digest("files")
+
+    # fetch_files_async():
+    #
+    # Ensure that the files of the artifact are available in the local
+    # cache when using a remote cache.
+    #
+    async def fetch_files_async(self):
+        files_digest = self._get_field_digest("files")
+        if files_digest:
+            await self._cas.ensure_tree_async(files_digest)
+
     # get_buildroot():
     #
     # Get a virtual directory for the artifact buildroot content
@@ -202,6 +224,7 @@ class Artifact:
     #    environment (dict): dict of the element's environment variables
     #    sandboxconfig (SandboxConfig): The element's SandboxConfig
     #    buildsandbox (Sandbox): The element's configured build sandbox
+    #    incremental (bool): Whether the build was staged from a previous build tree
     #
     def cache(
         self,
@@ -216,6 +239,7 @@ class Artifact:
         environment,
         sandboxconfig,
         buildsandbox,
+        incremental,
     ):
 
         context = self._context
@@ -240,8 +264,12 @@ class Artifact:
         artifact.weak_key = self._weak_cache_key
 
         artifact.was_workspaced = bool(element._get_workspace())
+        artifact.was_incremental = incremental
         properties = ["mtime"] if artifact.was_workspaced else []
 
+        # Incremental builds rely on the mtimes of the build tree
+        buildtree_properties = ["mtime"] if artifact.was_workspaced or sandboxconfig.incremental else []
+
         # Store files
         if collectvdir is not None:
             filesvdir = CasBasedDirectory(cas_cache=self._cas)
@@ -281,12 +309,15 @@ class Artifact:
             _yaml.roundtrip_dump(high_diversity_node, tmpname)
             files_to_capture.append((tmpname, artifact.high_diversity_meta))
 
-            # Store log file
+            # Store log file, compressed as build logs can be large
             log_filename = context.messenger.get_log_filename()
             if log_filename:
                 log = artifact.logs.add()
                 log.name = os.path.basename(log_filename)
-                files_to_capture.append((log_filename, log.digest))
+
+                tmpname = os.path.join(tmpdir, "log")
+                utils._compress_log(log_filename, tmpname)
+                files_to_capture.append((tmpname, log.digest))
 
             # Capture queued files and store returned digests
             digests = self._cas.add_objects(paths=[entry[0] for entry in files_to_capture])
@@ -307,7 +338,9 @@ class Artifact:
         # Store build tree
         if sandbox_build_dir is not None:
             buildtreevdir = CasBasedDirectory(cas_cache=self._cas)
-            buildtreevdir._import_files_internal(sandbox_build_dir, properties=properties, collect_result=False)
+            buildtreevdir._import_files_internal(
+                sandbox_build_dir, properties=buildtree_properties, collect_result=False
+            )
             artifact.buildtree.CopyFrom(buildtreevdir._get_digest())
 
         # Store sources
@@ -326,8 +359,11 @@ class Artifact:
                 for key, value in sorted(sandbox_env.items()):
                     artifact.buildsandbox.environment.add(name=key, value=value)
 
+            # Host mounts are not part of the build environment
+            mount_sources = buildsandbox._get_mount_sources()
             for directory in buildsandbox._get_marked_directories():
-                artifact.buildsandbox.marked_directories.append(directory)
+                if directory not in mount_sources:
+                    artifact.buildsandbox.marked_directories.append(directory)
 
             artifact.buildsandbox.working_directory = buildsandbox._get_work_directory()
 
@@ -579,6 +615,25 @@ class Artifact:
 
         return self._metadata_workspaced_dependencies
 
+    # get_metadata_incremental():
+    #
+    # Retrieve whether the given artifact was built incrementally.
+    #
+    # Returns:
+    #    (bool): Whether the given artifact was built incrementally
+    #
+    def get_metadata_incremental(self):
+
+        if self._metadata_incremental is not None:
+            return self._metadata_incremental
+
+        # Extract proto
+        artifact = self._get_proto()
+
+        self._metadata_incremental = artifact.was_incremental
+
+        return self._metadata_incremental
+
     # get_dependency_artifact_names()
     #
     # Retrieve the artifact names of all of the dependencies in _Scope.BUILD
@@ -615,20 +670,30 @@ class Artifact:
     #     (bool): Whether artifact is in local cache
     #
     def query_cache(self):
-        artifact = self._load_proto()
+        return run_synchronously(self.query_cache_async())
+
+    # query_cache_async():
+    #
+    # Like query_cache(), but awaits buildbox-casd on the asyncio event loop.
+    #
+    # Returns:
+    #     (bool): Whether artifact is in local cache
+    #
+    async def query_cache_async(self):
+        artifact = await to_thread(self._load_proto)
         if not artifact:
             self._cached = False
             return False
 
         # Check whether 'files' subdirectory is available, with or without file contents
-        if str(artifact.files) and not self._cas.contains_directory(artifact.files):
+        if str(artifact.files) and not await self._cas.contains_directory_async(artifact.files):
             self._cached = False
             return False
 
         # Check whether public data and logs are available
         logfile_digests = [logfile.digest for logfile in artifact.logs]
         digests = [artifact.low_diversity_meta, artifact.high_diversity_meta, artifact.public_data] + logfile_digests
-        if not self._cas.contains_files(digests):
+        if not await self._cas.contains_files_async(digests):
             self._cached = False
             return False
 
@@ -684,22 +749,44 @@ class Artifact:
     # Returns: True if the artifact has been downloaded, False otherwise
     #
     def pull(self, *, pull_buildtrees):
+        return run_synchronously(self.pull_async(pull_buildtrees=pull_buildtrees))
+
+    # pull_async()
+    #
+    # Like pull(), but awaits the remotes on the asyncio event loop.
+    #
+    # Args:
+    #     pull_buildtrees (bool): Whether to pull buildtrees or not
+    #
+    # Returns: True if the artifact has been downloaded, False otherwise
+    #
+    async def pull_async(self, *, pull_buildtrees):
         artifacts = self._context.artifactcache
 
         pull_key = self.get_extract_key()
 
-        if not artifacts.pull(self._element, pull_key, pull_buildtrees=pull_buildtrees):
+        if not await artifacts.pull_async(self._element, pull_key, pull_buildtrees=pull_buildtrees):
             return False
 
-        self.set_cached()
+        await to_thread(self.set_cached)
 
-        # Add reference for the other key (weak key when pulling with strong key,
-        # strong key when pulling with weak key)
-        for key in self.get_metadata_keys():
-            artifacts.link_key(self._element, pull_key, key)
+        await to_thread(self._link_keys, pull_key)
 
         return True
 
+    # _link_keys():
+    #
+    # Add reference for the other key (weak key when pulling with strong key,
+    # strong key when pulling with weak key)
+    #
+    # Args:
+    #    pull_key (str): The key the artifact was pulled with
+    #
+    def _link_keys(self, pull_key):
+        artifacts = self._context.artifactcache
+        for key in self.get_metadata_keys():
+            artifacts.link_key(self._element, pull_key, key)
+
     def configure_sandbox(self, sandbox):
         artifact = self._get_proto()
 
@@ -15,15 +15,20 @@
 #        Tristan Maat <tristan.maat@codethink.co.uk>
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from ._assetcache import AssetCache
 from ._cas.casremote import BlobNotFound
+from ._coroutines import run_synchronously, to_thread
 from ._exceptions import ArtifactError, AssetCacheError, CASError, CASRemoteError
+from ._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
 from ._protos.buildstream.v2 import artifact_pb2
 
 from . import utils
 
 REMOTE_ASSET_ARTIFACT_URN_TEMPLATE = "urn:fdc:buildstream.build:2020:artifact:{}"
+REMOTE_ASSET_CHUNKED_ARTIFACT_URN_TEMPLATE = "urn:fdc:buildstream.build:2020:chunked-artifact:{}"
+REMOTE_ASSET_CHUNKED_BLOB_URN_TEMPLATE = "urn:fdc:buildstream.build:2020:chunked-blob:{}/{}"
 
 
 # An ArtifactCache manages artifacts.
@@ -39,6 +44,18 @@ class ArtifactCache(AssetCache):
         self._basedir = context.artifactdir
         os.makedirs(self._basedir, exist_ok=True)
 
+        # The digests of the artifact protos found in the index remotes
+        # in this session, or None for artifacts which were not found
+        self._remote_artifacts = {}
+
+        # Files of at least this size are transferred in chunks, the file
+        # blobs are not available locally when using a remote cache
+        self._chunk_threshold = None if context.remote_cache_spec else context.config_chunk_threshold
+
+        # The chunk manifests of the large file blobs which were split
+        # into chunks, see _blob_chunks()
+        self._chunksdir = os.path.join(os.path.dirname(self._basedir), "chunks")
+
     # preflight():
     #
     # Preflight check.
@@ -105,22 +122,40 @@ class ArtifactCache(AssetCache):
     #   (ArtifactError): if there was an error
     #
     def push(self, element, artifact):
+        return run_synchronously(self.push_async(element, artifact))
+
+    # push_async():
+    #
+    # Like push(), but awaits the remotes on the asyncio event loop.
+    #
+    # Args:
+    #     element (Element): The Element whose artifact is to be pushed
+    #     artifact (Artifact): The artifact being pushed
+    #
+    # Returns:
+    #   (bool): True if any remote was updated, False if no pushes were required
+    #
+    # Raises:
+    #   (ArtifactError): if there was an error
+    #
+    async def push_async(self, element, artifact):
         project = element._get_project()
         display_key = element._get_display_key()
 
         index_remotes, storage_remotes = self.get_remotes(project.name, True)
         artifact_proto = artifact._get_proto()
-        artifact_digest = self.cas.add_object(buffer=artifact_proto.SerializeToString())
+        artifact_digest = await to_thread(self.cas.add_object, buffer=artifact_proto.SerializeToString())
+        manifests = {}
 
         pushed = False
 
         # First push our files to all storage remotes, so that they
         # can perform file checks on their end
         for remote in storage_remotes:
-            remote.init()
+            await remote.init_async()
             element.status("Pushing data from artifact {} -> {}".format(display_key.brief, remote))
 
-            if self._push_artifact_blobs(artifact, artifact_digest, remote):
+            if await self._push_artifact_blobs_async(artifact, artifact_digest, remote, manifests, index_remotes):
                 element.info("Pushed data from artifact {} -> {}".format(display_key.brief, remote))
             else:
                 element.info(
@@ -128,10 +163,10 @@ class ArtifactCache(AssetCache):
                 )
 
         for remote in index_remotes:
-            remote.init()
+            await remote.init_async()
             element.status("Pushing artifact {} -> {}".format(display_key.brief, remote))
 
-            if self._push_artifact_proto(element, artifact, artifact_digest, remote):
+            if await self._push_artifact_proto_async(element, artifact, artifact_digest, remote, manifests):
                 element.info("Pushed artifact {} -> {}".format(display_key.brief, remote))
                 pushed = True
             else:
@@ -152,23 +187,41 @@ class ArtifactCache(AssetCache):
     #   (bool): True if pull was successful, False if artifact was not available
     #
     def pull(self, element, key, *, pull_buildtrees=False):
+        return run_synchronously(self.pull_async(element, key, pull_buildtrees=pull_buildtrees))
+
+    # pull_async():
+    #
+    # Like pull(), but awaits the remotes on the asyncio event loop.
+    #
+    # Args:
+    #     element (Element): The Element whose artifact is to be fetched
+    #     key (str): The cache key to use
+    #     pull_buildtrees (bool): Whether to pull buildtrees or not
+    #
+    # Returns:
+    #   (bool): True if pull was successful, False if artifact was not available
+    #
+    async def pull_async(self, element, key, *, pull_buildtrees=False):
         artifact_digest = None
         display_key = key[: self.context.log_key_length]
         project = element._get_project()
 
         artifact_name = element.get_artifact_name(key=key)
-        uri = REMOTE_ASSET_ARTIFACT_URN_TEMPLATE.format(artifact_name)
+        uris = self._lookup_uris(artifact_name)
 
         index_remotes, storage_remotes = self.get_remotes(project.name, False)
 
+        # Reuse the artifact proto digest if check_remotes() already found it
+        artifact_digest = self._remote_artifacts.get(artifact_name)
+
         errors = []
         # Start by pulling our artifact proto, so that we know which
         # blobs to pull
-        for remote in index_remotes:
-            remote.init()
+        for remote in [] if artifact_digest else index_remotes:
+            await remote.init_async()
             try:
                 element.status("Pulling artifact {} <- {}".format(display_key, remote))
-                response = remote.fetch_blob([uri])
+                response = await remote.fetch_blob_async(uris)
                 if response:
                     artifact_digest = response.blob_digest
                     break
@@ -193,11 +246,13 @@ class ArtifactCache(AssetCache):
         errors = []
         # If we do, we can pull it!
         for remote in storage_remotes:
-            remote.init()
+            await remote.init_async()
             try:
                 element.status("Pulling data for artifact {} <- {}".format(display_key, remote))
 
-                if self._pull_artifact_storage(element, key, artifact_digest, remote, pull_buildtrees=pull_buildtrees):
+                if await self._pull_artifact_storage_async(
+                    element, key, artifact_digest, remote, pull_buildtrees=pull_buildtrees, index_remotes=index_remotes
+                ):
                     element.info("Pulled artifact {} <- {}".format(display_key, remote))
                     return True
 
@@ -238,6 +293,54 @@ class ArtifactCache(AssetCache):
 
         utils.safe_link(os.path.join(self._basedir, oldref), os.path.join(self._basedir, newref))
 
+    # check_remotes():
+    #
+    # Check which of the artifacts of the given elements are available in
+    # the remotes. The remotes of each project are queried in turn for the
+    # artifacts which were not found in the previous remotes, with up to
+    # as many concurrent queries as fetch jobs are configured.
+    #
+    # The results are remembered for the rest of the session, and used
+    # by check_remotes_for_element() and pull().
+    #
+    # Args:
+    #    elements (list [Element]): The elements to check
+    #
+    # Returns:
+    #    (set): The names of the artifacts which are available remotely
+    #
+    def check_remotes(self, elements):
+        refs_by_project = {}
+        for element in elements:
+            project = element._get_project()
+            refs_by_project.setdefault(project.name, set()).add(element.get_artifact_name())
+
+        for project_name, refs in refs_by_project.items():
+            pending = sorted(ref for ref in refs if ref not in self._remote_artifacts)
+            if not pending:
+                continue
+
+            index_remotes, _ = self.get_remotes(project_name, False)
+            for remote in index_remotes:
+                if not pending:
+                    break
+
+                remote.init()
+                with ThreadPoolExecutor(max_workers=self.context.sched_fetchers) as pool:
+                    digests = list(pool.map(lambda ref, remote=remote: self._query_remote(ref, remote), pending))
+
+                for ref, digest in zip(pending, digests):
+                    if digest:
+                        self._remote_artifacts[ref] = digest
+                pending = [ref for ref, digest in zip(pending, digests) if not digest]
+
+            for ref in pending:
+                self._remote_artifacts[ref] = None
+
+        return {
+            ref for refs in refs_by_project.values() for ref in refs if self._remote_artifacts.get(ref) is not None
+        }
+
     # check_remotes_for_element()
     #
     # Check if the element is available in any of the remotes
@@ -249,33 +352,51 @@ class ArtifactCache(AssetCache):
     #    (bool): True if the element is available remotely
     #
     def check_remotes_for_element(self, element):
+        return run_synchronously(self.check_remotes_for_element_async(element))
+
+    # check_remotes_for_element_async()
+    #
+    # Like check_remotes_for_element(), but awaits the remotes on the
+    # asyncio event loop.
+    #
+    # Args:
+    #    element (Element): The element to check
+    #
+    # Returns:
+    #    (bool): True if the element is available remotely
+    #
+    async def check_remotes_for_element_async(self, element):
         project = element._get_project()
         index_remotes, _ = self.get_remotes(project.name, False)
 
-        # If there are no remotes
-        if not index_remotes:
-            return False
-
         ref = element.get_artifact_name()
-        for remote in index_remotes:
-            remote.init()
+        if ref not in self._remote_artifacts:
+            digest = None
+            for remote in index_remotes:
+                await remote.init_async()
+
+                digest = await self._query_remote_async(ref, remote)
+                if digest:
+                    break
 
-            if self._query_remote(ref, remote):
-                return True
+            self._remote_artifacts[ref] = digest
 
-        return False
+        return self._remote_artifacts[ref] is not None
 
     ################################################
     #             Local Private Methods            #
     ################################################
 
-    # _push_artifact_blobs()
+    # _push_artifact_blobs_async()
     #
     # Push the blobs that make up an artifact to the remote server.
     #
     # Args:
     #    artifact (Artifact): The artifact whose blobs to push.
     #    remote (CASRemote): The remote to push the blobs to.
+    #    manifests (dict): The chunk manifests of the large file blobs which were pushed
+    #                      in chunks, which are added by file hash, see _send_directory_chunked()
+    #    index_remotes (list): The index remotes to look up chunk manifests in
     #
     # Returns:
     #    (bool) - True if we uploaded anything, False otherwise.
@@ -284,44 +405,21 @@ class ArtifactCache(AssetCache):
     #    ArtifactError: If we fail to push blobs (*unless* they're
     #    already there or we run out of space on the server).
     #
-    def _push_artifact_blobs(self, artifact, artifact_digest, remote):
+    async def _push_artifact_blobs_async(self, artifact, artifact_digest, remote, manifests, index_remotes):
         artifact_proto = artifact._get_proto()
 
         try:
-            if artifact_proto.HasField("files"):
-                self.cas._send_directory(remote, artifact_proto.files)
-
-            if artifact_proto.HasField("buildtree"):
-                try:
-                    self.cas._send_directory(remote, artifact_proto.buildtree)
-                except FileNotFoundError:
-                    pass
-
-            if artifact_proto.HasField("sources"):
-                try:
-                    self.cas._send_directory(remote, artifact_proto.sources)
-                except FileNotFoundError:
-                    pass
-
-            if artifact_proto.HasField("buildroot"):
+            for directory, optional in self._artifact_directories(artifact_proto):
                 try:
-                    self.cas._send_directory(remote, artifact_proto.buildroot)
+                    if self._chunk_threshold is not None:
+                        await to_thread(self._send_directory_chunked, remote, directory, manifests, index_remotes)
+                    else:
+                        await self.cas._send_directory_async(remote, directory)
                 except FileNotFoundError:
-                    pass
-
-            if artifact_proto.HasField("buildsandbox"):
-                for subsandbox_digest in artifact_proto.buildsandbox.subsandbox_digests:
-                    self.cas._send_directory(remote, subsandbox_digest)
-
-            digests = [artifact_digest, artifact_proto.low_diversity_meta, artifact_proto.high_diversity_meta]
-
-            if artifact_proto.HasField("public_data"):
-                digests.append(artifact_proto.public_data)
-
-            for log_file in artifact_proto.logs:
-                digests.append(log_file.digest)
+                    if not optional:
+                        raise
 
-            self.cas.send_blobs(remote, digests)
+            await self.cas.send_blobs_async(remote, [artifact_digest] + self._artifact_blobs(artifact_proto))
 
         except CASRemoteError as cas_error:
             if cas_error.reason != "cache-too-full":
@@ -330,7 +428,7 @@ class ArtifactCache(AssetCache):
 
         return True
 
-    # _push_artifact_proto()
+    # _push_artifact_proto_async()
     #
     # Pushes the artifact proto to remote.
     #
@@ -338,6 +436,7 @@ class ArtifactCache(AssetCache):
     #    element (Element): The element
     #    artifact (Artifact): The related artifact being pushed
     #    remote (AssetRemote): Remote to push to
+    #    manifests (dict): The chunk manifests of the large file blobs which were pushed in chunks
     #
     # Returns:
     #    (bool): Whether we pushed the artifact.
@@ -346,55 +445,109 @@ class ArtifactCache(AssetCache):
     #    ArtifactError: If the push fails for any reason except the
     #    artifact already existing.
     #
-    def _push_artifact_proto(self, element, artifact, artifact_digest, remote):
-
+    async def _push_artifact_proto_async(self, element, artifact, artifact_digest, remote, manifests):
         artifact_proto = artifact._get_proto()
-
-        keys = list(utils._deduplicate([artifact_proto.strong_key, artifact_proto.weak_key]))
-        artifact_names = [element.get_artifact_name(key=key) for key in keys]
-        uris = [REMOTE_ASSET_ARTIFACT_URN_TEMPLATE.format(artifact_name) for artifact_name in artifact_names]
+        uris = self._artifact_uris(element, artifact_proto, chunked=bool(manifests))
 
         try:
-            response = remote.fetch_blob(uris)
+            response = await remote.fetch_blob_async(
+                self._lookup_uris(element.get_artifact_name(key=artifact_proto.strong_key))
+            )
             # Skip push if artifact is already on the server
             if response and response.blob_digest == artifact_digest:
                 return False
         except AssetCacheError as e:
             raise ArtifactError("{}".format(e), temporary=True) from e
 
-        referenced_directories = []
-        if artifact_proto.HasField("files"):
-            referenced_directories.append(artifact_proto.files)
-        if artifact_proto.HasField("buildtree"):
-            referenced_directories.append(artifact_proto.buildtree)
-        if artifact_proto.HasField("sources"):
-            referenced_directories.append(artifact_proto.sources)
-        if artifact_proto.HasField("buildroot"):
-            referenced_directories.append(artifact_proto.buildroot)
-        if artifact_proto.HasField("buildsandbox"):
-            for subsandbox_digest in artifact_proto.buildsandbox.subsandbox_digests:
-                referenced_directories.append(subsandbox_digest)
-
-        referenced_blobs = [artifact_proto.low_diversity_meta, artifact_proto.high_diversity_meta] + [
-            log_file.digest for log_file in artifact_proto.logs
-        ]
-
-        if artifact_proto.HasField("public_data"):
-            referenced_blobs.append(artifact_proto.public_data)
-
         try:
-            remote.push_blob(
+            if manifests:
+                await to_thread(self._push_chunk_manifests, remote, manifests)
+            await remote.push_blob_async(
                 uris,
                 artifact_digest,
-                references_blobs=referenced_blobs,
-                references_directories=referenced_directories,
+                references_blobs=self._artifact_blobs(artifact_proto),
+                references_directories=[directory for directory, _ in self._artifact_directories(artifact_proto)],
             )
         except AssetCacheError as e:
             raise ArtifactError("{}".format(e), temporary=True) from e
 
         return True
 
-    # _pull_artifact_storage():
+    # _artifact_uris()
+    #
+    # Artifacts with files which were pushed in chunks are published under
+    # separate URIs, as the storage remote does not have these files as
+    # whole blobs, and only clients which support chunking may use them.
+    #
+    # Args:
+    #    element (Element): The element
+    #    artifact_proto (Artifact): The artifact proto
+    #    chunked (bool): Whether files of the artifact were pushed in chunks
+    #
+    # Returns:
+    #    (list): The remote asset URIs of the artifact, for all of its keys
+    #
+    def _artifact_uris(self, element, artifact_proto, *, chunked=False):
+        template = REMOTE_ASSET_CHUNKED_ARTIFACT_URN_TEMPLATE if chunked else REMOTE_ASSET_ARTIFACT_URN_TEMPLATE
+        keys = list(utils._deduplicate([artifact_proto.strong_key, artifact_proto.weak_key]))
+        artifact_names = [element.get_artifact_name(key=key) for key in keys]
+        return [template.format(artifact_name) for artifact_name in artifact_names]
+
+    # _lookup_uris()
+    #
+    # Args:
+    #    artifact_name (str): The name of the artifact
+    #
+    # Returns:
+    #    (list): The remote asset URIs to look the artifact up with, which
+    #            include the URI of chunk-pushed artifacts if chunking is enabled
+    #
+    def _lookup_uris(self, artifact_name):
+        uris = [REMOTE_ASSET_ARTIFACT_URN_TEMPLATE.format(artifact_name)]
+        if self._chunk_threshold is not None:
+            uris.append(REMOTE_ASSET_CHUNKED_ARTIFACT_URN_TEMPLATE.format(artifact_name))
+        return uris
+
+    # _artifact_directories()
+    #
+    # Args:
+    #    artifact_proto (Artifact): The artifact proto
+    #
+    # Returns:
+    #    (list): (Digest, bool) tuples of the directories referenced by the
+    #            artifact, and whether the directory may be missing locally
+    #
+    def _artifact_directories(self, artifact_proto):
+        directories = []
+        if artifact_proto.HasField("files"):
+            directories.append((artifact_proto.files, False))
+        if artifact_proto.HasField("buildtree"):
+            directories.append((artifact_proto.buildtree, True))
+        if artifact_proto.HasField("sources"):
+            directories.append((artifact_proto.sources, True))
+        if artifact_proto.HasField("buildroot"):
+            directories.append((artifact_proto.buildroot, True))
+        if artifact_proto.HasField("buildsandbox"):
+            for subsandbox_digest in artifact_proto.buildsandbox.subsandbox_digests:
+                directories.append((subsandbox_digest, False))
+        return directories
+
+    # _artifact_blobs()
+    #
+    # Args:
+    #    artifact_proto (Artifact): The artifact proto
+    #
+    # Returns:
+    #    (list): The Digests of the metadata blobs referenced by the artifact
+    #
+    def _artifact_blobs(self, artifact_proto):
+        blobs = [artifact_proto.low_diversity_meta, artifact_proto.high_diversity_meta]
+        if artifact_proto.HasField("public_data"):
+            blobs.append(artifact_proto.public_data)
+        blobs.extend(log_file.digest for log_file in artifact_proto.logs)
+        return blobs
+
+    # _pull_artifact_storage_async():
     #
     # Pull artifact blobs from the given remote.
     #
@@ -403,6 +556,7 @@ class ArtifactCache(AssetCache):
     #    key (str): The specific key for the artifact to pull
     #    remote (CASRemote): remote to pull from
     #    pull_buildtree (bool): whether to pull buildtrees or not
+    #    index_remotes (list): The index remotes to look up chunk manifests in
     #
     # Returns:
     #    (bool): True if we pulled any blobs.
@@ -411,44 +565,24 @@ class ArtifactCache(AssetCache):
     #    ArtifactError: If the pull failed for any reason except the
     #    blobs not existing on the server.
     #
-    def _pull_artifact_storage(self, element, key, artifact_digest, remote, pull_buildtrees=False):
-        artifact_name = element.get_artifact_name(key=key)
-
+    async def _pull_artifact_storage_async(
+        self, element, key, artifact_digest, remote, pull_buildtrees=False, index_remotes=()
+    ):
         try:
             # Fetch and parse artifact proto
-            self.cas.fetch_blobs(remote, [artifact_digest])
-            artifact = artifact_pb2.Artifact()
-            with self.cas.open(artifact_digest, "rb") as f:
-                artifact.ParseFromString(f.read())
-
-            # Write the artifact proto to cache
-            artifact_path = os.path.join(self._basedir, artifact_name)
-            os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
-            with utils.save_file_atomic(artifact_path, mode="wb") as f:
-                f.write(artifact.SerializeToString())
-
-            if artifact.HasField("files"):
-                self.cas.fetch_directory(remote, artifact.files)
-
-            if pull_buildtrees:
-                if artifact.HasField("buildtree"):
-                    self.cas.fetch_directory(remote, artifact.buildtree)
-                if artifact.HasField("sources"):
-                    self.cas.fetch_directory(remote, artifact.sources)
-                if artifact.HasField("buildroot"):
-                    self.cas.fetch_directory(remote, artifact.buildroot)
-                if artifact.HasField("buildsandbox"):
-                    for subsandbox_digest in artifact.buildsandbox.subsandbox_digests:
-                        self.cas.fetch_directory(remote, subsandbox_digest)
-
-            digests = [artifact.low_diversity_meta, artifact.high_diversity_meta]
-            if artifact.HasField("public_data"):
-                digests.append(artifact.public_data)
-
-            for log_digest in artifact.logs:
-                digests.append(log_digest.digest)
-
-            self.cas.fetch_blobs(remote, digests)
+            await self.cas.fetch_blobs_async(remote, [artifact_digest])
+            artifact = await to_thread(self._store_artifact_proto, element, key, artifact_digest)
+
+            base_files = None
+            for directory in self._pulled_directories(artifact, pull_buildtrees):
+                if self._chunk_threshold is None:
+                    await self.cas.fetch_directory_async(remote, directory)
+                else:
+                    if base_files is None:
+                        base_files = await to_thread(self._previous_large_files, element, key)
+                    await to_thread(self._fetch_directory_chunked, remote, directory, index_remotes, base_files)
+
+            await self.cas.fetch_blobs_async(remote, self._artifact_blobs(artifact))
         except BlobNotFound:
             return False
         except CASRemoteError as e:
@@ -456,6 +590,356 @@ class ArtifactCache(AssetCache):
 
         return True
 
+    # _store_artifact_proto():
+    #
+    # Parse a fetched artifact proto and write it to the local artifact cache.
+    #
+    # Args:
+    #    element (Element): element to pull
+    #    key (str): The specific key for the artifact to pull
+    #    artifact_digest (Digest): The digest of the fetched artifact proto
+    #
+    # Returns:
+    #    (Artifact): The artifact proto
+    #
+    def _store_artifact_proto(self, element, key, artifact_digest):
+        artifact_name = element.get_artifact_name(key=key)
+
+        artifact = artifact_pb2.Artifact()
+        with self.cas.open(artifact_digest, "rb") as f:
+            artifact.ParseFromString(f.read())
+
+        artifact_path = os.path.join(self._basedir, artifact_name)
+        os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+        with utils.save_file_atomic(artifact_path, mode="wb") as f:
+            f.write(artifact.SerializeToString())
+
+        return artifact
+
+    # _pulled_directories():
+    #
+    # Args:
+    #    artifact (Artifact): The artifact proto
+    #    pull_buildtrees (bool): whether to pull buildtrees or not
+    #
+    # Returns:
+    #    (list): The Digests of the directories to pull for the artifact
+    #
+    def _pulled_directories(self, artifact, pull_buildtrees):
+        directories = []
+        if artifact.HasField("files"):
+            directories.append(artifact.files)
+
+        if pull_buildtrees:
+            if artifact.HasField("buildtree"):
+                directories.append(artifact.buildtree)
+            if artifact.HasField("sources"):
+                directories.append(artifact.sources)
+            if artifact.HasField("buildroot"):
+                directories.append(artifact.buildroot)
+            if artifact.HasField("buildsandbox"):
+                directories.extend(artifact.buildsandbox.subsandbox_digests)
+
+        return directories
+
+    # _file_blobs()
+    #
+    # Args:
+    #    directory (Digest): The digest of a directory in the local cache
+    #
+    # Yields:
+    #    (Digest): The digests of all files in the directory tree
+    #
+    def _file_blobs(self, directory):
+        for _, digest in self._file_paths(directory):
+            yield digest
+
+    # _file_paths()
+    #
+    # Args:
+    #    directory (Digest): The digest of a directory in the local cache
+    #
+    # Yields:
+    #    (str): The paths of all files in the directory tree, relative to the directory
+    #    (Digest): The digests of the files
+    #
+    def _file_paths(self, directory):
+        directories = [("", directory)]
+        while directories:
+            dirpath, digest = directories.pop()
+            directory_proto = remote_execution_pb2.Directory()
+            with self.cas.open(digest, "rb") as f:
+                directory_proto.ParseFromString(f.read())
+
+            for filenode in directory_proto.files:
+                yield os.path.join(dirpath, filenode.name), filenode.digest
+            directories.extend(
+                (os.path.join(dirpath, dirnode.name), dirnode.digest) for dirnode in directory_proto.directories
+            )
+
+    # _send_directory_chunked()
+    #
+    # Upload a directory, sending large file blobs in chunks. Only the
+    # chunks which are missing on the remote are sent.
+    #
+    # Args:
+    #    remote (CASRemote): The remote to push the blobs to
+    #    directory (Digest): The digest of the directory
+    #    manifests (dict): The chunk manifests of the large file blobs which were pushed
+    #                      in chunks, to add the file Digest and manifest Digest to by file hash
+    #    index_remotes (list): The index remotes to look up chunk manifests in
+    #
+    def _send_directory_chunked(self, remote, directory, manifests, index_remotes):
+        large_blobs = {
+            digest.hash: digest for digest in self._file_blobs(directory) if digest.size_bytes >= self._chunk_threshold
+        }
+
+        for digest in large_blobs.values():
+            manifests[digest.hash] = (digest, self._send_blob_chunked(remote, digest, index_remotes))
+
+        blobs = [
+            digest for digest in self.cas.required_blobs_for_directory(directory) if digest.hash not in large_blobs
+        ]
+        self.cas.send_blobs(remote, blobs)
+
+    # _send_blob_chunked()
+    #
+    # Upload a file blob in chunks. If the blob was pushed in chunks
+    # before, and its chunks are still present on the remote, the blob
+    # is not split again.
+    #
+    # Whether the remote has the whole blob can not be determined, as
+    # buildbox-casd reports blobs which are present locally as present
+    # on the remote.
+    #
+    # Args:
+    #    remote (CASRemote): The remote to push the chunks to
+    #    digest (Digest): The digest of the file blob
+    #    index_remotes (list): The index remotes to look up the chunk manifest in
+    #
+    # Returns:
+    #    (Digest): The digest of the chunk manifest
+    #
+    def _send_blob_chunked(self, remote, digest, index_remotes):
+        manifest_digest = self._lookup_chunk_manifest(remote, digest, index_remotes)
+        if manifest_digest is not None:
+            blobs = list(self.cas.required_blobs_for_directory(manifest_digest))
+            if not self.cas.missing_blobs(blobs, remote=remote):
+                # Upload the blobs which are present locally, in case the remote lacks them
+                self.cas.send_blobs(remote, blobs)
+                return manifest_digest
+
+        chunks = self._blob_chunks(digest)
+        manifest_digest = self.cas.add_object(buffer=self.cas.chunk_manifest(chunks).SerializeToString())
+        self.cas.send_blob_chunks(remote, digest, chunks)
+        self.cas.send_blobs(remote, [manifest_digest])
+        return manifest_digest
+
+    # _push_chunk_manifests()
+    #
+    # Associate large file blobs with their chunk manifests in an index remote.
+    #
+    # Args:
+    #    remote (AssetRemote): The remote to push to
+    #    manifests (dict): The chunk manifests of the large file blobs which were pushed in chunks
+    #
+    def _push_chunk_manifests(self, remote, manifests):
+        for digest, manifest_digest in manifests.values():
+            uri = REMOTE_ASSET_CHUNKED_BLOB_URN_TEMPLATE.format(digest.hash, digest.size_bytes)
+            remote.push_directory([uri], manifest_digest)
+
+    # _lookup_chunk_manifest()
+    #
+    # Look up the chunk manifest of a file blob which was pushed in chunks,
+    # and fetch the manifest from the storage remote.
+    #
+    # Args:
+    #    remote (CASRemote): The storage remote to fetch the manifest from
+    #    digest (Digest): The digest of the file blob
+    #    index_remotes (list): The index remotes to look up the chunk manifest in
+    #
+    # Returns:
+    #    (Digest): The digest of the manifest, or None if the blob was not pushed in chunks
+    #
+    def _lookup_chunk_manifest(self, remote, digest, index_remotes):
+        uri = REMOTE_ASSET_CHUNKED_BLOB_URN_TEMPLATE.format(digest.hash, digest.size_bytes)
+
+        for index_remote in index_remotes:
+            index_remote.init()
+            try:
+                response = index_remote.fetch_directory([uri])
+            except AssetCacheError:
+                continue
+
+            if response:
+                try:
+                    self.cas.fetch_directory(remote, response.root_directory_digest, fetch_file_blobs=False)
+                except BlobNotFound:
+                    return None
+
+                return response.root_directory_digest
+
+        return None
+
+    # _previous_large_files()
+    #
+    # Find the large file blobs of the most recently used other artifact
+    # of an element which are available locally, as these usually share
+    # most of their chunks with the large file blobs at the same paths of
+    # a new artifact of the element.
+    #
+    # Args:
+    #    element (Element): The element
+    #    key (str): The cache key of the new artifact
+    #
+    # Returns:
+    #    (dict): The Digests of the large file blobs of the artifact, by path
+    #
+    def _previous_large_files(self, element, key):
+        artifact_name = element.get_artifact_name(key=key)
+
+        for ref in reversed(self.list_artifacts(glob=os.path.join(os.path.dirname(artifact_name), "*"))):
+            if ref == artifact_name:
+                continue
+
+            artifact = artifact_pb2.Artifact()
+            try:
+                with open(os.path.join(self._basedir, ref), "rb") as f:
+                    artifact.ParseFromString(f.read())
+
+                if not artifact.HasField("files"):
+                    continue
+
+                files = {
+                    path: digest
+                    for path, digest in self._file_paths(artifact.files)
+                    if digest.size_bytes >= self._chunk_threshold
+                }
+            except FileNotFoundError:
+                continue
+
+            missing_hashes = {digest.hash for digest in self.cas.missing_blobs(files.values())}
+            return {path: digest for path, digest in files.items() if digest.hash not in missing_hashes}
+
+        return {}
+
+    # _fetch_directory_chunked()
+    #
+    # Fetch a directory, fetching large file blobs which are missing
+    # locally in chunks, if they were pushed in chunks. Chunks which are
+    # shared with the large file blobs at the same paths of a previous
+    # artifact are copied from these, only the other chunks are fetched.
+    #
+    # Args:
+    #    remote (CASRemote): The remote to fetch from
+    #    directory (Digest): The digest of the directory
+    #    index_remotes (list): The index remotes to look up chunk manifests in
+    #    base_files (dict): The large file blobs of a previous artifact, see _previous_large_files()
+    #
+    def _fetch_directory_chunked(self, remote, directory, index_remotes, base_files):
+        self.cas.fetch_directory(remote, directory, fetch_file_blobs=False)
+
+        files = list(self._file_paths(directory))
+        missing_blobs = self.cas.missing_blobs([digest for _, digest in files])
+        small_blobs = [digest for digest in missing_blobs if digest.size_bytes < self._chunk_threshold]
+        self.cas.fetch_blobs(remote, small_blobs)
+
+        missing_hashes = {digest.hash for digest in missing_blobs if digest.size_bytes >= self._chunk_threshold}
+        for path, digest in files:
+            if digest.hash not in missing_hashes:
+                continue
+            missing_hashes.remove(digest.hash)
+
+            base_blobs = [base_files[path]] if path in base_files else []
+            if not self._fetch_chunked_blob(remote, digest, index_remotes, base_blobs):
+                self.cas.fetch_blobs(remote, [digest])
+
+    # _fetch_chunked_blob()
+    #
+    # Fetch a file blob in chunks and assemble it.
+    #
+    # Args:
+    #    remote (CASRemote): The remote to fetch the chunks from
+    #    digest (Digest): The digest of the file blob
+    #    index_remotes (list): The index remotes to look up the chunk manifest in
+    #    base_blobs (list): The Digests of local blobs which may share chunks with the blob
+    #
+    # Returns:
+    #    (bool): Whether the blob was fetched, False if it was not pushed in chunks
+    #
+    def _fetch_chunked_blob(self, remote, digest, index_remotes, base_blobs):
+        manifest_digest = self._lookup_chunk_manifest(remote, digest, index_remotes)
+        if manifest_digest is None:
+            return False
+
+        manifest = remote_execution_pb2.Directory()
+        with self.cas.open(manifest_digest, "rb") as f:
+            manifest.ParseFromString(f.read())
+
+        base_blobs = [(base_digest, self._blob_chunks(base_digest)) for base_digest in base_blobs]
+        try:
+            if self.cas.splice_blob(remote, manifest, base_blobs=base_blobs) != digest:
+                return False
+        except BlobNotFound:
+            return False
+
+        # The pulled blob may be the base blob of a later pull
+        self._store_chunk_manifest(digest, manifest)
+        return True
+
+    # _blob_chunks()
+    #
+    # Split a large file blob into chunks, see CASCache.blob_chunks().
+    #
+    # The chunk manifests are kept in the artifact cache directory, such
+    # that the blobs which were pushed or pulled in chunks don't need to be
+    # split again when they are used as the base of a later pull or pushed
+    # to another remote.
+    #
+    # Args:
+    #    digest (Digest): The digest of the file blob, which needs to be available locally
+    #
+    # Returns:
+    #    (list): The chunks of the blob, as returned by CASCache.blob_chunks()
+    #
+    def _blob_chunks(self, digest):
+        manifest = remote_execution_pb2.Directory()
+        try:
+            with open(self._chunk_manifest_path(digest), "rb") as f:
+                manifest.ParseFromString(f.read())
+            return self.cas.manifest_chunks(manifest)
+        except FileNotFoundError:
+            pass
+
+        chunks = self.cas.blob_chunks(digest)
+        self._store_chunk_manifest(digest, self.cas.chunk_manifest(chunks))
+        return chunks
+
+    # _store_chunk_manifest()
+    #
+    # Keep the chunk manifest of a large file blob, see _blob_chunks().
+    #
+    # Args:
+    #    digest (Digest): The digest of the file blob
+    #    manifest (Directory): The manifest of the chunks of the blob
+    #
+    def _store_chunk_manifest(self, digest, manifest):
+        path = self._chunk_manifest_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with utils.save_file_atomic(path, mode="wb") as f:
+            f.write(manifest.SerializeToString())
+
+    # _chunk_manifest_path()
+    #
+    # Args:
+    #    digest (Digest): The digest of a file blob
+    #
+    # Returns:
+    #    (str): The path of the chunk manifest of the blob, see _blob_chunks()
+    #
+    def _chunk_manifest_path(self, digest):
+        return os.path.join(self._chunksdir, digest.hash[:2], "{}_{}".format(digest.hash[2:], digest.size_bytes))
+
     # _query_remote()
     #
     # Args:
@@ -463,13 +947,19 @@ class ArtifactCache(AssetCache):
     #    remote (AssetRemote): The remote we want to check
     #
     # Returns:
-    #    (bool): True if the ref exists in the remote, False otherwise.
+    #    (Digest): The digest of the artifact proto if the ref exists in the remote, otherwise None
     #
     def _query_remote(self, ref, remote):
-        uri = REMOTE_ASSET_ARTIFACT_URN_TEMPLATE.format(ref)
+        return run_synchronously(self._query_remote_async(ref, remote))
 
+    # _query_remote_async()
+    #
+    # Like _query_remote(), but awaits the remote on the asyncio event loop.
+    #
+    async def _query_remote_async(self, ref, remote):
         try:
-            response = remote.fetch_blob([uri])
-            return bool(response)
+            response = await remote.fetch_blob_async(self._lookup_uris(ref))
         except AssetCacheError as e:
             raise ArtifactError("{}".format(e), temporary=True) from e
+
+        return response.blob_digest if response else None
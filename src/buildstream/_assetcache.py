@@ -21,18 +21,21 @@ import grpc
 
 from . import utils
 from ._cas import CASRemote, CASCache, CASDProcessManager
+from ._coroutines import run_synchronously, to_thread
 from ._exceptions import AssetCacheError, RemoteError
 from ._remotespec import RemoteSpec, RemoteType
 from ._remote import BaseRemote
+from ._remotemisscache import RemoteMissCache
 from ._protos.build.bazel.remote.asset.v1 import remote_asset_pb2
 from ._protos.build.buildgrid import local_cas_pb2
 from ._protos.google.rpc import code_pb2
 
 
 class AssetRemote(BaseRemote):
-    def __init__(self, spec, casd):
+    def __init__(self, spec, casd, *, miss_cache=None):
         super().__init__(spec)
         self.casd = casd
+        self.miss_cache = miss_cache
         self.instance_name = None
         self.fetch_service = None
         self.push_service = None
@@ -113,6 +116,20 @@ class AssetRemote(BaseRemote):
     #     AssetCacheError: If the upstream has a problem
     #
     def fetch_blob(self, uris, *, qualifiers=None):
+        return run_synchronously(self.fetch_blob_async(uris, qualifiers=qualifiers))
+
+    # fetch_blob_async():
+    #
+    # Like fetch_blob(), but awaits the request on the asyncio event loop
+    # using the grpc.aio channel to buildbox-casd.
+    #
+    # The remote miss cache is a database on disk, it is accessed
+    # in a thread to not block the event loop.
+    #
+    async def fetch_blob_async(self, uris, *, qualifiers=None):
+        if await to_thread(self._recently_missing, uris):
+            return None
+
         request = remote_asset_pb2.FetchBlobRequest()
         if self.instance_name:
             request.instance_name = self.instance_name
@@ -121,14 +138,16 @@ class AssetRemote(BaseRemote):
             request.qualifiers.extend(qualifiers)
 
         try:
-            response = self.fetch_service.FetchBlob(request)
+            response = await self.casd.get_async_asset_fetch().FetchBlob(request)
         except grpc.RpcError as e:
             if e.code() == grpc.StatusCode.NOT_FOUND:
+                await to_thread(self._record_missing, uris)
                 return None
 
             raise AssetCacheError("FetchBlob failed with status {}: {}".format(e.code().name, e.details())) from e
 
         if response.status.code == code_pb2.NOT_FOUND:
+            await to_thread(self._record_missing, uris)
             return None
 
         if response.status.code != code_pb2.OK:
@@ -154,6 +173,9 @@ class AssetRemote(BaseRemote):
     #     AssetCacheError: If the upstream has a problem
     #
     def fetch_directory(self, uris, *, qualifiers=None):
+        if self._recently_missing(uris):
+            return None
+
         request = remote_asset_pb2.FetchDirectoryRequest()
         if self.instance_name:
             request.instance_name = self.instance_name
@@ -165,11 +187,13 @@ class AssetRemote(BaseRemote):
             response = self.fetch_service.FetchDirectory(request)
         except grpc.RpcError as e:
             if e.code() == grpc.StatusCode.NOT_FOUND:
+                self._record_missing(uris)
                 return None
 
             raise AssetCacheError("FetchDirectory failed with status {}: {}".format(e.code().name, e.details())) from e
 
         if response.status.code == code_pb2.NOT_FOUND:
+            self._record_missing(uris)
             return None
 
         if response.status.code != code_pb2.OK:
@@ -195,6 +219,24 @@ class AssetRemote(BaseRemote):
     #     AssetCacheError: If the upstream has a problem
     #
     def push_blob(self, uris, blob_digest, *, qualifiers=None, references_blobs=None, references_directories=None):
+        run_synchronously(
+            self.push_blob_async(
+                uris,
+                blob_digest,
+                qualifiers=qualifiers,
+                references_blobs=references_blobs,
+                references_directories=references_directories,
+            )
+        )
+
+    # push_blob_async():
+    #
+    # Like push_blob(), but awaits the request on the asyncio event loop
+    # using the grpc.aio channel to buildbox-casd, see fetch_blob_async().
+    #
+    async def push_blob_async(
+        self, uris, blob_digest, *, qualifiers=None, references_blobs=None, references_directories=None
+    ):
         request = remote_asset_pb2.PushBlobRequest()
         if self.instance_name:
             request.instance_name = self.instance_name
@@ -208,10 +250,12 @@ class AssetRemote(BaseRemote):
             request.references_directories.extend(references_directories)
 
         try:
-            self.push_service.PushBlob(request)
+            await self.casd.get_async_asset_push().PushBlob(request)
         except grpc.RpcError as e:
             raise AssetCacheError("PushBlob failed with status {}: {}".format(e.code().name, e.details())) from e
 
+        await to_thread(self._forget_missing, uris)
+
     # push_directory():
     #
     # Associate a CAS Directory digest to URIs.
@@ -249,6 +293,24 @@ class AssetRemote(BaseRemote):
         except grpc.RpcError as e:
             raise AssetCacheError("PushDirectory failed with status {}: {}".format(e.code().name, e.details())) from e
 
+        self._forget_missing(uris)
+
+    ################################################
+    #             Local Private Methods            #
+    ################################################
+
+    # Misses are remembered across sessions in the remote miss cache, if enabled
+    def _recently_missing(self, uris):
+        return self.miss_cache is not None and self.miss_cache.is_missing(self.spec, uris)
+
+    def _record_missing(self, uris):
+        if self.miss_cache is not None:
+            self.miss_cache.add(self.spec, uris)
+
+    def _forget_missing(self, uris):
+        if self.miss_cache is not None:
+            self.miss_cache.discard(self.spec, uris)
+
 
 # RemotePair()
 #
@@ -264,14 +326,14 @@ class AssetRemote(BaseRemote):
 # to establish a connection to this remote at initialization time.
 #
 class RemotePair:
-    def __init__(self, casd: CASDProcessManager, spec: RemoteSpec):
+    def __init__(self, casd: CASDProcessManager, spec: RemoteSpec, miss_cache: Optional[RemoteMissCache] = None):
         self.index: Optional[AssetRemote] = None
         self.storage: Optional[CASRemote] = None
         self.error: Optional[str] = None
 
         try:
             if spec.remote_type in [RemoteType.INDEX, RemoteType.ALL]:
-                index = AssetRemote(spec, casd)
+                index = AssetRemote(spec, casd, miss_cache=miss_cache)
                 index.check()
                 self.index = index
             if spec.remote_type in [RemoteType.STORAGE, RemoteType.ALL]:
@@ -322,7 +384,7 @@ class AssetCache:
             if spec in self._remotes:
                 continue
 
-            remote = RemotePair(casd, spec)
+            remote = RemotePair(casd, spec, self.context.remote_miss_cache)
             if remote.error:
                 self.context.messenger.warn("Failed to initialize remote {}: {}".format(spec.url, remote.error))
 
@@ -0,0 +1,238 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import hashlib
+import os
+
+from . import utils
+from ._protos.buildstream.v2 import buildroot_pb2
+from .utils import FileListResult
+
+# The number of staged artifacts before the first stored build root,
+# the interval doubles with every further build root
+BUILDROOT_CHECKPOINT_INTERVAL = 8
+
+# The maximum number of build root records, the least recently used
+# records are removed when it is exceeded
+BUILDROOT_MAX_RECORDS = 1024
+
+
+# BuildRootCache()
+#
+# Stores the merged trees resulting from staging sequences of
+# dependency artifacts, so that elements which share the same
+# (or a prefix of the same) dependency staging sequence can start
+# from the cached tree instead of merging every artifact again.
+#
+# Every record is keyed by a chain of keys, see BuildRootCache.chain_key(),
+# and records the digest of the staged root directory as well as the
+# results of staging the artifacts since the previous record in the chain.
+#
+# The trees are only referenced by the records, they are expired from
+# the CAS like any other content, in which case the record is removed.
+#
+# Args:
+#    context (Context): The BuildStream context
+#
+class BuildRootCache:
+    def __init__(self, context):
+        self._cas = context.get_cascache()
+
+        self._basedir = os.path.join(context.cachedir, "buildroots")
+        os.makedirs(self._basedir, exist_ok=True)
+
+        self._n_records = len(os.listdir(self._basedir))
+
+    # initial_key():
+    #
+    # Args:
+    #    digest (Digest): The digest of the directory staging starts from
+    #
+    # Returns:
+    #    (str): The first key of a staging chain
+    #
+    @staticmethod
+    def initial_key(digest):
+        return hashlib.sha256("{}/{}".format(digest.hash, digest.size_bytes).encode()).hexdigest()
+
+    # chain_key():
+    #
+    # Compute the key of a staging sequence extended by one artifact.
+    #
+    # Args:
+    #    key (str): The key of the staging sequence so far
+    #    artifact_key (str): The strong cache key of the staged artifact
+    #    files_digest (Digest): The digest of the staged artifact's files
+    #    include (list): The domains to include files from
+    #    exclude (list): The domains to exclude files from
+    #    orphans (bool): Whether files not spoken for by split domains are staged
+    #
+    # Returns:
+    #    (str): The key of the extended staging sequence
+    #
+    @staticmethod
+    def chain_key(key, artifact_key, files_digest, include, exclude, orphans):
+        components = [
+            key,
+            artifact_key,
+            files_digest.hash,
+            str(files_digest.size_bytes),
+            ",".join(include or []),
+            ",".join(exclude or []),
+            str(bool(orphans)),
+        ]
+        return hashlib.sha256("\0".join(components).encode()).hexdigest()
+
+    # checkpoints():
+    #
+    # The build roots of a staging sequence are stored after the last
+    # artifact, and after staging BUILDROOT_CHECKPOINT_INTERVAL artifacts
+    # times a power of two, such that the cost of digesting the staged
+    # tree for intermediate build roots grows only logarithmically with
+    # the length of the sequence.
+    #
+    # Args:
+    #    length (int): The number of artifacts in the staging sequence
+    #
+    # Returns:
+    #    (list): The sorted indices of the artifacts after which build roots are stored
+    #
+    @staticmethod
+    def checkpoints(length):
+        checkpoints = []
+        staged = BUILDROOT_CHECKPOINT_INTERVAL
+        while staged < length:
+            checkpoints.append(staged - 1)
+            staged *= 2
+
+        if length:
+            checkpoints.append(length - 1)
+
+        return checkpoints
+
+    # lookup():
+    #
+    # Look up a build root record. The recorded tree is not checked
+    # to be present, see contains().
+    #
+    # Args:
+    #    key (str): The key of the staging sequence
+    #
+    # Returns:
+    #    (Digest): The digest of the staged root, or None
+    #    (list): The FileListResults of the artifacts staged since the
+    #            previous record in the chain, or None
+    #
+    def lookup(self, key):
+        path = os.path.join(self._basedir, key)
+
+        buildroot = buildroot_pb2.BuildRoot()
+        try:
+            with open(path, "rb") as f:
+                buildroot.ParseFromString(f.read())
+        except FileNotFoundError:
+            return None, None
+
+        # Mark the record as recently used
+        os.utime(path)
+
+        results = []
+        for stage_result in buildroot.results:
+            result = FileListResult()
+            result.overwritten = list(stage_result.overwritten)
+            result.ignored = list(stage_result.ignored)
+            result.files_written = list(stage_result.files_written)
+            results.append(result)
+
+        return buildroot.root, results
+
+    # contains():
+    #
+    # Check that the tree of a build root record is still fully present
+    # in the local CAS, removing the record if it has been expired.
+    #
+    # Args:
+    #    key (str): The key of the staging sequence
+    #    root (Digest): The digest of the staged root
+    #
+    # Returns:
+    #    (bool): Whether the tree is present
+    #
+    def contains(self, key, root):
+        if self._cas.contains_directory(root):
+            return True
+
+        self._remove(key)
+        return False
+
+    # store():
+    #
+    # Store a build root record.
+    #
+    # Args:
+    #    key (str): The key of the staging sequence
+    #    root (Digest): The digest of the staged root
+    #    results (list): The FileListResults of the artifacts staged since
+    #                    the previous record in the chain
+    #
+    def store(self, key, root, results):
+        buildroot = buildroot_pb2.BuildRoot()
+        buildroot.root.CopyFrom(root)
+        for result in results:
+            stage_result = buildroot.results.add()
+            stage_result.overwritten.extend(result.overwritten)
+            stage_result.ignored.extend(result.ignored)
+            stage_result.files_written.extend(result.files_written)
+
+        path = os.path.join(self._basedir, key)
+        if not os.path.exists(path):
+            self._n_records += 1
+
+        with utils.save_file_atomic(path, "wb") as f:
+            f.write(buildroot.SerializeToString())
+
+        if self._n_records > BUILDROOT_MAX_RECORDS:
+            self._evict()
+
+    # _remove():
+    #
+    # Remove a build root record.
+    #
+    # Args:
+    #    key (str): The key of the staging sequence
+    #
+    def _remove(self, key):
+        try:
+            os.unlink(os.path.join(self._basedir, key))
+            self._n_records -= 1
+        except FileNotFoundError:
+            pass
+
+    # _evict():
+    #
+    # Remove the least recently used records, down to three quarters
+    # of BUILDROOT_MAX_RECORDS so that this is not done for every record.
+    #
+    def _evict(self):
+        records = []
+        with os.scandir(self._basedir) as entries:
+            for entry in entries:
+                try:
+                    records.append((entry.stat().st_mtime, entry.name))
+                except FileNotFoundError:
+                    pass
+
+        records.sort()
+        self._n_records = len(records)
+        for _, key in records[: len(records) - BUILDROOT_MAX_RECORDS * 3 // 4]:
+            self._remove(key)
@@ -15,11 +15,13 @@
 #        Jürg Billeter <juerg.billeter@codethink.co.uk>
 
 import itertools
+import mmap
 import os
+import shutil
 import stat
 import contextlib
 import time
-from typing import Optional, List
+from typing import Dict, Optional, List, Set
 import threading
 
 import grpc
@@ -29,10 +31,12 @@ from .._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
 from .._protos.build.buildgrid import local_cas_pb2
 
 from .. import utils
+from .._coroutines import run_synchronously, to_thread
 from ..types import FastEnum, SourceRef
 from .._exceptions import CASCacheError
 
 from .casremote import CASRemote, _CASBatchRead, _CASBatchUpdate, BlobNotFound
+from .chunking import chunk_boundaries
 
 _BUFFER_SIZE = 65536
 
@@ -40,6 +44,10 @@ _BUFFER_SIZE = 65536
 # Refresh interval for disk usage of local cache in seconds
 _CACHE_USAGE_REFRESH = 5
 
+# How many chunks of a blob to hold in the local cache at once
+# when transferring a blob in chunks
+_CHUNK_BATCH_SIZE = 64
+
 
 class CASLogLevel(FastEnum):
     WARNING = "warning"
@@ -74,6 +82,10 @@ class CASCache:
         self._default_remote = CASRemote(None, casd)
         self._default_remote.init()
 
+        # Sets of the hashes of Directory objects whose entire tree is known
+        # to be present on a remote, keyed by the remote's casd instance name
+        self._remote_directories = {}  # type: Dict[str, Set[str]]
+
     # preflight():
     #
     # Preflight check.
@@ -104,7 +116,7 @@ class CASCache:
     # Returns: True if the files are in the cache, False otherwise
     #
     def contains_files(self, digests):
-        return len(self.missing_blobs(digests)) == 0
+        return run_synchronously(self.contains_files_async(digests))
 
     # contains_directory():
     #
@@ -117,7 +129,22 @@ class CASCache:
     # Returns: True if the directory is available in the local cache
     #
     def contains_directory(self, digest):
-        local_cas = self._casd.get_local_cas()
+        return run_synchronously(self.contains_directory_async(digest))
+
+    # contains_files_async():
+    #
+    # Like contains_files(), but awaits buildbox-casd on the asyncio event loop.
+    #
+    async def contains_files_async(self, digests):
+        missing = await self.missing_blobs_async(digests)
+        return len(missing) == 0
+
+    # contains_directory_async():
+    #
+    # Like contains_directory(), but awaits buildbox-casd on the asyncio event loop.
+    #
+    async def contains_directory_async(self, digest):
+        local_cas = self._casd.get_async_local_cas()
 
         # Without a remote cache, `FetchTree` simply checks the local cache.
         request = local_cas_pb2.FetchTreeRequest()
@@ -127,12 +154,7 @@ class CASCache:
         request.fetch_file_blobs = not self._remote_cache
 
         try:
-            response_future = local_cas.FetchTree.future(request)
-            try:
-                response_future.result()
-            except:
-                response_future.cancel()
-                raise
+            await local_cas.FetchTree(request)
 
             if not self._remote_cache:
                 return True
@@ -147,12 +169,7 @@ class CASCache:
         request = local_cas_pb2.UploadTreeRequest()
         request.root_digest.CopyFrom(digest)
         try:
-            response_future = local_cas.UploadTree.future(request)
-            try:
-                response_future.result()
-            except:
-                response_future.cancel()
-                raise
+            await local_cas.UploadTree(request)
 
             return True
         except grpc.RpcError as e:
@@ -160,7 +177,8 @@ class CASCache:
                 return False
             if e.code() == grpc.StatusCode.UNIMPLEMENTED:
                 # Fallback path if buildbox-casd is too old to support UploadTree
-                missing_blobs = self.missing_blobs_for_directory(digest, remote=self._default_remote)
+                required_blobs = await self._required_blobs_async(digest)
+                missing_blobs = await self.missing_blobs_async(required_blobs, remote=self._default_remote)
                 return not missing_blobs
             raise
 
@@ -235,20 +253,30 @@ class CASCache:
     # Args:
     #     tree (Digest): The digest of the tree
     #
+    # Raises:
+    #     CASCacheError: If the blobs could not be fetched
+    #
     def ensure_tree(self, tree):
+        run_synchronously(self.ensure_tree_async(tree))
+
+    # ensure_tree_async():
+    #
+    # Like ensure_tree(), but awaits buildbox-casd on the asyncio event loop.
+    #
+    async def ensure_tree_async(self, tree):
         if self._remote_cache:
-            local_cas = self._casd.get_local_cas()
+            local_cas = self._casd.get_async_local_cas()
 
             request = local_cas_pb2.FetchTreeRequest()
             request.root_digest.CopyFrom(tree)
             request.fetch_file_blobs = True
 
-            response_future = local_cas.FetchTree.future(request)
             try:
-                response_future.result()
-            except:
-                response_future.cancel()
-                raise
+                await local_cas.FetchTree(request)
+            except grpc.RpcError as e:
+                raise CASCacheError(
+                    "Failed to fetch directory tree {}: {}: {}".format(tree.hash, e.code().name, e.details())
+                ) from e
 
     # fetch_directory():
     #
@@ -259,9 +287,17 @@ class CASCache:
     # Args:
     #     remote (Remote): The remote to use.
     #     dir_digest (Digest): Digest object for the directory to fetch.
+    #     fetch_file_blobs (bool): Whether to fetch the file blobs, or only the directory objects
     #
-    def fetch_directory(self, remote, dir_digest):
-        local_cas = self._casd.get_local_cas()
+    def fetch_directory(self, remote, dir_digest, *, fetch_file_blobs=True):
+        run_synchronously(self.fetch_directory_async(remote, dir_digest, fetch_file_blobs=fetch_file_blobs))
+
+    # fetch_directory_async():
+    #
+    # Like fetch_directory(), but awaits buildbox-casd on the asyncio event loop.
+    #
+    async def fetch_directory_async(self, remote, dir_digest, *, fetch_file_blobs=True):
+        local_cas = self._casd.get_async_local_cas()
 
         request = local_cas_pb2.FetchTreeRequest()
         request.instance_name = remote.local_cas_instance_name
@@ -269,13 +305,7 @@ class CASCache:
         request.fetch_file_blobs = False
 
         try:
-            response_future = local_cas.FetchTree.future(request)
-            try:
-                response_future.result()
-            except:
-                response_future.cancel()
-                raise
-
+            await local_cas.FetchTree(request)
         except grpc.RpcError as e:
             if e.code() == grpc.StatusCode.NOT_FOUND:
                 raise BlobNotFound(
@@ -286,8 +316,9 @@ class CASCache:
                 "Failed to fetch directory tree {}: {}: {}".format(dir_digest.hash, e.code().name, e.details())
             ) from e
 
-        required_blobs = self.required_blobs_for_directory(dir_digest)
-        self.fetch_blobs(remote, required_blobs)
+        if fetch_file_blobs:
+            required_blobs = await self._required_blobs_async(dir_digest)
+            await self.fetch_blobs_async(remote, required_blobs)
 
     # pull_tree():
     #
@@ -427,6 +458,147 @@ class CASCache:
 
         return digests
 
+    # blob_chunks():
+    #
+    # Split a blob into content-defined chunks. Blobs which only differ
+    # slightly share most of their chunks. The chunks are only hashed,
+    # they are not added to the local cache.
+    #
+    # Args:
+    #     digest (Digest): The digest of the blob
+    #
+    # Returns:
+    #     (list): The Digest and offset in the blob of every chunk, in order
+    #
+    def blob_chunks(self, digest):
+        if digest.size_bytes == 0:
+            return []
+
+        with self.open(digest, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return [
+                    (utils._message_digest(buffer[offset : offset + size]), offset)
+                    for offset, size in chunk_boundaries(buffer)
+                ]
+
+    # chunk_manifest():
+    #
+    # Args:
+    #     chunks (list): The chunks of a blob, as returned by blob_chunks()
+    #
+    # Returns:
+    #     (Directory): The manifest of the chunks, with a file for every
+    #                  chunk, named by the index of the chunk
+    #
+    def chunk_manifest(self, chunks):
+        manifest = remote_execution_pb2.Directory()
+        for index, (chunk_digest, _) in enumerate(chunks):
+            filenode = manifest.files.add()
+            filenode.name = "{:08d}".format(index)
+            filenode.digest.CopyFrom(chunk_digest)
+
+        return manifest
+
+    # manifest_chunks():
+    #
+    # Args:
+    #     manifest (Directory): The manifest of the chunks of a blob, see chunk_manifest()
+    #
+    # Returns:
+    #     (list): The chunks, as returned by blob_chunks()
+    #
+    def manifest_chunks(self, manifest):
+        chunks = []
+        offset = 0
+        for filenode in manifest.files:
+            chunks.append((filenode.digest, offset))
+            offset += filenode.digest.size_bytes
+
+        return chunks
+
+    # send_blob_chunks():
+    #
+    # Upload the chunks of a blob which are missing on the remote.
+    #
+    # The missing chunks are added to the local cache to be uploaded by
+    # buildbox-casd, where they are left to expire like other objects.
+    #
+    # Args:
+    #     remote (CASRemote): The remote to upload to
+    #     digest (Digest): The digest of the blob
+    #     chunks (list): The chunks of the blob, as returned by blob_chunks()
+    #
+    def send_blob_chunks(self, remote, digest, chunks):
+        offsets = {chunk_digest.hash: offset for chunk_digest, offset in chunks}
+        chunk_digests = [chunk_digest for chunk_digest, _ in chunks]
+
+        # The chunks which are neither present locally nor on the remote
+        missing_chunks = list(self.missing_blobs(chunk_digests, remote=remote))
+        missing_hashes = {chunk_digest.hash for chunk_digest in missing_chunks}
+
+        with self.open(digest, "rb") as f:
+            for chunk_group in _grouper(iter(missing_chunks), _CHUNK_BATCH_SIZE):
+                chunk_group = list(chunk_group)
+
+                buffers = []
+                for chunk_digest in chunk_group:
+                    f.seek(offsets[chunk_digest.hash])
+                    buffers.append(f.read(chunk_digest.size_bytes))
+                self.add_objects(buffers=buffers)
+
+                self.send_blobs(remote, chunk_group)
+
+        # buildbox-casd reports chunks which are present locally as present
+        # on the remote, upload these in case the remote lacks them
+        self.send_blobs(
+            remote, [chunk_digest for chunk_digest in chunk_digests if chunk_digest.hash not in missing_hashes]
+        )
+
+    # splice_blob():
+    #
+    # Assemble a blob from the chunks in its manifest. Chunks which are
+    # found in the given local blobs are copied from these, only the other
+    # chunks are fetched from the remote.
+    #
+    # The fetched chunks are left in the local cache to expire like other
+    # objects.
+    #
+    # Args:
+    #     remote (CASRemote): The remote to fetch chunks from
+    #     manifest (Directory): The manifest of the chunks, see chunk_manifest()
+    #     base_blobs (list): The Digests of local blobs which may share chunks with
+    #                        the blob, along with their chunks as returned by blob_chunks()
+    #
+    # Returns:
+    #     (Digest): The digest of the assembled blob
+    #
+    def splice_blob(self, remote, manifest, *, base_blobs=()):
+        # The local blob and offset of the chunks found in the base blobs
+        sources = {}
+        for base_digest, base_chunks in base_blobs:
+            for chunk_digest, offset in base_chunks:
+                sources.setdefault(chunk_digest.hash, (base_digest, offset))
+
+        with self._temporary_object() as tmp:
+            for filenode_group in _grouper(iter(manifest.files), _CHUNK_BATCH_SIZE):
+                filenode_group = list(filenode_group)
+                self.fetch_blobs(
+                    remote, [filenode.digest for filenode in filenode_group if filenode.digest.hash not in sources]
+                )
+
+                for filenode in filenode_group:
+                    if filenode.digest.hash in sources:
+                        base_digest, offset = sources[filenode.digest.hash]
+                        with self.open(base_digest, "rb") as base:
+                            base.seek(offset)
+                            tmp.write(base.read(filenode.digest.size_bytes))
+                    else:
+                        with self.open(filenode.digest, "rb") as chunk:
+                            shutil.copyfileobj(chunk, tmp)
+            tmp.flush()
+
+            return self.add_object(path=tmp.name)
+
     # import_directory():
     #
     # Import directory tree into CAS.
@@ -522,16 +694,62 @@ class CASCache:
     #
     # Determine which blobs of a directory tree are missing on the remote.
     #
+    # Subtrees which are known to be present on the remote, see
+    # mark_directory_present(), are not checked again.
+    #
     # Args:
     #     digest (Digest): The directory digest
     #
     # Returns: List of missing Digest objects
     #
     def missing_blobs_for_directory(self, digest, *, remote=None):
-        required_blobs = self.required_blobs_for_directory(digest)
+        present_directories = None
+        if remote:
+            present_directories = self._remote_directories.get(remote.local_cas_instance_name)
+
+        required_blobs = self.required_blobs_for_directory(digest, _present_directories=present_directories)
 
         return self.missing_blobs(required_blobs, remote=remote)
 
+    # mark_directory_present():
+    #
+    # Record that the entire tree of a directory is present on the remote,
+    # after its missing blobs were uploaded, such that it is skipped by
+    # subsequent calls to missing_blobs_for_directory() in this session.
+    #
+    # This is not persisted, as blobs may expire on the remote.
+    #
+    # Args:
+    #     remote (CASRemote): The remote
+    #     digest (Digest): The directory digest
+    #
+    def mark_directory_present(self, remote, digest):
+        present_directories = self._remote_directories.setdefault(remote.local_cas_instance_name, set())
+
+        directories = [digest]
+        while directories:
+            directory_digest = directories.pop()
+            if directory_digest.hash in present_directories:
+                continue
+
+            directory = remote_execution_pb2.Directory()
+            with open(self.objpath(directory_digest), "rb") as f:
+                directory.ParseFromString(f.read())
+
+            directories.extend(dirnode.digest for dirnode in directory.directories)
+            present_directories.add(directory_digest.hash)
+
+    # forget_remote_directories():
+    #
+    # Forget which directories were recorded to be present on the remote
+    # with mark_directory_present(), when the remote reports missing blobs.
+    #
+    # Args:
+    #     remote (CASRemote): The remote
+    #
+    def forget_remote_directories(self, remote):
+        self._remote_directories.pop(remote.local_cas_instance_name, None)
+
     # missing_blobs():
     #
     # Determine which blobs are missing locally or on the remote.
@@ -542,7 +760,14 @@ class CASCache:
     # Returns: List of missing Digest objects
     #
     def missing_blobs(self, blobs, *, remote=None):
-        cas = self._casd.get_cas()
+        return run_synchronously(self.missing_blobs_async(blobs, remote=remote))
+
+    # missing_blobs_async():
+    #
+    # Like missing_blobs(), but awaits buildbox-casd on the asyncio event loop.
+    #
+    async def missing_blobs_async(self, blobs, *, remote=None):
+        cas = self._casd.get_async_cas()
 
         if remote:
             instance_name = remote.local_cas_instance_name
@@ -559,13 +784,7 @@ class CASCache:
                 d.CopyFrom(required_digest)
 
             try:
-                response_future = cas.FindMissingBlobs.future(request)
-                try:
-                    response = response_future.result()
-                except:
-                    response_future.cancel()
-                    raise
-
+                response = await cas.FindMissingBlobs(request)
             except grpc.RpcError as e:
                 if e.code() == grpc.StatusCode.INVALID_ARGUMENT and e.details().startswith("Invalid instance name"):
                     raise CASCacheError("Unsupported buildbox-casd version: FindMissingBlobs failed") from e
@@ -583,10 +802,16 @@ class CASCache:
     # Generator that returns the Digests of all blobs in the tree specified by
     # the Digest of the toplevel Directory object.
     #
-    def required_blobs_for_directory(self, directory_digest, *, excluded_subdirs=None, _fetch_tree=True):
+    def required_blobs_for_directory(
+        self, directory_digest, *, excluded_subdirs=None, _fetch_tree=True, _present_directories=None
+    ):
         if not excluded_subdirs:
             excluded_subdirs = []
 
+        # Skip subtrees which are known to be present on a remote
+        if _present_directories and directory_digest.hash in _present_directories:
+            return
+
         if self._remote_cache and _fetch_tree:
             # Ensure we have the directory protos in the local cache
             local_cas = self._casd.get_local_cas()
@@ -616,7 +841,9 @@ class CASCache:
 
         for dirnode in directory.directories:
             if dirnode.name not in excluded_subdirs:
-                yield from self.required_blobs_for_directory(dirnode.digest, _fetch_tree=False)
+                yield from self.required_blobs_for_directory(
+                    dirnode.digest, _fetch_tree=False, _present_directories=_present_directories
+                )
 
     ################################################
     #             Local Private Methods            #
@@ -634,6 +861,30 @@ class CASCache:
             os.chmod(f.name, stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH)
             yield f
 
+    # _required_blobs_async():
+    #
+    # Like required_blobs_for_directory(), but awaits buildbox-casd on the
+    # asyncio event loop, and reads the Directory protos off the event loop.
+    #
+    # Args:
+    #     directory_digest (Digest): The digest of the directory
+    #
+    # Returns:
+    #     (list): The Digests of all blobs in the tree
+    #
+    async def _required_blobs_async(self, directory_digest):
+        if self._remote_cache:
+            # Ensure we have the directory protos in the local cache
+            local_cas = self._casd.get_async_local_cas()
+
+            request = local_cas_pb2.FetchTreeRequest()
+            request.root_digest.CopyFrom(directory_digest)
+            request.fetch_file_blobs = False
+
+            await local_cas.FetchTree(request)
+
+        return await to_thread(lambda: list(self.required_blobs_for_directory(directory_digest, _fetch_tree=False)))
+
     def _fetch_tree(self, remote, digest):
         self.fetch_blobs(remote, [digest])
 
@@ -665,13 +916,20 @@ class CASCache:
     # Returns: The Digests of the blobs that were not available on the remote CAS
     #
     def fetch_blobs(self, remote, digests, *, allow_partial=False):
+        return run_synchronously(self.fetch_blobs_async(remote, digests, allow_partial=allow_partial))
+
+    # fetch_blobs_async():
+    #
+    # Like fetch_blobs(), but awaits buildbox-casd on the asyncio event loop.
+    #
+    async def fetch_blobs_async(self, remote, digests, *, allow_partial=False):
         if self._remote_cache:
             # Determine blobs missing in the remote cache and only fetch those
-            digests = self.missing_blobs(digests)
+            digests = await self.missing_blobs_async(digests)
 
         missing_blobs = [] if allow_partial else None
 
-        remote.init()
+        await remote.init_async()
 
         batch = _CASBatchRead(remote)
 
@@ -679,7 +937,7 @@ class CASCache:
             if digest.hash:
                 batch.add(digest)
 
-        batch.send(missing_blobs=missing_blobs)
+        await batch.send_async(missing_blobs=missing_blobs)
 
         if self._remote_cache:
             # Upload fetched blobs to the remote cache as we can't transfer
@@ -688,7 +946,7 @@ class CASCache:
             for digest in digests:
                 if missing_blobs is None or digest not in missing_blobs:  # pylint: disable=unsupported-membership-test
                     batch.add(digest)
-            batch.send()
+            await batch.send_async()
 
         return missing_blobs
 
@@ -701,31 +959,41 @@ class CASCache:
     #    digests (list): The Digests of Blobs to upload
     #
     def send_blobs(self, remote, digests):
+        run_synchronously(self.send_blobs_async(remote, digests))
+
+    # send_blobs_async():
+    #
+    # Like send_blobs(), but awaits buildbox-casd on the asyncio event loop.
+    #
+    async def send_blobs_async(self, remote, digests):
         if self._remote_cache:
             # First fetch missing blobs from the remote cache as we can't
             # transfer blobs directly from the remote cache to another remote.
 
-            remote_missing_blobs = self.missing_blobs(digests, remote=remote)
+            remote_missing_blobs = await self.missing_blobs_async(digests, remote=remote)
 
             batch = _CASBatchRead(self._default_remote)
             for digest in remote_missing_blobs:
                 batch.add(digest)
-            batch.send()
+            await batch.send_async()
 
         batch = _CASBatchUpdate(remote)
 
         for digest in digests:
             batch.add(digest)
 
-        batch.send()
+        await batch.send_async()
 
     def _send_directory(self, remote, digest):
-        required_blobs = list(self.required_blobs_for_directory(digest))
+        run_synchronously(self._send_directory_async(remote, digest))
+
+    async def _send_directory_async(self, remote, digest):
+        required_blobs = await self._required_blobs_async(digest)
 
         # Upload any blobs missing on the server.
         # buildbox-casd will call FindMissingBlobs before the actual upload
         # and skip blobs that already exist on the server.
-        self.send_blobs(remote, required_blobs)
+        await self.send_blobs_async(remote, required_blobs)
 
     # get_cache_usage():
     #
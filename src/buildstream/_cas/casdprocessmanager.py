@@ -12,6 +12,7 @@
 #  limitations under the License.
 #
 
+import asyncio
 import contextlib
 import threading
 import os
@@ -36,6 +37,7 @@ from .._protos.google.longrunning import operations_pb2_grpc
 
 from .. import _site
 from .. import utils
+from .._coroutines import completed, is_synchronous
 from .._exceptions import CASCacheError
 
 _CASD_MAX_LOGFILES = 10
@@ -174,6 +176,15 @@ class CASDProcessManager:
         self._ac_service = None
         self._shutdown_requested = False
 
+        # grpc.aio channel and stubs for the scheduler's event loop
+        self._async_channel = None
+        self._async_loop = None
+        self._async_cas = None
+        self._async_local_cas = None
+        self._async_asset_fetch = None
+        self._async_asset_push = None
+        self._async_bytestream = None
+
         self._lock = threading.Lock()
 
     def __buildbox_casd(self):
@@ -340,6 +351,16 @@ class CASDProcessManager:
                 self._casd_channel.close()
                 self._casd_channel = None
 
+            # The grpc.aio channel is closed by the scheduler when its
+            # event loop terminates, just drop the references here.
+            self._async_channel = None
+            self._async_loop = None
+            self._async_cas = None
+            self._async_local_cas = None
+            self._async_asset_fetch = None
+            self._async_asset_push = None
+            self._async_bytestream = None
+
         self._terminate(messenger)
         self.process = None
         shutil.rmtree(self._socket_tempdir)
@@ -428,6 +449,117 @@ class CASDProcessManager:
             self._operations_service = operations_pb2_grpc.OperationsStub(self._casd_channel)
             self._ac_service = remote_execution_pb2_grpc.ActionCacheStub(self._casd_channel)
 
+    # _establish_async_connection()
+    #
+    # Create the grpc.aio channel for the running event loop.
+    #
+    # A grpc.aio channel is bound to the event loop it was created in,
+    # if the running loop has changed since the channel was created
+    # (the scheduler creates a new loop for every session), then a new
+    # channel is created.
+    #
+    def _establish_async_connection(self):
+        loop = asyncio.get_running_loop()
+        if self._async_channel is not None and self._async_loop is loop:
+            return
+
+        # Make sure casd is ready before opening the async channel
+        self._establish_connection()
+
+        self._async_loop = loop
+        self._async_channel = grpc.aio.insecure_channel(self._connection_string)
+        self._async_cas = remote_execution_pb2_grpc.ContentAddressableStorageStub(self._async_channel)
+        self._async_local_cas = local_cas_pb2_grpc.LocalContentAddressableStorageStub(self._async_channel)
+        self._async_asset_fetch = remote_asset_pb2_grpc.FetchStub(self._async_channel)
+        self._async_asset_push = remote_asset_pb2_grpc.PushStub(self._async_channel)
+        self._async_bytestream = bytestream_pb2_grpc.ByteStreamStub(self._async_channel)
+
+    # close_async_channel()
+    #
+    # Close the grpc.aio channel, this must be awaited in the event loop
+    # which the channel was created in before that loop is closed.
+    #
+    async def close_async_channel(self):
+        channel = self._async_channel
+        if channel is None:
+            return
+
+        self._async_channel = None
+        self._async_loop = None
+        self._async_cas = None
+        self._async_local_cas = None
+        self._async_asset_fetch = None
+        self._async_asset_push = None
+        self._async_bytestream = None
+
+        await channel.close()
+
+    # get_async_cas():
+    #
+    # Return grpc.aio ContentAddressableStorage stub for buildbox-casd channel.
+    #
+    # This must be called from within the running event loop, or from a
+    # coroutine driven by run_synchronously(), which gets a stub making
+    # blocking calls on the regular channel instead.
+    #
+    def get_async_cas(self):
+        if is_synchronous():
+            return _BlockingStub(self.get_cas())
+        self._establish_async_connection()
+        return self._async_cas
+
+    # get_async_local_cas():
+    #
+    # Return grpc.aio LocalCAS stub for buildbox-casd channel.
+    #
+    # This must be called from within the running event loop, or from a
+    # coroutine driven by run_synchronously(), which gets a stub making
+    # blocking calls on the regular channel instead.
+    #
+    def get_async_local_cas(self):
+        if is_synchronous():
+            return _BlockingStub(self.get_local_cas())
+        self._establish_async_connection()
+        return self._async_local_cas
+
+    # get_async_asset_fetch():
+    #
+    # Return grpc.aio Remote Asset Fetch stub for buildbox-casd channel.
+    #
+    # This must be called from within the running event loop, or from a
+    # coroutine driven by run_synchronously(), which gets a stub making
+    # blocking calls on the regular channel instead.
+    #
+    def get_async_asset_fetch(self):
+        if is_synchronous():
+            return _BlockingStub(self.get_asset_fetch())
+        self._establish_async_connection()
+        return self._async_asset_fetch
+
+    # get_async_asset_push():
+    #
+    # Return grpc.aio Remote Asset Push stub for buildbox-casd channel.
+    #
+    # This must be called from within the running event loop, or from a
+    # coroutine driven by run_synchronously(), which gets a stub making
+    # blocking calls on the regular channel instead.
+    #
+    def get_async_asset_push(self):
+        if is_synchronous():
+            return _BlockingStub(self.get_asset_push())
+        self._establish_async_connection()
+        return self._async_asset_push
+
+    # get_async_bytestream():
+    #
+    # Return grpc.aio ByteStream stub for buildbox-casd channel.
+    #
+    # This must be called from within the running event loop.
+    #
+    def get_async_bytestream(self):
+        self._establish_async_connection()
+        return self._async_bytestream
+
     # get_cas():
     #
     # Return ContentAddressableStorage stub for buildbox-casd channel.
@@ -495,3 +627,31 @@ class CASDProcessManager:
         if self._casd_channel is None:
             self._establish_connection()
         return self._ac_service
+
+
+# _BlockingStub()
+#
+# A wrapper for a stub of the regular buildbox-casd channel, which is
+# returned by the get_async_*() methods to coroutines driven by
+# run_synchronously(). The unary calls block until the response is
+# received, and return it as an awaitable which completes immediately.
+#
+# Args:
+#    stub: The stub of the regular channel
+#
+class _BlockingStub:
+    def __init__(self, stub):
+        self._stub = stub
+
+    def __getattr__(self, name):
+        method = getattr(self._stub, name)
+
+        def call(request, **kwargs):
+            response_future = method.future(request, **kwargs)
+            try:
+                return completed(response_future.result())
+            except:
+                response_future.cancel()
+                raise
+
+        return call
@@ -12,9 +12,15 @@
 #  limitations under the License.
 #
 
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
 from .._protos.google.rpc import code_pb2
+from .._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
 from .._protos.build.buildgrid import local_cas_pb2
 
+from .._coroutines import run_synchronously
 from .._remote import BaseRemote
 from .._exceptions import CASRemoteError
 
@@ -34,6 +40,46 @@ class BlobNotFound(CASRemoteError):
         super().__init__(msg)
 
 
+# TransferStats
+#
+# Counts the bytes of the blobs which buildbox-casd transferred from and
+# to remotes on behalf of a task, such as a job.
+#
+# buildbox-casd skips blobs which are already present locally when
+# fetching, or on the remote when uploading, and need not report the
+# blobs it transferred. While counting, the blobs which are missing
+# locally are looked up before every fetch, and only the sizes of those
+# which did not fail are counted as downloaded.
+#
+# The blobs which are missing on a remote cannot be looked up through
+# buildbox-casd, which reports blobs present locally as present on the
+# remote, so the sizes of all blobs requested to be uploaded which did
+# not fail are counted instead. Directory trees fetched with FetchTree
+# and Remote Asset requests are not counted.
+#
+class TransferStats:
+    def __init__(self):
+        self.bytes_downloaded = 0
+        self.bytes_upload_requested = 0
+
+    # record()
+    #
+    # Context manager which counts the blob transfers of the current
+    # thread or asyncio task in these stats.
+    #
+    @contextmanager
+    def record(self):
+        token = _transfer_stats.set(self)
+        try:
+            yield
+        finally:
+            _transfer_stats.reset(token)
+
+
+# The stats the blob transfers of the current task are counted in
+_transfer_stats: ContextVar[Optional[TransferStats]] = ContextVar("transfer_stats", default=None)
+
+
 # Represents a single remote CAS cache.
 #
 class CASRemote(BaseRemote):
@@ -83,43 +129,55 @@ class _CASBatchRead:
         request_digest.CopyFrom(digest)
 
     def send(self, *, missing_blobs=None):
+        run_synchronously(self.send_async(missing_blobs=missing_blobs))
+
+    # send_async():
+    #
+    # Like send(), but awaits the requests on the asyncio event loop
+    # using the grpc.aio channel to buildbox-casd.
+    #
+    async def send_async(self, *, missing_blobs=None):
         assert not self._sent
         self._sent = True
 
         if not self._requests:
             return
 
-        local_cas = self._remote.casd.get_local_cas()
+        local_cas = self._remote.casd.get_async_local_cas()
+        stats = _transfer_stats.get()
 
         for request in self._requests:
-            batch_response_future = local_cas.FetchMissingBlobs.future(request)
-
-            try:
-                batch_response = batch_response_future.result()
-            except:
-                batch_response_future.cancel()
-                raise
-
-            for response in batch_response.responses:
-                if response.status.code == code_pb2.NOT_FOUND:
-                    if missing_blobs is None:
-                        raise BlobNotFound(
-                            response.digest.hash,
-                            "Failed to download blob {}: {}".format(response.digest.hash, response.status.code),
-                        )
-
-                    missing_blobs.append(response.digest)
-
-                if response.status.code != code_pb2.OK:
-                    raise CASRemoteError(
-                        "Failed to download blob {}: {}".format(response.digest.hash, response.status.code)
+            if stats:
+                # Blobs which are present locally are not fetched
+                missing = await _find_local_missing_blobs(self._remote, request)
+
+            batch_response = await local_cas.FetchMissingBlobs(request)
+            self._process_response(batch_response, missing_blobs)
+
+            if stats:
+                stats.bytes_downloaded += _transferred_bytes(missing, batch_response)
+
+    def _process_response(self, batch_response, missing_blobs):
+        for response in batch_response.responses:
+            if response.status.code == code_pb2.NOT_FOUND:
+                if missing_blobs is None:
+                    raise BlobNotFound(
+                        response.digest.hash,
+                        "Failed to download blob {}: {}".format(response.digest.hash, response.status.code),
                     )
-                if response.digest.size_bytes != len(response.data):
-                    raise CASRemoteError(
-                        "Failed to download blob {}: expected {} bytes, received {} bytes".format(
-                            response.digest.hash, response.digest.size_bytes, len(response.data)
-                        )
+
+                missing_blobs.append(response.digest)
+
+            if response.status.code != code_pb2.OK:
+                raise CASRemoteError(
+                    "Failed to download blob {}: {}".format(response.digest.hash, response.status.code)
+                )
+            if response.digest.size_bytes != len(response.data):
+                raise CASRemoteError(
+                    "Failed to download blob {}: expected {} bytes, received {} bytes".format(
+                        response.digest.hash, response.digest.size_bytes, len(response.data)
                     )
+                )
 
 
 # Represents a batch of blobs queued for upload.
@@ -143,31 +201,69 @@ class _CASBatchUpdate:
         request_digest.CopyFrom(digest)
 
     def send(self):
+        run_synchronously(self.send_async())
+
+    # send_async():
+    #
+    # Like send(), but awaits the requests on the asyncio event loop
+    # using the grpc.aio channel to buildbox-casd.
+    #
+    async def send_async(self):
         assert not self._sent
         self._sent = True
 
         if not self._requests:
             return
 
-        local_cas = self._remote.casd.get_local_cas()
+        local_cas = self._remote.casd.get_async_local_cas()
+        stats = _transfer_stats.get()
 
         for request in self._requests:
-            batch_response_future = local_cas.UploadMissingBlobs.future(request)
-
-            try:
-                batch_response = batch_response_future.result()
-            except:
-                batch_response_future.cancel()
-                raise
-
-            for response in batch_response.responses:
-                if response.status.code != code_pb2.OK:
-                    if response.status.code == code_pb2.RESOURCE_EXHAUSTED:
-                        reason = "cache-too-full"
-                    else:
-                        reason = None
-
-                    raise CASRemoteError(
-                        "Failed to upload blob {}: {}".format(response.digest.hash, response.status.code),
-                        reason=reason,
-                    )
+            batch_response = await local_cas.UploadMissingBlobs(request)
+            self._process_response(batch_response)
+
+            if stats:
+                stats.bytes_upload_requested += _transferred_bytes(request.blob_digests, batch_response)
+
+    def _process_response(self, batch_response):
+        for response in batch_response.responses:
+            if response.status.code != code_pb2.OK:
+                if response.status.code == code_pb2.RESOURCE_EXHAUSTED:
+                    reason = "cache-too-full"
+                else:
+                    reason = None
+
+                raise CASRemoteError(
+                    "Failed to upload blob {}: {}".format(response.digest.hash, response.status.code),
+                    reason=reason,
+                )
+
+
+# _find_local_missing_blobs():
+#
+# Args:
+#    remote (CASRemote): The remote to fetch from
+#    request (Message): A FetchMissingBlobs request
+#
+# Returns:
+#    (list): The Digests of the requested blobs which are missing locally
+#
+async def _find_local_missing_blobs(remote, request):
+    cas = remote.casd.get_async_cas()
+    find_request = remote_execution_pb2.FindMissingBlobsRequest(blob_digests=request.blob_digests)
+    response = await cas.FindMissingBlobs(find_request)
+    return response.missing_blob_digests
+
+
+# _transferred_bytes():
+#
+# Args:
+#    digests (list): The Digests of the blobs to count
+#    batch_response (Message): The response, which lists at least the failed blobs
+#
+# Returns:
+#    (int): The total size of the given blobs which did not fail
+#
+def _transferred_bytes(digests, batch_response):
+    failed = {response.digest.hash for response in batch_response.responses if response.status.code != code_pb2.OK}
+    return sum(digest.size_bytes for digest in digests if digest.hash not in failed)
@@ -14,29 +14,69 @@
 #  Authors:
 #        Jürg Billeter <juerg.billeter@codethink.co.uk>
 
-from concurrent import futures
-from enum import Enum
+import asyncio
+import bisect
+import collections
 import contextlib
 import logging
 import os
 import sys
+import threading
+import time
+import zlib
+from enum import Enum
 
 import grpc
 import click
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 from .._protos.build.bazel.remote.asset.v1 import remote_asset_pb2_grpc
 from .. import _signals
 from .._protos.build.bazel.remote.execution.v2 import (
     remote_execution_pb2,
     remote_execution_pb2_grpc,
 )
-from .._protos.google.bytestream import bytestream_pb2_grpc
+from .._protos.google.bytestream import bytestream_pb2, bytestream_pb2_grpc
+from .._protos.google.rpc import code_pb2
 from .casdprocessmanager import CASDProcessManager
 
+# Disable pylint warnings for whole file here, the servicers implement
+# the generated grpc servicer methods as grpc.aio coroutines:
+# pylint: disable=invalid-overridden-method
+
 # The default limit for gRPC messages is 4 MiB.
 # Limit payload to 1 MiB to leave sufficient headroom for metadata.
 _MAX_PAYLOAD_BYTES = 1024 * 1024
 
+# The maximum number of directories in a single GetTree response.
+_MAX_TREE_PAGE_SIZE = 1000
+
+# The maximum number of digests in the presence index of the server.
+_MAX_PRESENCE_INDEX_ENTRIES = 1024 * 1024
+
+# The amount of zstd compressed data to decompress at once. Zstandard
+# decompressors can't limit their output, and a compressed byte expands
+# to at most 32 KiB, which limits the output of a single step to 32 MiB.
+_ZSTD_INPUT_SLICE_BYTES = 1024
+
+
+# Raised when compressed data expands to more than the size of its blob
+class _DecompressionLimitError(Exception):
+    pass
+
+
+# The blob compressors supported by the server, in order of preference.
+# Zstandard is only supported if the optional zstandard module is installed.
+_COMPRESSORS = [remote_execution_pb2.Compressor.DEFLATE]
+_DECOMPRESSION_ERRORS = (zlib.error, _DecompressionLimitError)
+if zstandard is not None:
+    _COMPRESSORS.insert(0, remote_execution_pb2.Compressor.ZSTD)
+    _DECOMPRESSION_ERRORS += (zstandard.ZstdError,)
+
 
 # LogLevel():
 #
@@ -72,47 +112,346 @@ class LogLevel(click.Choice):
         return equivalents[level]
 
 
+# ServerMetrics():
+#
+# Per-method request metrics of the artifact server.
+#
+# For every RPC method, this records the number of requests and failed
+# requests, the bytes received and sent and a latency histogram.
+# The metrics can be rendered in the Prometheus text exposition format.
+#
+class ServerMetrics:
+
+    # Upper bounds of the latency histogram buckets, in seconds
+    LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods = {}
+        self._counters = {}
+
+    # measure():
+    #
+    # Context manager measuring a single request
+    #
+    # The yielded _RequestMeasurement is used to account
+    # the bytes received and sent by the request.
+    #
+    # Args:
+    #    method (str): The name of the RPC method
+    #
+    @contextlib.contextmanager
+    def measure(self, method):
+        measurement = _RequestMeasurement()
+        start = time.monotonic()
+        failed = True
+        try:
+            yield measurement
+            failed = False
+        finally:
+            self.observe(
+                method,
+                time.monotonic() - start,
+                bytes_received=measurement.bytes_received,
+                bytes_sent=measurement.bytes_sent,
+                failed=failed,
+            )
+
+    # observe():
+    #
+    # Record a completed request
+    #
+    # Args:
+    #    method (str): The name of the RPC method
+    #    duration (float): The request latency in seconds
+    #    bytes_received (int): The payload bytes received from the client
+    #    bytes_sent (int): The payload bytes sent to the client
+    #    failed (bool): Whether the request failed
+    #
+    def observe(self, method, duration, *, bytes_received=0, bytes_sent=0, failed=False):
+        with self._lock:
+            try:
+                stats = self._methods[method]
+            except KeyError:
+                stats = self._methods[method] = _MethodMetrics(len(self.LATENCY_BUCKETS))
+
+            stats.requests += 1
+            if failed:
+                stats.failures += 1
+            stats.bytes_received += bytes_received
+            stats.bytes_sent += bytes_sent
+            stats.latency_sum += duration
+            stats.latency_buckets[bisect.bisect_left(self.LATENCY_BUCKETS, duration)] += 1
+
+    # increment():
+    #
+    # Increment a server wide counter
+    #
+    # Args:
+    #    counter (str): The name of the counter
+    #    amount (int): The amount to add
+    #
+    def increment(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    # get_counter():
+    #
+    # Args:
+    #    counter (str): The name of the counter
+    #
+    # Returns:
+    #    (int): The current value of the counter
+    #
+    def get_counter(self, counter):
+        with self._lock:
+            return self._counters.get(counter, 0)
+
+    # get_requests():
+    #
+    # Args:
+    #    method (str): The name of the RPC method
+    #
+    # Returns:
+    #    (int): The number of requests handled for the given method
+    #
+    def get_requests(self, method):
+        with self._lock:
+            stats = self._methods.get(method)
+            return stats.requests if stats else 0
+
+    # render():
+    #
+    # Returns:
+    #    (str): The metrics in the Prometheus text exposition format
+    #
+    def render(self):
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append("# HELP {} {}".format(name, help_text))
+            lines.append("# TYPE {} {}".format(name, kind))
+
+        with self._lock:
+            methods = sorted(self._methods.items())
+
+            for name, attr, help_text in (
+                ("bst_artifact_server_requests_total", "requests", "Requests handled"),
+                ("bst_artifact_server_failures_total", "failures", "Requests which failed"),
+                ("bst_artifact_server_received_bytes_total", "bytes_received", "Payload bytes received"),
+                ("bst_artifact_server_sent_bytes_total", "bytes_sent", "Payload bytes sent"),
+            ):
+                family(name, "counter", help_text)
+                for method, stats in methods:
+                    lines.append('{}{{method="{}"}} {}'.format(name, method, getattr(stats, attr)))
+
+            name = "bst_artifact_server_latency_seconds"
+            family(name, "histogram", "Request latency")
+            for method, stats in methods:
+                cumulative = 0
+                for bound, count in zip(self.LATENCY_BUCKETS, stats.latency_buckets):
+                    cumulative += count
+                    lines.append('{}_bucket{{method="{}",le="{}"}} {}'.format(name, method, bound, cumulative))
+                lines.append('{}_bucket{{method="{}",le="+Inf"}} {}'.format(name, method, stats.requests))
+                lines.append('{}_sum{{method="{}"}} {}'.format(name, method, stats.latency_sum))
+                lines.append('{}_count{{method="{}"}} {}'.format(name, method, stats.requests))
+
+            for counter, value in sorted(self._counters.items()):
+                name = "bst_artifact_server_{}_total".format(counter)
+                family(name, "counter", counter.replace("_", " ").capitalize())
+                lines.append("{} {}".format(name, value))
+
+        return "\n".join(lines) + "\n"
+
+
+# _MethodMetrics():
+#
+# The accumulated metrics of a single RPC method.
+#
+class _MethodMetrics:
+    def __init__(self, n_buckets):
+        self.requests = 0
+        self.failures = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.latency_sum = 0.0
+
+        # One count per bucket, plus one for the overflow
+        self.latency_buckets = [0] * (n_buckets + 1)
+
+
+# _RequestMeasurement():
+#
+# The byte counts of a request in flight.
+#
+class _RequestMeasurement:
+    def __init__(self):
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+
+# _PresenceIndex():
+#
+# In-memory index of the blobs known to be present in the local CAS.
+#
+# FindMissingBlobs requests are answered from the index where possible,
+# only the digests which are not known to be present are forwarded to
+# buildbox-casd. The index learns about blobs from the responses of
+# FindMissingBlobs and from successful uploads.
+#
+# The index is only used if the server has no quota. With a quota, casd
+# expires blobs without telling us, and an index entry for an expired
+# blob would make clients skip uploading it. All lookups are forwarded
+# to casd in this case, which also keeps the expiry order of casd up to
+# date with the blobs which clients use.
+#
+# Once the index is full, the least recently used entries are forgotten.
+#
+# Args:
+#    metrics (ServerMetrics): The metrics to count hits and misses in
+#    quota (int): The quota of the server, or None
+#    max_entries (int): The maximum number of digests in the index
+#
+class _PresenceIndex:
+    def __init__(self, metrics, *, quota, max_entries=_MAX_PRESENCE_INDEX_ENTRIES):
+        self._metrics = metrics
+        self._enabled = not quota
+        self._max_entries = max_entries
+        self._present = collections.OrderedDict()
+
+    # add():
+    #
+    # Record blobs as present in the local CAS
+    #
+    # Args:
+    #    digests (iterable): The Digests of the present blobs
+    #
+    def add(self, digests):
+        if not self._enabled:
+            return
+
+        for digest in digests:
+            key = (digest.hash, digest.size_bytes)
+            if key in self._present:
+                self._present.move_to_end(key)
+                continue
+
+            if len(self._present) >= self._max_entries:
+                self._present.popitem(last=False)
+            self._present[key] = None
+
+    # find_unknown():
+    #
+    # Filter out the blobs which are known to be present
+    #
+    # Args:
+    #    digests (list): The Digests to look up
+    #
+    # Returns:
+    #    (list): The Digests which are not known to be present
+    #
+    def find_unknown(self, digests):
+        unknown = []
+        for digest in digests:
+            key = (digest.hash, digest.size_bytes)
+            if key in self._present:
+                self._present.move_to_end(key)
+            else:
+                unknown.append(digest)
+
+        self._metrics.increment("presence_index_hits", len(digests) - len(unknown))
+        self._metrics.increment("presence_index_misses", len(unknown))
+        return unknown
+
+
+# start_metrics_endpoint():
+#
+# Serve the metrics in the Prometheus text exposition format over HTTP.
+#
+# Any GET request is answered with the current metrics.
+#
+# Args:
+#     metrics (ServerMetrics): The metrics to serve
+#     host (str): The address to listen on
+#     port (int): The port to listen on, 0 for an ephemeral port
+#
+# Returns:
+#     (asyncio.Server): The listening HTTP server
+#
+async def start_metrics_endpoint(metrics, host="127.0.0.1", port=0):
+    async def handle(reader, writer):
+        try:
+            # Read and discard the request head
+            while True:
+                line = await reader.readline()
+                if not line or line in (b"\r\n", b"\n"):
+                    break
+
+            body = metrics.render().encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4\r\n"
+                b"Content-Length: " + str(len(body)).encode("ascii") + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
 # create_server():
 #
 # Create gRPC CAS artifact server as specified in the Remote Execution API.
 #
+# The server is a grpc.aio server, all requests are proxied to buildbox-casd
+# asynchronously on the running event loop, ByteStream reads and writes are
+# streamed through without buffering whole blobs.
+#
 # Args:
 #     repo (str): Path to CAS repository
 #     enable_push (bool): Whether to allow blob uploads and artifact updates
 #     index_only (bool): Whether to store CAS blobs or only artifacts
+#     metrics (ServerMetrics): Optional metrics to record the requests in
 #
-@contextlib.contextmanager
-def create_server(repo, *, enable_push, quota, index_only, log_level=LogLevel.Levels.WARNING):
+@contextlib.asynccontextmanager
+async def create_server(repo, *, enable_push, quota, index_only, log_level=LogLevel.Levels.WARNING, metrics=None):
     logger = logging.getLogger("buildstream._cas.casserver")
     logger.setLevel(LogLevel.get_logging_equivalent(log_level))
     handler = logging.StreamHandler(sys.stderr)
     handler.setFormatter(logging.Formatter(fmt="%(levelname)s: %(funcName)s: %(message)s"))
     logger.addHandler(handler)
 
+    if metrics is None:
+        metrics = ServerMetrics()
+
     casd = CASDProcessManager(
         os.path.abspath(repo), os.path.join(os.path.abspath(repo), "logs"), log_level, quota, None, False, None
     )
 
     try:
-        # Use max_workers default from Python 3.5+
-        max_workers = (os.cpu_count() or 1) * 5
-        server = grpc.server(futures.ThreadPoolExecutor(max_workers))
+        server = grpc.aio.server()
 
         if not index_only:
+            presence = _PresenceIndex(metrics, quota=quota)
+
             bytestream_pb2_grpc.add_ByteStreamServicer_to_server(
-                _ByteStreamServicer(casd, enable_push=enable_push), server
+                _ByteStreamServicer(casd, metrics, presence, enable_push=enable_push), server
             )
 
             remote_execution_pb2_grpc.add_ContentAddressableStorageServicer_to_server(
-                _ContentAddressableStorageServicer(casd, enable_push=enable_push), server
+                _ContentAddressableStorageServicer(casd, metrics, presence, enable_push=enable_push), server
             )
 
-        remote_execution_pb2_grpc.add_CapabilitiesServicer_to_server(_CapabilitiesServicer(), server)
+        remote_execution_pb2_grpc.add_CapabilitiesServicer_to_server(
+            _CapabilitiesServicer(compressors=[] if index_only else _COMPRESSORS), server
+        )
 
         # Remote Asset API
-        remote_asset_pb2_grpc.add_FetchServicer_to_server(_FetchServicer(casd), server)
+        remote_asset_pb2_grpc.add_FetchServicer_to_server(_FetchServicer(casd, metrics), server)
         if enable_push:
-            remote_asset_pb2_grpc.add_PushServicer_to_server(_PushServicer(casd), server)
+            remote_asset_pb2_grpc.add_PushServicer_to_server(_PushServicer(casd, metrics), server)
 
         # Ensure we have the signal handler set for SIGTERM
         # This allows threads from GRPC to call our methods that do register
@@ -121,71 +460,432 @@ def create_server(repo, *, enable_push, quota, index_only, log_level=LogLevel.Le
             yield server
 
     finally:
+        await casd.close_async_channel()
         casd.release_resources()
 
 
-class _ByteStreamServicer(bytestream_pb2_grpc.ByteStreamServicer):
-    def __init__(self, casd, *, enable_push):
+# _ProxyServicer():
+#
+# Base class for servicers forwarding unary requests to buildbox-casd.
+#
+class _ProxyServicer:
+    def __init__(self, metrics):
         super().__init__()
-        self.bytestream = casd.get_bytestream()
-        self.enable_push = enable_push
+        self.metrics = metrics
         self.logger = logging.getLogger("buildstream._cas.casserver")
 
-    def Read(self, request, context):
+    # _forward():
+    #
+    # Forward a unary request to buildbox-casd, recording its metrics.
+    #
+    # Args:
+    #    method (str): The name of the RPC method
+    #    stub_method (callable): The grpc.aio casd stub method
+    #    request (Message): The request
+    #    context (grpc.aio.ServicerContext): The servicer context
+    #
+    # Returns:
+    #    (Message): The response from buildbox-casd
+    #
+    async def _forward(self, method, stub_method, request, context):
+        with self.metrics.measure(method) as measurement:
+            measurement.bytes_received = request.ByteSize()
+            try:
+                response = await stub_method(request)
+            except grpc.RpcError as err:
+                await context.abort(err.code(), err.details())
+            measurement.bytes_sent = response.ByteSize()
+            return response
+
+
+class _ByteStreamServicer(_ProxyServicer, bytestream_pb2_grpc.ByteStreamServicer):
+    def __init__(self, casd, metrics, presence, *, enable_push):
+        super().__init__(metrics)
+        self.casd = casd
+        self.presence = presence
+        self.enable_push = enable_push
+
+    async def Read(self, request, context):
         self.logger.debug("Reading %s", request.resource_name)
-        try:
-            yield from self.bytestream.Read(request)
-        except grpc.RpcError as err:
-            context.abort(err.code(), err.details())
+        with self.metrics.measure("Read") as measurement:
+            try:
+                compressor, resource_name = _parse_compressed_resource_name(request.resource_name)
+            except ValueError as e:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
 
-    def Write(self, request_iterator, context):
+            if compressor == remote_execution_pb2.Compressor.IDENTITY:
+                try:
+                    async for response in self.casd.get_async_bytestream().Read(request):
+                        measurement.bytes_sent += len(response.data)
+                        yield response
+                except grpc.RpcError as err:
+                    await context.abort(err.code(), err.details())
+                return
+
+            # The offset of compressed reads refers to the uncompressed blob,
+            # the compressed data from that offset on is sent, and a limit
+            # is not supported as clients can't know the compressed size
+            if request.read_limit:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Compressed reads do not support read_limit")
+
+            compressobj = _new_compressobj(compressor)
+            uncompressed_size = 0
+
+            async def compressed_chunks():
+                nonlocal uncompressed_size
+
+                casd_request = bytestream_pb2.ReadRequest(resource_name=resource_name, read_offset=request.read_offset)
+                # Compress in a thread, to not hold up other requests with large blobs
+                async for response in self.casd.get_async_bytestream().Read(casd_request):
+                    uncompressed_size += len(response.data)
+                    yield await asyncio.to_thread(compressobj.compress, response.data)
+                yield await asyncio.to_thread(compressobj.flush)
+
+            try:
+                async for data in compressed_chunks():
+                    if data:
+                        measurement.bytes_sent += len(data)
+                        yield bytestream_pb2.ReadResponse(data=data)
+            except grpc.RpcError as err:
+                await context.abort(err.code(), err.details())
+
+            self._record_compression("Read", resource_name, compressor, uncompressed_size, measurement.bytes_sent)
+
+    async def Write(self, request_iterator, context):
         # Note that we can't easily give more information because the
         # data is stuck in an iterator that will be consumed if read.
         self.logger.debug("Writing data")
-        try:
-            ret = self.bytestream.Write(request_iterator)
-        except grpc.RpcError as err:
-            context.abort(err.code(), err.details())
-        return ret
+        with self.metrics.measure("Write") as measurement:
+            try:
+                first_request = await anext(request_iterator)
+                compressor, resource_name = _parse_compressed_resource_name(first_request.resource_name)
+            except StopAsyncIteration:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Write request without data")
+            except ValueError as e:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
 
+            # The offset of compressed writes refers to the uncompressed blob,
+            # such that clients may resume interrupted uploads
+            uncompressed_size = first_request.write_offset
 
-class _ContentAddressableStorageServicer(remote_execution_pb2_grpc.ContentAddressableStorageServicer):
-    def __init__(self, casd, *, enable_push):
-        super().__init__()
-        self.cas = casd.get_cas()
+            decompressobj = None
+            if compressor != remote_execution_pb2.Compressor.IDENTITY:
+                digest = _parse_upload_resource_name(resource_name)
+                if digest is None:
+                    await context.abort(
+                        grpc.StatusCode.INVALID_ARGUMENT,
+                        "Invalid resource name: {}".format(first_request.resource_name),
+                    )
+                decompressobj = _BoundedDecompressor(compressor, digest.size_bytes - uncompressed_size)
+            errors = []
+
+            async def requests():
+                nonlocal uncompressed_size
+
+                request = first_request
+                while True:
+                    measurement.bytes_received += len(request.data)
+
+                    if decompressobj:
+                        # Forward the decompressed data, with offsets in the decompressed blob
+                        try:
+                            data = await asyncio.to_thread(decompressobj.decompress, request.data)
+                            if request.finish_write:
+                                data += await asyncio.to_thread(decompressobj.flush)
+                        except _DECOMPRESSION_ERRORS as e:
+                            errors.append(e)
+                            return
+
+                        request = bytestream_pb2.WriteRequest(
+                            resource_name=resource_name if request.resource_name else "",
+                            write_offset=uncompressed_size,
+                            finish_write=request.finish_write,
+                            data=data,
+                        )
+
+                    uncompressed_size += len(request.data)
+                    yield request
+
+                    try:
+                        request = await anext(request_iterator)
+                    except StopAsyncIteration:
+                        break
+
+            try:
+                response = await self.casd.get_async_bytestream().Write(requests())
+            except grpc.RpcError as err:
+                if errors:
+                    await context.abort(
+                        grpc.StatusCode.INVALID_ARGUMENT, "Invalid compressed data: {}".format(errors[0])
+                    )
+                await context.abort(err.code(), err.details())
+
+            digest = _parse_upload_resource_name(resource_name)
+            if digest and response.committed_size == digest.size_bytes:
+                self.presence.add([digest])
+
+                if decompressobj:
+                    # The committed size of compressed uploads is the compressed size
+                    response.committed_size = measurement.bytes_received
+                    self._record_compression(
+                        "Write", resource_name, compressor, digest.size_bytes, measurement.bytes_received
+                    )
+
+            return response
+
+    # _record_compression():
+    #
+    # Record the sizes of a compressed transfer in the metrics.
+    #
+    # Args:
+    #    method (str): The name of the RPC method
+    #    resource_name (str): The uncompressed resource name of the blob
+    #    compressor (Compressor.Value): The compressor used for the transfer
+    #    uncompressed_size (int): The size of the blob
+    #    compressed_size (int): The number of bytes transferred
+    #
+    def _record_compression(self, method, resource_name, compressor, uncompressed_size, compressed_size):
+        _record_compression(self.metrics, compressor, uncompressed_size, compressed_size)
+        self.logger.debug(
+            "%s %s: %d bytes compressed to %d bytes with %s (ratio %.2f)",
+            method,
+            resource_name,
+            uncompressed_size,
+            compressed_size,
+            _compressor_name(compressor),
+            uncompressed_size / compressed_size if compressed_size else 0,
+        )
+
+
+class _ContentAddressableStorageServicer(_ProxyServicer, remote_execution_pb2_grpc.ContentAddressableStorageServicer):
+    def __init__(self, casd, metrics, presence, *, enable_push):
+        super().__init__(metrics)
+        self.casd = casd
+        self.presence = presence
         self.enable_push = enable_push
-        self.logger = logging.getLogger("buildstream._cas.casserver")
 
-    def FindMissingBlobs(self, request, context):
-        self.logger.info("Finding '%s'", request.blob_digests)
-        try:
-            ret = self.cas.FindMissingBlobs(request)
-        except grpc.RpcError as err:
-            context.abort(err.code(), err.details())
-        return ret
+    async def FindMissingBlobs(self, request, context):
+        self.logger.info("Finding %d blobs", len(request.blob_digests))
+        self.logger.debug("Finding '%s'", request.blob_digests)
+        with self.metrics.measure("FindMissingBlobs") as measurement:
+            measurement.bytes_received = request.ByteSize()
+            try:
+                unknown = self.presence.find_unknown(request.blob_digests)
+                if unknown:
+                    # Only ask casd about the blobs which are not known to be present
+                    casd_request = remote_execution_pb2.FindMissingBlobsRequest()
+                    casd_request.CopyFrom(request)
+                    del casd_request.blob_digests[:]
+                    casd_request.blob_digests.extend(unknown)
 
-    def BatchReadBlobs(self, request, context):
-        self.logger.info("Reading '%s'", request.digests)
-        try:
-            ret = self.cas.BatchReadBlobs(request)
-        except grpc.RpcError as err:
-            context.abort(err.code(), err.details())
-        return ret
+                    response = await self.casd.get_async_cas().FindMissingBlobs(casd_request)
+
+                    missing = {(digest.hash, digest.size_bytes) for digest in response.missing_blob_digests}
+                    self.presence.add(digest for digest in unknown if (digest.hash, digest.size_bytes) not in missing)
+                else:
+                    response = remote_execution_pb2.FindMissingBlobsResponse()
+            except grpc.RpcError as err:
+                await context.abort(err.code(), err.details())
+            measurement.bytes_sent = response.ByteSize()
+            return response
+
+    async def BatchReadBlobs(self, request, context):
+        self.logger.info("Reading %d blobs", len(request.digests))
+        self.logger.debug("Reading '%s'", request.digests)
+        compressor = next((c for c in _COMPRESSORS if c in request.acceptable_compressors), None)
+        if compressor is None:
+            return await self._forward("BatchReadBlobs", self.casd.get_async_cas().BatchReadBlobs, request, context)
+
+        with self.metrics.measure("BatchReadBlobs") as measurement:
+            measurement.bytes_received = request.ByteSize()
+            try:
+                response = await self.casd.get_async_cas().BatchReadBlobs(request)
+            except grpc.RpcError as err:
+                await context.abort(err.code(), err.details())
+
+            uncompressed_size, compressed_size = await asyncio.to_thread(_compress_blobs, response, compressor)
+            if compressed_size:
+                _record_compression(self.metrics, compressor, uncompressed_size, compressed_size)
+                self.logger.debug(
+                    "BatchReadBlobs: %d bytes compressed to %d bytes with %s",
+                    uncompressed_size,
+                    compressed_size,
+                    _compressor_name(compressor),
+                )
+
+            measurement.bytes_sent = response.ByteSize()
+            return response
+
+    async def BatchUpdateBlobs(self, request, context):
+        self.logger.info("Updating %d blobs", len(request.requests))
+        self.logger.debug("Updating: '%s'", [request.digest for request in request.requests])
+        if any(blob.compressor != remote_execution_pb2.Compressor.IDENTITY for blob in request.requests):
+            request = await self._decompress_update_request(request, context)
+
+        response = await self._forward(
+            "BatchUpdateBlobs", self.casd.get_async_cas().BatchUpdateBlobs, request, context
+        )
+        self.presence.add(blob.digest for blob in response.responses if blob.status.code == code_pb2.OK)
+        return response
+
+    # _decompress_update_request():
+    #
+    # Decompress the compressed blobs of a BatchUpdateBlobs request,
+    # as buildbox-casd is only passed uncompressed blobs.
+    #
+    # Args:
+    #    request (BatchUpdateBlobsRequest): The request
+    #    context (grpc.aio.ServicerContext): The servicer context
+    #
+    # Returns:
+    #    (BatchUpdateBlobsRequest): The request with only uncompressed blobs
+    #
+    async def _decompress_update_request(self, request, context):
+        casd_request = remote_execution_pb2.BatchUpdateBlobsRequest()
+        casd_request.CopyFrom(request)
+
+        for blob in casd_request.requests:
+            if blob.compressor != remote_execution_pb2.Compressor.IDENTITY and blob.compressor not in _COMPRESSORS:
+                await context.abort(
+                    grpc.StatusCode.INVALID_ARGUMENT, "Unsupported compressor: {}".format(blob.compressor)
+                )
 
-    def BatchUpdateBlobs(self, request, context):
-        self.logger.info("Updating: '%s'", [request.digest for request in request.requests])
         try:
-            ret = self.cas.BatchUpdateBlobs(request)
-        except grpc.RpcError as err:
-            context.abort(err.code(), err.details())
-        return ret
+            sizes = await asyncio.to_thread(_decompress_blobs, casd_request)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        for compressor, (uncompressed_size, compressed_size) in sizes.items():
+            _record_compression(self.metrics, compressor, uncompressed_size, compressed_size)
+            self.logger.debug(
+                "BatchUpdateBlobs: %d bytes compressed to %d bytes with %s",
+                uncompressed_size,
+                compressed_size,
+                _compressor_name(compressor),
+            )
+
+        return casd_request
+
+    # GetTree():
+    #
+    # Stream all Directory protos of a tree in breadth-first order.
+    #
+    # The directories of every level of the tree are read from casd in
+    # batches, so a client can resolve a whole tree with a single call
+    # instead of one round trip per directory level.
+    #
+    # The page token lists the digests of the directories which remain
+    # to be read, such that a page resumes the walk where the previous
+    # one ended, instead of walking the tree from the root again. As
+    # the directories of earlier pages are not known when resuming, a
+    # directory which is referenced again may be returned again.
+    #
+    async def GetTree(self, request, context):
+        self.logger.info("Getting tree %s/%d", request.root_digest.hash, request.root_digest.size_bytes)
+        with self.metrics.measure("GetTree") as measurement:
+            measurement.bytes_received = request.ByteSize()
+
+            if request.page_size < 0:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Invalid page size")
+
+            if request.page_token:
+                try:
+                    digests = _parse_page_token(request.page_token)
+                except ValueError:
+                    await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Invalid page token")
+            else:
+                digests = [request.root_digest]
+
+            page_size = min(request.page_size, _MAX_TREE_PAGE_SIZE) if request.page_size else _MAX_TREE_PAGE_SIZE
+
+            response = remote_execution_pb2.GetTreeResponse()
+            found = False
+            try:
+                async for directory, pending in self._walk_tree(request.instance_name, digests):
+                    found = True
+
+                    # Start a new page when the current one is full
+                    if len(response.directories) >= page_size or (
+                        response.directories and response.ByteSize() + directory.ByteSize() > _MAX_PAYLOAD_BYTES
+                    ):
+                        response.next_page_token = _page_token(pending())
+                        measurement.bytes_sent += response.ByteSize()
+                        yield response
+                        response = remote_execution_pb2.GetTreeResponse()
+
+                    response.directories.append(directory)
+            except grpc.RpcError as err:
+                await context.abort(err.code(), err.details())
+
+            if not found and not request.page_token:
+                await context.abort(
+                    grpc.StatusCode.NOT_FOUND, "Directory not found: {}".format(request.root_digest.hash)
+                )
+
+            measurement.bytes_sent += response.ByteSize()
+            yield response
+
+    # _walk_tree():
+    #
+    # Read all directories of a tree from casd, level by level.
+    #
+    # Directories which are referenced more than once are only yielded
+    # once, directories missing from the CAS are skipped along with
+    # their subtrees.
+    #
+    # Args:
+    #    instance_name (str): The instance name to read from
+    #    digests (list): The digests of the directories to start from,
+    #                    the root directory or the pending directories
+    #                    of a previous walk
+    #
+    # Yields:
+    #    (Directory): The directories in breadth-first order
+    #    (callable): Returns the digests of the directories which are
+    #                pending from this directory on, to resume the walk
+    #                with; it needs to be called before the next iteration
+    #
+    async def _walk_tree(self, instance_name, digests):
+        cas = self.casd.get_async_cas()
+        seen = {digest.hash for digest in digests}
+        level = list(digests)
+
+        while level:
+            next_level = []
+            batches = list(_batch_digests(level))
+            for index, batch in enumerate(batches):
+                request = remote_execution_pb2.BatchReadBlobsRequest(instance_name=instance_name, digests=batch)
+                response = await cas.BatchReadBlobs(request)
+                blobs = {blob.digest.hash: blob for blob in response.responses}
+
+                for position, digest in enumerate(batch):
+                    blob = blobs.get(digest.hash)
+                    if blob is None or blob.status.code != code_pb2.OK:
+                        continue
+
+                    directory = remote_execution_pb2.Directory.FromString(blob.data)
+                    for dirnode in directory.directories:
+                        if dirnode.digest.hash not in seen:
+                            seen.add(dirnode.digest.hash)
+                            next_level.append(dirnode.digest)
+
+                    # The subdirectories of this directory are pending already, they
+                    # are skipped when this directory is read again on resumption
+                    def pending(batch=batch, position=position, index=index):
+                        later = [digest for later_batch in batches[index + 1 :] for digest in later_batch]
+                        return batch[position:] + later + next_level
+
+                    yield directory, pending
+
+            level = next_level
 
 
 class _CapabilitiesServicer(remote_execution_pb2_grpc.CapabilitiesServicer):
-    def __init__(self):
+    def __init__(self, *, compressors):
         self.logger = logging.getLogger("buildstream._cas.casserver")
+        self.compressors = compressors
 
-    def GetCapabilities(self, request, context):
+    async def GetCapabilities(self, request, context):
         self.logger.info("Retrieving capabilities")
         response = remote_execution_pb2.ServerCapabilities()
 
@@ -194,6 +894,8 @@ class _CapabilitiesServicer(remote_execution_pb2_grpc.CapabilitiesServicer):
         cache_capabilities.action_cache_update_capabilities.update_enabled = False
         cache_capabilities.max_batch_total_size_bytes = _MAX_PAYLOAD_BYTES
         cache_capabilities.symlink_absolute_path_strategy = remote_execution_pb2.SymlinkAbsolutePathStrategy.ALLOWED
+        cache_capabilities.supported_compressors.extend(self.compressors)
+        cache_capabilities.supported_batch_update_compressors.extend(self.compressors)
 
         response.deprecated_api_version.major = 2
         response.low_api_version.major = 2
@@ -202,47 +904,324 @@ class _CapabilitiesServicer(remote_execution_pb2_grpc.CapabilitiesServicer):
         return response
 
 
-class _FetchServicer(remote_asset_pb2_grpc.FetchServicer):
-    def __init__(self, casd):
-        super().__init__()
-        self.fetch = casd.get_asset_fetch()
-        self.logger = logging.getLogger("buildstream._cas.casserver")
+class _FetchServicer(_ProxyServicer, remote_asset_pb2_grpc.FetchServicer):
+    def __init__(self, casd, metrics):
+        super().__init__(metrics)
+        self.casd = casd
 
-    def FetchBlob(self, request, context):
+    async def FetchBlob(self, request, context):
         self.logger.debug("FetchBlob '%s'", request.uris)
-        try:
-            ret = self.fetch.FetchBlob(request)
-        except grpc.RpcError as err:
-            context.abort(err.code(), err.details())
-        return ret
+        return await self._forward("FetchBlob", self.casd.get_async_asset_fetch().FetchBlob, request, context)
 
-    def FetchDirectory(self, request, context):
+    async def FetchDirectory(self, request, context):
         self.logger.debug("FetchDirectory '%s'", request.uris)
-        try:
-            ret = self.fetch.FetchDirectory(request)
-        except grpc.RpcError as err:
-            context.abort(err.code(), err.details())
-        return ret
+        return await self._forward(
+            "FetchDirectory", self.casd.get_async_asset_fetch().FetchDirectory, request, context
+        )
 
 
-class _PushServicer(remote_asset_pb2_grpc.PushServicer):
-    def __init__(self, casd):
-        super().__init__()
-        self.push = casd.get_asset_push()
-        self.logger = logging.getLogger("buildstream._cas.casserver")
+class _PushServicer(_ProxyServicer, remote_asset_pb2_grpc.PushServicer):
+    def __init__(self, casd, metrics):
+        super().__init__(metrics)
+        self.casd = casd
 
-    def PushBlob(self, request, context):
+    async def PushBlob(self, request, context):
         self.logger.debug("PushBlob '%s'", request.uris)
-        try:
-            ret = self.push.PushBlob(request)
-        except grpc.RpcError as err:
-            context.abort(err.code(), err.details())
-        return ret
+        return await self._forward("PushBlob", self.casd.get_async_asset_push().PushBlob, request, context)
 
-    def PushDirectory(self, request, context):
+    async def PushDirectory(self, request, context):
         self.logger.debug("PushDirectory '%s'", request.uris)
+        return await self._forward("PushDirectory", self.casd.get_async_asset_push().PushDirectory, request, context)
+
+
+# _batch_digests():
+#
+# Split a list of digests into batches which can be read
+# with a single BatchReadBlobs request.
+#
+# Args:
+#    digests (list): The Digests to read
+#
+# Yields:
+#    (list): Batches of Digests
+#
+def _batch_digests(digests):
+    batch = []
+    batch_size = 0
+    for digest in digests:
+        if batch and batch_size + digest.size_bytes > _MAX_PAYLOAD_BYTES:
+            yield batch
+            batch = []
+            batch_size = 0
+        batch.append(digest)
+        batch_size += digest.size_bytes
+
+    if batch:
+        yield batch
+
+
+# _page_token():
+#
+# Args:
+#    digests (list): The digests of the pending directories of a tree walk
+#
+# Returns:
+#    (str): The GetTree page token to resume the walk with
+#
+def _page_token(digests):
+    return ",".join("{}/{}".format(digest.hash, digest.size_bytes) for digest in digests)
+
+
+# _parse_page_token():
+#
+# Args:
+#    page_token (str): A page token returned by _page_token()
+#
+# Returns:
+#    (list): The digests of the pending directories
+#
+# Raises:
+#    (ValueError): If the page token is malformed
+#
+def _parse_page_token(page_token):
+    digests = []
+    for resource in page_token.split(","):
+        hash_, size_bytes = resource.split("/")
+        if not hash_ or int(size_bytes) < 0:
+            raise ValueError("Invalid digest in page token: {}".format(resource))
+        digests.append(remote_execution_pb2.Digest(hash=hash_, size_bytes=int(size_bytes)))
+
+    return digests
+
+
+# _parse_upload_resource_name():
+#
+# Parse the digest from a ByteStream upload resource name of the form
+# "[{instance_name}/]uploads/{uuid}/blobs/{hash}/{size}[/{metadata}]".
+#
+# Args:
+#    resource_name (str): The resource name of a Write request
+#
+# Returns:
+#    (Digest): The digest of the uploaded blob, or None if the resource
+#              name does not refer to an uncompressed blob
+#
+def _parse_upload_resource_name(resource_name):
+    parts = resource_name.split("/")
+    try:
+        index = parts.index("uploads")
+        if parts[index + 2] != "blobs":
+            return None
+        return remote_execution_pb2.Digest(hash=parts[index + 3], size_bytes=int(parts[index + 4]))
+    except (ValueError, IndexError):
+        return None
+
+
+# _parse_compressed_resource_name():
+#
+# Parse the compressor from a ByteStream resource name, which refers to
+# compressed data if it contains "compressed-blobs/{compressor}" in place
+# of "blobs".
+#
+# Args:
+#    resource_name (str): The resource name of a Read or Write request
+#
+# Returns:
+#    (Compressor.Value): The compressor, IDENTITY for uncompressed blobs
+#    (str): The resource name of the uncompressed blob
+#
+# Raises:
+#    ValueError: If the compressor is not supported
+#
+def _parse_compressed_resource_name(resource_name):
+    parts = resource_name.split("/")
+    try:
+        index = parts.index("compressed-blobs")
+    except ValueError:
+        return remote_execution_pb2.Compressor.IDENTITY, resource_name
+
+    try:
+        compressor = remote_execution_pb2.Compressor.Value.Value(parts[index + 1].upper())
+    except (ValueError, IndexError):
+        compressor = None
+    if compressor not in _COMPRESSORS:
+        raise ValueError("Unsupported compressor in resource name: {}".format(resource_name))
+
+    return compressor, "/".join(parts[:index] + ["blobs"] + parts[index + 2 :])
+
+
+# _new_compressobj():
+#
+# Args:
+#    compressor (Compressor.Value): A supported compressor
+#
+# Returns:
+#    A streaming compressor with compress() and flush() methods
+#
+def _new_compressobj(compressor):
+    if compressor == remote_execution_pb2.Compressor.ZSTD:
+        return zstandard.ZstdCompressor().compressobj()
+
+    # Raw deflate streams without zlib headers
+    return zlib.compressobj(wbits=-zlib.MAX_WBITS)
+
+
+# _new_decompressobj():
+#
+# Args:
+#    compressor (Compressor.Value): A supported compressor
+#
+# Returns:
+#    A streaming decompressor with decompress() and flush() methods
+#
+def _new_decompressobj(compressor):
+    if compressor == remote_execution_pb2.Compressor.ZSTD:
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    return zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+
+
+# _BoundedDecompressor():
+#
+# A streaming decompressor which raises _DecompressionLimitError once the
+# decompressed data exceeds a maximum size, such that small amounts of
+# compressed data can't expand to arbitrary amounts of memory.
+#
+# Args:
+#    compressor (Compressor.Value): A supported compressor
+#    max_size (int): The maximum size of the decompressed data
+#
+class _BoundedDecompressor:
+    def __init__(self, compressor, max_size):
+        self._compressor = compressor
+        self._decompressobj = _new_decompressobj(compressor)
+        self._remaining = max_size
+
+    # decompress():
+    #
+    # Args:
+    #    data (bytes): The next compressed data
+    #
+    # Returns:
+    #    (bytes): The decompressed data
+    #
+    def decompress(self, data):
+        if self._compressor == remote_execution_pb2.Compressor.ZSTD:
+            return b"".join(
+                self._consume(self._decompressobj.decompress(data[offset : offset + _ZSTD_INPUT_SLICE_BYTES]))
+                for offset in range(0, len(data), _ZSTD_INPUT_SLICE_BYTES)
+            )
+
+        decompressed = self._decompressobj.decompress(data, self._remaining + 1)
+        if self._decompressobj.unconsumed_tail:
+            raise _DecompressionLimitError("Decompressed data exceeds the size of the blob")
+        return self._consume(decompressed)
+
+    # flush():
+    #
+    # Returns:
+    #    (bytes): The remaining decompressed data
+    #
+    def flush(self):
+        if self._compressor == remote_execution_pb2.Compressor.ZSTD:
+            return self._consume(self._decompressobj.flush())
+
+        return self._consume(self._decompressobj.flush(self._remaining + 1))
+
+    def _consume(self, decompressed):
+        if len(decompressed) > self._remaining:
+            raise _DecompressionLimitError("Decompressed data exceeds the size of the blob")
+        self._remaining -= len(decompressed)
+        return decompressed
+
+
+# _compress_blobs():
+#
+# Compress the blobs of a BatchReadBlobs response in place, only those
+# which compression makes smaller.
+#
+# Args:
+#    response (BatchReadBlobsResponse): The response
+#    compressor (Compressor.Value): A supported compressor
+#
+# Returns:
+#    (int): The uncompressed size of the compressed blobs
+#    (int): The compressed size of the compressed blobs
+#
+def _compress_blobs(response, compressor):
+    uncompressed_size = 0
+    compressed_size = 0
+    for blob in response.responses:
+        if blob.status.code == code_pb2.OK and blob.data:
+            compressobj = _new_compressobj(compressor)
+            data = compressobj.compress(blob.data) + compressobj.flush()
+            if len(data) < len(blob.data):
+                uncompressed_size += len(blob.data)
+                compressed_size += len(data)
+                blob.data = data
+                blob.compressor = compressor
+
+    return uncompressed_size, compressed_size
+
+
+# _decompress_blobs():
+#
+# Decompress the compressed blobs of a BatchUpdateBlobs request in place,
+# none of which may expand to more than the size of its digest.
+#
+# Args:
+#    request (BatchUpdateBlobsRequest): The request
+#
+# Returns:
+#    (dict): The uncompressed and compressed sizes of the blobs, by compressor
+#
+# Raises:
+#    (ValueError): If the data of a blob is invalid
+#
+def _decompress_blobs(request):
+    sizes = {}
+    for blob in request.requests:
+        if blob.compressor == remote_execution_pb2.Compressor.IDENTITY:
+            continue
+
         try:
-            ret = self.push.PushDirectory(request)
-        except grpc.RpcError as err:
-            context.abort(err.code(), err.details())
-        return ret
+            decompressobj = _BoundedDecompressor(blob.compressor, blob.digest.size_bytes)
+            data = decompressobj.decompress(blob.data) + decompressobj.flush()
+        except _DECOMPRESSION_ERRORS as e:
+            raise ValueError("Invalid compressed data for {}: {}".format(blob.digest.hash, e)) from e
+
+        uncompressed_size, compressed_size = sizes.get(blob.compressor, (0, 0))
+        sizes[blob.compressor] = (uncompressed_size + len(data), compressed_size + len(blob.data))
+        blob.data = data
+        blob.compressor = remote_execution_pb2.Compressor.IDENTITY
+
+    return sizes
+
+
+# _compressor_name():
+#
+# Args:
+#    compressor (Compressor.Value): A compressor
+#
+# Returns:
+#    (str): The lowercase name of the compressor, as used in resource names
+#
+def _compressor_name(compressor):
+    return remote_execution_pb2.Compressor.Value.Name(compressor).lower()
+
+
+# _record_compression():
+#
+# Count the uncompressed and on-the-wire bytes of compressed transfers,
+# from which the compression ratio of each compressor can be derived.
+#
+# Args:
+#    metrics (ServerMetrics): The metrics to count the bytes in
+#    compressor (Compressor.Value): The compressor used for the transfer
+#    uncompressed_size (int): The uncompressed size of the blobs
+#    compressed_size (int): The compressed size of the blobs
+#
+def _record_compression(metrics, compressor, uncompressed_size, compressed_size):
+    name = _compressor_name(compressor)
+    metrics.increment("{}_uncompressed_bytes".format(name), uncompressed_size)
+    metrics.increment("{}_compressed_bytes".format(name), compressed_size)
@@ -0,0 +1,71 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import zlib
+
+# The minimum and maximum sizes of chunks
+MIN_CHUNK_SIZE = 512 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Chunk boundaries are only placed where this marker occurs, which
+# happens every 64 KiB on average in random data. The marker is found
+# with bytes.find(), which is a lot faster than computing a rolling
+# hash at every position in Python.
+_MARKER = b"\x8f\xa3"
+
+# The size of the window following a marker which decides whether the
+# marker is a chunk boundary
+_WINDOW_SIZE = 16
+
+# One out of this many markers is a chunk boundary, such that chunks
+# are about 1 MiB larger than the minimum size on average
+_BOUNDARY_MODULUS = 16
+
+
+# chunk_boundaries()
+#
+# Split a buffer into content-defined chunks.
+#
+# As the boundaries of chunks only depend on the content near them,
+# an insertion or removal only changes the chunks around it, and the
+# chunks of the rest of the buffer stay the same.
+#
+# Args:
+#    buffer (bytes-like): The buffer to split, such as an mmap object
+#
+# Yields:
+#    (int, int): The offset and the size of each chunk
+#
+def chunk_boundaries(buffer):
+    size = len(buffer)
+    start = 0
+    while start < size:
+        end = _find_boundary(buffer, start, min(start + MAX_CHUNK_SIZE, size))
+        yield start, end - start
+        start = end
+
+
+def _find_boundary(buffer, start, limit):
+    position = start + MIN_CHUNK_SIZE
+    while position < limit:
+        position = buffer.find(_MARKER, position, limit)
+        if position < 0:
+            break
+
+        window = buffer[position : position + _WINDOW_SIZE]
+        if zlib.crc32(window) % _BOUNDARY_MODULUS == 0:
+            return position
+
+        position += 1
+
+    return limit
@@ -0,0 +1,149 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import os
+import threading
+
+from . import utils
+
+
+# CompilerCache()
+#
+# Manages the persistent compiler cache directories which are mounted
+# into build sandboxes of elements which enable the `compiler-cache`
+# sandbox configuration, for use by tools such as ccache.
+#
+# Every project gets its own directory, the contents of which are
+# entirely managed by the tools running in the sandbox. BuildStream
+# only bounds the total size of all directories, evicting the least
+# recently used files when the configured quota is exceeded.
+#
+# Args:
+#    context (Context): The BuildStream context
+#
+class CompilerCache:
+    def __init__(self, context):
+        self._basedir = os.path.join(context.cachedir, "compilercache")
+        self._quota = context.config_compiler_cache_quota
+
+        self._lock = threading.Lock()
+        self._builds = 0
+        self._evicted_files = 0
+        self._evicted_bytes = 0
+
+    # get_directory():
+    #
+    # Get the host directory to mount for a build, creating it if needed.
+    #
+    # Args:
+    #    project_name (str): The name of the project of the building element
+    #
+    # Returns:
+    #    (str): The absolute path of the host directory
+    #
+    def get_directory(self, project_name):
+        directory = os.path.join(self._basedir, project_name)
+        os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            self._builds += 1
+
+        return directory
+
+    # get_size():
+    #
+    # Returns:
+    #    (int): The total size of all compiler cache directories in bytes
+    #
+    def get_size(self):
+        return sum(size for _, _, size in self._list_files())
+
+    # cleanup():
+    #
+    # Evict the least recently used files until the total size
+    # of the compiler cache directories is within the quota.
+    #
+    # Returns:
+    #    (int): The total size of the remaining files in bytes
+    #
+    def cleanup(self):
+        files = self._list_files()
+        size = sum(file_size for _, _, file_size in files)
+
+        if self._quota is None or size <= self._quota:
+            return size
+
+        files.sort()
+        for _, path, file_size in files:
+            if size <= self._quota:
+                break
+
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+            size -= file_size
+            with self._lock:
+                self._evicted_files += 1
+                self._evicted_bytes += file_size
+
+        return size
+
+    # report():
+    #
+    # Evict files exceeding the quota and report the usage of the
+    # compiler cache, if any build used it in this session.
+    #
+    # Args:
+    #    messenger (Messenger): The messenger to report with
+    #
+    def report(self, messenger):
+        if not self._builds:
+            return
+
+        size = self.cleanup()
+
+        if self._quota is None:
+            quota = "unlimited"
+        else:
+            quota = utils._pretty_size(self._quota, dec_places=1)
+
+        messenger.info(
+            "Compiler cache used by {} builds".format(self._builds),
+            detail="Size: {} (quota {})\nEvicted: {} files ({})".format(
+                utils._pretty_size(size, dec_places=1),
+                quota,
+                self._evicted_files,
+                utils._pretty_size(self._evicted_bytes, dec_places=1),
+            ),
+        )
+
+    # _list_files()
+    #
+    # Returns:
+    #    (list): A list of (last use, path, size) tuples for every
+    #            file in the compiler cache directories
+    #
+    def _list_files(self):
+        files = []
+        for root, _, filenames in os.walk(self._basedir):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                try:
+                    st = os.lstat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((max(st.st_atime, st.st_mtime), path, st.st_size))
+
+        return files
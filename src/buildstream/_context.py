@@ -27,9 +27,15 @@ from ._messenger import Messenger
 from ._profile import Topics, PROFILER
 from ._platform import Platform
 from ._artifactcache import ArtifactCache
+from ._buildrootcache import BuildRootCache
+from ._compilercache import CompilerCache
+from ._jobserver import JobServer
+from ._remotemisscache import RemoteMissCache
 from ._elementsourcescache import ElementSourcesCache
 from ._remotespec import RemoteSpec, RemoteExecutionSpec
 from ._sourcecache import SourceCache
+from ._trace import TraceWriter
+from ._events import EventWriter
 from ._cas import CASCache, CASDProcessManager, CASLogLevel
 from .types import _CacheBuildTrees, _PipelineSelection, _SchedulerErrorAction, _SourceUriPolicy
 from ._workspaces import Workspaces, WorkspaceProjectCache
@@ -157,6 +163,12 @@ class Context:
         # Maximum number of push tasks
         self.sched_pushers: Optional[int] = None
 
+        # Maximum number of simultaneous speculative downloads
+        self.sched_prefetchers: Optional[int] = None
+
+        # Number of upcoming builds to prefetch dependency artifacts for
+        self.sched_prefetch_lookahead: Optional[int] = None
+
         # Maximum number of retries for network tasks
         self.sched_network_retries: Optional[int] = None
 
@@ -169,6 +181,9 @@ class Context:
         # Retry any existing failed builds
         self.build_retry_failed: Optional[bool] = None
 
+        # Whether to share job slots between builds with a jobserver
+        self.build_jobserver: Optional[bool] = None
+
         # Control which dependencies to build
         self.build_dependencies: Optional[_PipelineSelection] = None
 
@@ -187,6 +202,12 @@ class Context:
         # Reserved disk space for local cache in bytes
         self.config_cache_reserved: Optional[int] = None
 
+        # Size of the compiler cache in bytes
+        self.config_compiler_cache_quota: Optional[int] = None
+
+        # Size in bytes from which files are pushed and pulled in chunks, None to disable chunking
+        self.config_chunk_threshold: Optional[int] = None
+
         # Low watermark for local cache (ratio relative to effective quota)
         self.config_cache_low_watermark: Optional[float] = None
 
@@ -199,6 +220,18 @@ class Context:
         # Whether or not to cache build trees on artifact creation
         self.cache_buildtrees: Optional[str] = None
 
+        # Number of seconds for which artifacts and sources missing in remotes are remembered
+        self.remote_miss_ttl: Optional[int] = None
+
+        # Whether to look up artifacts and sources in remotes regardless of remembered misses
+        self.ignore_remote_misses: Optional[bool] = None
+
+        # The timeline of the session, if one is being recorded
+        self.tracer: Optional[TraceWriter] = None
+
+        # The machine-readable event stream of the session, if one is being written
+        self.events: Optional[EventWriter] = None
+
         # Don't shoot the messenger
         self.messenger: Messenger = Messenger()
 
@@ -224,6 +257,10 @@ class Context:
         self._artifactcache: Optional[ArtifactCache] = None
         self._elementsourcescache: Optional[ElementSourcesCache] = None
         self._sourcecache: Optional[SourceCache] = None
+        self._buildrootcache: Optional[BuildRootCache] = None
+        self._compilercache: Optional[CompilerCache] = None
+        self._jobserver: Optional[JobServer] = None
+        self._remote_miss_cache: Optional[RemoteMissCache] = None
         self._projects: List["Project"] = []
         self._project_overrides: MappingNode = Node.from_dict({})
         self._workspaces: Optional[Workspaces] = None
@@ -246,10 +283,26 @@ class Context:
         if self._cascache:
             self._cascache.release_resources()
 
+        if self._jobserver:
+            self._jobserver.close()
+            self._jobserver = None
+
+        if self._remote_miss_cache:
+            self._remote_miss_cache.close()
+            self._remote_miss_cache = None
+
         if self._casd:
             self._casd.release_resources(self.messenger)
             self._casd = None
 
+        if self.tracer:
+            self.tracer.close()
+            self.tracer = None
+
+        if self.events:
+            self.events.close()
+            self.events = None
+
     # load()
     #
     # Loads the configuration files
@@ -359,7 +412,17 @@ class Context:
         # casdir - the casdir may not have been created yet.
         cache = defaults.get_mapping("cache")
         cache.validate_keys(
-            ["quota", "reserved-disk-space", "low-watermark", "storage-service", "pull-buildtrees", "cache-buildtrees"]
+            [
+                "quota",
+                "reserved-disk-space",
+                "low-watermark",
+                "storage-service",
+                "pull-buildtrees",
+                "cache-buildtrees",
+                "compiler-cache-quota",
+                "remote-miss-ttl",
+                "chunk-threshold",
+            ]
         )
 
         cas_volume = self.casdir
@@ -402,6 +465,26 @@ class Context:
                 LoadErrorReason.INVALID_DATA,
             ) from e
 
+        compiler_cache_quota_string = cache.get_str("compiler-cache-quota")
+        try:
+            self.config_compiler_cache_quota = utils._parse_size(compiler_cache_quota_string, cas_volume)
+        except utils.UtilError as e:
+            raise LoadError(
+                "{}\nPlease specify the value in bytes or as a % of full disk space.\n"
+                "\nValid values are, for example: 800M 10G 1T 50%\n".format(str(e)),
+                LoadErrorReason.INVALID_DATA,
+            ) from e
+
+        chunk_threshold_string = cache.get_str("chunk-threshold")
+        try:
+            self.config_chunk_threshold = utils._parse_size(chunk_threshold_string, cas_volume)
+        except utils.UtilError as e:
+            raise LoadError(
+                "{}\nPlease specify the value in bytes.\n"
+                "\nValid values are, for example: 64M 1G infinity\n".format(str(e)),
+                LoadErrorReason.INVALID_DATA,
+            ) from e
+
         remote_cache = cache.get_mapping("storage-service", default=None)
         if remote_cache:
             self.remote_cache_spec = RemoteSpec.new_from_node(remote_cache)
@@ -425,6 +508,10 @@ class Context:
         # Load cache build trees configuration
         self.cache_buildtrees = cache.get_enum("cache-buildtrees", _CacheBuildTrees)
 
+        # Load remote miss cache configuration
+        self.remote_miss_ttl = cache.get_int("remote-miss-ttl")
+        self.ignore_remote_misses = False
+
         # Load logging config
         logging = defaults.get_mapping("logging")
         logging.validate_keys(
@@ -450,18 +537,23 @@ class Context:
 
         # Load scheduler config
         scheduler = defaults.get_mapping("scheduler")
-        scheduler.validate_keys(["on-error", "fetchers", "builders", "pushers", "network-retries"])
+        scheduler.validate_keys(
+            ["on-error", "fetchers", "builders", "pushers", "network-retries", "prefetchers", "prefetch-lookahead"]
+        )
         self.sched_error_action = scheduler.get_enum("on-error", _SchedulerErrorAction)
         self.sched_fetchers = scheduler.get_int("fetchers")
         self.sched_builders = scheduler.get_int("builders")
         self.sched_pushers = scheduler.get_int("pushers")
         self.sched_network_retries = scheduler.get_int("network-retries")
+        self.sched_prefetchers = scheduler.get_int("prefetchers")
+        self.sched_prefetch_lookahead = scheduler.get_int("prefetch-lookahead")
 
         # Load build config
         build = defaults.get_mapping("build")
-        build.validate_keys(["max-jobs", "retry-failed", "dependencies"])
+        build.validate_keys(["max-jobs", "retry-failed", "dependencies", "jobserver"])
         self.build_max_jobs = build.get_int("max-jobs")
         self.build_retry_failed = build.get_bool("retry-failed")
+        self.build_jobserver = build.get_bool("jobserver")
 
         dependencies = build.get_str("dependencies")
         if dependencies not in ["none", "run", "all"]:
@@ -521,6 +613,45 @@ class Context:
 
         return self._sourcecache
 
+    @property
+    def buildrootcache(self) -> BuildRootCache:
+        if not self._buildrootcache:
+            self._buildrootcache = BuildRootCache(self)
+
+        return self._buildrootcache
+
+    @property
+    def compilercache(self) -> CompilerCache:
+        if not self._compilercache:
+            self._compilercache = CompilerCache(self)
+
+        return self._compilercache
+
+    # jobserver
+    #
+    # The jobserver shared by all builds, or None if the jobserver is disabled.
+    #
+    @property
+    def jobserver(self) -> Optional[JobServer]:
+        if self.build_jobserver and not self._jobserver:
+            self._jobserver = JobServer(self.tmpdir, self.platform.get_cpu_count())
+
+        return self._jobserver
+
+    # remote_miss_cache
+    #
+    # The record of artifacts and sources missing in remotes, or None
+    # if misses are not remembered.
+    #
+    @property
+    def remote_miss_cache(self) -> Optional[RemoteMissCache]:
+        if self.remote_miss_ttl and not self._remote_miss_cache:
+            self._remote_miss_cache = RemoteMissCache(
+                os.path.join(self.cachedir, "remote-misses.db"), self.remote_miss_ttl, ignore=self.ignore_remote_misses
+            )
+
+        return self._remote_miss_cache
+
     @property
     def effective_build_max_jobs(self) -> int:
         # Based on some testing (mainly on AWS), maximum effective
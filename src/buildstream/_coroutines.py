@@ -0,0 +1,98 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import asyncio
+from contextvars import ContextVar
+
+
+# Whether the coroutines of the current context are driven by run_synchronously()
+_synchronous: ContextVar[bool] = ContextVar("synchronous", default=False)
+
+
+# run_synchronously()
+#
+# Run a coroutine to completion in the calling thread, without an
+# event loop.
+#
+# The cache operations which the scheduler awaits on its event loop are
+# implemented once as coroutines, and their blocking variants run the
+# same coroutines with this function. While the coroutine runs, the
+# grpc.aio stubs of the CASDProcessManager are replaced by stubs which
+# make blocking calls, and to_thread() calls its function directly, such
+# that the coroutine never suspends.
+#
+# Args:
+#    coro (coroutine): The coroutine to run
+#
+# Returns:
+#    The value returned by the coroutine
+#
+def run_synchronously(coro):
+    token = _synchronous.set(True)
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    finally:
+        _synchronous.reset(token)
+
+    coro.close()
+    raise RuntimeError("Coroutine {} suspended while running synchronously".format(coro.__qualname__))
+
+
+# is_synchronous()
+#
+# Returns:
+#    (bool): Whether the calling coroutine is driven by run_synchronously()
+#
+def is_synchronous():
+    return _synchronous.get()
+
+
+# to_thread()
+#
+# Like asyncio.to_thread(), but calls the function directly in coroutines
+# which are driven by run_synchronously().
+#
+# Args:
+#    func (callable): The blocking function to call
+#    args, kwargs: The arguments for the function
+#
+# Returns:
+#    The value returned by the function
+#
+async def to_thread(func, /, *args, **kwargs):
+    if _synchronous.get():
+        return func(*args, **kwargs)
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+# completed()
+#
+# Args:
+#    value: The result
+#
+# Returns:
+#    An awaitable which returns the given result without suspending
+#
+def completed(value):
+    return _Completed(value)
+
+
+class _Completed:
+    def __init__(self, value):
+        self._value = value
+
+    def __await__(self):
+        yield from ()
+        return self._value
@@ -0,0 +1,232 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+from array import array
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from pyroaring import BitMap  # pylint: disable=no-name-in-module
+
+from .types import _Scope
+
+# The nodes of the graph, these are Elements but any object
+# with a `_unique_id` can be used
+Node = TypeVar("Node")
+
+
+# DependencyGraph()
+#
+# A frozen, array backed representation of the dependency graph
+# reachable from a set of root elements.
+#
+# The build and runtime dependencies of every node are stored as
+# slices of a single edge array (compressed sparse rows), indexed
+# by the node's `_unique_id`, such that traversals only deal with
+# integers and never recurse.
+#
+# The graph must only be created once the dependencies of all
+# reachable nodes have been instantiated.
+#
+# Args:
+#    roots: The toplevel nodes of the graph
+#    build_dependencies: A function returning the build dependencies of a node
+#    runtime_dependencies: A function returning the runtime dependencies of a node
+#
+class DependencyGraph:
+    def __init__(
+        self,
+        roots: Iterable[Node],
+        build_dependencies: Callable[[Node], Sequence[Node]],
+        runtime_dependencies: Callable[[Node], Sequence[Node]],
+    ):
+        # Collect all reachable nodes
+        nodes: List[Node] = []
+        seen = BitMap()
+        queue = list(roots)
+        while queue:
+            node = queue.pop()
+            if node._unique_id in seen:  # type: ignore
+                continue
+            seen.add(node._unique_id)  # type: ignore
+            nodes.append(node)
+            queue.extend(build_dependencies(node))
+            queue.extend(runtime_dependencies(node))
+
+        # Unique IDs are allocated sequentially, so the IDs of the
+        # nodes loaded together are mostly contiguous
+        self._base = seen.min() if nodes else 0
+        size = seen.max() - self._base + 1 if nodes else 0
+
+        self._nodes: List[Optional[Node]] = [None] * size
+        for node in nodes:
+            self._nodes[node._unique_id - self._base] = node  # type: ignore
+
+        self._build_offsets, self._build_edges = self._compress(build_dependencies)
+        self._runtime_offsets, self._runtime_edges = self._compress(runtime_dependencies)
+
+    def __iter__(self) -> Iterator[Node]:
+        return (node for node in self._nodes if node is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for node in self._nodes if node is not None)
+
+    def __contains__(self, node: Node) -> bool:
+        index = node._unique_id - self._base  # type: ignore
+        return 0 <= index < len(self._nodes) and self._nodes[index] is node
+
+    # build_dependencies()
+    #
+    # Args:
+    #    node: A node in the graph
+    #
+    # Returns:
+    #    The direct build dependencies of the node
+    #
+    def build_dependencies(self, node: Node) -> List[Node]:
+        index = node._unique_id - self._base  # type: ignore
+        start, end = self._build_offsets[index], self._build_offsets[index + 1]
+        return [self._nodes[dep] for dep in self._build_edges[start:end]]  # type: ignore
+
+    # runtime_dependencies()
+    #
+    # Args:
+    #    node: A node in the graph
+    #
+    # Returns:
+    #    The direct runtime dependencies of the node
+    #
+    def runtime_dependencies(self, node: Node) -> List[Node]:
+        index = node._unique_id - self._base  # type: ignore
+        start, end = self._runtime_offsets[index], self._runtime_offsets[index + 1]
+        return [self._nodes[dep] for dep in self._runtime_edges[start:end]]  # type: ignore
+
+    # dependencies()
+    #
+    # Iterate over the dependencies of a node in the given scope, in the
+    # same order as Element._dependencies(), in linear time and without
+    # recursion.
+    #
+    # Args:
+    #    node: The node to start from
+    #    scope: The scope to iterate over
+    #    recurse: Whether to recurse into dependencies
+    #    visited: The (build, runtime) BitMaps of visited unique IDs, to share
+    #             across multiple calls
+    #
+    # Yields:
+    #    The nodes in the scope of the node
+    #
+    def dependencies(
+        self,
+        node: Node,
+        scope: _Scope,
+        *,
+        recurse: bool = True,
+        visited: Optional[Tuple[BitMap, BitMap]] = None,
+    ) -> Iterator[Node]:
+        base = self._base
+        nodes = self._nodes
+        index = node._unique_id - base  # type: ignore
+
+        if not recurse:
+            yielded = set()
+            if scope in (_Scope.BUILD, _Scope.ALL):
+                for dep in self._build_edges[self._build_offsets[index] : self._build_offsets[index + 1]]:
+                    if dep not in yielded:
+                        yielded.add(dep)
+                        yield nodes[dep]  # type: ignore
+            if scope in (_Scope.RUN, _Scope.ALL):
+                for dep in self._runtime_edges[self._runtime_offsets[index] : self._runtime_offsets[index + 1]]:
+                    if dep not in yielded:
+                        yielded.add(dep)
+                        yield nodes[dep]  # type: ignore
+            return
+
+        if visited is None:
+            visited = (BitMap(), BitMap())
+        else:
+            # Short-circuit when the node was already visited in this scope
+            if scope in (_Scope.BUILD, _Scope.ALL) and node._unique_id in visited[0]:  # type: ignore
+                return
+            if scope in (_Scope.RUN, _Scope.ALL) and node._unique_id in visited[1]:  # type: ignore
+                return
+
+        if scope == _Scope.NONE:
+            yield node
+            return
+
+        visited_build, visited_run = visited
+        build_offsets, build_edges = self._build_offsets, self._build_edges
+        runtime_offsets, runtime_edges = self._runtime_offsets, self._runtime_edges
+
+        # The stack holds [index, scope, edges, position] frames, a node is
+        # yielded after all of its dependencies, except in the build scope
+        # where only the dependencies are yielded.
+        #
+        stack = []
+
+        def push(index, scope):
+            unique_id = index + base
+            if scope == _Scope.ALL:
+                visited_build.add(unique_id)
+                visited_run.add(unique_id)
+                edges = (
+                    build_edges[build_offsets[index] : build_offsets[index + 1]]
+                    + runtime_edges[runtime_offsets[index] : runtime_offsets[index + 1]]
+                )
+            elif scope == _Scope.BUILD:
+                visited_build.add(unique_id)
+                edges = build_edges[build_offsets[index] : build_offsets[index + 1]]
+            else:
+                visited_run.add(unique_id)
+                edges = runtime_edges[runtime_offsets[index] : runtime_offsets[index + 1]]
+            stack.append([index, scope, edges, 0])
+
+        push(index, scope)
+        while stack:
+            frame = stack[-1]
+            index, scope, edges, position = frame
+
+            descend = None
+            while position < len(edges):
+                dep = edges[position]
+                position += 1
+                if scope == _Scope.ALL:
+                    if dep + base not in visited_build and dep + base not in visited_run:
+                        descend = (dep, _Scope.ALL)
+                        break
+                elif dep + base not in visited_run:
+                    descend = (dep, _Scope.RUN)
+                    break
+
+            if descend is not None:
+                frame[3] = position
+                push(*descend)
+                continue
+
+            stack.pop()
+            if scope != _Scope.BUILD:
+                yield nodes[index]  # type: ignore
+
+    # _compress()
+    #
+    # Build the offset and edge arrays for one kind of dependency
+    #
+    def _compress(self, get_dependencies: Callable[[Node], Sequence[Node]]) -> Tuple[array, array]:
+        offsets = array("L", [0])
+        edges = array("L")
+        for node in self._nodes:
+            if node is not None:
+                edges.extend(dep._unique_id - self._base for dep in get_dependencies(node))  # type: ignore
+            offsets.append(len(edges))
+
+        return offsets, edges
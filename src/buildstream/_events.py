@@ -0,0 +1,230 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import json
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, TextIO, Tuple
+
+from ._state import State
+
+if TYPE_CHECKING:
+    from .element import Element
+
+# The maximum number of events waiting to be written
+_EVENT_QUEUE_SIZE = 10000
+
+# How long to wait for queued events to be written when closing, in seconds
+_CLOSE_TIMEOUT = 5
+
+
+# EventWriter()
+#
+# Streams the events of the session as newline-delimited JSON objects,
+# for other programs such as build farm dashboards to follow the progress
+# of the session without parsing the log.
+#
+# Every event has an "event" member with the type of the event and a
+# "time" member with the time of the event in seconds since the epoch.
+# The event types are:
+#
+#    task-added:    A task was added, with its "task" id, "action" and "name"
+#    task-changed:  The "progress" of a task changed, out of a "total" if known
+#    task-removed:  A task was removed
+#    task-failed:   A task failed
+#    job-started:   A job started, with its "job" id, "action" and "element"
+#    job-finished:  A job finished with an "outcome" after a "duration" in seconds,
+#                   having downloaded "bytes_downloaded" and requested to upload
+#                   "bytes_upload_requested"
+#    cache-hit:     The artifact of an "element" was found, in a remote if "remote"
+#    cache-miss:    The artifact of an "element" was not found
+#    events-dropped: A "count" of events were dropped
+#
+# The events are written by a background thread. They are queued without
+# ever blocking the caller, if the consumer does not keep up and the queue
+# runs full, events are dropped and counted in an events-dropped event.
+#
+# Args:
+#    file: The open file to write the events to
+#
+class EventWriter:
+    def __init__(self, file: TextIO) -> None:
+        self._file: TextIO = file
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=_EVENT_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._dropped = 0
+
+        # The start time of every running job, by job id
+        self._jobs: Dict[str, float] = {}
+
+        self._thread: threading.Thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._thread.start()
+
+    # connect_state()
+    #
+    # Stream the task events of the State.
+    #
+    # Args:
+    #    state: The State of the session
+    #
+    def connect_state(self, state: State) -> None:
+        def task_added(task_id: str) -> None:
+            task = state.tasks[task_id]
+            self._emit("task-added", task=task_id, action=task.action_name, name=task.full_name)
+
+        def task_changed(task_id: str) -> None:
+            task = state.tasks[task_id]
+            self._emit("task-changed", task=task_id, progress=task.current_progress, total=task.maximum_progress)
+
+        def task_removed(task_id: str) -> None:
+            self._emit("task-removed", task=task_id)
+
+        def task_failed(task_id: str, _element: Optional[Tuple[int, Any]] = None) -> None:
+            self._emit("task-failed", task=task_id)
+
+        state.register_task_added_callback(task_added)
+        state.register_task_changed_callback(task_changed)
+        state.register_task_removed_callback(task_removed)
+        state.register_task_failed_callback(task_failed)
+
+    # job_started()
+    #
+    # Args:
+    #    job_id: The unique id of the job
+    #    action_name: The action name of the queue of the job
+    #    element_name: The full name of the element of the job, if any
+    #
+    def job_started(self, job_id: str, action_name: str, element_name: Optional[str]) -> None:
+        self._jobs[job_id] = time.monotonic()
+        self._emit("job-started", job=job_id, action=action_name, element=element_name)
+
+    # job_finished()
+    #
+    # Args:
+    #    job_id: The unique id of the job
+    #    action_name: The action name of the queue of the job
+    #    element_name: The full name of the element of the job, if any
+    #    outcome: The completion status of the job
+    #    bytes_downloaded: The number of bytes the job downloaded from remotes
+    #    bytes_upload_requested: The number of bytes the job requested to upload to remotes
+    #
+    def job_finished(
+        self,
+        job_id: str,
+        action_name: str,
+        element_name: Optional[str],
+        outcome: str,
+        bytes_downloaded: int,
+        bytes_upload_requested: int,
+    ) -> None:
+        duration = time.monotonic() - self._jobs.pop(job_id)
+        self._emit(
+            "job-finished",
+            job=job_id,
+            action=action_name,
+            element=element_name,
+            outcome=outcome,
+            duration=round(duration, 6),
+            bytes_downloaded=bytes_downloaded,
+            bytes_upload_requested=bytes_upload_requested,
+        )
+
+    # cache_queried()
+    #
+    # Report the result of querying the local cache for the artifact of
+    # an element. Artifacts which are pending a pull are reported by the
+    # pull queue instead.
+    #
+    # Args:
+    #    element: The element whose artifact was queried
+    #
+    def cache_queried(self, element: "Element") -> None:
+        if element._cached():
+            self.cache_hit(element._get_full_name(), remote=False)
+        elif not element._pull_pending():
+            self.cache_miss(element._get_full_name())
+
+    # cache_hit()
+    #
+    # Args:
+    #    element_name: The full name of the element whose artifact was found
+    #    remote: Whether the artifact was found in a remote rather than locally
+    #
+    def cache_hit(self, element_name: str, *, remote: bool) -> None:
+        self._emit("cache-hit", element=element_name, remote=remote)
+
+    # cache_miss()
+    #
+    # Args:
+    #    element_name: The full name of the element whose artifact was not found
+    #
+    def cache_miss(self, element_name: str) -> None:
+        self._emit("cache-miss", element=element_name)
+
+    # close()
+    #
+    # Write out the queued events and close the file.
+    #
+    # If the consumer does not read the queued events in time, the writer
+    # thread is abandoned with the file open, such that the session is
+    # never held up at exit.
+    #
+    def close(self) -> None:
+        with self._lock:
+            try:
+                if self._dropped:
+                    self._queue.put_nowait(self._serialize("events-dropped", count=self._dropped))
+                    self._dropped = 0
+                self._queue.put_nowait(None)
+            except queue.Full:
+                return
+
+        self._thread.join(timeout=_CLOSE_TIMEOUT)
+        if self._thread.is_alive():
+            return
+
+        try:
+            self._file.close()
+        except OSError:
+            pass
+
+    def _emit(self, event_type: str, **fields: Any) -> None:
+        with self._lock:
+            try:
+                if self._dropped:
+                    self._queue.put_nowait(self._serialize("events-dropped", count=self._dropped))
+                    self._dropped = 0
+                self._queue.put_nowait(self._serialize(event_type, **fields))
+            except queue.Full:
+                self._dropped += 1
+
+    def _serialize(self, event_type: str, **fields: Any) -> str:
+        event = {"event": event_type, "time": time.time()}
+        event.update(fields)
+        return json.dumps(event) + "\n"
+
+    def _run(self) -> None:
+        while True:
+            line = self._queue.get()
+            if line is None:
+                return
+
+            # Once the consumer went away, events are only dropped,
+            # which must not interrupt the session
+            try:
+                self._file.write(line)
+                if self._queue.empty():
+                    self._file.flush()
+            except OSError:
+                return
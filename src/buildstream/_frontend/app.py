@@ -31,6 +31,8 @@ from .._exceptions import BstError, StreamError, LoadError, AppError
 from ..exceptions import LoadErrorReason
 from .._message import Message, MessageType, unconditional_messages
 from .._stream import Stream
+from .._trace import TraceWriter
+from .._events import EventWriter
 from ..types import _SchedulerErrorAction, _Scope
 from .. import node
 from .. import utils
@@ -199,11 +201,22 @@ class App:
                 "network_retries": "sched_network_retries",
                 "pull_buildtrees": "pull_buildtrees",
                 "cache_buildtrees": "cache_buildtrees",
+                "ignore_remote_misses": "ignore_remote_misses",
             }
             for cli_option, context_attr in override_map.items():
                 option_value = self._main_options.get(cli_option)
                 if option_value is not None:
                     setattr(self.context, context_attr, option_value)
+
+            # Record a timeline of the session if requested
+            if self._main_options.get("trace_file"):
+                self.context.tracer = TraceWriter(self._main_options["trace_file"])
+                self.context.messenger.set_tracer(self.context.tracer)
+
+            # Stream machine-readable events of the session if requested
+            if self._main_options.get("events"):
+                self.context.events = EventWriter(self._main_options["events"])
+
             try:
                 self.context.platform
             except BstError as e:
@@ -222,6 +235,8 @@ class App:
 
             # Register callbacks with the State
             self._state.register_task_failed_callback(self._job_failed)
+            if self.context.events:
+                self.context.events.connect_state(self._state)
 
             # Create the logger right before setting the message handler
             self.logger = LogLine(
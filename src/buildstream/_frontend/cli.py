@@ -22,6 +22,7 @@ import click
 from .. import _yaml
 from .._exceptions import BstError, LoadError, AppError, RemoteError
 from .complete import main_bashcomplete, complete_path, CompleteUnhandled
+from .completionindex import CompletionIndex
 from ..types import _CacheBuildTrees, _SchedulerErrorAction, _PipelineSelection, _HostMount, _Scope
 from .._remotespec import RemoteSpec, RemoteSpecPurpose
 from ..utils import UtilError
@@ -80,6 +81,26 @@ class RemoteSpecType(click.ParamType):
         return "REMOTE"
 
 
+# EventStreamType
+#
+# Opens the destination of the event stream, which is either the
+# number of an open file descriptor or the path of a file.
+#
+class EventStreamType(click.ParamType):
+    name = "events"
+
+    def convert(self, value, param, ctx):
+        try:
+            if value.isdigit():
+                return os.fdopen(int(value), "w", encoding="utf-8")
+            return open(value, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+        except OSError as e:
+            self.fail("Failed to open event stream '{}': {}".format(value, e))
+
+    def __repr__(self):
+        return "FD|PATH"
+
+
 ##################################################################
 #            Override of click's main entry point                #
 ##################################################################
@@ -176,16 +197,48 @@ def complete_target(args, incomplete):
 
     # If a project was loaded, use its element-path to
     # adjust our completion's base directory
+    project_directory = base_directory
     if element_directory:
         base_directory = os.path.join(base_directory, element_directory)
 
-    complete_list = []
-    for p in complete_path("File", incomplete, base_directory=base_directory):
-        if p.endswith(".bst ") or p.endswith("/"):
-            complete_list.append(p)
+    # Paths outside of the element directory are not indexed
+    dirname = incomplete.rsplit(os.sep, 1)[0] if os.sep in incomplete else ""
+    if os.path.isabs(dirname) or os.path.normpath(dirname).split(os.sep)[0] == "..":
+        complete_list = []
+        for p in complete_path("File", incomplete, base_directory=base_directory):
+            if p.endswith(".bst ") or p.endswith("/"):
+                complete_list.append(p)
+        return complete_list
+
+    index_file = os.path.abspath(os.path.join(project_directory, ".bst", "completion-index.json"))
+    index = CompletionIndex(base_directory, index_file)
+    complete_list = complete_indexed_path(index, incomplete)
+    index.save()
     return complete_list
 
 
+# Completion of element paths in an element directory, using a CompletionIndex
+#
+# This behaves like complete_path(), but only lists element files and directories,
+# and does not list the ".bst" directory of the project.
+#
+def complete_indexed_path(index, incomplete):
+    if os.sep in incomplete:
+        dirname = incomplete.rsplit(os.sep, 1)[0]
+    elif incomplete in index.list_directory("")[0]:
+        dirname = incomplete
+    else:
+        dirname = ""
+
+    dirs, files = index.list_directory(os.path.normpath(dirname) if dirname else "")
+    if not dirname:
+        dirs = [name for name in dirs if name != ".bst"]
+
+    prefix = dirname + os.sep if dirname else ""
+    entries = [(name, os.sep) for name in dirs] + [(name, " ") for name in files if name.endswith(".bst")]
+    return [prefix + name + suffix for name, suffix in sorted(entries)]
+
+
 def complete_artifact(orig_args, args, incomplete):
     from .._context import Context
 
@@ -210,7 +263,9 @@ def complete_artifact(orig_args, args, incomplete):
 
         # element targets are valid artifact names
         complete_list = complete_target(args, incomplete)
-        complete_list.extend(ref for ref in ctx.artifactcache.list_artifacts() if ref.startswith(incomplete))
+        index = CompletionIndex(ctx.artifactdir, os.path.join(ctx.cachedir, "artifacts", "completion-index.json"))
+        complete_list.extend(index.list_files(incomplete))
+        index.save()
 
         return complete_list
 
@@ -369,6 +424,23 @@ def print_version(ctx, param, value):
     type=FastEnumType(_CacheBuildTrees),
     help="Cache artifact build tree content on creation",
 )
+@click.option(
+    "--ignore-remote-misses",
+    is_flag=True,
+    default=None,
+    help="Look up artifacts and sources in remotes even if they were recently missing",
+)
+@click.option(
+    "--trace-file",
+    type=click.File(mode="w", encoding="UTF-8"),
+    help="A file to record a timeline of the session in, in the Chrome trace event format",
+)
+@click.option(
+    "--events",
+    type=EventStreamType(),
+    metavar="FD|PATH",
+    help="A file descriptor number or file to stream newline-delimited JSON events of the session to",
+)
 @click.pass_context
 def cli(context, **kwargs):
     """Build and manipulate BuildStream projects
@@ -1614,15 +1686,17 @@ def artifact_push(app, deps, artifact_remotes, ignore_project_artifact_remotes,
 @click.pass_obj
 def artifact_log(app, artifacts, out):
     """Show build logs of artifacts"""
+    from .. import utils
+
     with app.initialized():
         artifact_logs = app.stream.artifact_log(artifacts)
 
         if not out:
             try:
                 for log in list(artifact_logs.values()):
-                    with open(log[0], "r", encoding="utf-8") as f:
-                        data = f.read()
-                    click.echo_via_pager(data)
+                    # Logs are decompressed on the fly as the pager consumes them
+                    with utils._open_log(log[0], text=True) as f:
+                        click.echo_via_pager(f)
             except (OSError, FileNotFoundError):
                 click.echo("Error: file cannot be opened", err=True)
                 sys.exit(1)
@@ -1639,15 +1713,23 @@ def artifact_log(app, artifacts, out):
                     os.mkdir(name)
                     for log in log_files:
                         dest = os.path.join(out, name, log)
-                        shutil.copy(log, dest)
+                        _copy_log(log, dest)
                     # make a dir and write in log files
                 else:
                     log_name = os.path.splitext(name)[0] + ".log"
                     dest = os.path.join(out, log_name)
-                    shutil.copy(log_files[0], dest)
+                    _copy_log(log_files[0], dest)
                     # write a log file
 
 
+# Write out a decompressed copy of an artifact log
+def _copy_log(log, dest):
+    from .. import utils
+
+    with utils._open_log(log) as src, open(dest, "wb") as f:
+        shutil.copyfileobj(src, f)
+
+
 ################################################################
 #                Artifact List-Contents Command                #
 ################################################################
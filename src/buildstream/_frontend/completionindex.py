@@ -0,0 +1,161 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import os
+import time
+
+import ujson
+
+from .. import utils
+
+# The version of the index file format, indexes with
+# a different version are discarded
+_INDEX_VERSION = 1
+
+# Directories which were modified more recently than this (in nanoseconds)
+# are not recorded in the index, as further modifications within the
+# granularity of the file system timestamps would go unnoticed
+_RACY_INTERVAL = 2 * 1000 * 1000 * 1000
+
+
+# CompletionIndex()
+#
+# A persistent index of the contents of a directory tree, used to
+# speed up shell completion of element and artifact names.
+#
+# The listing of each directory is stored along with the mtime of the
+# directory, such that a directory only needs to be listed again when
+# entries were added to it or removed from it. Listing an unmodified
+# directory costs a single stat() call.
+#
+# Args:
+#    directory (str): The directory to index
+#    index_file (str): The file to store the index in
+#
+class CompletionIndex:
+    def __init__(self, directory, index_file):
+        self._directory = directory
+        self._index_file = index_file
+        self._entries = self._load()  # Dict of [mtime, dirs, files] lists indexed by relative directory path
+        self._changed = False
+
+    # list_directory()
+    #
+    # List the contents of a directory in the tree.
+    #
+    # Args:
+    #    relpath (str): The directory relative path, or an empty string for the toplevel
+    #
+    # Returns:
+    #    (list): The sorted names of the subdirectories
+    #    (list): The sorted names of the other files in the directory
+    #
+    def list_directory(self, relpath):
+        path = os.path.join(self._directory, relpath)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            if self._entries.pop(relpath, None) is not None:
+                self._changed = True
+            return [], []
+
+        entry = self._entries.get(relpath)
+        if entry is not None and entry[0] == mtime:
+            return entry[1], entry[2]
+
+        dirs = []
+        files = []
+        try:
+            with os.scandir(path) as it:
+                for dirent in it:
+                    if dirent.is_dir():
+                        dirs.append(dirent.name)
+                    else:
+                        files.append(dirent.name)
+        except OSError:
+            # Not a directory, or not readable
+            return [], []
+
+        dirs.sort()
+        files.sort()
+
+        if time.time_ns() - mtime > _RACY_INTERVAL:
+            self._entries[relpath] = [mtime, dirs, files]
+            self._changed = True
+
+        return dirs, files
+
+    # list_files()
+    #
+    # List all files in the tree whose relative paths start with @prefix,
+    # only the directories which can contain such files are visited.
+    #
+    # Args:
+    #    prefix (str): The prefix of the relative paths to list
+    #
+    # Returns:
+    #    (list): The sorted relative paths of the files
+    #
+    def list_files(self, prefix=""):
+        result = []
+        stack = [""]
+        while stack:
+            relpath = stack.pop()
+            dirs, files = self.list_directory(relpath)
+
+            for name in files:
+                filepath = os.path.join(relpath, name)
+                if filepath.startswith(prefix):
+                    result.append(filepath)
+
+            for name in dirs:
+                dirpath = os.path.join(relpath, name)
+                if dirpath.startswith(prefix) or prefix.startswith(dirpath + os.sep):
+                    stack.append(dirpath)
+
+        return sorted(result)
+
+    # save()
+    #
+    # Store the index if it was modified. This is best effort, the
+    # index is not stored if the directory is not writable.
+    #
+    def save(self):
+        if not self._changed:
+            return
+
+        # Forget about directories which no longer exist
+        for relpath in list(self._entries):
+            if relpath and not os.path.isdir(os.path.join(self._directory, relpath)):
+                del self._entries[relpath]
+
+        try:
+            os.makedirs(os.path.dirname(self._index_file), exist_ok=True)
+            with utils.save_file_atomic(self._index_file, "w", encoding="utf-8") as f:
+                ujson.dump({"version": _INDEX_VERSION, "entries": self._entries}, f)
+        except OSError:
+            pass
+
+        self._changed = False
+
+    def _load(self):
+        try:
+            with open(self._index_file, "r", encoding="utf-8") as f:
+                index = ujson.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(index, dict) or index.get("version") != _INDEX_VERSION:
+            return {}
+
+        return index.get("entries", {})
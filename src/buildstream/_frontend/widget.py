@@ -15,8 +15,6 @@
 #        Tristan Van Berkom <tristan.vanberkom@codethink.co.uk>
 import datetime
 import os
-from contextlib import ExitStack
-from mmap import mmap
 import re
 import textwrap
 import click
@@ -24,6 +22,7 @@ import click
 from .profile import Profile
 from ..types import _Scope
 from .. import _yaml
+from .. import utils
 from .. import __version__ as bst_version
 from .. import FileType
 from .._exceptions import BstError, ImplError
@@ -826,30 +825,7 @@ class LogLine(Widget):
         return text
 
     def _read_last_lines(self, logfile):
-        with ExitStack() as stack:
-            # mmap handles low-level memory details, allowing for
-            # faster searches
-            f = stack.enter_context(open(logfile, "r+", encoding="utf-8"))
-            log = stack.enter_context(mmap(f.fileno(), os.path.getsize(f.name)))
-
-            count = 0
-            end = log.size() - 1
-
-            while count < self._log_lines and end >= 0:
-                location = log.rfind(b"\n", 0, end)
-                count += 1
-
-                # If location is -1 (none found), this will print the
-                # first character because of the later +1
-                end = location
-
-            # end+1 is correct whether or not a newline was found at
-            # that location. If end is -1 (seek before beginning of file)
-            # then we get the first characther. If end is a newline position,
-            # we discard it and only want to print the beginning of the next
-            # line.
-            lines = log[(end + 1) :].splitlines()
-            return "\n".join([line.decode("utf-8") for line in lines]).rstrip()
+        return utils._read_last_lines(logfile, self._log_lines)
 
     # _format_plugins()
     #
@@ -160,6 +160,7 @@ class Includes:
         file_path = os.path.join(directory, include_str)
         key = (current_loader, file_path)
         if key not in self._loaded:
+            project._materialise(include_str)
             try:
                 self._loaded[key] = _yaml.load(
                     file_path, shortname=shortname, project=project, copy_tree=self._copy_tree
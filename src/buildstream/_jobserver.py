@@ -0,0 +1,105 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import os
+import shutil
+import tempfile
+
+# The directory in which the jobserver is mounted in build sandboxes
+JOBSERVER_SANDBOX_DIRECTORY = "/buildstream-jobserver"
+
+# The name of the jobserver FIFO in the jobserver directory
+_FIFO_NAME = "fifo"
+
+# The token written to the FIFO, GNU make writes back the
+# tokens it reads, so their value does not matter
+_TOKEN = b"+"
+
+
+# JobServer()
+#
+# A GNU make jobserver, sharing a single pool of job slots between the
+# builds of all elements which run at the same time.
+#
+# The pool is a named pipe (FIFO) containing one token per slot. The
+# directory containing the FIFO is mounted into build sandboxes, and
+# build tools which implement the jobserver protocol using a named pipe,
+# such as GNU make >= 4.4, are pointed to it with MAKEFLAGS.
+#
+# Every build job holds one of the slots itself while it runs, which
+# accounts for the implicit slot of the toplevel make process, all
+# additional parallel jobs of the build are taken from the pool.
+#
+# Args:
+#    tmpdir (str): The directory to create the FIFO in
+#    slots (int): The total number of job slots
+#
+class JobServer:
+    def __init__(self, tmpdir, slots):
+        os.makedirs(tmpdir, exist_ok=True)
+
+        self.slots = slots
+        self.directory = tempfile.mkdtemp(prefix="jobserver-", dir=tmpdir)
+
+        path = os.path.join(self.directory, _FIFO_NAME)
+        os.mkfifo(path, 0o600)
+
+        # Keep the FIFO open for reading and writing, such that the tokens
+        # are not lost while no build tool has it open, and such that build
+        # tools never get an EOF when reading from it.
+        self._fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        os.write(self._fd, _TOKEN * slots)
+
+    # makeflags
+    #
+    # The MAKEFLAGS for build tools to use the jobserver in the sandbox.
+    #
+    @property
+    def makeflags(self):
+        return "-j{} --jobserver-auth=fifo:{}".format(
+            self.slots, os.path.join(JOBSERVER_SANDBOX_DIRECTORY, _FIFO_NAME)
+        )
+
+    # acquire()
+    #
+    # Take a slot from the pool without blocking.
+    #
+    # Returns:
+    #    (bool): Whether a slot was taken, and must be released with release()
+    #
+    def acquire(self):
+        if self._fd is None:
+            return False
+
+        try:
+            return len(os.read(self._fd, 1)) == 1
+        except BlockingIOError:
+            return False
+
+    # release()
+    #
+    # Return a slot taken with acquire() to the pool.
+    #
+    def release(self):
+        if self._fd is not None:
+            os.write(self._fd, _TOKEN)
+
+    # close()
+    #
+    # Close and remove the FIFO.
+    #
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,143 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import os
+import shutil
+
+from .. import utils
+from ..storage.directory import DirectoryError, FileType
+
+# The maximum number of symbolic links to follow when resolving a path
+_MAX_SYMLINK_DEPTH = 40
+
+
+# JunctionDirectory()
+#
+# The on disk directory of a subproject, which is populated with the
+# staged sources of its junction as files are needed, instead of
+# exporting all of the sources up front.
+#
+# The loader only reads the project.conf, element, include and ref
+# files it needs, and plugins only get real paths of the files and
+# directories they refer to with Plugin.node_get_project_path().
+#
+# Args:
+#    vdir (CasBasedDirectory): The staged sources of the junction
+#    basedir (str): The directory to materialise the sources in
+#    path (str): The relative path of the project in the sources
+#
+class JunctionDirectory:
+    def __init__(self, vdir, basedir, path):
+        self._vdir = vdir
+        self._basedir = basedir
+        self._path = path
+        self._populated = set()  # Source relative directories which have been fully materialised
+
+    # materialise()
+    #
+    # Ensure that a project relative path exists on disk, if it exists
+    # in the sources of the junction. Symbolic links along the path are
+    # materialised and followed.
+    #
+    # Args:
+    #    path (str): The project relative path
+    #    contents (bool): Whether to materialise the contents of a directory
+    #
+    def materialise(self, path, *, contents=True):
+        self._materialise(os.path.join(self._path, path), contents, 0)
+
+    def _materialise(self, path, contents, depth):
+        path = os.path.normpath(path)
+        if path == ".":
+            path = ""
+
+        # Paths leading outside of the sources are reported by the callers
+        if os.path.isabs(path) or path == ".." or path.startswith("../") or depth > _MAX_SYMLINK_DEPTH:
+            return
+
+        components = path.split(os.sep) if path else []
+        for index, _ in enumerate(components):
+            relpath = os.path.join(*components[: index + 1])
+            try:
+                st = self._vdir.stat(relpath)
+            except DirectoryError:
+                # Missing files are reported by the callers
+                return
+
+            if st.file_type == FileType.SYMLINK:
+                target = os.path.join(os.path.dirname(relpath), self._vdir.readlink(relpath))
+                self._materialise_symlink(relpath)
+                self._materialise(os.path.join(target, *components[index + 1 :]), contents, depth + 1)
+                return
+
+            if index < len(components) - 1:
+                if st.file_type != FileType.DIRECTORY:
+                    return
+                os.makedirs(os.path.join(self._basedir, relpath), exist_ok=True)
+            elif st.file_type == FileType.REGULAR_FILE:
+                self._materialise_file(relpath, st.executable)
+            elif contents:
+                self._populate(relpath, depth)
+            else:
+                os.makedirs(os.path.join(self._basedir, relpath), exist_ok=True)
+
+        if not components and contents:
+            self._populate(path, depth)
+
+    # _populate()
+    #
+    # Materialise a directory along with all of its contents.
+    #
+    def _populate(self, path, depth):
+        if path in self._populated:
+            return
+        self._populated.add(path)
+
+        os.makedirs(os.path.join(self._basedir, path), exist_ok=True)
+        vdir = self._vdir.open_directory(path) if path else self._vdir
+
+        symlinks = []
+        for relpath in vdir.list_relative_paths():
+            st = vdir.stat(relpath)
+            fullpath = os.path.join(path, relpath)
+            if st.file_type == FileType.DIRECTORY:
+                os.makedirs(os.path.join(self._basedir, fullpath), exist_ok=True)
+            elif st.file_type == FileType.REGULAR_FILE:
+                self._materialise_file(fullpath, st.executable)
+            else:
+                self._materialise_symlink(fullpath)
+                symlinks.append(fullpath)
+
+        # Symbolic links may refer to files outside of this directory
+        for fullpath in symlinks:
+            target = os.path.join(os.path.dirname(fullpath), self._vdir.readlink(fullpath))
+            self._materialise(target, True, depth + 1)
+
+    def _materialise_file(self, path, executable):
+        fullpath = os.path.join(self._basedir, path)
+        if os.path.lexists(fullpath):
+            return
+
+        os.makedirs(os.path.dirname(fullpath), exist_ok=True)
+        with self._vdir.open_file(path, mode="rb") as src, utils.save_file_atomic(fullpath, "wb") as dest:
+            shutil.copyfileobj(src, dest)
+
+        os.chmod(fullpath, 0o755 if executable else 0o644)
+
+    def _materialise_symlink(self, path):
+        fullpath = os.path.join(self._basedir, path)
+        if os.path.lexists(fullpath):
+            return
+
+        os.makedirs(os.path.dirname(fullpath), exist_ok=True)
+        os.symlink(self._vdir.readlink(path), fullpath)
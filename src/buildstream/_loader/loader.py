@@ -30,6 +30,7 @@ from ..types import _KeyStrength
 from .types import Symbol
 from . import loadelement
 from .loadelement import LoadElement, Dependency, DependencyType, extract_depends_from_node
+from .junctiondirectory import JunctionDirectory
 
 
 # Loader():
@@ -73,6 +74,7 @@ class Loader:
         self._links = {}  # Dict of link target target paths indexed by link element paths
         self._loaders = {}  # Dict of junction loaders
         self._loader_search_provenances = {}  # Dictionary of provenance nodes of ongoing child loader searches
+        self._scanned_junctions = set()  # Names of junctions which were considered for prefetching
 
         self._includes = Includes(self, copy_tree=True)
 
@@ -126,6 +128,9 @@ class Loader:
         #
         target_elements = []
 
+        # Fetch the subprojects of any junctioned targets all at once
+        self._prefetch_junctions([(target.rsplit(":", 1)[0], None) for target in targets if ":" in target])
+
         for target in targets:
             with PROFILER.profile(Topics.LOAD_PROJECT, target):
                 _junction, name, loader = self._parse_name(target, None)
@@ -277,6 +282,7 @@ class Loader:
 
         # Load the data and process any conditional statements therein
         fullpath = os.path.join(self._basedir, filename)
+        self.project._materialise(os.path.relpath(fullpath, self.project.directory))
         try:
             node = _yaml.load(
                 fullpath, shortname=filename, copy_tree=self.load_context.rewritable, project=self.project
@@ -300,6 +306,7 @@ class Loader:
                 detail = None
                 elements_dir = os.path.relpath(self._basedir, self.project.directory)
                 element_relpath = os.path.relpath(filename, elements_dir)
+                self.project._materialise(os.path.join(elements_dir, element_relpath))
                 if filename.startswith(elements_dir) and os.path.exists(os.path.join(self._basedir, element_relpath)):
                     detail = "Did you mean '{}'?".format(element_relpath)
 
@@ -494,6 +501,8 @@ class Loader:
         top_element.mark_fully_loaded()
 
         dependencies = extract_depends_from_node(top_element.node)
+        if load_subprojects:
+            self._prefetch_junctions([(dep.junction, dep.node) for dep in dependencies if dep.junction])
         # The loader queue is a stack of tuples
         # [0] is the LoadElement instance
         # [1] is a stack of Dependency objects to load
@@ -529,6 +538,8 @@ class Loader:
                         dep_element.mark_fully_loaded()
 
                         dep_deps = extract_depends_from_node(dep_element.node)
+                        if load_subprojects:
+                            self._prefetch_junctions([(dep.junction, dep.node) for dep in dep_deps if dep.junction])
                         loader_queue.append((dep_element, list(reversed(dep_deps)), {}))
 
                         # Pylint is not very happy about Cython and can't understand 'node' is a 'MappingNode'
@@ -857,6 +868,7 @@ class Loader:
         if element._should_fetch():
             self.load_context.fetch_subprojects([element])
 
+        junction_directory = None
         sources = list(element.sources())
         if len(sources) == 1 and sources[0]._get_local_path():
             # Optimization for junctions with a single local source
@@ -878,9 +890,10 @@ class Loader:
             basedir = os.path.join(
                 self.project.directory, ".bst", "staged-junctions", filename, element._get_cache_key(_KeyStrength.WEAK)
             )
-            if not os.path.exists(basedir):
-                os.makedirs(basedir, exist_ok=True)
-                element._stage_sources_at(basedir)
+            os.makedirs(os.path.join(basedir, element.path), exist_ok=True)
+
+            # Only the files which are needed are exported from CAS
+            junction_directory = JunctionDirectory(element._get_staged_sources(), basedir, element.path)
 
         # Load the project
         project_dir = os.path.join(basedir, element.path)
@@ -891,6 +904,7 @@ class Loader:
                 project_dir,
                 self.load_context.context,
                 junction=element,
+                junction_directory=junction_directory,
                 parent_loader=self,
                 search_for_project=False,
                 provenance_node=provenance_node,
@@ -925,6 +939,57 @@ class Loader:
 
         return loader
 
+    # _prefetch_junctions():
+    #
+    # Fetch the sources of the local junctions which are about to be needed
+    # in a single batch, such that the scheduler fetches them in parallel,
+    # instead of fetching them one at a time as _get_loader() encounters them.
+    #
+    # This only performs a shallow scan of the junction elements, the
+    # subprojects are still loaded by _get_loader() in the usual order.
+    # Junctions which are overridden, links, or which cannot be loaded
+    # are skipped here, such that _get_loader() resolves them and reports
+    # any errors with the same provenance as usual.
+    #
+    # Args:
+    #    junctions (list): A list of (str, Node) tuples of junction names and
+    #                      the provenance of the references to them
+    #
+    def _prefetch_junctions(self, junctions):
+        elements = []
+
+        for name, provenance_node in junctions:
+            # Only the first junction in a path is local to this project
+            filename = name.split(":", 1)[0]
+            if filename in self._loaders or filename in self._scanned_junctions:
+                continue
+            self._scanned_junctions.add(filename)
+
+            if self._search_for_overrides(filename):
+                continue
+
+            load_element = self._elements.get(self._normalize_element_name(filename))
+            if load_element is None:
+                try:
+                    load_element = self._load_file_no_deps(filename, provenance_node, only_first_pass=True)
+                except LoadError:
+                    continue
+
+            if load_element is None or load_element.kind != "junction":
+                continue
+
+            element = Element._new_from_load_element(load_element)
+            if not element._has_all_sources_resolved():
+                continue
+
+            element._query_source_cache()
+            if element._should_fetch():
+                elements.append(element)
+
+        # A single junction is fetched by _get_loader() as usual
+        if len(elements) > 1:
+            self.load_context.fetch_subprojects(elements)
+
     # _shallow_load_overrides():
     #
     # Loads any of the override elements on this loader's junction
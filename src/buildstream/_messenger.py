@@ -16,15 +16,19 @@
 
 import os
 import datetime
+import queue
 import threading
+from collections import deque
 from contextlib import contextmanager
-from typing import Optional, Callable, Iterator, TextIO
+from contextvars import ContextVar
+from typing import Optional, Callable, Deque, Iterator, TextIO
 
 from .types import _DisplayKey
 from . import _signals
 from ._exceptions import BstError
 from ._message import Message, MessageType, unconditional_messages
 from ._state import State, Task
+from ._trace import TraceWriter
 from ._version import get_versions
 
 _RENDER_INTERVAL: datetime.timedelta = datetime.timedelta(seconds=1)
@@ -37,6 +41,13 @@ if "BST_TEST_SUITE" in os.environ:
     _DISPLAY_LIMIT = datetime.timedelta(seconds=0)
 
 
+# Seconds to wait for the log writer when flushing a log at SIGTERM time
+_TERMINATE_FLUSH_TIMEOUT: float = 1.0
+
+# The maximum number of writes to a log which may be pending
+_MAX_PENDING_LOG_WRITES: int = 4096
+
+
 # TimeData class to contain times in an object that can be passed around
 # and updated from different places
 class _TimeData:
@@ -58,25 +69,259 @@ class _JobInfo:
         self.element_key = element_key
 
 
-# _MessengerLocal
+# _LogBuffer
 #
-# Thread local storage for the messenger
+# The text recorded to a task log which is yet to be written to the
+# log file by the _LogWriter. Recording text never blocks, so that
+# tasks running on the scheduler's event loop do not block it.
 #
-class _MessengerLocal(threading.local):
+# At most _MAX_PENDING_LOG_WRITES writes are pending, when the writer
+# falls further behind, recorded text is dropped and the number of
+# dropped writes is noted in the log once it catches up.
+#
+# Args:
+#    writer: The _LogWriter writing out this log
+#    logfile: The open log file to write to
+#
+class _LogBuffer:
+    def __init__(self, writer: "_LogWriter", logfile: TextIO) -> None:
+        self._writer: "_LogWriter" = writer
+        self._logfile: TextIO = logfile
+        self._pending: Deque[str] = deque()
+        self._lock: threading.Lock = threading.Lock()
+        self._error: Optional[OSError] = None
+        self._dropped: int = 0  # Writes dropped by write()
+        self._reported_dropped: int = 0  # Dropped writes noted in the log
+
+    # write()
+    #
+    # Queue text to be written to the log
+    #
+    # Args:
+    #    text: The text to write
+    #
+    def write(self, text: str) -> None:
+        self._check_error()
+        if len(self._pending) >= _MAX_PENDING_LOG_WRITES:
+            self._dropped += 1
+            return
+
+        self._pending.append(text)
+        self._writer.schedule(self)
+
+    # flush()
+    #
+    # Write out all queued text and flush the log, in the calling
+    # thread, rather than waiting for the writer thread.
+    #
+    def flush(self) -> None:
+        self.write_pending()
+        self._check_error()
+
+    # write_pending()
+    #
+    # Write out all queued text and flush the log
+    #
+    def write_pending(self) -> None:
+        with self._lock:
+            self._write_pending()
+
+    # terminate()
+    #
+    # Write out all queued text followed by the given text, this is
+    # called from the SIGTERM handler.
+    #
+    # The handler may have interrupted this thread while it was writing
+    # this log, in which case the lock is never released, so only wait
+    # for the writer thread for a limited time.
+    #
+    # Args:
+    #    text: The text to write
+    #
+    def terminate(self, text: str) -> None:
+        self._pending.append(text)
+
+        # The lock can't be acquired with a timeout in a with statement
+        if self._lock.acquire(timeout=_TERMINATE_FLUSH_TIMEOUT):  # pylint: disable=consider-using-with
+            try:
+                self._write_pending()
+            finally:
+                self._lock.release()
+        else:
+            os.fsync(self._logfile.fileno())
+
+    # _write_pending()
+    #
+    # Write out the queued text, the lock must be held.
+    #
+    def _write_pending(self) -> None:
+        if not self._pending and self._dropped == self._reported_dropped:
+            return
+
+        try:
+            while self._pending:
+                text = self._pending.popleft()
+
+                # Once writing failed, the pending text is only discarded
+                if self._error is None:
+                    self._logfile.write(text)
+
+            dropped = self._dropped - self._reported_dropped
+            self._reported_dropped += dropped
+
+            if self._error is None:
+                if dropped:
+                    self._logfile.write("[{} log messages dropped, the log writer fell behind]\n".format(dropped))
+                self._logfile.flush()
+        except OSError as e:
+            self._error = e
+
+    def _check_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+
+# _LogWriter
+#
+# Writes the task logs in a single background thread, which is
+# running while any log is open.
+#
+class _LogWriter:
     def __init__(self) -> None:
-        super().__init__()
+        self._queue: "queue.SimpleQueue[Optional[_LogBuffer]]" = queue.SimpleQueue()
+        self._lock: threading.Lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._open_logs: int = 0
 
-        # The open file handle for this task
-        self.log_handle: Optional[TextIO] = None
+    # open()
+    #
+    # Start writing a log file
+    #
+    # Args:
+    #    logfile: The open log file to write to
+    #
+    # Returns:
+    #    The buffer to record text to
+    #
+    def open(self, logfile: TextIO) -> _LogBuffer:
+        with self._lock:
+            if self._thread is None:
+                # Each thread has its own queue, a stopping thread may still be draining its queue
+                self._queue = queue.SimpleQueue()
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), name="log-writer", daemon=True)
+                self._thread.start()
+            self._open_logs += 1
 
-        # The filename for this task
-        self.log_filename: Optional[str] = None
+        return _LogBuffer(self, logfile)
 
-        # Level of silent messages depth in this task
-        self.silence_scope_depth: int = 0
+    # close()
+    #
+    # Write out the remaining text of a log and stop writing it, the
+    # writer thread is stopped when no log remains open.
+    #
+    # Args:
+    #    log: The buffer returned by open()
+    #
+    def close(self, log: _LogBuffer) -> None:
+        thread = None
+        try:
+            log.flush()
+        finally:
+            with self._lock:
+                self._open_logs -= 1
+                if self._open_logs == 0:
+                    thread, self._thread = self._thread, None
+                    self._queue.put(None)
+
+        # Pending text has been written out already, so this does not wait for I/O
+        if thread is not None:
+            thread.join()
+
+    # schedule()
+    #
+    # Schedule the pending text of a log to be written out
+    #
+    # Args:
+    #    log: The buffer with pending text
+    #
+    def schedule(self, log: _LogBuffer) -> None:
+        self._queue.put(log)
+
+    def _run(self, queue_: "queue.SimpleQueue[Optional[_LogBuffer]]") -> None:
+        while True:
+            log = queue_.get()
+            if log is None:
+                return
+
+            log.write_pending()
+
+
+# _MessengerLocal
+#
+# Task local storage for the messenger
+#
+# This is backed by context variables rather than thread local storage,
+# each thread has its own context, and so does each asyncio task, which
+# allows jobs running as coroutines on the scheduler's event loop to
+# record their messages independently of each other.
+#
+class _MessengerLocal:
+
+    # The open file handle for this task
+    _log_handle: ContextVar[Optional[TextIO]] = ContextVar("log_handle", default=None)
+
+    # The text recorded to the log file for this task, yet to be written
+    _log_buffer: ContextVar[Optional[_LogBuffer]] = ContextVar("log_buffer", default=None)
+
+    # The filename for this task
+    _log_filename: ContextVar[Optional[str]] = ContextVar("log_filename", default=None)
+
+    # Level of silent messages depth in this task
+    _silence_scope_depth: ContextVar[int] = ContextVar("silence_scope_depth", default=0)
+
+    # Job
+    _job: ContextVar[Optional[_JobInfo]] = ContextVar("job", default=None)
+
+    @property
+    def log_handle(self) -> Optional[TextIO]:
+        return self._log_handle.get()
+
+    @log_handle.setter
+    def log_handle(self, value: Optional[TextIO]) -> None:
+        self._log_handle.set(value)
 
-        # Job
-        self.job: Optional[_JobInfo] = None
+    @property
+    def log_buffer(self) -> Optional[_LogBuffer]:
+        return self._log_buffer.get()
+
+    @log_buffer.setter
+    def log_buffer(self, value: Optional[_LogBuffer]) -> None:
+        self._log_buffer.set(value)
+
+    @property
+    def log_filename(self) -> Optional[str]:
+        return self._log_filename.get()
+
+    @log_filename.setter
+    def log_filename(self, value: Optional[str]) -> None:
+        self._log_filename.set(value)
+
+    @property
+    def silence_scope_depth(self) -> int:
+        return self._silence_scope_depth.get()
+
+    @silence_scope_depth.setter
+    def silence_scope_depth(self, value: int) -> None:
+        self._silence_scope_depth.set(value)
+
+    @property
+    def job(self) -> Optional[_JobInfo]:
+        return self._job.get()
+
+    @job.setter
+    def job(self, value: Optional[_JobInfo]) -> None:
+        self._job.set(value)
 
 
 # Messenger()
@@ -100,8 +345,9 @@ class Messenger:
         self._next_render: Optional[datetime.datetime] = None  # The time of the next render
         self._render_status_cb: Optional[Callable[[], None]] = None  # The render callback
 
-        # Thread local storage
+        # Task local storage
         self._locals: _MessengerLocal = _MessengerLocal()
+        self._log_writer: _LogWriter = _LogWriter()  # The writer of all task logs
 
         # The callback to call when propagating messages
         #
@@ -110,13 +356,16 @@ class Messenger:
         #        We can use `Protocol` to strongly type this with python >= 3.8
         self._message_handler = None
 
+        # The timeline to record timed activities in, if any
+        self._tracer: Optional[TraceWriter] = None
+
         # Save the bst version to record in log files
         #
         self._bst_version = get_versions()["version"]
 
     # setup_new_action_context()
     #
-    # Setup the thread local context for a new task, some message
+    # Setup the task local context for a new task, some message
     # components are filled in automatically based on the action context.
     #
     # Args:
@@ -156,6 +405,16 @@ class Messenger:
     def set_render_status_cb(self, callback: Callable[[], None]) -> None:
         self._render_status_cb = callback
 
+    # set_tracer()
+    #
+    # Sets the timeline to record completed timed activities in
+    #
+    # Args:
+    #    tracer: The TraceWriter
+    #
+    def set_tracer(self, tracer: TraceWriter) -> None:
+        self._tracer = tracer
+
     # message():
     #
     # Proxies a message back to the caller, this is the central
@@ -180,6 +439,12 @@ class Messenger:
             message.task_element_name = job.element_name
             message.task_element_key = job.element_key
 
+        # Record timed activities in the timeline, including silenced ones,
+        # the jobs themselves are recorded by the scheduler
+        if self._tracer and message.message_type in (MessageType.SUCCESS, MessageType.FAIL) and not message.scheduler:
+            self._tracer.activity(message)
+
+        if job is not None:
             # Don't forward LOG messages from jobs
             if message.message_type == MessageType.LOG:
                 return
@@ -398,6 +663,8 @@ class Messenger:
     # and the full logfile path will be available via the
     # Messenger.get_log_filename() API.
     #
+    # Messages are written to the log file by a background thread.
+    #
     # Args:
     #    filename: A logging directory relative filename,
     #              the pid and .log extension will be automatically
@@ -436,8 +703,7 @@ class Messenger:
                 #
                 # So just try to flush as well as we can at SIGTERM time
                 try:
-                    logfile.write("\n\nForcefully terminated\n")
-                    logfile.flush()
+                    log.terminate("\n\nForcefully terminated\n")
                 except RuntimeError:
                     os.fsync(logfile.fileno())
 
@@ -448,9 +714,16 @@ class Messenger:
                 "BuildStream {} - {}\n".format(self._bst_version, starttime.strftime("%A, %d-%m-%Y at %H:%M:%S"))
             )
 
+            log = self._log_writer.open(logfile)
+
             self._locals.log_handle = logfile
-            with _signals.terminator(flush_log):
-                yield self._locals.log_filename
+            self._locals.log_buffer = log
+            try:
+                with _signals.terminator(flush_log):
+                    yield self._locals.log_filename
+            finally:
+                self._locals.log_buffer = None
+                self._log_writer.close(log)
 
             self._locals.log_handle = None
             self._locals.log_filename = None
@@ -461,10 +734,14 @@ class Messenger:
     # log file handle when the Messenger.recorded_messages() context
     # manager is active
     #
+    # Any messages which are still pending are written out first,
+    # so that output written to the handle appears after them.
+    #
     # Returns:
     #    The active logging file handle, or None
     #
     def get_log_handle(self) -> Optional[TextIO]:
+        self._flush_log()
         return self._locals.log_handle
 
     # get_log_filename()
@@ -473,10 +750,14 @@ class Messenger:
     # log filename when the Messenger.recorded_messages() context
     # manager is active
     #
+    # Any messages which are still pending are written out first,
+    # so that the file is complete when it is read.
+    #
     # Returns:
     #    The active logging filename, or None
     #
     def get_log_filename(self) -> Optional[str]:
+        self._flush_log()
         return self._locals.log_filename
 
     # timed_suspendable()
@@ -513,6 +794,15 @@ class Messenger:
     def _silent_messages(self) -> bool:
         return self._locals.silence_scope_depth > 0
 
+    # _flush_log()
+    #
+    # Wait for pending messages to be written to the active log file
+    #
+    def _flush_log(self) -> None:
+        log = self._locals.log_buffer
+        if log is not None:
+            log.flush()
+
     # _record_message()
     #
     # Records the message if recording is enabled
@@ -522,7 +812,8 @@ class Messenger:
     #
     def _record_message(self, message: Message) -> None:
 
-        if self._locals.log_handle is None:
+        log = self._locals.log_buffer
+        if log is None:
             return
 
         INDENT = "    "
@@ -565,9 +856,13 @@ class Messenger:
             detail=detail,
         )
 
-        # Write to the open log file
-        self._locals.log_handle.write("{}\n".format(text))
-        self._locals.log_handle.flush()
+        # Queue the text to be written to the open log file
+        log.write("{}\n".format(text))
+
+        # The frontend prints the tail of the log file on failures,
+        # so make sure it is complete before the message is dispatched
+        if message.message_type in (MessageType.FAIL, MessageType.ERROR, MessageType.BUG):
+            log.flush()
 
     # _render_status()
     #
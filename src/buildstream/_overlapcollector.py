@@ -15,7 +15,7 @@
 #        Tristan Van Berkom <tristan.vanberkom@codethink.co.uk>
 
 import os
-from contextlib import contextmanager
+from contextlib import contextmanager, suppress
 from typing import TYPE_CHECKING, Optional, List, Tuple
 from .plugin import Plugin
 from .types import CoreWarnings, OverlapAction
@@ -122,8 +122,8 @@ class OverlapCollectorSession:
         # Dictionary of files which were ignored (See FileListResult()), keyed by element unique ID
         self._ignored = {}  # type: Dict[int, List[str]]
 
-        # Dictionary of files which were staged, keyed by element unique ID
-        self._files_written = {}  # type: Dict[int, List[str]]
+        # Dictionary of the unique ID of the first element to stage each file, keyed by filename
+        self._owners = {}  # type: Dict[str, int]
 
         # Dictionary of element IDs which overlapped, keyed by the file they overlap on
         self._overlaps = {}  # type: Dict[str, List[int]]
@@ -137,6 +137,7 @@ class OverlapCollectorSession:
     #    result (FileListResult): The result of Element.stage_artifact()
     #
     def collect_stage_result(self, element: "Element", result: FileListResult):
+        element_id = element._unique_id
 
         for overwritten_file in result.overwritten:
 
@@ -149,25 +150,25 @@ class OverlapCollectorSession:
                 #
                 self._overlaps[overwritten_file] = overlap_list = []
 
-                # Search files which were staged in this session, start the
-                # list off with the bottom most element
+                # Start the list off with the bottom most element which
+                # staged this file in this session, if any
                 #
-                for element_id, staged_files in self._files_written.items():
-                    if overwritten_file in staged_files:
-                        overlap_list.append(element_id)
-                        break
+                owner_id = self._owners.get(overwritten_file)
+                if owner_id is not None:
+                    overlap_list.append(owner_id)
 
             # Add the currently staged element to the overlap list, it might be
             # the only element in the list if it overlaps with a file staged
             # from a previous session.
             #
-            overlap_list.append(element._unique_id)
+            overlap_list.append(element_id)
 
         # Record written files and ignored files.
         #
-        self._files_written[element._unique_id] = result.files_written
+        for filename in result.files_written:
+            self._owners.setdefault(filename, element_id)
         if result.ignored:
-            self._ignored[element._unique_id] = result.ignored
+            self._ignored[element_id] = result.ignored
 
     # warnings()
     #
@@ -268,13 +269,10 @@ class OverlapCollectorSession:
     #
     def _search_stage_element(self, filename: str, sessions: List["OverlapCollectorSession"]) -> Tuple[int, str]:
         for session in reversed(sessions):
-            for element_id, staged_files in session._files_written.items():
-                if any(
-                    staged_file
-                    for staged_file in staged_files
-                    if os.path.join(session._location, staged_file) == filename
-                ):
-                    return element_id, session._location
+            prefix = session._location.rstrip(os.sep) + os.sep
+            if filename.startswith(prefix):
+                with suppress(KeyError):
+                    return session._owners[filename[len(prefix) :]], session._location
 
         assert False, "Could not find element responsible for staging: {}".format(filename)
 
@@ -16,10 +16,7 @@
 #        Jürg Billeter <juerg.billeter@codethink.co.uk>
 #        Tristan Maat <tristan.maat@codethink.co.uk>
 
-import itertools
-
-from collections import OrderedDict
-from operator import itemgetter
+from itertools import chain
 from typing import List, Iterator
 from pyroaring import BitMap  # pylint: disable=no-name-in-module
 
@@ -184,39 +181,38 @@ def except_elements(targets: List[Element], elements: List[Element], except_targ
     if not except_targets:
         return elements
 
-    targeted: List[Element] = list(dependencies(targets, _Scope.ALL))
-    visited: List[Element] = []
-
-    def find_intersection(element: Element) -> Iterator[Element]:
-        if element in visited:
-            return
-        visited.append(element)
+    targeted = BitMap(element._unique_id for element in dependencies(targets, _Scope.ALL))
 
-        # Intersection elements are those that are also in
-        # 'targeted', as long as we don't recurse into them.
-        if element in targeted:
-            yield element
-        else:
-            for dep in element._dependencies(_Scope.ALL, recurse=False):
-                yield from find_intersection(dep)
-
-    # Build a list of 'intersection' elements, i.e. the set of
+    # Build the set of 'intersection' elements, i.e. the set of
     # elements that lie on the border closest to excepted elements
     # between excepted and target elements.
-    intersection = list(itertools.chain.from_iterable(find_intersection(element) for element in except_targets))
+    #
+    # Intersection elements are those that are also in 'targeted',
+    # as long as we don't recurse into them.
+    intersection = BitMap()
+    visited = BitMap()
+    queue = list(except_targets)
+    while queue:
+        element = queue.pop()
+        if element._unique_id in visited:
+            continue
+        visited.add(element._unique_id)
+
+        if element._unique_id in targeted:
+            intersection.add(element._unique_id)
+        else:
+            queue.extend(element._dependencies(_Scope.ALL, recurse=False))
 
     # Now use this set of elements to traverse the targeted
     # elements, except 'intersection' elements and their unique
     # dependencies.
-    queue = []
-    visited = []
-
-    queue.extend(targets)
+    visited = BitMap()
+    queue = list(targets)
     while queue:
         element = queue.pop()
-        if element in visited or element in intersection:
+        if element._unique_id in visited or element._unique_id in intersection:
             continue
-        visited.append(element)
+        visited.add(element._unique_id)
 
         queue.extend(element._dependencies(_Scope.ALL, recurse=False))
 
@@ -227,7 +223,7 @@ def except_elements(targets: List[Element], elements: List[Element], except_targ
 
     # Ensure that we return elements in the same order they were
     # in before.
-    return [element for element in elements if element in visited]
+    return [element for element in elements if element._unique_id in visited]
 
 
 # assert_consistent()
@@ -311,42 +307,65 @@ def assert_sources_cached(context: Context, elements: List[Element]):
 # from a given resolved toplevel element, using depth
 # sorting for more efficient processing.
 #
+# The depth of an element is the longest path of build
+# dependencies leading to it from the toplevel elements,
+# runtime dependencies have the same depth as their reverse
+# dependencies.
+#
 class _Planner:
     def __init__(self):
-        self.depth_map = OrderedDict()
-        self.visiting_elements = set()
-
-    # Here we want to traverse the same element more than once when
-    # it is reachable from multiple places, with the interest of finding
-    # the deepest occurance of every element
-    def plan_element(self, element, depth):
-        if element in self.visiting_elements:
-            # circular dependency, already being processed
-            return
-
-        prev_depth = self.depth_map.get(element)
-        if prev_depth is not None and prev_depth >= depth:
-            # element and dependencies already processed at equal or greater depth
-            return
-
-        self.visiting_elements.add(element)
-        for dep in element._dependencies(_Scope.RUN, recurse=False):
-            self.plan_element(dep, depth)
+        self.depth_map = {}
 
-        for dep in element._dependencies(_Scope.BUILD, recurse=False):
-            self.plan_element(dep, depth + 1)
+    # Order the elements such that every element comes after its
+    # dependencies, runtime dependencies being visited first
+    def order_elements(self, roots):
+        order = []
+        visited = BitMap()
 
-        self.depth_map[element] = depth
-        self.visiting_elements.remove(element)
+        for root in roots:
+            if root._unique_id in visited:
+                continue
+            visited.add(root._unique_id)
+
+            stack = [(root, self.direct_dependencies(root))]
+            while stack:
+                element, deps = stack[-1]
+                for dep, _ in deps:
+                    if dep._unique_id not in visited:
+                        visited.add(dep._unique_id)
+                        stack.append((dep, self.direct_dependencies(dep)))
+                        break
+                else:
+                    stack.pop()
+                    order.append(element)
+
+        return order
+
+    # Iterate over the direct dependencies of an element along
+    # with the depth increment of the dependency
+    def direct_dependencies(self, element):
+        return chain(
+            ((dep, 0) for dep in element._dependencies(_Scope.RUN, recurse=False)),
+            ((dep, 1) for dep in element._dependencies(_Scope.BUILD, recurse=False)),
+        )
 
     def plan(self, roots):
-        for root in roots:
-            self.plan_element(root, 0)
+        order = self.order_elements(roots)
+
+        # Propagate the deepest occurance of every element from
+        # the reverse dependencies, which all come later in the order
+        for element in roots:
+            self.depth_map[element] = 0
+        for element in reversed(order):
+            depth = self.depth_map[element]
+            for dep, increment in self.direct_dependencies(element):
+                if self.depth_map.get(dep, -1) < depth + increment:
+                    self.depth_map[dep] = depth + increment
 
-        depth_sorted = sorted(self.depth_map.items(), key=itemgetter(1), reverse=True)
+        depth_sorted = sorted(order, key=self.depth_map.__getitem__, reverse=True)
 
         # Set the depth of each element
-        for index, item in enumerate(depth_sorted):
-            item[0]._set_depth(index)
+        for index, element in enumerate(depth_sorted):
+            element._set_depth(index)
 
-        return [item[0] for item in depth_sorted]
+        return depth_sorted
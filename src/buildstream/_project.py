@@ -44,6 +44,7 @@ from .source import AliasSubstitution, SourceError
 
 if TYPE_CHECKING:
     from ._context import Context
+    from ._loader.junctiondirectory import JunctionDirectory
     from .plugins.elements.junction import JunctionElement
 
 
@@ -84,6 +85,7 @@ class Project:
         context: "Context",
         *,
         junction: Optional["JunctionElement"] = None,
+        junction_directory: Optional["JunctionDirectory"] = None,
         cli_options: Optional[Dict[str, str]] = None,
         default_mirror: Optional[str] = None,
         parent_loader: Optional[Loader] = None,
@@ -134,6 +136,7 @@ class Project:
         self._context: "Context" = context  # The invocation Context
         self._invoked_from_workspace_element: Optional[str] = None
         self._absolute_directory_path: Optional[Path] = None
+        self._junction_directory: Optional["JunctionDirectory"] = junction_directory  # Lazily exported sources
 
         self._default_targets: Optional[List[str]] = None  # Default target elements
         self._default_mirror: Optional[str] = default_mirror  # The name of the preferred mirror.
@@ -302,6 +305,8 @@ class Project:
     #    check_is_dir (bool): If ``True`` an error will be also raised
     #                         if path does not point to a directory.
     #                         Defaults to ``False``
+    #    _with_contents (bool): Whether the contents of a directory are needed on disk
+    #
     # Returns:
     #    (str): The project path
     #
@@ -309,11 +314,13 @@ class Project:
     #    (LoadError): In case that the project path is not valid or does not
     #                 exist
     #
-    def get_path_from_node(self, node, *, check_is_file=False, check_is_dir=False):
+    def get_path_from_node(self, node, *, check_is_file=False, check_is_dir=False, _with_contents=True):
         path_str = node.as_str()
         path = Path(path_str)
         full_path = self._absolute_directory_path / path
 
+        self._materialise(path_str, contents=_with_contents)
+
         if full_path.is_symlink():
             provenance = node.get_provenance()
             raise LoadError(
@@ -521,6 +528,7 @@ class Project:
             elements = [Element._new_from_load_element(load_element, task) for load_element in load_elements]
 
         Element._clear_meta_elements_cache()
+        Element._freeze_dependency_graph(elements)
 
         # Assert loaders after resolving everything, this is because plugin
         # loading (across junction boundaries) can also be the cause of
@@ -832,6 +840,45 @@ class Project:
                 + "Please upgrade BuildStream.",
             )
 
+    # _materialise():
+    #
+    # Ensure that a project relative path exists on disk, for subprojects
+    # of which the sources are only exported as they are needed.
+    #
+    # Args:
+    #    path (str): The project relative path
+    #    contents (bool): Whether the contents of a directory are needed
+    #
+    def _materialise(self, path, *, contents=True):
+        if self._junction_directory:
+            self._junction_directory.materialise(path, contents=contents)
+
+    # _refers_to_directory():
+    #
+    # Check whether an expanded node refers to the project directory.
+    #
+    # Args:
+    #    node (Node): The node to check
+    #
+    # Returns:
+    #    (bool): Whether any value in the node contains the project directory
+    #
+    def _refers_to_directory(self, node):
+        directory = str(self._absolute_directory_path)
+        uri = urllib.parse.quote(directory)
+
+        def values(value):
+            if isinstance(value, dict):
+                for item in value.values():
+                    yield from values(item)
+            elif isinstance(value, list):
+                for item in value:
+                    yield from values(item)
+            elif value is not None:
+                yield str(value)
+
+        return any(directory in value or uri in value for value in values(node.strip_node_info()))
+
     # _load():
     #
     # Loads the project configuration file in the project
@@ -843,6 +890,7 @@ class Project:
 
         # Load builtin default
         projectfile = os.path.join(self.directory, _PROJECT_CONF_FILE)
+        self._materialise(_PROJECT_CONF_FILE)
         self._default_config_node = _yaml.load(_site.default_project_config, shortname="projectconfig.yaml")
 
         # Load project local config and override the builtin
@@ -873,7 +921,10 @@ class Project:
         _assert_symbol_name(self.name, "project name", ref_node=pre_config_node.get_node("name"))
 
         self.element_path = os.path.join(
-            self.directory, self.get_path_from_node(pre_config_node.get_scalar("element-path"), check_is_dir=True)
+            self.directory,
+            self.get_path_from_node(
+                pre_config_node.get_scalar("element-path"), check_is_dir=True, _with_contents=False
+            ),
         )
 
         self.config.options = OptionPool(self.element_path)
@@ -935,6 +986,7 @@ class Project:
             )
 
         if self.ref_storage == ProjectRefStorage.PROJECT_REFS:
+            self._materialise("junction.refs")
             self.junction_refs.load(self.first_pass_config.options)
 
     # _load_second_pass()
@@ -993,6 +1045,7 @@ class Project:
 
         # Load project.refs if it exists, this may be ignored.
         if self.ref_storage == ProjectRefStorage.PROJECT_REFS:
+            self._materialise("project.refs")
             self.refs.load(self.options)
 
         # Parse shell options
@@ -1048,6 +1101,12 @@ class Project:
 
         # Load project options
         options_node = config.get_mapping("options", default={})
+        if any(
+            isinstance(option, MappingNode) and option.get_str("type", default=None) == "element-mask"
+            for option in options_node.values()
+        ):
+            # The valid values of element masks are all of the element files
+            self._materialise(os.path.relpath(self.element_path, self.directory))
         output.options.load(options_node)
         if self.junction:
             # load before user configuration
@@ -1154,6 +1213,13 @@ class Project:
         # Perform variable substitutions in source aliases
         variables.expand(output._aliases)
 
+        # The project-root variables hand the whole project directory to
+        # source and mirror plugins, which is then needed on disk
+        if self._junction_directory and (
+            self._refers_to_directory(mirrors_node) or self._refers_to_directory(output._aliases)
+        ):
+            self._materialise("")
+
     # _find_project_dir()
     #
     # Returns path of the project directory, if a configuration file is found
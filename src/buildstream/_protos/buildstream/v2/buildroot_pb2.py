@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: buildstream/v2/buildroot.proto
+# Protobuf Python Version: 5.29.0
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    5,
+    29,
+    0,
+    '',
+    'buildstream/v2/buildroot.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from buildstream._protos.build.bazel.remote.execution.v2 import remote_execution_pb2 as build_dot_bazel_dot_remote_dot_execution_dot_v2_dot_remote__execution__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1e\x62uildstream/v2/buildroot.proto\x12\x0e\x62uildstream.v2\x1a\x36\x62uild/bazel/remote/execution/v2/remote_execution.proto\"\xc6\x01\n\tBuildRoot\x12\x35\n\x04root\x18\x01 \x01(\x0b\x32\'.build.bazel.remote.execution.v2.Digest\x12\x36\n\x07results\x18\x02 \x03(\x0b\x32%.buildstream.v2.BuildRoot.StageResult\x1aJ\n\x0bStageResult\x12\x13\n\x0boverwritten\x18\x01 \x03(\t\x12\x0f\n\x07ignored\x18\x02 \x03(\t\x12\x15\n\rfiles_written\x18\x03 \x03(\tb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'buildstream.v2.buildroot_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_BUILDROOT']._serialized_start=107
+  _globals['_BUILDROOT']._serialized_end=305
+  _globals['_BUILDROOT_STAGERESULT']._serialized_start=231
+  _globals['_BUILDROOT_STAGERESULT']._serialized_end=305
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,24 @@
+from build.bazel.remote.execution.v2 import remote_execution_pb2 as _remote_execution_pb2
+from google.protobuf.internal import containers as _containers
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from typing import ClassVar as _ClassVar, Iterable as _Iterable, Mapping as _Mapping, Optional as _Optional, Union as _Union
+
+DESCRIPTOR: _descriptor.FileDescriptor
+
+class BuildRoot(_message.Message):
+    __slots__ = ("root", "results")
+    class StageResult(_message.Message):
+        __slots__ = ("overwritten", "ignored", "files_written")
+        OVERWRITTEN_FIELD_NUMBER: _ClassVar[int]
+        IGNORED_FIELD_NUMBER: _ClassVar[int]
+        FILES_WRITTEN_FIELD_NUMBER: _ClassVar[int]
+        overwritten: _containers.RepeatedScalarFieldContainer[str]
+        ignored: _containers.RepeatedScalarFieldContainer[str]
+        files_written: _containers.RepeatedScalarFieldContainer[str]
+        def __init__(self, overwritten: _Optional[_Iterable[str]] = ..., ignored: _Optional[_Iterable[str]] = ..., files_written: _Optional[_Iterable[str]] = ...) -> None: ...
+    ROOT_FIELD_NUMBER: _ClassVar[int]
+    RESULTS_FIELD_NUMBER: _ClassVar[int]
+    root: _remote_execution_pb2.Digest
+    results: _containers.RepeatedCompositeFieldContainer[BuildRoot.StageResult]
+    def __init__(self, root: _Optional[_Union[_remote_execution_pb2.Digest, _Mapping]] = ..., results: _Optional[_Iterable[_Union[BuildRoot.StageResult, _Mapping]]] = ...) -> None: ...
@@ -16,6 +16,7 @@ import threading
 
 import grpc
 
+from ._coroutines import to_thread
 from ._exceptions import ImplError, RemoteError
 
 
@@ -69,6 +70,15 @@ class BaseRemote:
             self._configure_protocols()
             self._initialized = True
 
+    # init_async():
+    #
+    # Like init(), but runs the initialization off the asyncio event loop,
+    # as configuring the protocols communicates with the remote.
+    #
+    async def init_async(self):
+        if not self._initialized:
+            await to_thread(self.init)
+
     # check():
     #
     # Check if the remote is functional and has all the required
@@ -0,0 +1,141 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import os
+import sqlite3
+import threading
+import time
+
+
+# RemoteMissCache()
+#
+# A persistent record of the URIs which the remote asset servers did
+# not have, such that subsequent sessions don't ask the remotes about
+# them again until the record expires.
+#
+# This is best effort, if the database can not be accessed, all URIs
+# are looked up on the remotes.
+#
+# Args:
+#    path (str): The path of the database file
+#    ttl (int): The number of seconds for which a miss is remembered
+#    ignore (bool): Whether to record misses without consulting the recorded misses
+#
+class RemoteMissCache:
+    def __init__(self, path, ttl, *, ignore=False):
+        self._path = path
+        self._ttl = ttl
+        self._ignore = ignore
+        self._connection = None
+        self._lock = threading.Lock()
+
+    # is_missing()
+    #
+    # Check whether the remote was recently found to have none of the URIs.
+    #
+    # Args:
+    #    spec (RemoteSpec): The spec of the remote
+    #    uris (list of str): The URIs to check
+    #
+    # Returns:
+    #    (bool): Whether all URIs were recently missing in the remote
+    #
+    def is_missing(self, spec, uris):
+        if self._ignore or not uris:
+            return False
+
+        expiry = time.time() - self._ttl
+        with self._lock:
+            try:
+                connection = self._connect()
+                for uri in uris:
+                    row = connection.execute(
+                        "SELECT time FROM misses WHERE url = ? AND instance = ? AND uri = ?",
+                        (spec.url, spec.instance_name or "", uri),
+                    ).fetchone()
+                    if row is None or row[0] < expiry:
+                        return False
+            except (OSError, sqlite3.Error):
+                return False
+
+        return True
+
+    # add()
+    #
+    # Record that the remote does not have the URIs.
+    #
+    # Args:
+    #    spec (RemoteSpec): The spec of the remote
+    #    uris (list of str): The missing URIs
+    #
+    def add(self, spec, uris):
+        now = time.time()
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO misses (url, instance, uri, time) VALUES (?, ?, ?, ?)",
+                        [(spec.url, spec.instance_name or "", uri, now) for uri in uris],
+                    )
+                    connection.execute("DELETE FROM misses WHERE time < ?", (now - self._ttl,))
+            except (OSError, sqlite3.Error):
+                pass
+
+    # discard()
+    #
+    # Forget recorded misses of the URIs, after they were pushed to the remote.
+    #
+    # Args:
+    #    spec (RemoteSpec): The spec of the remote
+    #    uris (list of str): The URIs
+    #
+    def discard(self, spec, uris):
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    connection.executemany(
+                        "DELETE FROM misses WHERE url = ? AND instance = ? AND uri = ?",
+                        [(spec.url, spec.instance_name or "", uri) for uri in uris],
+                    )
+            except (OSError, sqlite3.Error):
+                pass
+
+    # close()
+    #
+    # Close the database.
+    #
+    def close(self):
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self):
+        if not self._connection:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=10, check_same_thread=False)
+            try:
+                with connection:
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS misses ("
+                        "url TEXT NOT NULL, instance TEXT NOT NULL, uri TEXT NOT NULL, time REAL NOT NULL, "
+                        "PRIMARY KEY (url, instance, uri))"
+                    )
+            except (OSError, sqlite3.Error):
+                connection.close()
+                raise
+            self._connection = connection
+
+        return self._connection
@@ -15,6 +15,8 @@
 #        Tristan Daniël Maat <tristan.maat@codethink.co.uk>
 #
 
+import asyncio
+
 from .job import Job
 
 
@@ -37,7 +39,9 @@ from .job import Job
 #
 #     action_cb():
 #
-#     This function will be called in the child task
+#     This function will be called in the child task, if it is a coroutine
+#     function then it is awaited on the scheduler's event loop instead of
+#     being called in a thread.
 #
 #     Args:
 #        element (Element): The element passed to the Job() constructor
@@ -79,3 +83,9 @@ class ElementJob(Job):
 
         # Run the action
         return self._action_cb(self._element)
+
+    async def child_process_async(self):
+        return await self._action_cb(self._element)
+
+    def is_async(self):
+        return asyncio.iscoroutinefunction(self._action_cb)
@@ -29,6 +29,7 @@ from ... import utils
 from ..._utils import terminate_thread
 from ..._exceptions import ImplError, BstError, set_last_task_error, SkipJob
 from ..._message import Message, MessageType
+from ..._cas.casremote import TransferStats
 from ...types import FastEnum
 from ..._signals import TerminateException
 
@@ -86,6 +87,7 @@ class Job:
         self.id = "{}-{}".format(action_name, next(Job._id_generator))
         self.name = None  # The name of the job, set by the job's subclass
         self.action_name = action_name  # The action name for the Queue
+        self.transfer_stats = TransferStats()  # The bytes transferred by the job from and to remotes
 
         #
         # Private members
@@ -127,9 +129,17 @@ class Job:
 
         loop = asyncio.get_event_loop()
 
-        async def execute():
-            ret_code, self._result = await loop.run_in_executor(None, self.child_action)
-            await self._parent_child_completed(ret_code)
+        if self.is_async():
+
+            async def execute():
+                ret_code, self._result = await self.child_action_async()
+                await self._parent_child_completed(ret_code)
+
+        else:
+
+            async def execute():
+                ret_code, self._result = await loop.run_in_executor(None, self.child_action)
+                await self._parent_child_completed(ret_code)
 
         self._task = loop.create_task(execute())
 
@@ -150,10 +160,13 @@ class Job:
 
             with self._terminate_lock:
                 self._should_terminate = True
-                if self._thread_id is None:
+                if self.is_async():
+                    # Coroutine jobs are interrupted at their current await point
+                    self._task.cancel()
+                elif self._thread_id is None:
                     return
-
-            terminate_thread(self._thread_id)
+                else:
+                    terminate_thread(self._thread_id)
         self._terminated = True
 
     # get_terminated()
@@ -238,6 +251,32 @@ class Job:
     def child_process(self):
         raise ImplError("Job '{kind}' does not implement child_process()".format(kind=type(self).__name__))
 
+    # child_process_async()
+    #
+    # This will be awaited on the scheduler's event loop instead of
+    # child_process() for jobs which report that they are asynchronous,
+    # see Job.is_async().
+    #
+    # Returns:
+    #    (any): The result of the Job, as for child_process()
+    #
+    async def child_process_async(self):
+        raise ImplError("Job '{kind}' does not implement child_process_async()".format(kind=type(self).__name__))
+
+    # is_async()
+    #
+    # Whether this job runs as a coroutine on the scheduler's event loop,
+    # rather than in a thread of the scheduler's thread pool.
+    #
+    # Asynchronous jobs do not occupy a thread while they wait for I/O,
+    # they must never block the event loop.
+    #
+    # Returns:
+    #    (bool): True if child_process_async() should be used
+    #
+    def is_async(self):
+        return False
+
     # parent_complete()
     #
     # This will be executed in the main thread after the job finishes, and is
@@ -317,23 +356,11 @@ class Job:
             # Time, log and and run the action function
             #
             timeinfo = stack.enter_context(self._messenger.timed_suspendable())
+            stack.enter_context(self.transfer_stats.record())
 
             try:
-                filename = (
-                    stack.enter_context(
-                        self._messenger.recorded_messages(self._logfile, self._scheduler.context.logdir)
-                    )
-                    if self._logfile
-                    else None
-                )
-            except Exception as e:  # pylint: disable=broad-except
-                elapsed = datetime.datetime.now() - timeinfo.start_time
-                self.message(
-                    MessageType.ERROR,
-                    "Error opening log file: {}".format(e),
-                    elapsed=elapsed,
-                    detail=traceback.format_exc(),
-                )
+                filename = self._child_action_open_log(stack, timeinfo)
+            except _ChildActionFailed:
                 self._thread_id = None
                 return _ReturnCode.PERM_FAIL, None
 
@@ -348,63 +375,159 @@ class Job:
                 try:
                     # Try the task action
                     result = self.child_process()  # pylint: disable=assignment-from-no-return
-                except SkipJob as e:
-                    elapsed = datetime.datetime.now() - timeinfo.start_time
-                    self.message(MessageType.SKIPPED, str(e), elapsed=elapsed, logfile=filename)
-
-                    # Alert parent of skip by return code
-                    return _ReturnCode.SKIPPED, None
-                except BstError as e:
-                    elapsed = datetime.datetime.now() - timeinfo.start_time
-                    retry_flag = e.temporary
-
-                    if retry_flag and (self._tries <= self._max_retries):
-                        self.message(
-                            MessageType.FAIL,
-                            "Try #{} failed, retrying".format(self._tries),
-                            elapsed=elapsed,
-                            logfile=filename,
-                        )
-                    else:
-                        self.message(
-                            MessageType.FAIL,
-                            str(e),
-                            elapsed=elapsed,
-                            detail=e.detail,
-                            logfile=filename,
-                            sandbox=e.sandbox,
-                        )
-
-                    # Report the exception to the parent (for internal testing purposes)
-                    set_last_task_error(e.domain, e.reason)
-
-                    # Set return code based on whether or not the error was temporary.
-                    #
-                    return _ReturnCode.FAIL if retry_flag else _ReturnCode.PERM_FAIL, None
-                except Exception:  # pylint: disable=broad-except
-
-                    # If an unhandled (not normalized to BstError) occurs, that's a bug,
-                    # send the traceback and formatted exception back to the frontend
-                    # and print it to the log file.
-                    #
-                    elapsed = datetime.datetime.now() - timeinfo.start_time
-                    detail = "An unhandled exception occured:\n\n{}".format(traceback.format_exc())
-
-                    self.message(MessageType.BUG, self.action_name, elapsed=elapsed, detail=detail, logfile=filename)
-                    # Unhandled exceptions should permenantly fail
-                    return _ReturnCode.PERM_FAIL, None
-
+                except Exception as e:  # pylint: disable=broad-except
+                    return self._child_action_failed(e, timeinfo, filename)
                 else:
-                    # No exception occurred in the action
-                    elapsed = datetime.datetime.now() - timeinfo.start_time
-                    self.message(MessageType.SUCCESS, self.action_name, elapsed=elapsed, logfile=filename)
-
-                    # Shutdown needs to stay outside of the above context manager,
-                    # make sure we dont try to handle SIGTERM while the process
-                    # is already busy in sys.exit()
-                    return _ReturnCode.OK, result
+                    return self._child_action_succeeded(result, timeinfo, filename)
                 finally:
                     self._thread_id = None
             except TerminateException:
                 self._thread_id = None
                 return _ReturnCode.TERMINATED, None
+
+    # child_action_async()
+    #
+    # Perform the action of an asynchronous job on the event loop, this
+    # awaits child_process_async().
+    #
+    # This runs in its own asyncio task, so the messenger context set up
+    # here is local to this job.
+    #
+    async def child_action_async(self):
+        self._messenger.setup_new_action_context(
+            self.action_name, self._message_element_name, self._message_element_key
+        )
+
+        with ExitStack() as stack:
+            timeinfo = stack.enter_context(self._messenger.timed_suspendable())
+            stack.enter_context(self.transfer_stats.record())
+
+            try:
+                filename = self._child_action_open_log(stack, timeinfo)
+            except _ChildActionFailed:
+                return _ReturnCode.PERM_FAIL, None
+
+            self.message(MessageType.START, self.action_name, logfile=filename)
+
+            if self._should_terminate:
+                return _ReturnCode.TERMINATED, None
+
+            try:
+                result = await self.child_process_async()
+            except asyncio.CancelledError:
+                return _ReturnCode.TERMINATED, None
+            except Exception as e:  # pylint: disable=broad-except
+                return self._child_action_failed(e, timeinfo, filename)
+            else:
+                return self._child_action_succeeded(result, timeinfo, filename)
+
+    # _child_action_open_log()
+    #
+    # Open the log file of the job if it has one.
+    #
+    # Args:
+    #    stack (ExitStack): The stack to enter the recording context into
+    #    timeinfo (_TimeData): The start time of the action
+    #
+    # Returns:
+    #    (str): The log filename, or None if the job does not log to a file
+    #
+    # Raises:
+    #    (_ChildActionFailed): If the log file could not be opened, the
+    #                          error has already been reported
+    #
+    def _child_action_open_log(self, stack, timeinfo):
+        if not self._logfile:
+            return None
+
+        try:
+            return stack.enter_context(
+                self._messenger.recorded_messages(self._logfile, self._scheduler.context.logdir)
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            elapsed = datetime.datetime.now() - timeinfo.start_time
+            self.message(
+                MessageType.ERROR,
+                "Error opening log file: {}".format(e),
+                elapsed=elapsed,
+                detail=traceback.format_exc(),
+            )
+            raise _ChildActionFailed() from e
+
+    # _child_action_succeeded()
+    #
+    # Report a successful action.
+    #
+    # Returns:
+    #    (_ReturnCode, any): The return code and result of the action
+    #
+    def _child_action_succeeded(self, result, timeinfo, filename):
+        # No exception occurred in the action
+        elapsed = datetime.datetime.now() - timeinfo.start_time
+        self.message(MessageType.SUCCESS, self.action_name, elapsed=elapsed, logfile=filename)
+
+        return _ReturnCode.OK, result
+
+    # _child_action_failed()
+    #
+    # Report an exception raised by the action.
+    #
+    # Args:
+    #    e (Exception): The exception raised by the action
+    #
+    # Returns:
+    #    (_ReturnCode, None): The return code for the failure
+    #
+    def _child_action_failed(self, e, timeinfo, filename):
+        elapsed = datetime.datetime.now() - timeinfo.start_time
+
+        if isinstance(e, SkipJob):
+            self.message(MessageType.SKIPPED, str(e), elapsed=elapsed, logfile=filename)
+
+            # Alert parent of skip by return code
+            return _ReturnCode.SKIPPED, None
+
+        if isinstance(e, BstError):
+            retry_flag = e.temporary
+
+            if retry_flag and (self._tries <= self._max_retries):
+                self.message(
+                    MessageType.FAIL,
+                    "Try #{} failed, retrying".format(self._tries),
+                    elapsed=elapsed,
+                    logfile=filename,
+                )
+            else:
+                self.message(
+                    MessageType.FAIL,
+                    str(e),
+                    elapsed=elapsed,
+                    detail=e.detail,
+                    logfile=filename,
+                    sandbox=e.sandbox,
+                )
+
+            # Report the exception to the parent (for internal testing purposes)
+            set_last_task_error(e.domain, e.reason)
+
+            # Set return code based on whether or not the error was temporary.
+            #
+            return _ReturnCode.FAIL if retry_flag else _ReturnCode.PERM_FAIL, None
+
+        # If an unhandled (not normalized to BstError) occurs, that's a bug,
+        # send the traceback and formatted exception back to the frontend
+        # and print it to the log file.
+        #
+        detail = "An unhandled exception occured:\n\n{}".format(traceback.format_exc())
+
+        self.message(MessageType.BUG, self.action_name, elapsed=elapsed, detail=detail, logfile=filename)
+        # Unhandled exceptions should permenantly fail
+        return _ReturnCode.PERM_FAIL, None
+
+
+# _ChildActionFailed
+#
+# Raised internally when the action of a job failed before it could run.
+#
+class _ChildActionFailed(Exception):
+    pass
@@ -0,0 +1,160 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import asyncio
+import heapq
+from collections import deque
+
+from .resources import ResourceType
+from .._exceptions import BstError
+from ..types import _Scope
+
+
+# Prefetcher()
+#
+# Speculatively fetches the files of dependency artifacts of the next
+# elements to be built, when a remote cache (storage-service) is
+# configured, such that build jobs do not have to wait for the blobs
+# to be downloaded when staging their dependencies.
+#
+# Upcoming builds are considered in the order they would be built in,
+# and prefetches only ever use a limited number of DOWNLOAD resource
+# tokens, such that they don't starve pull and fetch jobs.
+#
+# Prefetching is best effort, failures are ignored as the build job
+# will fetch anything missing itself and report errors.
+#
+# Args:
+#    scheduler (Scheduler): The scheduler
+#    lookahead (int): The number of upcoming builds to prefetch for
+#    max_jobs (int): The maximum number of simultaneous prefetches
+#
+class Prefetcher:
+    def __init__(self, scheduler, *, lookahead, max_jobs):
+        self._scheduler = scheduler
+        self._resources = scheduler.resources
+        self._lookahead = lookahead
+        self._max_jobs = max_jobs
+
+        self._upcoming = []  # Heap of (depth, order, element) of elements to be built
+        self._upcoming_ids = set()  # Unique ids of elements added to the heap
+        self._started_ids = set()  # Unique ids of elements which are no longer upcoming
+        self._order = 0  # Counter to keep the order of elements with the same depth stable
+        self._window = []  # Upcoming elements whose dependencies are being prefetched
+        self._candidates = deque()  # Dependencies to prefetch
+        self._requested_ids = set()  # Unique ids of dependencies already considered
+        self._tasks = set()  # Running prefetch tasks
+
+        self.prefetched = 0  # The number of artifacts which were prefetched
+
+    # enabled
+    #
+    # Whether speculative prefetching is enabled at all.
+    #
+    @property
+    def enabled(self):
+        return self._lookahead > 0 and self._max_jobs > 0
+
+    # active
+    #
+    # Whether any prefetches are running, the scheduler must
+    # not stop before they complete.
+    #
+    @property
+    def active(self):
+        return bool(self._tasks)
+
+    # add_upcoming()
+    #
+    # Notify the prefetcher of an element which is going to be built.
+    #
+    # Args:
+    #    element (Element): An element which is pending or ready to be built
+    #
+    def add_upcoming(self, element):
+        if not self.enabled or element._unique_id in self._upcoming_ids:
+            return
+
+        self._upcoming_ids.add(element._unique_id)
+        heapq.heappush(self._upcoming, (element._depth, self._order, element))
+        self._order += 1
+
+    # started()
+    #
+    # Notify the prefetcher that an element is being built or skipped,
+    # such that it is no longer considered upcoming.
+    #
+    # Args:
+    #    element (Element): The element
+    #
+    def started(self, element):
+        if self.enabled:
+            self._started_ids.add(element._unique_id)
+
+    # schedule()
+    #
+    # Start as many prefetches as the budget allows. This is called by
+    # the scheduler after all queues have started their jobs.
+    #
+    def schedule(self):
+        if not self.enabled:
+            return
+
+        # Advance the window of upcoming builds
+        self._window = [element for element in self._window if element._unique_id not in self._started_ids]
+        while len(self._window) < self._lookahead and self._upcoming:
+            _, _, element = heapq.heappop(self._upcoming)
+            if element._unique_id in self._started_ids:
+                continue
+
+            self._window.append(element)
+            for dep in element._dependencies(_Scope.BUILD):
+                if dep._unique_id not in self._requested_ids:
+                    self._requested_ids.add(dep._unique_id)
+                    self._candidates.append(dep)
+
+        while self._candidates and len(self._tasks) < self._max_jobs:
+            dep = self._candidates[0]
+
+            # Dependencies which are not cached yet are going to be built
+            # locally or pulled by the pull queue
+            if not dep._cached_success():
+                self._candidates.popleft()
+                continue
+
+            if not self._resources.reserve([ResourceType.DOWNLOAD]):
+                break
+
+            self._candidates.popleft()
+            self._tasks.add(self._scheduler.loop.create_task(self._prefetch(dep)))
+
+    # cancel()
+    #
+    # Cancel all running prefetches, this is called when the scheduler
+    # is terminated.
+    #
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+
+    async def _prefetch(self, element):
+        try:
+            await element._prefetch_artifact_files_async()
+            self.prefetched += 1
+            element.status("Prefetched artifact files")
+        except BstError as e:
+            element.status("Failed to prefetch artifact files", detail=str(e))
+        finally:
+            self._tasks.discard(asyncio.current_task())
+            self._resources.release([ResourceType.DOWNLOAD])
+            self._scheduler._sched()
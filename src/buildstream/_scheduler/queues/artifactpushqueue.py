@@ -44,6 +44,6 @@ class ArtifactPushQueue(Queue):
         return QueueStatus.READY
 
     @staticmethod
-    def _push_or_skip(element):
-        if not element._push():
+    async def _push_or_skip(element):
+        if not await element._push_async():
             raise SkipJob(ArtifactPushQueue.action_name)
@@ -28,20 +28,49 @@ class BuildQueue(Queue):
     complete_name = "Built"
     resources = [ResourceType.PROCESS, ResourceType.CACHE]
 
+    def __init__(self, scheduler, *, imperative=False):
+        super().__init__(scheduler, imperative=imperative)
+
+        # Unique IDs of elements whose build jobs hold a jobserver slot
+        self._jobserver_slots = set()
+
     def get_process_func(self):
         return BuildQueue._assemble_element
 
     def status(self, element):
+        prefetcher = self._scheduler.prefetcher
+
         if element._cached_success():
+            prefetcher.started(element)
             return QueueStatus.SKIP
 
+        prefetcher.add_upcoming(element)
+
         if not element._buildable():
             return QueueStatus.PENDING
 
         return QueueStatus.READY
 
+    def harvest_jobs(self):
+        jobs = super().harvest_jobs()
+        jobserver = self._scheduler.context.jobserver
+        for job in jobs:
+            element = job.get_element()
+            self._scheduler.prefetcher.started(element)
+
+            # Every build holds a slot of the jobserver, for the toplevel
+            # build process. If none is available, all slots are used by
+            # parallel jobs of other builds which will return them soon.
+            if jobserver and jobserver.acquire():
+                self._jobserver_slots.add(element._unique_id)
+        return jobs
+
     def done(self, job, element, result, status):
 
+        if element._unique_id in self._jobserver_slots:
+            self._jobserver_slots.discard(element._unique_id)
+            self._scheduler.context.jobserver.release()
+
         # Inform element in main process that assembly is done
         element._assemble_done(status is JobStatus.OK)
 
@@ -12,6 +12,8 @@
 #  limitations under the License.
 #
 
+import asyncio
+
 from . import Queue, QueueStatus
 from ..resources import ResourceType
 from ..jobs import JobStatus
@@ -63,16 +65,22 @@ class CacheQueryQueue(Queue):
             if not element._pull_pending():
                 element._load_artifact_done()
 
+            if self._scheduler.context.events:
+                self._scheduler.context.events.cache_queried(element)
+
+    # The artifact queries are awaited on the scheduler's event loop, so
+    # that many cache queries can be in flight without occupying threads.
+    #
     @staticmethod
-    def _query_artifacts_or_sources(element):
-        element._load_artifact(pull=False)
+    async def _query_artifacts_or_sources(element):
+        await element._load_artifact_async(pull=False)
         if not element._can_query_cache() or not element._cached_success():
-            element._query_source_cache()
+            await asyncio.to_thread(element._query_source_cache)
 
     @staticmethod
-    def _query_artifacts_and_sources(element):
-        element._load_artifact(pull=False)
-        element._query_source_cache()
+    async def _query_artifacts_and_sources(element):
+        await element._load_artifact_async(pull=False)
+        await asyncio.to_thread(element._query_source_cache)
 
     @staticmethod
     def _query_sources(element):
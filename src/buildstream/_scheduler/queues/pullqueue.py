@@ -46,7 +46,14 @@ class PullQueue(Queue):
 
         element._load_artifact_done()
 
+        events = self._scheduler.context.events
+        if events:
+            if status is JobStatus.OK:
+                events.cache_hit(element._get_full_name(), remote=True)
+            else:
+                events.cache_miss(element._get_full_name())
+
     @staticmethod
-    def _pull_or_skip(element):
-        if not element._load_artifact(pull=True):
+    async def _pull_or_skip(element):
+        if not await element._load_artifact_async(pull=True):
             raise SkipJob(PullQueue.action_name)
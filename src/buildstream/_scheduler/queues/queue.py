@@ -116,6 +116,11 @@ class Queue:
     # lists, dicts, numbers, but not Element instances). This is sent to back
     # to the main process.
     #
+    # The callable may also be a coroutine function, in which case it is
+    # awaited directly on the scheduler's event loop rather than being run
+    # in a thread. Such callables must not block, any blocking work should
+    # be delegated to a thread with `asyncio.to_thread()`.
+    #
     # This method is the only way for a queue to affect elements, and so is
     # not optional to implement.
     #
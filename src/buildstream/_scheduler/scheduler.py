@@ -29,12 +29,21 @@ import threading
 from concurrent.futures import ThreadPoolExecutor
 
 # Local imports
-from .resources import Resources
+from .resources import Resources, ResourceType
+from .prefetcher import Prefetcher
 from .jobs import JobStatus
 from ..types import FastEnum
 from .._profile import Topics, PROFILER
 from .. import _signals
 
+# The names of the resources in the timeline
+_RESOURCE_NAMES = {
+    ResourceType.CACHE: "cache",
+    ResourceType.DOWNLOAD: "download",
+    ResourceType.PROCESS: "process",
+    ResourceType.UPLOAD: "upload",
+}
+
 
 # A decent return code for Scheduler.run()
 class SchedStatus(FastEnum):
@@ -109,6 +118,7 @@ class Scheduler:
         self._interrupt_callback = interrupt_callback
 
         self.resources = Resources(context.sched_builders, context.sched_fetchers, context.sched_pushers)
+        self.prefetcher = self._create_prefetcher()
 
         # Ensure that the forkserver is started before we start.
         # This is best run before we do any GRPC connections to casd or have
@@ -170,6 +180,7 @@ class Scheduler:
                     # Run the queues
                     self._sched()
                     self.loop.run_forever()
+                    self.loop.run_until_complete(casd_process_manager.close_async_channel())
                     self.loop.close()
 
             # Invoke the ticker callback a final time to render pending messages
@@ -206,6 +217,8 @@ class Scheduler:
 
             self.queues.clear()
 
+        self.prefetcher = self._create_prefetcher()
+
     # terminate()
     #
     # Forcefully terminates all ongoing jobs.
@@ -284,12 +297,44 @@ class Scheduler:
 
         self._state.remove_task(job.id)
 
+        if self.context.tracer:
+            self.context.tracer.job_completed(
+                job.action_name,
+                job.name,
+                [_RESOURCE_NAMES[resource] for resource in job.queue.resources],
+                status.name.lower(),
+            )
+            self._trace_active_jobs()
+
+        if self.context.events:
+            self.context.events.job_finished(
+                job.id,
+                job.action_name,
+                job.name,
+                status.name.lower(),
+                job.transfer_stats.bytes_downloaded,
+                job.transfer_stats.bytes_upload_requested,
+            )
+
         self._sched()
 
     #######################################################
     #                  Local Private Methods              #
     #######################################################
 
+    # _create_prefetcher()
+    #
+    # Returns:
+    #    (Prefetcher): A new prefetcher for upcoming builds
+    #
+    def _create_prefetcher(self):
+        # Dependency artifact files only need to be prefetched with a remote cache
+        return Prefetcher(
+            self,
+            lookahead=self.context.sched_prefetch_lookahead if self.context.remote_cache_spec else 0,
+            max_jobs=min(self.context.sched_prefetchers, self.context.sched_fetchers),
+        )
+
     # _abort_on_casd_failure()
     #
     # Abort if casd failed while running.
@@ -330,10 +375,29 @@ class Scheduler:
         # are always started.
         #
         self._active_jobs.append(job)
+        if self.context.tracer:
+            self.context.tracer.job_started(job.action_name, job.name)
+            self._trace_active_jobs()
+
+        if self.context.events:
+            self.context.events.job_started(job.id, job.action_name, job.name)
+
         job.start()
 
         self._state.add_task(job.id, job.action_name, job.name, self._state.elapsed_time())
 
+    # _trace_active_jobs()
+    #
+    # Record the number of active jobs holding each type of resource in the timeline.
+    #
+    def _trace_active_jobs(self):
+        counts = {name: 0 for name in _RESOURCE_NAMES.values()}
+        for job in self._active_jobs:
+            for resource in job.queue.resources:
+                counts[_RESOURCE_NAMES[resource]] += 1
+
+        self.context.tracer.counter("Active jobs", counts)
+
     # _sched_queue_jobs()
     #
     # Ask the queues what jobs they want to schedule and schedule
@@ -396,6 +460,10 @@ class Scheduler:
         for job in ready:
             self._start_job(job)
 
+        # Use any remaining download budget to prefetch for upcoming builds
+        if self._queue_jobs:
+            self.prefetcher.schedule()
+
     # _sched()
     #
     # Run any jobs which are ready to run, or quit the main loop
@@ -434,7 +502,7 @@ class Scheduler:
             #
             # If nothing is ticking then bail out
             #
-            if not self._active_jobs:
+            if not self._active_jobs and not self.prefetcher.active:
                 self.loop.stop()
 
         if self._sched_handle is None:
@@ -450,7 +518,7 @@ class Scheduler:
             self.suspended = True
             _signals.is_not_suspended.clear()
 
-            for suspender in reversed(_signals.suspendable_stack):
+            for suspender in reversed(_signals.suspenders()):
                 suspender.suspend()
 
     # _resume_jobs()
@@ -459,7 +527,7 @@ class Scheduler:
     #
     def _resume_jobs(self):
         if self.suspended:
-            for suspender in _signals.suspendable_stack:
+            for suspender in _signals.suspenders():
                 suspender.resume()
 
             _signals.is_not_suspended.set()
@@ -518,9 +586,18 @@ class Scheduler:
         for job in self._active_jobs:
             job.terminate()
 
+        self.prefetcher.cancel()
+
     # Regular timeout for driving status in the UI
     def _tick(self):
         self._ticker_callback()
+
+        # Sample the cache usage for the timeline
+        if self.context.tracer:
+            usage = self.context.get_cascache().get_cache_usage()
+            if usage.used_size is not None:
+                self.context.tracer.counter("Cache usage", {"bytes": usage.used_size})
+
         self.loop.call_later(1, self._tick)
 
     def _handle_exception(self, loop, context: dict) -> None:
@@ -13,6 +13,7 @@
 #
 #  Authors:
 #        Tristan Van Berkom <tristan.vanberkom@codethink.co.uk>
+import asyncio
 import os
 import signal
 import sys
@@ -20,7 +21,7 @@ import threading
 import traceback
 from contextlib import contextmanager, ExitStack
 from collections import deque
-from typing import Callable, Deque
+from typing import Callable, Deque, Dict, List, Optional
 
 # Global per process state for handling of sigterm/sigtstp/sigcont,
 # note that it is expected that this only ever be used by new processes
@@ -29,6 +30,13 @@ from typing import Callable, Deque
 terminator_stack: Deque[Callable] = deque()
 suspendable_stack: Deque[Callable] = deque()
 
+# Handlers registered by asyncio tasks, keyed by task. Tasks interleave
+# on the main thread, so unlike threads they do not enter and leave
+# these contexts in stack order.
+#
+task_terminator_stacks: Dict[asyncio.Task, Deque[Callable]] = {}
+task_suspendable_stacks: Dict[asyncio.Task, Deque["Suspender"]] = {}
+
 terminator_lock = threading.Lock()
 suspendable_lock = threading.Lock()
 
@@ -47,12 +55,90 @@ class TerminateException(BaseException):
     pass
 
 
+# _current_task()
+#
+# Returns:
+#    (asyncio.Task): The asyncio task running on the main thread, or None
+#
+def _current_task() -> Optional[asyncio.Task]:
+    if threading.current_thread() != threading.main_thread():
+        return None
+
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        # No running event loop
+        return None
+
+
+# _push_handler()
+#
+# Register a handler on the stack of the current asyncio task, or on
+# the process wide stack outside of asyncio tasks. The outermost handler
+# installs the signal handler, it is always registered process wide.
+#
+# Args:
+#    stack (Deque): The process wide stack
+#    task_stacks (Dict): The stacks of asyncio tasks
+#    lock (threading.Lock): The lock protecting the stacks
+#    handler: The handler to register
+#
+# Returns:
+#    (asyncio.Task): The task the handler was registered for, or None
+#    (Deque): The stack the handler was registered on
+#
+def _push_handler(stack, task_stacks, lock, handler):
+    with lock:
+        task = _current_task() if stack else None
+        if task is not None:
+            stack = task_stacks.setdefault(task, deque())
+        stack.append(handler)
+
+    return task, stack
+
+
+# _pop_handler()
+#
+# Unregister a handler registered with _push_handler()
+#
+# Args:
+#    task (asyncio.Task): The task returned by _push_handler()
+#    stack (Deque): The stack returned by _push_handler()
+#    task_stacks (Dict): The stacks of asyncio tasks
+#    lock (threading.Lock): The lock protecting the stacks
+#    handler: The handler to unregister
+#
+def _pop_handler(task, stack, task_stacks, lock, handler):
+    with lock:
+        stack.remove(handler)
+        if task is not None and not stack:
+            del task_stacks[task]
+
+
+# suspenders()
+#
+# Returns:
+#    (list): The registered Suspender objects, from outermost to innermost
+#
+def suspenders() -> List["Suspender"]:
+    with suspendable_lock:
+        return _all_handlers(suspendable_stack, task_suspendable_stacks)
+
+
+# Asyncio tasks run within the process wide handlers of the scheduler
+def _all_handlers(stack, task_stacks):
+    handlers = list(stack)
+    for task_stack in list(task_stacks.values()):
+        handlers.extend(task_stack)
+    return handlers
+
+
 # Per process SIGTERM handler
 def terminator_handler(signal_, frame):
     exit_code = -1
 
-    while terminator_stack:
-        terminator_ = terminator_stack.pop()
+    # Don't take the lock here, the interrupted code may be holding it
+    for terminator_ in reversed(_all_handlers(terminator_stack, task_terminator_stacks)):
         try:
             terminator_()
         except SystemExit as e:
@@ -100,8 +186,7 @@ def terminator(terminate_func):
 
     assert threading.current_thread() == threading.main_thread() or not outermost
 
-    with terminator_lock:
-        terminator_stack.append(terminate_func)
+    task, stack = _push_handler(terminator_stack, task_terminator_stacks, terminator_lock, terminate_func)
 
     if outermost:
         original_handler = signal.signal(signal.SIGTERM, terminator_handler)
@@ -115,8 +200,7 @@ def terminator(terminate_func):
         if outermost:
             signal.signal(signal.SIGTERM, original_handler)
 
-        with terminator_lock:
-            terminator_stack.remove(terminate_func)
+        _pop_handler(task, stack, task_terminator_stacks, terminator_lock, terminate_func)
 
 
 # Just a simple object for holding on to two callbacks
@@ -132,7 +216,8 @@ def suspend_handler(sig, frame):
 
     # Suspend callbacks from innermost frame first
     with suspendable_lock:
-        for suspender in reversed(suspendable_stack):
+        suspenders_ = _all_handlers(suspendable_stack, task_suspendable_stacks)
+        for suspender in reversed(suspenders_):
             suspender.suspend()
 
         # Use SIGSTOP directly now on self, dont introduce more SIGTSTP
@@ -143,7 +228,7 @@ def suspend_handler(sig, frame):
         os.kill(os.getpid(), signal.SIGSTOP)
 
         # Resume callbacks from outermost frame inwards
-        for suspender in suspendable_stack:
+        for suspender in suspenders_:
             suspender.resume()
 
     is_not_suspended.set()
@@ -184,8 +269,7 @@ def suspendable(suspend_callback, resume_callback):
 
     suspender = Suspender(suspend_callback, resume_callback)
 
-    with suspendable_lock:
-        suspendable_stack.append(suspender)
+    task, stack = _push_handler(suspendable_stack, task_suspendable_stacks, suspendable_lock, suspender)
 
     if outermost:
         original_stop = signal.signal(signal.SIGTSTP, suspend_handler)
@@ -196,8 +280,7 @@ def suspendable(suspend_callback, resume_callback):
         if outermost:
             signal.signal(signal.SIGTSTP, original_stop)
 
-        with suspendable_lock:
-            suspendable_stack.remove(suspender)
+        _pop_handler(task, stack, task_suspendable_stacks, suspendable_lock, suspender)
 
 
 # blocked()
@@ -230,6 +230,8 @@ class Stream:
                             element._query_source_cache()
                         if not element._pull_pending():
                             element._load_artifact_done()
+                        if self._context.events:
+                            self._context.events.cache_queried(element)
                     elif element._has_all_sources_resolved():
                         element._query_source_cache()
 
@@ -439,7 +441,10 @@ class Stream:
 
         # Enqueue elements
         self._enqueue_plan(elements)
-        self._run(announce_session=True)
+        try:
+            self._run(announce_session=True)
+        finally:
+            self._context.compilercache.report(self._context.messenger)
 
     # fetch()
     #
@@ -1423,6 +1428,7 @@ class Stream:
 
         ArtifactElement.clear_artifact_name_cache()
         ArtifactProject.clear_project_cache()
+        Element._freeze_dependency_graph(artifacts)
         return list(artifacts)
 
     # _load_elements()
@@ -1518,6 +1524,11 @@ class Stream:
     def _resolve_cached_remotely(self, targets):
         with self._context.messenger.simple_task("Querying remotes for cached status", silent_nested=True) as task:
             task.set_maximum_progress(len(targets))
+
+            # Query the remotes for all targets at once, the
+            # results are remembered by the artifact cache
+            self._artifacts.check_remotes(targets)
+
             for element in targets:
                 element._cached_remotely()
                 task.add_current_progress()
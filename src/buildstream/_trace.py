@@ -0,0 +1,172 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import datetime
+import json
+import threading
+from typing import Dict, Optional, TextIO, Tuple
+
+from ._message import Message, MessageType
+
+# The pid under which all events are recorded
+_PID = 1
+
+# The track of activities which do not belong to a job
+_MAIN_TRACK = 0
+
+
+# TraceWriter()
+#
+# Writes a timeline of the session in the Chrome trace event format,
+# which can be loaded in Perfetto or chrome://tracing.
+#
+# Every job is a span on a track of its own while it runs, and the timed
+# activities of a job, such as staging or running commands, are nested
+# spans on the same track. Activities outside of jobs are recorded on the
+# main track.
+#
+# Events are written as they complete, using the JSON array format of
+# which the closing bracket is optional, so that the timeline of an
+# ongoing or interrupted session can be loaded as well.
+#
+# Args:
+#    file: The open file to write the events to
+#
+class TraceWriter:
+    def __init__(self, file: TextIO) -> None:
+        self._file = file
+        self._lock = threading.Lock()
+        self._start_time = datetime.datetime.now()
+        self._first_event = True
+
+        # The track and start time of every running job, by action name and element name
+        self._jobs: Dict[Tuple[str, Optional[str]], Tuple[int, datetime.datetime]] = {}
+        self._named_tracks = set()
+
+        self._file.write("[\n")
+        self._write({"name": "process_name", "ph": "M", "pid": _PID, "args": {"name": "BuildStream"}})
+        self._name_track(_MAIN_TRACK, "Main")
+
+    # job_started()
+    #
+    # Record that a job started, the span of the job is written when it completes.
+    #
+    # Args:
+    #    action_name: The action name of the queue of the job
+    #    element_name: The full name of the element of the job, if any
+    #
+    def job_started(self, action_name: str, element_name: Optional[str]) -> None:
+        with self._lock:
+            used_tracks = {track for track, _ in self._jobs.values()}
+            track = next(track for track in range(1, len(used_tracks) + 2) if track not in used_tracks)
+            self._jobs[(action_name, element_name)] = (track, datetime.datetime.now())
+            self._name_track(track, "Job slot {}".format(track))
+
+    # job_completed()
+    #
+    # Write the span of a completed job.
+    #
+    # Args:
+    #    action_name: The action name of the queue of the job
+    #    element_name: The full name of the element of the job, if any
+    #    resources: The names of the resources held by the job
+    #    outcome: The completion status of the job
+    #
+    def job_completed(self, action_name: str, element_name: Optional[str], resources, outcome: str) -> None:
+        with self._lock:
+            track, start_time = self._jobs.pop((action_name, element_name))
+            self._write_span(
+                "{} {}".format(action_name, element_name) if element_name else action_name,
+                "job",
+                track,
+                start_time,
+                datetime.datetime.now() - start_time,
+                {"queue": action_name, "element": element_name, "resources": list(resources), "outcome": outcome},
+            )
+
+    # activity()
+    #
+    # Write the span of a completed timed activity.
+    #
+    # Args:
+    #    message: A SUCCESS or FAIL message of the activity
+    #
+    def activity(self, message: Message) -> None:
+        assert message.elapsed is not None
+        start_time = message.creation_time - message.elapsed
+
+        args = {"outcome": message.message_type}
+        if message.element_name:
+            args["element"] = message.element_name
+        if message.detail and message.message_type == MessageType.SUCCESS:
+            args["detail"] = message.detail
+
+        with self._lock:
+            if message.action_name:
+                job = self._jobs.get((message.action_name, message.task_element_name))
+                track = job[0] if job else _MAIN_TRACK
+            else:
+                track = _MAIN_TRACK
+            self._write_span(message.message, "activity", track, start_time, message.elapsed, args)
+
+    # counter()
+    #
+    # Write the current values of a counter.
+    #
+    # Args:
+    #    name: The name of the counter
+    #    values: The values of the series of the counter, by series name
+    #
+    def counter(self, name: str, values: Dict[str, int]) -> None:
+        with self._lock:
+            self._write(
+                {"name": name, "ph": "C", "pid": _PID, "ts": self._timestamp(datetime.datetime.now()), "args": values}
+            )
+            self._file.flush()
+
+    # close()
+    #
+    # Terminate the timeline and close the file.
+    #
+    def close(self) -> None:
+        with self._lock:
+            self._file.write("\n]\n")
+            self._file.close()
+
+    def _name_track(self, track: int, name: str) -> None:
+        if track not in self._named_tracks:
+            self._named_tracks.add(track)
+            self._write({"name": "thread_name", "ph": "M", "pid": _PID, "tid": track, "args": {"name": name}})
+
+    def _write_span(self, name, category, track, start_time, duration, args) -> None:
+        self._write(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "pid": _PID,
+                "tid": track,
+                "ts": self._timestamp(start_time),
+                "dur": int(duration.total_seconds() * 1000000),
+                "args": args,
+            }
+        )
+
+    def _write(self, event) -> None:
+        if not self._first_event:
+            self._file.write(",\n")
+        self._first_event = False
+        self._file.write(json.dumps(event))
+
+    def _timestamp(self, time: datetime.datetime) -> int:
+        return int((time - self._start_time).total_seconds() * 1000000)
@@ -62,8 +62,10 @@ Class Reference
 ---------------
 """
 
+import asyncio
 import os
 import re
+import shutil
 import stat
 import copy
 import warnings
@@ -92,7 +94,10 @@ from .sandbox._config import SandboxConfig
 from .sandbox._sandboxremote import SandboxRemote
 from .types import _HostMount, _Scope, _CacheBuildTrees, _KeyStrength, OverlapAction, _DisplayKey
 from ._artifact import Artifact
+from ._buildrootcache import BuildRootCache
 from ._elementproxy import ElementProxy
+from ._dependencygraph import DependencyGraph
+from ._jobserver import JOBSERVER_SANDBOX_DIRECTORY
 from ._elementsources import ElementSources
 from ._loader import Symbol, DependencyType, MetaSource
 from ._overlapcollector import OverlapCollector
@@ -273,6 +278,8 @@ class Element(Plugin):
         self.__reverse_build_deps = set()  # type: Set[Element]
         # Direct reverse runtime dependency Elements
         self.__reverse_runtime_deps = set()  # type: Set[Element]
+        # The frozen dependency graph this element belongs to, once loading has completed
+        self.__dependency_graph = None  # type: Optional[DependencyGraph]
         self.__build_deps_uncached = None  # Build dependencies which are not yet cached
         self.__runtime_deps_uncached = None  # Runtime dependencies which are not yet cached
         self.__ready_for_runtime_and_cached = False  # Whether all runtime deps are cached, as well as the element
@@ -295,6 +302,8 @@ class Element(Plugin):
         self.__artifact = None  # type: Optional[Artifact]
         self.__dynamic_public = None
         self.__sandbox_config = None  # type: Optional[SandboxConfig]
+        self.__incremental_build = False  # Whether the sources were staged on top of a previous build tree
+        self.__assembling = False  # Whether the element is being assembled, sources are then staged incrementally
 
         # Callbacks
         self.__required_callback = None  # Callback to Queues
@@ -697,8 +706,9 @@ class Element(Plugin):
         assert overlap_collector is not None, "Attempted to stage artifacts outside of Element.stage()"
 
         with overlap_collector.session(action, path):
-            for dep in self.dependencies(selection):
-                dep._stage_artifact(sandbox, path=path, include=include, exclude=exclude, orphans=orphans, owner=self)
+            self.__stage_dependencies(
+                sandbox, self.dependencies(selection), path=path, include=include, exclude=exclude, orphans=orphans
+            )
 
     def integrate(self, sandbox: "Sandbox") -> None:
         """Integrate currently staged filesystem against this artifact.
@@ -813,9 +823,14 @@ class Element(Plugin):
         """
         context = self._get_context()
 
-        if self._get_workspace() or context.cache_buildtrees == _CacheBuildTrees.ALWAYS:
+        if (
+            self._get_workspace()
+            or self.__sandbox_config.incremental
+            or context.cache_buildtrees == _CacheBuildTrees.ALWAYS
+        ):
             # Buildtree must be preserved even after a success build if this is a
-            # workspace build or the user has configured to always cache buildtrees.
+            # workspace or incremental build or the user has configured to always
+            # cache buildtrees.
             return
 
         build_root = self.get_variable("build-root")
@@ -866,6 +881,11 @@ class Element(Plugin):
     #
     def _dependencies(self, scope: _Scope, *, recurse=True, visited=None):
 
+        # Once loaded, traverse the frozen dependency graph
+        if self.__dependency_graph is not None:
+            yield from self.__dependency_graph.dependencies(self, scope, recurse=recurse, visited=visited)
+            return
+
         # The format of visited is (BitMap(), BitMap()), with the first BitMap
         # containing element that have been visited for the `_Scope.BUILD` case
         # and the second one relating to the `_Scope.RUN` case.
@@ -1032,8 +1052,9 @@ class Element(Plugin):
     #
     def _stage_dependency_artifacts(self, sandbox, scope, *, path=None, include=None, exclude=None, orphans=True):
         with self._overlap_collectors[sandbox].session(OverlapAction.WARNING, path):
-            for dep in self._dependencies(scope):
-                dep._stage_artifact(sandbox, path=path, include=include, exclude=exclude, orphans=orphans, owner=self)
+            self.__stage_dependencies(
+                sandbox, self._dependencies(scope), path=path, include=include, exclude=exclude, orphans=orphans
+            )
 
     # _new_from_load_element():
     #
@@ -1140,6 +1161,27 @@ class Element(Plugin):
 
         return element
 
+    # _freeze_dependency_graph()
+    #
+    # Build the frozen dependency graph of the given elements and their
+    # dependencies, which is then used to traverse the dependencies of
+    # every element in it.
+    #
+    # This must be called once all elements have been instantiated.
+    #
+    # Args:
+    #    elements (List[Element]): The toplevel elements
+    #
+    @classmethod
+    def _freeze_dependency_graph(cls, elements):
+        graph = DependencyGraph(
+            elements,
+            lambda element: element.__build_dependencies,
+            lambda element: element.__runtime_dependencies,
+        )
+        for element in graph:
+            element.__dependency_graph = graph
+
     # _clear_meta_elements_cache()
     #
     # Clear the internal meta elements cache.
@@ -1485,7 +1527,7 @@ class Element(Plugin):
         # Stage all sources that need to be copied
         sandbox_vroot = sandbox.get_virtual_directory()
         host_vdirectory = sandbox_vroot.open_directory(directory.lstrip(os.sep), create=True)
-        self._stage_sources_at(host_vdirectory)
+        self._stage_sources_at(host_vdirectory, incremental=self.__assembling)
 
     # _stage_sources_at():
     #
@@ -1493,8 +1535,9 @@ class Element(Plugin):
     #
     # Args:
     #     vdirectory (Union[str, Directory]): A virtual directory object or local path to stage sources to.
+    #     incremental (bool): Whether to stage the sources on top of the build tree of the last build
     #
-    def _stage_sources_at(self, vdirectory):
+    def _stage_sources_at(self, vdirectory, *, incremental=False):
 
         # It's advantageous to have this temporary directory on
         # the same file system as the rest of our cache.
@@ -1509,12 +1552,13 @@ class Element(Plugin):
             staged_sources = self.__sources.get_files()
 
             # incremental builds should merge the source into the last artifact before staging
-            last_build_artifact = self.__get_last_build_artifact()
+            last_build_artifact = self.__get_last_build_artifact() if incremental else None
             if last_build_artifact:
                 self.info("Incremental build")
                 last_sources = last_build_artifact.get_sources()
                 import_dir = last_build_artifact.get_buildtree()
                 import_dir._apply_changes(last_sources, staged_sources)
+                self.__incremental_build = True
             else:
                 import_dir = staged_sources
 
@@ -1524,6 +1568,16 @@ class Element(Plugin):
         # Ensure deterministic owners of sources at build time
         vdirectory._set_deterministic_user()
 
+    # _get_staged_sources():
+    #
+    # Get the staged sources of this element without exporting them.
+    #
+    # Returns:
+    #    (Directory): A virtual directory of the staged sources
+    #
+    def _get_staged_sources(self):
+        return self.__sources.get_files()
+
     # _set_required():
     #
     # Mark this element and its dependencies as required.
@@ -1676,8 +1730,8 @@ class Element(Plugin):
         if self._cached_failure() and not self.__assemble_done:
             with self._output_file() as output_file:
                 for log_path in self.__artifact.get_logs():
-                    with open(log_path, encoding="utf-8") as log_file:
-                        output_file.write(log_file.read())
+                    with utils._open_log(log_path, text=True) as log_file:
+                        shutil.copyfileobj(log_file, output_file)
 
             _, description, detail = self._get_build_result()
             e = CachedFailure(description, detail=detail)
@@ -1713,14 +1767,21 @@ class Element(Plugin):
 
                 # Step 1 - Configure
                 self.__configure_sandbox(sandbox)
+                self.__mount_compiler_cache(sandbox)
+                self.__mount_jobserver(sandbox)
 
                 # Print the environment at the beginning of the log file.
-                env_dump = _yaml.roundtrip_dump_string(sandbox._get_configured_environment() or self.get_environment())
+                environment = sandbox._get_configured_environment() or self.get_environment()
+                env_dump = _yaml.roundtrip_dump_string(dict(environment, **sandbox._get_host_environment()))
                 self.log("Build environment for element {}".format(self.name), detail=env_dump)
 
-                # Step 2 - Stage
-                self.__stage(sandbox)
+                # Sources are only staged on top of a previous build tree
+                # for the build itself, plugins may stage them in either step
+                self.__assembling = True
                 try:
+                    # Step 2 - Stage
+                    self.__stage(sandbox)
+
                     # Step 3 - Assemble
                     collect = self.assemble(sandbox)  # pylint: disable=assignment-from-no-return
 
@@ -1735,6 +1796,8 @@ class Element(Plugin):
                     raise
                 else:
                     self._cache_artifact(sandbox, collect)
+                finally:
+                    self.__assembling = False
 
     def _cache_artifact(self, sandbox, collect):
 
@@ -1758,7 +1821,8 @@ class Element(Plugin):
         # with an empty buildtreedir regardless of this configuration.
 
         if cache_buildtrees == _CacheBuildTrees.ALWAYS or (
-            cache_buildtrees == _CacheBuildTrees.AUTO and (not build_success or self._get_workspace())
+            cache_buildtrees == _CacheBuildTrees.AUTO
+            and (not build_success or self._get_workspace() or self.__sandbox_config.incremental)
         ):
             try:
                 sandbox_build_dir = sandbox_vroot.open_directory(self.get_variable("build-root").lstrip(os.sep))
@@ -1795,6 +1859,7 @@ class Element(Plugin):
                 environment=self.__environment,
                 sandboxconfig=self.__sandbox_config,
                 buildsandbox=sandbox if buildrootvdir else None,
+                incremental=self.__incremental_build,
             )
 
         if collect is not None and collectvdir is None:
@@ -1868,113 +1933,66 @@ class Element(Plugin):
     # Returns: True if the artifact has been downloaded, False otherwise
     #
     def _load_artifact(self, *, pull, strict=None):
-        context = self._get_context()
-
-        if strict is None:
-            strict = context.get_strict()
-
-        pull_buildtrees = context.pull_buildtrees and not self._get_workspace()
-
-        # First check whether we already have the strict artifact in the local cache
-        artifact = Artifact(
-            self,
-            context,
-            strict_key=self.__strict_cache_key,
-            strong_key=self.__strict_cache_key,
-            weak_key=self.__weak_cache_key,
-        )
-        artifact.query_cache()
-
-        self.__pull_pending = False
-        if not pull and not artifact.cached(buildtree=pull_buildtrees):
-            if self.__artifacts.has_fetch_remotes(plugin=self) and not self._get_workspace():
-                # Artifact is not completely available in cache and artifact remote server is available.
-                # Stop artifact loading here as pull is required to proceed.
-                self.__pull_pending = True
-
-        # Attempt to pull artifact with the strict cache key
-        pulled = pull and artifact.pull(pull_buildtrees=pull_buildtrees)
+        pull_buildtrees = self._get_context().pull_buildtrees and not self._get_workspace()
+        steps = self.__load_artifact_steps(pull, strict, pull_buildtrees)
 
-        # Ignore failed build artifacts if a retry was requested
-        ignore_failed_artifact = context.build and context.build_retry_failed
-
-        if artifact.cached() or strict:
-            if artifact.cached() and ignore_failed_artifact:
-                success, _, _ = artifact.load_build_result()
-                if not success:
-
-                    self.info(
-                        "Discarded failed build",
-                        detail="Discarded '{}'\n".format(artifact.strong_key)
-                        + "because retrying failed builds is enabled.",
-                    )
-
-                    artifact = Artifact(
-                        self,
-                        context,
-                        strong_key=self.__cache_key,
-                        strict_key=self.__strict_cache_key,
-                        weak_key=self.__weak_cache_key,
-                    )
-                    artifact._cached = False
-                    pulled = False
+        try:
+            artifact = next(steps)
+            while True:
+                artifact.query_cache()
+                pulled = pull and artifact.pull(pull_buildtrees=pull_buildtrees)
+                artifact = steps.send(pulled)
+        except StopIteration as e:
+            return e.value
 
-            self.__artifact = artifact
-            return pulled
-        elif self.__pull_pending:
-            return False
+    # _load_artifact_async():
+    #
+    # Like _load_artifact(), but queries the local cache and pulls from
+    # the remotes on the asyncio event loop.
+    #
+    # Args:
+    #    pull (bool): Whether to attempt to pull the artifact
+    #    strict (bool|None): Force strict/non-strict operation
+    #
+    # Returns: True if the artifact has been downloaded, False otherwise
+    #
+    async def _load_artifact_async(self, *, pull, strict=None):
+        pull_buildtrees = self._get_context().pull_buildtrees and not self._get_workspace()
 
-        # In non-strict mode retry with weak cache key
-        artifact = Artifact(self, context, strict_key=self.__strict_cache_key, weak_key=self.__weak_cache_key)
-        artifact.query_cache()
+        if pull_buildtrees and not pull:
+            # Checking whether the buildtree is cached is not asynchronous
+            return await asyncio.to_thread(self._load_artifact, pull=pull, strict=strict)
 
-        # Attempt to pull artifact with the weak cache key
-        pulled = pull and artifact.pull(pull_buildtrees=pull_buildtrees)
+        steps = self.__load_artifact_steps(pull, strict, pull_buildtrees)
 
-        # Automatically retry building failed builds in non-strict mode, because
-        # dependencies may have changed since the last build which might cause this
-        # failed build to succeed.
-        #
-        # When not building (e.g. `bst show`, `bst artifact push` etc), we do not drop
-        # the failed artifact, the retry only occurs at build time.
-        #
-        if context.build and artifact.cached():
-            success, _, _ = artifact.load_build_result()
-            if not success:
-                #
-                # If we could resolve the stong cache key for this element at this time,
-                # we could compare the artifact key against the resolved strong key.
-                #
-                # If we could assert that artifact state is never consulted in advance
-                # of resolving the strong key, then we could discard the loaded artifact
-                # at that time instead.
-                #
-                # Since neither of these are true, we settle for always retrying a failed
-                # build in non-strict mode unless the failed artifact's strong key is
-                # equal to the resolved strict key.
-                #
-                if ignore_failed_artifact or artifact.strong_key != self.__strict_cache_key:
+        try:
+            artifact = next(steps)
+            while True:
+                await artifact.query_cache_async()
+                pulled = pull and await artifact.pull_async(pull_buildtrees=pull_buildtrees)
+                artifact = steps.send(pulled)
+        except StopIteration as e:
+            return e.value
 
-                    if ignore_failed_artifact:
-                        reason = "because retrying failed builds is enabled."
-                    else:
-                        reason = "in non strict mode because intermediate dependencies may have changed."
-                    self.info(
-                        "Discarded failed build",
-                        detail="Discarded '{}'\n{}".format(artifact.strong_key, reason),
-                    )
+    # _prefetch_artifact_files_async()
+    #
+    # Fetch the files of the cached artifact from the remote cache into
+    # the local cache, ahead of staging the artifact in a build of a
+    # reverse dependency.
+    #
+    async def _prefetch_artifact_files_async(self):
+        assert self._cached_success()
 
-                    artifact = Artifact(
-                        self,
-                        context,
-                        strict_key=self.__strict_cache_key,
-                        weak_key=self.__weak_cache_key,
-                    )
-                    artifact._cached = False
-                    pulled = False
+        await self.__artifact.fetch_files_async()
 
-        self.__artifact = artifact
-        return pulled
+    # _cached_remotely_async()
+    #
+    # Like _cached_remotely(), but awaits the remotes on the asyncio event loop.
+    #
+    async def _cached_remotely_async(self):
+        if self.__cached_remotely is None:
+            self.__cached_remotely = await self.__artifacts.check_remotes_for_element_async(self)
+        return self.__cached_remotely
 
     def _query_source_cache(self):
         self.__sources.query_cache()
@@ -2023,19 +2041,7 @@ class Element(Plugin):
     #           and no updated was required
     #
     def _push(self):
-        if not self._cached():
-            raise ElementError("Push failed: {} is not cached".format(self.name))
-
-        # Do not push elements that are cached with a dangling buildtree ref
-        # unless element type is expected to have an an empty buildtree directory
-        if not self._cached_buildtree() and self._buildtree_exists():
-            raise ElementError("Push failed: buildtree of {} is not cached".format(self.name))
-
-        if not self._cached_buildroot() and self._buildroot_exists():
-            raise ElementError("Push failed: buildroot of {} is not cached".format(self.name))
-
-        if self.__get_tainted():
-            self.warn("Not pushing tainted artifact.")
+        if not self.__check_pushable():
             return False
 
         # Push all keys used for local commit via the Artifact member
@@ -2046,6 +2052,21 @@ class Element(Plugin):
         # Notify successful upload
         return True
 
+    # _push_async():
+    #
+    # Like _push(), but pushes to the remotes on the asyncio event loop.
+    #
+    # Returns:
+    #   (bool): True if the remote was updated, False if it already existed
+    #           and no updated was required
+    #
+    async def _push_async(self):
+        # Checking the buildtree and buildroot in the local cache is not asynchronous
+        if not await asyncio.to_thread(self.__check_pushable):
+            return False
+
+        return await self.__artifacts.push_async(self, self.__artifact)
+
     # _shell():
     #
     # Connects the terminal with a shell running in a staged
@@ -2533,6 +2554,7 @@ class Element(Plugin):
     #    (Element): The Element to add as a build dependency
     #
     def _add_build_dependency(self, dependency):
+        assert self.__dependency_graph is None, "Adding dependencies to a frozen dependency graph"
         self.__build_dependencies.append(dependency)
 
     # _file_is_whitelisted()
@@ -2706,6 +2728,153 @@ class Element(Plugin):
             for dep in self._dependencies(_Scope.BUILD)
         ]
 
+    # __load_artifact_steps():
+    #
+    # The logic of _load_artifact(), shared by its synchronous and
+    # asynchronous variants.
+    #
+    # This generator yields the candidate artifacts in turn, the caller
+    # queries the local cache for each of them and optionally pulls it,
+    # and sends back whether the artifact was pulled.
+    #
+    # Args:
+    #    pull (bool): Whether to attempt to pull the artifact
+    #    strict (bool|None): Force strict/non-strict operation
+    #    pull_buildtrees (bool): Whether buildtrees are pulled
+    #
+    # Returns: True if the artifact has been downloaded, False otherwise
+    #
+    def __load_artifact_steps(self, pull, strict, pull_buildtrees):
+        context = self._get_context()
+
+        if strict is None:
+            strict = context.get_strict()
+
+        # First check whether we already have the strict artifact in the local cache,
+        # and attempt to pull it with the strict cache key
+        artifact = Artifact(
+            self,
+            context,
+            strict_key=self.__strict_cache_key,
+            strong_key=self.__strict_cache_key,
+            weak_key=self.__weak_cache_key,
+        )
+        pulled = yield artifact
+
+        self.__pull_pending = False
+        if not pull and not artifact.cached(buildtree=pull_buildtrees):
+            if self.__artifacts.has_fetch_remotes(plugin=self) and not self._get_workspace():
+                # Artifact is not completely available in cache and artifact remote server is available.
+                # Stop artifact loading here as pull is required to proceed.
+                self.__pull_pending = True
+
+        # Ignore failed build artifacts if a retry was requested
+        ignore_failed_artifact = context.build and context.build_retry_failed
+
+        if artifact.cached() or strict:
+            if artifact.cached() and ignore_failed_artifact:
+                success, _, _ = artifact.load_build_result()
+                if not success:
+
+                    self.info(
+                        "Discarded failed build",
+                        detail="Discarded '{}'\n".format(artifact.strong_key)
+                        + "because retrying failed builds is enabled.",
+                    )
+
+                    artifact = Artifact(
+                        self,
+                        context,
+                        strong_key=self.__cache_key,
+                        strict_key=self.__strict_cache_key,
+                        weak_key=self.__weak_cache_key,
+                    )
+                    artifact._cached = False
+                    pulled = False
+
+            self.__artifact = artifact
+            return pulled
+        elif self.__pull_pending:
+            return False
+
+        # In non-strict mode retry with weak cache key, and attempt
+        # to pull the artifact with the weak cache key
+        artifact = Artifact(self, context, strict_key=self.__strict_cache_key, weak_key=self.__weak_cache_key)
+        pulled = yield artifact
+
+        # Automatically retry building failed builds in non-strict mode, because
+        # dependencies may have changed since the last build which might cause this
+        # failed build to succeed.
+        #
+        # When not building (e.g. `bst show`, `bst artifact push` etc), we do not drop
+        # the failed artifact, the retry only occurs at build time.
+        #
+        if context.build and artifact.cached():
+            success, _, _ = artifact.load_build_result()
+            if not success:
+                #
+                # If we could resolve the stong cache key for this element at this time,
+                # we could compare the artifact key against the resolved strong key.
+                #
+                # If we could assert that artifact state is never consulted in advance
+                # of resolving the strong key, then we could discard the loaded artifact
+                # at that time instead.
+                #
+                # Since neither of these are true, we settle for always retrying a failed
+                # build in non-strict mode unless the failed artifact's strong key is
+                # equal to the resolved strict key.
+                #
+                if ignore_failed_artifact or artifact.strong_key != self.__strict_cache_key:
+
+                    if ignore_failed_artifact:
+                        reason = "because retrying failed builds is enabled."
+                    else:
+                        reason = "in non strict mode because intermediate dependencies may have changed."
+                    self.info(
+                        "Discarded failed build",
+                        detail="Discarded '{}'\n{}".format(artifact.strong_key, reason),
+                    )
+
+                    artifact = Artifact(
+                        self,
+                        context,
+                        strict_key=self.__strict_cache_key,
+                        weak_key=self.__weak_cache_key,
+                    )
+                    artifact._cached = False
+                    pulled = False
+
+        self.__artifact = artifact
+        return pulled
+
+    # __check_pushable()
+    #
+    # Check whether the artifact of this element can be pushed.
+    #
+    # Returns:
+    #   (bool): False if the artifact is tainted and should not be pushed
+    #
+    # Raises:
+    #   (ElementError): If the artifact is not completely cached
+    #
+    def __check_pushable(self):
+        if not self._cached():
+            raise ElementError("Push failed: {} is not cached".format(self.name))
+
+        # Do not push elements that are cached with a dangling buildtree ref
+        # unless element type is expected to have an an empty buildtree directory
+        if not self._cached_buildtree() and self._buildtree_exists():
+            raise ElementError("Push failed: buildtree of {} is not cached".format(self.name))
+
+        if not self._cached_buildroot() and self._buildroot_exists():
+            raise ElementError("Push failed: buildroot of {} is not cached".format(self.name))
+
+        if self.__get_tainted():
+            self.warn("Not pushing tainted artifact.")
+            return False
+
+        return True
+
     # __get_last_build_artifact()
     #
     # Return the Artifact of the previous build of this element,
@@ -2716,14 +2885,17 @@ class Element(Plugin):
     #
     def __get_last_build_artifact(self):
         workspace = self._get_workspace()
-        if not workspace:
-            # Currently incremental builds are only supported for workspaces
+        if workspace:
+            last_build = workspace.last_build
+        elif self.__sandbox_config.incremental:
+            last_build = self.__get_last_cached_key()
+        else:
             return None
 
-        if not workspace.last_build:
+        if not last_build:
             return None
 
-        artifact = Artifact(self, self._get_context(), strong_key=workspace.last_build)
+        artifact = Artifact(self, self._get_context(), strong_key=last_build)
         artifact.query_cache()
 
         if not artifact.cached():
@@ -2735,6 +2907,12 @@ class Element(Plugin):
         if not artifact.cached_sources():
             return None
 
+        # Outside of workspaces, only build on top of successful builds
+        if not workspace:
+            success, _, _ = artifact.load_build_result()
+            if not success:
+                return None
+
         # Don't perform an incremental build if there has been a change in
         # build dependencies.
         old_dep_refs = artifact.get_dependency_artifact_names()
@@ -2744,6 +2922,26 @@ class Element(Plugin):
 
         return artifact
 
+    # __get_last_cached_key():
+    #
+    # Find the key of the most recently cached artifact of this element
+    # other than the artifact which is about to be built.
+    #
+    # Returns:
+    #    (str): The cache key, or None if no other artifact is cached
+    #
+    def __get_last_cached_key(self):
+        key = self._get_cache_key()
+        artifact_names = self.__artifacts.list_artifacts(glob=self.get_artifact_name(key="*"))
+
+        # Artifact names are sorted by the time they were last used
+        for artifact_name in reversed(artifact_names):
+            last_key = artifact_name.rsplit("/", 1)[-1]
+            if last_key != key:
+                return last_key
+
+        return None
+
     # __configure_sandbox():
     #
     # Internal method for calling public abstract configure_sandbox() method.
@@ -2752,6 +2950,53 @@ class Element(Plugin):
 
         self.configure_sandbox(sandbox)
 
+    # __mount_compiler_cache():
+    #
+    # Mount the persistent compiler cache directory of the project into
+    # the build sandbox and export its path, if the compiler cache is enabled.
+    #
+    # The compiler cache lives on the local host, so it is not
+    # available to remote execution sandboxes. This neither affects
+    # the cache key nor the build environment recorded in the artifact.
+    #
+    def __mount_compiler_cache(self, sandbox):
+        path = self.__sandbox_config.compiler_cache_path
+        if not path or isinstance(sandbox, SandboxRemote):
+            return
+
+        context = self._get_context()
+        directory = context.compilercache.get_directory(self._get_project().name)
+
+        sandbox.mark_directory(path)
+        sandbox._set_mount_source(path, directory)
+        sandbox._set_host_environment({self.__sandbox_config.compiler_cache_variable: path})
+
+    # __mount_jobserver():
+    #
+    # Mount the jobserver into the build sandbox and point build tools
+    # to it with MAKEFLAGS, if the jobserver is enabled. Any parallelism
+    # options in the configured MAKEFLAGS are replaced.
+    #
+    # This neither affects the cache key nor the build environment recorded
+    # in the artifact, the jobserver is not available to remote execution
+    # sandboxes.
+    #
+    def __mount_jobserver(self, sandbox):
+        jobserver = self._get_context().jobserver
+        if not jobserver or isinstance(sandbox, SandboxRemote):
+            return
+
+        sandbox.mark_directory(JOBSERVER_SANDBOX_DIRECTORY)
+        sandbox._set_mount_source(JOBSERVER_SANDBOX_DIRECTORY, jobserver.directory)
+
+        environment = sandbox._get_configured_environment() or self.get_environment()
+        makeflags = [
+            flag
+            for flag in environment.get("MAKEFLAGS", "").split()
+            if not flag.startswith(("-j", "--jobs", "--jobserver"))
+        ]
+        sandbox._set_host_environment({"MAKEFLAGS": " ".join([jobserver.makeflags] + makeflags)})
+
     # __stage():
     #
     # Internal method for calling public abstract stage() method.
@@ -2762,6 +3007,96 @@ class Element(Plugin):
         with self.__collect_overlaps(sandbox):
             self.stage(sandbox)
 
+    # __stage_dependencies():
+    #
+    # Stage the artifacts of the given dependencies in order, starting
+    # from the merged tree of the longest already cached prefix of
+    # the staging sequence, see BuildRootCache.
+    #
+    # This must be called within an overlap collector session.
+    #
+    # Args:
+    #    sandbox: The build sandbox
+    #    dependencies: The elements to stage, in staging order
+    #    path: An optional sandbox relative path
+    #    include: An optional list of domains to include files from
+    #    exclude: An optional list of domains to exclude files from
+    #    orphans: Whether to include files not spoken for by split domains
+    #
+    def __stage_dependencies(self, sandbox, dependencies, *, path, include, exclude, orphans):
+        elements = [cast("Element", Plugin._lookup(dep._unique_id)) for dep in dependencies]
+
+        # Staging an uncached dependency fails with a proper error, which
+        # we leave to _stage_artifact()
+        if not all(element._cached() for element in elements):
+            for element in elements:
+                element._stage_artifact(
+                    sandbox, path=path, include=include, exclude=exclude, orphans=orphans, owner=self
+                )
+            return
+
+        overlap_collector = self._overlap_collectors[sandbox]
+        buildrootcache = self._get_context().buildrootcache
+
+        vbasedir = sandbox.get_virtual_directory()
+        vstagedir = vbasedir if path is None else vbasedir.open_directory(path.lstrip(os.sep), create=True)
+
+        # Compute the keys of every prefix of the staging sequence
+        keys = []
+        key = BuildRootCache.initial_key(vstagedir._get_digest())
+        for element in elements:
+            key = BuildRootCache.chain_key(
+                key,
+                element._get_cache_key(),
+                element.__artifact.get_files_digest(),
+                include,
+                exclude,
+                orphans,
+            )
+            keys.append(key)
+
+        checkpoints = BuildRootCache.checkpoints(len(elements))
+
+        # Find the staging sequence prefixes we have records for
+        candidates = []
+        recorded_results: List[FileListResult] = []
+        for index in checkpoints:
+            root, results = buildrootcache.lookup(keys[index])
+            if root is None or len(recorded_results) + len(results) != index + 1:
+                break
+            recorded_results.extend(results)
+            candidates.append((index, root))
+
+        # Restore the longest prefix whose tree is still present, which
+        # usually only needs to be checked for the longest one
+        n_restored = 0
+        restored_root = None
+        restored_results: List[FileListResult] = []
+        for index, root in reversed(candidates):
+            if buildrootcache.contains(keys[index], root):
+                n_restored = index + 1
+                restored_root = root
+                restored_results = recorded_results[:n_restored]
+                break
+
+        if restored_root is not None:
+            self.status("Staging {} dependencies from cached build root".format(n_restored))
+            vstagedir._reset(digest=restored_root)
+            for element, result in zip(elements, restored_results):
+                overlap_collector.collect_stage_result(element, result)
+
+        # Stage the remaining dependencies
+        results = []
+        for index in range(n_restored, len(elements)):
+            result = elements[index]._stage_artifact(
+                sandbox, path=path, include=include, exclude=exclude, orphans=orphans, owner=self
+            )
+            results.append(result)
+
+            if index in checkpoints:
+                buildrootcache.store(keys[index], vstagedir._get_digest(), results)
+                results = []
+
     # __preflight():
     #
     # A internal wrapper for calling the abstract preflight() method on
@@ -2848,8 +3183,11 @@ class Element(Plugin):
             # Whether this artifact's dependencies have workspaces
             workspaced_dependencies = self.__artifact.get_metadata_workspaced_dependencies()
 
+            # Whether this artifact was built on top of a previous build tree
+            incremental = self.__artifact.get_metadata_incremental()
+
             # Other conditions should be or-ed
-            self.__tainted = workspaced or workspaced_dependencies
+            self.__tainted = workspaced or workspaced_dependencies or incremental
 
         return self.__tainted
 
@@ -2891,7 +3229,7 @@ class Element(Plugin):
         project = self._get_project()
         platform = context.platform
 
-        if self._get_workspace():
+        if self._get_workspace() or (config and config.incremental):
             output_node_properties = ["mtime"]
         else:
             output_node_properties = None
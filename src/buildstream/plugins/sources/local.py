@@ -61,7 +61,9 @@ class LocalSource(Source):
     def configure(self, node):
         node.validate_keys(["path", *Source.COMMON_CONFIG_KEYS])
         self.path = self.node_get_project_path(node.get_scalar("path"))
-        self.fullpath = os.path.join(self.get_project_directory(), self.path)
+        # The path is exported from junctions by node_get_project_path(), without
+        # exporting the whole project with get_project_directory()
+        self.fullpath = os.path.join(self._get_project().directory, self.path)
 
     def preflight(self):
         pass
@@ -17,7 +17,9 @@
 #
 
 from typing import TYPE_CHECKING, Dict, Optional, Union
+from .._exceptions import LoadError
 from .._platform import Platform
+from ..exceptions import LoadErrorReason
 
 if TYPE_CHECKING:
     from ..node import Node, MappingNode
@@ -35,6 +37,9 @@ if TYPE_CHECKING:
 #    build_uid: The UID for the sandbox process
 #    build_gid: The GID for the sandbox process
 #    remote_apis_socket_path: The path to a UNIX socket providing REAPI access for nested remote execution
+#    compiler_cache_variable: The environment variable to export the compiler cache path in
+#    compiler_cache_path: The sandbox path to mount the persistent compiler cache at, or None
+#    incremental: Whether to build incrementally on top of the build tree of a previous artifact
 #
 # If the build_uid or build_gid is unspecified, then the underlying sandbox implementation
 # does not guarantee what UID/GID will be used, but generally UID/GID 0 will be used in a
@@ -53,7 +58,10 @@ class SandboxConfig:
         build_uid: Optional[int] = None,
         build_gid: Optional[int] = None,
         remote_apis_socket_path: Optional[str] = None,
-        remote_apis_socket_action_cache_enable_update: bool = False
+        remote_apis_socket_action_cache_enable_update: bool = False,
+        compiler_cache_variable: Optional[str] = None,
+        compiler_cache_path: Optional[str] = None,
+        incremental: bool = False
     ):
         self.build_os = build_os
         self.build_arch = build_arch
@@ -61,6 +69,9 @@ class SandboxConfig:
         self.build_gid = build_gid
         self.remote_apis_socket_path = remote_apis_socket_path
         self.remote_apis_socket_action_cache_enable_update = remote_apis_socket_action_cache_enable_update
+        self.compiler_cache_variable = compiler_cache_variable
+        self.compiler_cache_path = compiler_cache_path
+        self.incremental = incremental
 
     # to_dict():
     #
@@ -73,6 +84,9 @@ class SandboxConfig:
     #
     # This function is also used to contribute to the owning element's cache key.
     #
+    # The compiler cache and incremental build configurations are deliberately
+    # not included, as they must not affect the output of a build.
+    #
     # Returns:
     #    A dictionary representation of this SandboxConfig
     #
@@ -124,7 +138,9 @@ class SandboxConfig:
     #
     @classmethod
     def new_from_node(cls, config: "MappingNode[Node]", *, platform: Optional[Platform] = None) -> "SandboxConfig":
-        config.validate_keys(["build-uid", "build-gid", "build-os", "build-arch", "remote-apis-socket"])
+        config.validate_keys(
+            ["build-uid", "build-gid", "build-os", "build-arch", "remote-apis-socket", "compiler-cache", "incremental"]
+        )
 
         build_os: str
         build_arch: str
@@ -159,6 +175,23 @@ class SandboxConfig:
             remote_apis_socket_path = None
             remote_apis_socket_action_cache_enable_update = False
 
+        compiler_cache_variable = None
+        compiler_cache_path = None
+        compiler_cache = config.get_mapping("compiler-cache", default=None)
+        if compiler_cache:
+            compiler_cache.validate_keys(["enabled", "variable", "path"])
+            if compiler_cache.get_bool("enabled", default=True):
+                compiler_cache_variable = compiler_cache.get_str("variable", default="CCACHE_DIR")
+                compiler_cache_path = compiler_cache.get_str("path", default="/buildstream-compiler-cache")
+                if not compiler_cache_path.startswith("/"):
+                    provenance = compiler_cache.get_scalar("path").get_provenance()
+                    raise LoadError(
+                        "{}: The compiler cache path must be an absolute path".format(provenance),
+                        LoadErrorReason.INVALID_DATA,
+                    )
+
+        incremental = config.get_bool("incremental", default=False)
+
         return cls(
             build_os=build_os,
             build_arch=build_arch,
@@ -166,4 +199,7 @@ class SandboxConfig:
             build_gid=build_gid,
             remote_apis_socket_path=remote_apis_socket_path,
             remote_apis_socket_action_cache_enable_update=remote_apis_socket_action_cache_enable_update,
+            compiler_cache_variable=compiler_cache_variable,
+            compiler_cache_path=compiler_cache_path,
+            incremental=incremental,
         )
@@ -160,9 +160,12 @@ class SandboxREAPI(Sandbox):
             platform=platform,
         )
 
-    def _fetch_action_result_outputs(self, casremote, action_result):
+    def _fetch_action_result_outputs(self, casremote, action_result, *, fetch_file_blobs=True):
         # This also ensures that the outputs are uploaded to the cache
-        # storage-service, if configured
+        # storage-service, if configured.
+        #
+        # Without fetch_file_blobs, only the directory objects of the output
+        # directories are fetched and the file blobs are left on the remote.
 
         context = self._get_context()
         cascache = context.get_cascache()
@@ -174,7 +177,7 @@ class SandboxREAPI(Sandbox):
 
             root_directory_digest = output_directory.root_directory_digest
             if root_directory_digest and root_directory_digest.hash:
-                cascache.fetch_directory(casremote, root_directory_digest)
+                cascache.fetch_directory(casremote, root_directory_digest, fetch_file_blobs=fetch_file_blobs)
                 continue
 
             tree_digest = output_directory.tree_digest
@@ -48,6 +48,18 @@ class SandboxRemote(SandboxREAPI):
         self.action_spec = specs.action_spec
         self.operation_name = None
 
+        # Unless the outputs of actions need to be uploaded to a separate
+        # cache storage-service, the file blobs of the outputs are left on the
+        # remote. Subsequent commands run remotely as well, and the blobs which
+        # end up in the artifact are fetched by _fetch_missing_blobs(), or on
+        # demand by buildbox-casd when the storage-service is the same CAS.
+        cache_spec = context.remote_cache_spec
+        self._remote_resident_outputs = (
+            self.storage_spec is None
+            or cache_spec is None
+            or (self.storage_spec.url, self.storage_spec.instance_name) == (cache_spec.url, cache_spec.instance_name)
+        )
+
         self.re_remote = RERemote(context.remote_cache_spec, specs, casd)
         try:
             self.re_remote.init()
@@ -90,9 +102,16 @@ class SandboxRemote(SandboxREAPI):
             except grpc.RpcError as e:
                 status_code = e.code()
 
+                # The server is missing inputs of the action
+                if status_code == grpc.StatusCode.FAILED_PRECONDITION:
+                    raise SandboxError(
+                        "Failed contacting remote execution server at {}."
+                        "{}: {}".format(self.exec_spec.url, status_code.name, e.details()),
+                        reason="missing-inputs",
+                    )
+
                 if status_code in (
                     grpc.StatusCode.INVALID_ARGUMENT,
-                    grpc.StatusCode.FAILED_PRECONDITION,
                     grpc.StatusCode.RESOURCE_EXHAUSTED,
                     grpc.StatusCode.INTERNAL,
                     grpc.StatusCode.DEADLINE_EXCEEDED,
@@ -170,39 +189,32 @@ class SandboxRemote(SandboxREAPI):
         action_result = self._check_action_cache(action_digest)
 
         if not action_result:
-            with self._get_context().messenger.timed_activity(
-                "Uploading input root", element_name=self._get_element_name()
-            ):
-                # Determine blobs missing on remote
-                root_digests = [action.input_root_digest]
-
-                # Add virtual directories for subsandboxes
-                for subsandbox in self._get_subsandboxes():
-                    vdir = subsandbox.get_virtual_directory()
-                    root_digests.append(vdir._get_digest())
-
-                missing_blobs = []
-                try:
-                    for root_digest in root_digests:
-                        missing_blobs.extend(cascache.missing_blobs_for_directory(root_digest, remote=casremote))
-                except grpc.RpcError as e:
-                    raise SandboxError("Failed to determine missing blobs: {}".format(e)) from e
-
-                # Add command and action messages to blob list to push
-                missing_blobs.append(action.command_digest)
-                missing_blobs.append(action_digest)
-
-                # Now, push the missing blobs to the remote.
-                try:
-                    cascache.send_blobs(casremote, missing_blobs)
-                except grpc.RpcError as e:
-                    raise SandboxError("Failed to push source directory to remote: {}".format(e)) from e
+            self._upload_input_root(action, action_digest)
 
             # Now request to execute the action
-            operation = self.run_remote_command(action_digest)
-            action_result = self._extract_action_result(operation)
+            try:
+                operation = self.run_remote_command(action_digest)
+                action_result = self._extract_action_result(operation)
+            except SandboxError as e:
+                if e.reason != "missing-inputs":
+                    raise
 
-        self._fetch_action_result_outputs(casremote, action_result)
+                # Blobs of directories which were already uploaded in this session
+                # may have expired on the remote, check the entire input root again
+                cascache.forget_remote_directories(casremote)
+                self._upload_input_root(action, action_digest)
+
+                self.operation_name = None
+                operation = self.run_remote_command(action_digest)
+                action_result = self._extract_action_result(operation)
+
+        self._fetch_action_result_outputs(casremote, action_result, fetch_file_blobs=not self._remote_resident_outputs)
+
+        # Output directories are complete on the remote, they don't need to
+        # be checked again when they are part of the input of the next action
+        for output_directory in action_result.output_directories:
+            if output_directory.root_directory_digest.hash:
+                cascache.mark_directory_present(casremote, output_directory.root_directory_digest)
 
         # Forward remote stdout and stderr
         if stdout:
@@ -220,6 +232,46 @@ class SandboxRemote(SandboxREAPI):
 
         return action_result
 
+    def _upload_input_root(self, action, action_digest):
+        # Uploads the blobs of the input root and the subsandboxes, and the
+        # command and action messages, which are missing on the remote.
+        context = self._get_context()
+        cascache = context.get_cascache()
+        casremote = self.re_remote
+
+        with self._get_context().messenger.timed_activity(
+            "Uploading input root", element_name=self._get_element_name()
+        ):
+            # Determine blobs missing on remote
+            root_digests = [action.input_root_digest]
+
+            # Add virtual directories for subsandboxes
+            for subsandbox in self._get_subsandboxes():
+                vdir = subsandbox.get_virtual_directory()
+                root_digests.append(vdir._get_digest())
+
+            missing_blobs = []
+            try:
+                for root_digest in root_digests:
+                    missing_blobs.extend(cascache.missing_blobs_for_directory(root_digest, remote=casremote))
+            except grpc.RpcError as e:
+                raise SandboxError("Failed to determine missing blobs: {}".format(e)) from e
+
+            # Add command and action messages to blob list to push
+            missing_blobs.append(action.command_digest)
+            missing_blobs.append(action_digest)
+
+            # Now, push the missing blobs to the remote.
+            try:
+                cascache.send_blobs(casremote, missing_blobs)
+            except grpc.RpcError as e:
+                raise SandboxError("Failed to push source directory to remote: {}".format(e)) from e
+
+            # The input trees are now complete on the remote, they don't
+            # need to be checked again for subsequent actions
+            for root_digest in root_digests:
+                cascache.mark_directory_present(casremote, root_digest)
+
     def _check_action_cache(self, action_digest):
         # Checks the action cache to see if this artifact has already been built
         #
@@ -258,11 +310,14 @@ class SandboxRemote(SandboxREAPI):
         operation.response.Unpack(execution_response)
 
         if execution_response.status.code != code_pb2.OK:
+            # The server is missing inputs of the action
+            reason = "missing-inputs" if execution_response.status.code == code_pb2.FAILED_PRECONDITION else None
+
             # An unexpected error during execution: the remote execution
             # system failed at processing the execution request.
             if execution_response.status.message:
-                raise SandboxError(execution_response.status.message)
+                raise SandboxError(execution_response.status.message, reason=reason)
             # Otherwise, report the failure in a more general manner
-            raise SandboxError("Remote server failed at executing the build request.")
+            raise SandboxError("Remote server failed at executing the build request.", reason=reason)
 
         return execution_response.result
@@ -84,6 +84,7 @@ class Sandbox:
         self.__cwd = None  # type: Optional[str]
         self.__env = None  # type: Optional[Dict[str, str]]
         self.__mount_sources = {}  # type: Dict[str, str]
+        self.__host_env = {}  # type: Dict[str, str]
         self.__allow_run = True
         self.__subsandboxes = []  # type: List[Sandbox]
 
@@ -418,6 +419,27 @@ class Sandbox:
     def _set_mount_source(self, mountpoint, mount_source):
         self.__mount_sources[mountpoint] = mount_source
 
+    # _get_host_environment()
+    #
+    # Returns:
+    #    (Dict[str, str]): The environment variables set with _set_host_environment()
+    #
+    def _get_host_environment(self):
+        return self.__host_env
+
+    # _set_host_environment()
+    #
+    # Sets environment variables which refer to resources of the host,
+    # such as mounted host directories, for commands which run in the
+    # configured environment. Like mount sources, these are not part
+    # of the build environment recorded in artifacts.
+    #
+    # Args:
+    #    environment (Dict[str, str]): The environment variables to set
+    #
+    def _set_host_environment(self, environment):
+        self.__host_env.update(environment)
+
     # _get_environment()
     #
     # Fetches the environment variables for running commands
@@ -432,7 +454,7 @@ class Sandbox:
     def _get_environment(self, *, cwd=None, env=None):
         cwd = self._get_work_directory(cwd=cwd)
         if env is None:
-            env = self.__env
+            env = dict(self.__env, **self.__host_env)
 
         # Naive getcwd implementations can break when bind-mounts to different
         # paths on the same filesystem are present. Letting the command know
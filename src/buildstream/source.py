@@ -1357,10 +1357,19 @@ class Source(Plugin):
         This is useful for sources which need to load resources
         stored somewhere inside the project.
 
+        .. note::
+
+           The files of projects loaded through junctions are only
+           written to disk as they are needed, calling this writes all
+           of the files of the project. Resources referred to with
+           :func:`Plugin.node_get_project_path() <buildstream.plugin.Plugin.node_get_project_path>`
+           are written to disk without exporting the whole project.
+
         Returns:
            The project base directory
         """
         project = self._get_project()
+        project._materialise("")
         return project.directory
 
     @contextmanager
@@ -20,7 +20,7 @@ import stat
 import tarfile as tarfilelib
 from tarfile import TarFile
 from contextlib import contextmanager
-from io import StringIO, BytesIO
+from io import StringIO, BytesIO, TextIOWrapper
 from typing import Callable, Optional, Union, List, IO, Iterator, Dict
 
 from google.protobuf import timestamp_pb2
@@ -277,9 +277,13 @@ class CasBasedDirectory(Directory):
             if not entry:
                 raise DirectoryError("{} not found in {}".format(paths[-1], str(subdir)))
 
-            # Read-only access, allow direct access to CAS object
-            with open(self.__cas_cache.objpath(entry.digest), mode, encoding=encoding) as f:
-                yield f
+            # Read-only access, allow direct access to CAS object,
+            # which is fetched first if it is only in the remote cache
+            with self.__cas_cache.open(entry.digest, "rb") as f:
+                if encoding:
+                    yield TextIOWrapper(f, encoding=encoding)
+                else:
+                    yield f
         else:
             if "x" in mode and entry:
                 raise DirectoryError("{} already exists in {}".format(paths[-1], str(subdir)))
@@ -544,6 +548,27 @@ class CasBasedDirectory(Directory):
     # by the private _IndexEntry class
     #
     def _get_digest(self):
+        if not self.__digest:
+            # Compute the digests of all modified directories locally and
+            # store the Directory protos with a single request to casd
+            buffers: List[bytes] = []
+            self.__compute_digest(buffers)
+            self.__cas_cache.add_objects(buffers=buffers)
+
+        return self.__digest
+
+    # __compute_digest()
+    #
+    # Compute the digest of this directory and of any modified subdirectories
+    # without storing them in CAS.
+    #
+    # Args:
+    #   buffers (List[bytes]): A list to append the serialized Directory protos to
+    #
+    # Returns:
+    #   (Digest): The Digest protobuf object for the Directory protobuf
+    #
+    def __compute_digest(self, buffers: List[bytes]):
         if not self.__digest:
             # Create updated Directory proto
             pb2_directory = remote_execution_pb2.Directory()
@@ -563,7 +588,7 @@ class CasBasedDirectory(Directory):
                     # If it hasn't been instantiated, digest must be up-to-date.
                     subdir = entry.directory
                     if subdir is not None:
-                        dirnode.digest.CopyFrom(subdir._get_digest())
+                        dirnode.digest.CopyFrom(subdir.__compute_digest(buffers))
                     else:
                         dirnode.digest.CopyFrom(entry.digest)
                 elif entry.type == FileType.REGULAR_FILE:
@@ -578,7 +603,9 @@ class CasBasedDirectory(Directory):
                     symlinknode.name = name
                     symlinknode.target = entry.target
 
-            self.__digest = self.__cas_cache.add_object(buffer=pb2_directory.SerializeToString())
+            buffer = pb2_directory.SerializeToString()
+            buffers.append(buffer)
+            self.__digest = utils._message_digest(buffer)
 
         return self.__digest
 
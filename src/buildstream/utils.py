@@ -20,6 +20,7 @@ Utilities
 
 import calendar
 import errno
+import gzip
 import hashlib
 import math
 import os
@@ -33,6 +34,7 @@ from subprocess import TimeoutExpired
 import tempfile
 import threading
 import itertools
+import zlib
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Callable, IO, Iterable, Iterator, Optional, Tuple, Union, Pattern
@@ -70,6 +72,20 @@ _USE_CP_FILE_RANGE = hasattr(os, "copy_file_range")
 #
 _DEFAULT_GUESS_PATTERN = re.compile(r"(\d+)\.(\d+)(?:\.(\d+))?")
 
+# The leading bytes of gzip compressed files, used to tell
+# compressed artifact logs from uncompressed ones
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# The leading bytes of every gzip member, used to find the
+# members of compressed logs from their end
+_GZIP_MEMBER_MAGIC = b"\x1f\x8b\x08"
+
+# The block size in which the tail of a log is read
+_LOG_TAIL_BLOCK_SIZE = 64 * 1024
+
+# The uncompressed size of the gzip members of compressed logs
+_LOG_MEMBER_SIZE = 1024 * 1024
+
 
 class UtilError(BstError):
     """Raised by utility functions when system calls fail.
@@ -1577,6 +1593,136 @@ def _get_compression(tar):
         return ""
 
 
+# _compress_log():
+#
+# Compress a log file with gzip, for storing it in an artifact.
+#
+# The log is compressed as a sequence of independent gzip members,
+# which gzip readers decompress as a whole, such that the tail of
+# the log can be read by only decompressing the last members.
+#
+# Args:
+#    src (str): The log file to compress
+#    dest (str): The path to write the compressed log to
+#
+def _compress_log(src, dest):
+    with open(src, "rb") as infile, open(dest, "wb") as outfile:
+        while True:
+            data = infile.read(_LOG_MEMBER_SIZE)
+            if not data:
+                break
+            outfile.write(gzip.compress(data, compresslevel=6, mtime=0))
+
+
+# _open_log():
+#
+# Open a log file which is optionally gzip compressed, logs stored
+# in artifacts created by older versions of BuildStream are
+# uncompressed.
+#
+# The content is decompressed on the fly while reading.
+#
+# Args:
+#    path (str): The path of the log file
+#    text (bool): Whether to open the log in text mode
+#
+# Returns:
+#    (file object): The opened log
+#
+def _open_log(path, *, text=False):
+    with open(path, "rb") as f:
+        compressed = f.read(2) == _GZIP_MAGIC
+
+    if compressed:
+        if text:
+            return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+        return gzip.open(path, "rb")
+
+    if text:
+        return open(path, "r", encoding="utf-8", errors="replace")  # pylint: disable=consider-using-with
+    return open(path, "rb")  # pylint: disable=consider-using-with
+
+
+# _read_last_lines():
+#
+# Read the last lines of a log file.
+#
+# Logs are read backwards from the end, uncompressed logs in blocks
+# and compressed logs by gzip members, so only the tail of the file
+# is read.
+#
+# Args:
+#    path (str): The path of the log file
+#    n_lines (int): The number of lines to read
+#
+# Returns:
+#    (str): The last lines of the log
+#
+def _read_last_lines(path, n_lines):
+    with open(path, "rb") as f:
+        compressed = f.read(2) == _GZIP_MAGIC
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        # Read one line more than needed, since the file
+        # normally ends with a newline
+        while position > 0 and data.count(b"\n") <= n_lines:
+            if compressed:
+                position, block_data = _read_last_gzip_member(f, position)
+            else:
+                block = min(position, _LOG_TAIL_BLOCK_SIZE)
+                position -= block
+                f.seek(position)
+                block_data = f.read(block)
+            data = block_data + data
+
+    lines = data.splitlines()[-n_lines:] if n_lines > 0 else []
+    return "\n".join([line.decode("utf-8", errors="replace") for line in lines]).rstrip()
+
+
+# _read_last_gzip_member():
+#
+# Find and decompress the last gzip member of a compressed log,
+# which ends at the given position.
+#
+# The leading bytes of a member may also appear in compressed data,
+# the last position from which the data decompresses as complete
+# members is the start of the last member. Logs compressed as a
+# single member are decompressed as a whole.
+#
+# Args:
+#    f (file object): The compressed log, opened in binary mode
+#    end (int): The position at which the member ends
+#
+# Returns:
+#    (int): The position at which the member starts
+#    (bytes): The decompressed data of the member
+#
+def _read_last_gzip_member(f, end):
+    position = end
+    buffer = b""
+    while position > 0:
+        block = min(position, _LOG_TAIL_BLOCK_SIZE)
+        position -= block
+        f.seek(position)
+        buffer = f.read(block) + buffer
+
+        # Only search the new block, including magic bytes extending into the previous one
+        search_end = min(len(buffer), block + len(_GZIP_MEMBER_MAGIC) - 1)
+        while True:
+            index = buffer.rfind(_GZIP_MEMBER_MAGIC, 0, search_end)
+            if index < 0:
+                break
+
+            try:
+                return position + index, gzip.decompress(buffer[index:])
+            except (OSError, EOFError, zlib.error):
+                search_end = index + len(_GZIP_MEMBER_MAGIC) - 1
+
+    # Not a valid gzip file, decompressing it reports the error
+    return 0, gzip.decompress(buffer)
+
+
 # _parse_version():
 #
 # Args:
@@ -20,7 +20,7 @@ import shutil
 
 import pytest
 
-from buildstream import _yaml
+from buildstream import _yaml, utils
 from buildstream.exceptions import ErrorDomain, LoadErrorReason
 from buildstream._testing import cli  # pylint: disable=unused-import
 from buildstream._testing import create_repo
@@ -387,6 +387,97 @@ def test_tar_build(cli, tmpdir, datafiles):
     assert os.path.exists(os.path.join(checkoutdir, "base.txt"))
 
 
+# Only the files which are needed to load the subproject are
+# exported from the staged sources of the junction
+#
+@pytest.mark.datafiles(DATA_DIR)
+def test_tar_lazy_staging(cli, tmpdir, datafiles):
+    project = os.path.join(str(datafiles), "use-repo")
+    baserepo = os.path.join(project, "baserepo")
+    _yaml.roundtrip_dump({"kind": "stack"}, os.path.join(baserepo, "unused.bst"))
+    os.makedirs(os.path.join(baserepo, "data"))
+    with open(os.path.join(baserepo, "data", "large"), "wb") as f:
+        f.write(b"x" * 1024 * 1024)
+
+    repo = create_repo("tar", str(tmpdir))
+    ref = repo.create(baserepo)
+    element = {"kind": "junction", "sources": [repo.source_config(ref=ref)]}
+    _yaml.roundtrip_dump(element, os.path.join(project, "base.bst"))
+
+    element_list = cli.get_pipeline(project, ["target.bst"])
+    assert "base.bst:target.bst" in element_list
+
+    staged_junctions = os.path.join(project, ".bst", "staged-junctions", "base.bst")
+    [key] = os.listdir(staged_junctions)
+    staged_files = set(utils.list_relative_paths(os.path.join(staged_junctions, key)))
+    assert {"project.conf", "target.bst", "base.txt"} <= staged_files
+    assert not staged_files & {"unused.bst", "data", "data/large"}
+
+
+# Subprojects which hand their directory to plugins with
+# the project-root variables are exported entirely
+#
+@pytest.mark.datafiles(DATA_DIR)
+def test_tar_project_root_staging(cli, tmpdir, datafiles):
+    project = os.path.join(str(datafiles), "use-repo")
+    baserepo = os.path.join(project, "baserepo")
+    _yaml.roundtrip_dump(
+        {"name": "base", "min-version": "2.0", "aliases": {"files": "%{project-root-uri}/data/"}},
+        os.path.join(baserepo, "project.conf"),
+    )
+    _yaml.roundtrip_dump({"kind": "stack"}, os.path.join(baserepo, "unused.bst"))
+    os.makedirs(os.path.join(baserepo, "data"))
+    with open(os.path.join(baserepo, "data", "large"), "wb") as f:
+        f.write(b"x" * 1024)
+
+    repo = create_repo("tar", str(tmpdir))
+    ref = repo.create(baserepo)
+    element = {"kind": "junction", "sources": [repo.source_config(ref=ref)]}
+    _yaml.roundtrip_dump(element, os.path.join(project, "base.bst"))
+
+    element_list = cli.get_pipeline(project, ["target.bst"])
+    assert "base.bst:target.bst" in element_list
+
+    staged_junctions = os.path.join(project, ".bst", "staged-junctions", "base.bst")
+    [key] = os.listdir(staged_junctions)
+    staged_files = set(utils.list_relative_paths(os.path.join(staged_junctions, key)))
+    assert {"project.conf", "target.bst", "base.txt", "unused.bst", "data/large"} <= staged_files
+
+
+# Independent junctions which need to be fetched are fetched
+# all at once, instead of one after the other
+#
+@pytest.mark.datafiles(DATA_DIR)
+def test_tar_parallel_fetch(cli, tmpdir, datafiles):
+    project = os.path.join(str(datafiles), "use-repo")
+
+    # A second subproject with a different name
+    otherrepo = os.path.join(project, "otherrepo")
+    shutil.copytree(os.path.join(project, "baserepo"), otherrepo)
+    _yaml.roundtrip_dump({"name": "other", "min-version": "2.0"}, os.path.join(otherrepo, "project.conf"))
+
+    junctions = {"base.bst": "baserepo", "other.bst": "otherrepo"}
+    for junction, subproject in junctions.items():
+        repo = create_repo("tar", os.path.join(str(tmpdir), junction))
+        ref = repo.create(os.path.join(project, subproject))
+        element = {"kind": "junction", "sources": [repo.source_config(ref=ref)]}
+        _yaml.roundtrip_dump(element, os.path.join(project, junction))
+
+    element = {"kind": "stack", "depends": [junction + ":target.bst" for junction in junctions]}
+    _yaml.roundtrip_dump(element, os.path.join(project, "both.bst"))
+
+    result = cli.run(project=project, silent=True, args=["show", "both.bst"])
+    result.assert_success()
+
+    # Both fetches start before either of them completes
+    lines = result.stderr.splitlines()
+    logs = [(i, line) for i, line in enumerate(lines) if "fetch:" in line and line.endswith(".log")]
+    starts = [i for i, line in logs if "START" in line]
+    successes = [i for i, line in logs if "SUCCESS" in line]
+    assert len(starts) == 2 and len(successes) == 2
+    assert max(starts) < min(successes)
+
+
 @pytest.mark.datafiles(DATA_DIR)
 def test_tar_missing_project_conf(cli, tmpdir, datafiles):
     project = datafiles / "use-repo"
@@ -15,10 +15,12 @@
 # Pylint doesn't play well with fixtures and dependency injection from pytest
 # pylint: disable=redefined-outer-name
 
+import gzip
 import os
 import re
 import pytest
 
+from buildstream._protos.buildstream.v2 import artifact_pb2
 from buildstream._testing import cli  # pylint: disable=unused-import
 
 # Project directory
@@ -101,3 +103,30 @@ def test_artifact_log_files(cli, datafiles):
     with open(import_bin, "r", encoding="utf-8") as f:
         data = f.read()
         assert len(re.findall(pattern, data, re.MULTILINE)) > 0
+
+
+@pytest.mark.datafiles(DATA_DIR)
+def test_artifact_log_compressed(cli, datafiles):
+    project = str(datafiles)
+
+    result = cli.run(project=project, args=["build", "target.bst"])
+    result.assert_success()
+
+    # Load the artifact proto of the element from the local cache
+    artifact_name = cli.get_artifact_name(project, "test", "target.bst")
+    artifact = artifact_pb2.Artifact()
+    with open(os.path.join(cli.directory, "artifacts", "refs", artifact_name), "rb") as f:
+        artifact.ParseFromString(f.read())
+
+    # The log is stored compressed in CAS
+    assert len(artifact.logs) == 1
+    digest = artifact.logs[0].digest
+    objpath = os.path.join(cli.directory, "cas", "objects", digest.hash[:2], digest.hash[2:])
+    with gzip.open(objpath, "rt", encoding="utf-8") as f:
+        stored_log = f.read()
+    assert stored_log.startswith("BuildStream ")
+
+    # `bst artifact log` decompresses it
+    result = cli.run(project=project, args=["artifact", "log", "target.bst"])
+    result.assert_success()
+    assert result.output.strip() == stored_log.strip()
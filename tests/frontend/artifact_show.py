@@ -16,6 +16,8 @@
 # pylint: disable=redefined-outer-name
 
 import os
+import re
+
 import pytest
 
 from buildstream.exceptions import ErrorDomain
@@ -268,3 +270,40 @@ def test_artifact_show_ignore_project_remotes(cli, tmpdir, datafiles):
         result = cli.run(project=project, args=["artifact", "show", "--ignore-project-artifact-remotes", element])
         result.assert_success()
         assert "not cached {}".format(element) in result.output
+
+
+def get_fetch_blob_requests(share):
+    match = re.search(r'bst_artifact_server_requests_total{method="FetchBlob"} (\d+)', share.get_metrics())
+    return int(match.group(1)) if match else 0
+
+
+# Test that every artifact is queried once, and that artifacts found
+# in the first remote are not queried in the second remote
+@pytest.mark.datafiles(DATA_DIR)
+def test_artifact_show_queries_remotes_once(cli, tmpdir, datafiles):
+    project = str(datafiles)
+    element = "target.bst"
+
+    with create_artifact_share(os.path.join(str(tmpdir), "remote1"), metrics=True) as remote1, create_artifact_share(
+        os.path.join(str(tmpdir), "remote2"), metrics=True
+    ) as remote2:
+        cli.configure({"artifacts": {"servers": [{"url": remote1.repo, "push": True}]}})
+
+        result = cli.run(project=project, args=["build", element])
+        result.assert_success()
+
+        result = cli.run(project=project, args=["artifact", "delete", "--deps", "all", element])
+        result.assert_success()
+
+        cli.configure({"artifacts": {"servers": [{"url": remote1.repo}, {"url": remote2.repo}]}})
+        requests1 = get_fetch_blob_requests(remote1)
+
+        result = cli.run(project=project, args=["artifact", "show", "--deps", "all", element])
+        result.assert_success()
+        n_artifacts = result.output.count("available ")
+        assert n_artifacts > 1
+        assert "not cached" not in result.output
+
+        # One additional request is made to check each remote when connecting to it
+        assert get_fetch_blob_requests(remote1) - requests1 == n_artifacts + 1
+        assert get_fetch_blob_requests(remote2) == 1
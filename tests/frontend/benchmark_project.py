@@ -0,0 +1,57 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import os
+
+from buildstream._testing.runcli import cli  # pylint: disable=unused-import
+
+from benchmarks.generate import ProjectSpec, generate_project
+from benchmarks.run import compare_results
+
+
+# Test that the synthetic projects of the benchmark suite can be loaded and
+# built, using every feature of the generator
+#
+def test_generated_project_builds(cli, tmpdir):
+    project = os.path.join(str(tmpdir), "project")
+    spec = ProjectSpec(elements=20, compose_every=10, include_depth=2, options=2, junctions=2, junction_elements=5)
+    target = generate_project(project, spec)
+
+    result = cli.run(project=project, args=["show", "--deps", "all", "--format", "%{name}", target])
+    result.assert_success()
+    elements = result.output.splitlines()
+
+    # The import elements, the compose elements, the junctioned
+    # elements and the target
+    assert len(elements) == 20 + 2 + 2 * (5 + 1) + 1
+    assert "subproject1.bst:element4.bst" in elements
+
+    result = cli.run(project=project, args=["--option", "option0", "True", "build", target])
+    result.assert_success()
+
+    result = cli.run(
+        project=project, args=["--option", "option0", "True", "show", "--deps", "none", "--format", "%{state}", target]
+    )
+    result.assert_success()
+    assert result.output.strip() == "cached"
+
+
+def test_compare_results():
+    base = {"results": {"show": {"median": 2.0}, "build": {"median": 4.0}}}
+    new = {"results": {"show": {"median": 3.0}, "build": {"median": 4.0}, "checkout": {"median": 1.0}}}
+
+    assert compare_results(base, new) == [("show", 2.0, 3.0, 1.5), ("build", 4.0, 4.0, 1.0)]
@@ -0,0 +1,122 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import os
+
+import pytest
+
+from buildstream import _yaml
+from buildstream.exceptions import ErrorDomain, LoadErrorReason
+from buildstream._testing import cli  # pylint: disable=unused-import
+
+
+def create_project(project_dir, project_sandbox=None, element_sandbox=None):
+    files_dir = os.path.join(project_dir, "files")
+    os.makedirs(files_dir, exist_ok=True)
+    os.makedirs(os.path.join(project_dir, "elements"), exist_ok=True)
+    with open(os.path.join(files_dir, "hello"), "w", encoding="utf-8") as f:
+        f.write("hello")
+
+    project_conf = {"name": "test", "min-version": "2.0", "element-path": "elements"}
+    if project_sandbox is not None:
+        project_conf["sandbox"] = project_sandbox
+    _yaml.roundtrip_dump(project_conf, os.path.join(project_dir, "project.conf"))
+
+    element = {"kind": "import", "sources": [{"kind": "local", "path": "files"}]}
+    if element_sandbox is not None:
+        element["sandbox"] = element_sandbox
+    _yaml.roundtrip_dump(element, os.path.join(project_dir, "elements", "target.bst"))
+
+
+def show(cli, project, fmt):
+    result = cli.run(project=project, args=["show", "--deps", "none", "--format", fmt, "target.bst"])
+    result.assert_success()
+    return result.output.strip()
+
+
+@pytest.mark.parametrize(
+    "project_sandbox,element_sandbox,variable",
+    [
+        (None, None, None),
+        ({"compiler-cache": {}}, None, "CCACHE_DIR: /buildstream-compiler-cache"),
+        ({"compiler-cache": {}}, {"compiler-cache": {"enabled": False}}, None),
+        (None, {"compiler-cache": {"variable": "SCCACHE_DIR", "path": "/sccache"}}, "SCCACHE_DIR: /sccache"),
+    ],
+    ids=["disabled", "project", "element-disabled", "element"],
+)
+def test_compiler_cache_environment(cli, tmpdir, project_sandbox, element_sandbox, variable):
+    project = str(tmpdir.join("project"))
+    create_project(project)
+    key = show(cli, project, "%{full-key}")
+
+    create_project(project, project_sandbox, element_sandbox)
+
+    # The compiler cache path is only exported in the sandbox it is mounted in
+    env = _yaml.load_data(show(cli, project, "%{env}"))
+    assert "CCACHE_DIR" not in env and "SCCACHE_DIR" not in env
+
+    result = cli.run(project=project, args=["build", "target.bst"])
+    result.assert_success()
+    result = cli.run(project=project, args=["artifact", "log", "target.bst"])
+    result.assert_success()
+    if variable:
+        assert variable in result.output
+    else:
+        assert "CCACHE_DIR" not in result.output and "SCCACHE_DIR" not in result.output
+
+    # The compiler cache never affects the cache key
+    assert show(cli, project, "%{full-key}") == key
+
+
+def test_compiler_cache_relative_path(cli, tmpdir):
+    project = str(tmpdir)
+    create_project(project, {"compiler-cache": {"path": "ccache"}})
+
+    result = cli.run(project=project, args=["show", "target.bst"])
+    result.assert_main_error(ErrorDomain.LOAD, LoadErrorReason.INVALID_DATA)
+
+
+def test_compiler_cache_build(cli, tmpdir):
+    project = str(tmpdir.join("project"))
+    create_project(project, {"compiler-cache": {}})
+
+    result = cli.run(project=project, args=["build", "target.bst"])
+    result.assert_success()
+    assert "Compiler cache used by 1 builds" in result.stderr
+    assert os.path.isdir(os.path.join(cli.directory, "compilercache", "test"))
+
+
+def test_compiler_cache_eviction(cli, tmpdir):
+    project = str(tmpdir.join("project"))
+    create_project(project, {"compiler-cache": {}})
+    cli.configure({"cache": {"compiler-cache-quota": "3K"}})
+
+    # Populate the compiler cache with files of 1K each, used in order
+    cache_dir = os.path.join(cli.directory, "compilercache", "test")
+    os.makedirs(os.path.join(cache_dir, "a"))
+    for index in range(5):
+        path = os.path.join(cache_dir, "a", "file{}".format(index))
+        with open(path, "wb") as f:
+            f.write(b"x" * 1024)
+        os.utime(path, (1000000 + index, 1000000 + index))
+
+    result = cli.run(project=project, args=["build", "target.bst"])
+    result.assert_success()
+    assert "Evicted: 2 files" in result.stderr
+
+    # The least recently used files were evicted
+    assert sorted(os.listdir(os.path.join(cache_dir, "a"))) == ["file2", "file3", "file4"]
@@ -35,7 +35,9 @@ MAIN_OPTIONS = [
     "--default-mirror ",
     "--directory ",
     "--error-lines ",
+    "--events ",
     "--fetchers ",
+    "--ignore-remote-misses ",
     "--log-file ",
     "--max-jobs ",
     "--message-lines ",
@@ -51,6 +53,7 @@ MAIN_OPTIONS = [
     "--pull-buildtrees ",
     "--pushers ",
     "--strict ",
+    "--trace-file ",
     "--verbose ",
     "--version ",
 ]
@@ -329,6 +332,28 @@ def test_argument_element_invalid(datafiles, cli, project, cmd, word_idx, expect
     assert_completion_failed(cli, cmd, word_idx, expected, cwd=cwd)
 
 
+# The element index is updated when elements are added or removed
+#
+@pytest.mark.datafiles(os.path.join(DATA_DIR, "project"))
+def test_argument_element_index(cli, datafiles):
+    project = str(datafiles)
+    elements = os.path.join(project, "elements")
+
+    # Pretend that the directory was last modified a while ago, such that it gets indexed
+    os.utime(elements, (0, 0))
+    assert_completion(cli, "bst show ", 2, [e + " " for e in PROJECT_ELEMENTS], cwd=project)
+    assert os.path.exists(os.path.join(project, ".bst", "completion-index.json"))
+
+    with open(os.path.join(elements, "new.bst"), "w", encoding="utf-8") as f:
+        f.write("kind: stack\n")
+    assert_completion(cli, "bst show ", 2, [e + " " for e in PROJECT_ELEMENTS + ["new.bst"]], cwd=project)
+
+    os.unlink(os.path.join(elements, "new.bst"))
+    os.unlink(os.path.join(elements, "target.bst"))
+    expected = [e + " " for e in PROJECT_ELEMENTS if e != "target.bst"]
+    assert_completion(cli, "bst show ", 2, expected, cwd=project)
+
+
 @pytest.mark.parametrize(
     "cmd,word_idx,expected",
     [
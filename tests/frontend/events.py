@@ -0,0 +1,163 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+from buildstream import _events
+from buildstream._testing import cli  # pylint: disable=unused-import
+
+from tests.testutils import create_artifact_share
+
+# Project directory
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "project")
+
+
+def read_events(events_file):
+    with open(events_file, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.datafiles(DATA_DIR)
+def test_build_events(cli, tmpdir, datafiles):
+    project = str(datafiles)
+    events_file = os.path.join(str(tmpdir), "events.json")
+
+    result = cli.run(project=project, args=["--events", events_file, "build", "target.bst"])
+    result.assert_success()
+    events = read_events(events_file)
+
+    # Every job is a task, and every task which was added was removed
+    started = {event["job"]: event for event in events if event["event"] == "job-started"}
+    finished = {event["job"]: event for event in events if event["event"] == "job-finished"}
+    added = {event["task"] for event in events if event["event"] == "task-added"}
+    removed = {event["task"] for event in events if event["event"] == "task-removed"}
+    assert started.keys() == finished.keys()
+    assert started.keys() <= added
+    assert added == removed
+
+    # The element was built successfully
+    builds = [
+        event for event in finished.values() if event["action"] == "Build" and event["element"] == "import-bin.bst"
+    ]
+    assert len(builds) == 1
+    assert builds[0]["outcome"] == "ok"
+    assert builds[0]["duration"] >= 0
+
+    # The artifact was not in the cache before the build
+    lookups = [
+        event["event"]
+        for event in events
+        if event["event"] in ("cache-hit", "cache-miss") and event["element"] == "import-bin.bst"
+    ]
+    assert lookups == ["cache-miss"]
+
+    # Building again finds the artifact in the local cache
+    result = cli.run(project=project, args=["--events", events_file, "build", "target.bst"])
+    result.assert_success()
+    events = read_events(events_file)
+
+    hits = [event for event in events if event["event"] == "cache-hit" and event["element"] == "import-bin.bst"]
+    assert len(hits) == 1
+    assert not hits[0]["remote"]
+    assert not any(event["event"] == "job-started" and event["action"] == "Build" for event in events)
+
+
+@pytest.mark.datafiles(DATA_DIR)
+def test_events_file_descriptor(cli, tmpdir, datafiles):
+    project = str(datafiles)
+    read_fd, write_fd = os.pipe()
+
+    result = cli.run(project=project, args=["--events", str(write_fd), "show", "target.bst"])
+    result.assert_success()
+
+    # The stream is closed at the end of the session
+    with os.fdopen(read_fd, encoding="utf-8") as f:
+        events = [json.loads(line) for line in f]
+
+    assert any(event["event"] == "task-added" for event in events)
+
+
+@pytest.mark.datafiles(DATA_DIR)
+def test_transfer_events(cli, tmpdir, datafiles):
+    project = str(datafiles)
+    events_file = os.path.join(str(tmpdir), "events.json")
+
+    with create_artifact_share(os.path.join(str(tmpdir), "share")) as share:
+        cli.configure({"artifacts": {"servers": [{"url": share.repo, "push": True}]}})
+
+        # The pushed bytes are recorded
+        result = cli.run(project=project, args=["--events", events_file, "build", "import-bin.bst"])
+        result.assert_success()
+        pushes = [
+            event
+            for event in read_events(events_file)
+            if event["event"] == "job-finished" and event["action"] == "Push"
+        ]
+        assert len(pushes) == 1
+        assert pushes[0]["bytes_upload_requested"] > 0
+        assert pushes[0]["bytes_downloaded"] == 0
+
+        # The blobs which are still present locally are not downloaded
+        cli.remove_artifact_from_cache(project, "import-bin.bst")
+        result = cli.run(project=project, args=["--events", events_file, "artifact", "pull", "import-bin.bst"])
+        result.assert_success()
+        pulls = [
+            event
+            for event in read_events(events_file)
+            if event["event"] == "job-finished" and event["action"] == "Pull"
+        ]
+        assert len(pulls) == 1
+        assert pulls[0]["bytes_downloaded"] == 0
+        assert pulls[0]["bytes_upload_requested"] == 0
+
+        # The pulled bytes are recorded
+        shutil.rmtree(os.path.join(cli.directory, "cas"))
+        shutil.rmtree(os.path.join(cli.directory, "artifacts"))
+        result = cli.run(project=project, args=["--events", events_file, "artifact", "pull", "import-bin.bst"])
+        result.assert_success()
+        pulls = [
+            event
+            for event in read_events(events_file)
+            if event["event"] == "job-finished" and event["action"] == "Pull"
+        ]
+        assert len(pulls) == 1
+        assert pulls[0]["bytes_downloaded"] > 0
+        assert pulls[0]["bytes_upload_requested"] == 0
+
+
+# Test that closing the stream does not hang when the consumer does not read it
+#
+def test_close_unread_events(monkeypatch):
+    monkeypatch.setattr(_events, "_CLOSE_TIMEOUT", 0.1)
+    read_fd, write_fd = os.pipe()
+    try:
+        writer = _events.EventWriter(os.fdopen(write_fd, "w", encoding="utf-8"))
+        for _ in range(2 * _events._EVENT_QUEUE_SIZE):
+            writer.cache_miss("element-with-a-long-name-to-fill-the-pipe.bst")
+
+        start = time.monotonic()
+        writer.close()
+        assert time.monotonic() - start < 5
+    finally:
+        # The abandoned writer thread exits once the pipe is closed
+        os.close(read_fd)
+        writer._thread.join()
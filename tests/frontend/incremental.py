@@ -0,0 +1,142 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import os
+
+import pytest
+
+from buildstream import _yaml
+from buildstream._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
+from buildstream._protos.buildstream.v2 import artifact_pb2
+from buildstream._testing import cli  # pylint: disable=unused-import
+
+from tests.testutils import create_artifact_share
+
+
+# A manual element which runs no commands, and collects its build
+# directory, such that it can be built with any sandbox
+#
+def create_project(project_dir, incremental):
+    os.makedirs(os.path.join(project_dir, "elements"), exist_ok=True)
+    _yaml.roundtrip_dump(
+        {"name": "test", "min-version": "2.0", "element-path": "elements"},
+        os.path.join(project_dir, "project.conf"),
+    )
+
+    element = {
+        "kind": "manual",
+        "sources": [{"kind": "local", "path": "files"}],
+        "variables": {"build-root": "/build", "install-root": "/build"},
+        "config": {
+            "configure-commands": [],
+            "build-commands": [],
+            "install-commands": [],
+            "strip-commands": [],
+        },
+        "sandbox": {"incremental": incremental},
+    }
+    _yaml.roundtrip_dump(element, os.path.join(project_dir, "elements", "target.bst"))
+
+
+def write_file(project_dir, filename, content):
+    path = os.path.join(project_dir, "files", filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def load_artifact(cli, project):
+    artifact_name = cli.get_artifact_name(project, "test", "target.bst")
+    artifact = artifact_pb2.Artifact()
+    with open(os.path.join(cli.directory, "artifacts", "refs", artifact_name), "rb") as f:
+        artifact.ParseFromString(f.read())
+    return artifact
+
+
+def load_directory(cli, digest):
+    directory = remote_execution_pb2.Directory()
+    with open(os.path.join(cli.directory, "cas", "objects", digest.hash[:2], digest.hash[2:]), "rb") as f:
+        directory.ParseFromString(f.read())
+    return {node.name: node for node in directory.files}
+
+
+@pytest.mark.parametrize("incremental", [True, False], ids=["incremental", "non-incremental"])
+def test_incremental_build(cli, tmpdir, incremental):
+    project = str(tmpdir)
+    create_project(project, incremental)
+    write_file(project, "unchanged", "unchanged")
+    write_file(project, "changed", "old")
+    write_file(project, "removed", "removed")
+
+    result = cli.run(project=project, args=["build", "target.bst"])
+    result.assert_success()
+    first = load_artifact(cli, project)
+    assert not first.was_incremental
+
+    # Change the sources, which results in a new cache key
+    write_file(project, "changed", "new")
+    write_file(project, "added", "added")
+    os.unlink(os.path.join(project, "files", "removed"))
+
+    result = cli.run(project=project, args=["build", "target.bst"])
+    result.assert_success()
+    second = load_artifact(cli, project)
+    assert second.was_incremental == incremental
+    assert ("Incremental build" in result.stderr) == incremental
+
+    # The source changes are applied to the previous build tree
+    result = cli.run(project=project, args=["artifact", "list-contents", "target.bst"])
+    result.assert_success()
+    assert result.output.split()[1:] == ["added", "changed", "unchanged"]
+
+    if incremental:
+        # Unchanged files keep the properties of the previous build tree
+        old_files = load_directory(cli, first.buildtree)
+        new_files = load_directory(cli, second.buildtree)
+        assert new_files["unchanged"].node_properties == old_files["unchanged"].node_properties
+        assert new_files["changed"].digest != old_files["changed"].digest
+    else:
+        assert not second.HasField("buildtree")
+
+
+def test_incremental_build_not_shared(cli, tmpdir):
+    project = os.path.join(str(tmpdir), "project")
+    create_project(project, True)
+    write_file(project, "file", "old")
+
+    with create_artifact_share(os.path.join(str(tmpdir), "artifactshare")) as share:
+        cli.configure({"artifacts": {"servers": [{"url": share.repo, "push": True}]}})
+
+        result = cli.run(project=project, args=["build", "target.bst"])
+        result.assert_success()
+        assert share.get_artifact(cli.get_artifact_name(project, "test", "target.bst"))
+
+        # Staging the sources outside of a build does not use the previous build tree
+        write_file(project, "file", "new")
+        result = cli.run(
+            project=project,
+            args=["source", "checkout", "--directory", os.path.join(str(tmpdir), "checkout"), "target.bst"],
+        )
+        result.assert_success()
+        assert "Incremental build" not in result.stderr
+
+        # Incremental builds are kept out of shared artifact caches
+        result = cli.run(project=project, args=["build", "target.bst"])
+        result.assert_success()
+        assert "Incremental build" in result.stderr
+        assert "Not pushing tainted artifact" in result.stderr
+        assert not share.get_artifact(cli.get_artifact_name(project, "test", "target.bst"))
@@ -0,0 +1,99 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import os
+
+import pytest
+
+from buildstream import _yaml
+from buildstream._jobserver import JobServer
+from buildstream._protos.buildstream.v2 import artifact_pb2
+from buildstream._testing import cli  # pylint: disable=unused-import
+
+
+def create_project(project_dir):
+    os.makedirs(os.path.join(project_dir, "files"), exist_ok=True)
+    with open(os.path.join(project_dir, "files", "hello"), "w", encoding="utf-8") as f:
+        f.write("hello")
+
+    _yaml.roundtrip_dump({"name": "test", "min-version": "2.0"}, os.path.join(project_dir, "project.conf"))
+
+    # A manual element which runs no commands, such that it can be built with any sandbox
+    element = {
+        "kind": "manual",
+        "sources": [{"kind": "local", "path": "files"}],
+        "variables": {"build-root": "/build", "install-root": "/build"},
+        "environment": {"MAKEFLAGS": "-j8 -k"},
+        "config": {
+            "configure-commands": [],
+            "build-commands": [],
+            "install-commands": [],
+            "strip-commands": [],
+        },
+    }
+    _yaml.roundtrip_dump(element, os.path.join(project_dir, "target.bst"))
+
+
+@pytest.mark.parametrize("jobserver", [True, False], ids=["jobserver", "no-jobserver"])
+def test_jobserver_build(cli, tmpdir, jobserver):
+    project = str(tmpdir)
+    create_project(project)
+    key = cli.get_element_key(project, "target.bst")
+
+    # The build environment is recorded in the artifact along with the build tree
+    cli.configure({"build": {"jobserver": jobserver}, "cache": {"cache-buildtrees": "always"}})
+    result = cli.run(project=project, args=["build", "target.bst"])
+    result.assert_success()
+
+    # The jobserver does not affect the cache key
+    assert cli.get_element_key(project, "target.bst") == key
+
+    result = cli.run(project=project, args=["artifact", "log", "target.bst"])
+    result.assert_success()
+    if jobserver:
+        assert "--jobserver-auth=fifo:/buildstream-jobserver/fifo -k" in result.output
+        assert "-j8" not in result.output
+    else:
+        assert "MAKEFLAGS: -j8 -k" in result.output
+
+    # The build environment recorded in the artifact is not affected
+    artifact = artifact_pb2.Artifact()
+    artifact_name = cli.get_artifact_name(project, "test", "target.bst")
+    with open(os.path.join(cli.directory, "artifacts", "refs", artifact_name), "rb") as f:
+        artifact.ParseFromString(f.read())
+    environment = {variable.name: variable.value for variable in artifact.buildsandbox.environment}
+    assert environment["MAKEFLAGS"] == "-j8 -k"
+
+    # The jobserver is removed after the session
+    tmp = os.path.join(cli.directory, "tmp")
+    assert not os.path.exists(tmp) or not [name for name in os.listdir(tmp) if name.startswith("jobserver-")]
+
+
+def test_jobserver_slots(tmpdir):
+    jobserver = JobServer(str(tmpdir), 2)
+    try:
+        assert os.path.exists(os.path.join(jobserver.directory, "fifo"))
+        assert jobserver.acquire()
+        assert jobserver.acquire()
+        assert not jobserver.acquire()
+
+        jobserver.release()
+        assert jobserver.acquire()
+    finally:
+        jobserver.close()
+
+    assert not os.path.exists(jobserver.directory)
@@ -209,3 +209,36 @@ def test_overlaps_multistage(cli, datafiles, target, action, error):
     elif action == OverlapAction.ERROR:
         result.assert_main_error(ErrorDomain.STREAM, None)
         result.assert_task_error(ErrorDomain.ELEMENT, "overlaps")
+
+
+#
+# Test that rebuilding an element with the same build dependencies starts
+# from the cached build root, and still reports the overlaps of the
+# artifacts staged in it.
+#
+@pytest.mark.datafiles(DATA_DIR)
+def test_overlaps_cached_build_root(cli, datafiles):
+    project_dir = str(datafiles)
+    gen_project(project_dir, False)
+
+    result = cli.run(project=project_dir, args=["build", "collect.bst"])
+    result.assert_success()
+    assert "WARNING [overlaps]" in result.stderr
+    assert os.listdir(os.path.join(cli.directory, "buildroots"))
+
+    result = cli.run(project=project_dir, args=["artifact", "delete", "collect.bst"])
+    result.assert_success()
+
+    result = cli.run(project=project_dir, args=["build", "collect.bst"])
+    result.assert_success()
+    assert "WARNING [overlaps]" in result.stderr
+
+    result = cli.run(project=project_dir, args=["artifact", "log", "collect.bst"])
+    result.assert_success()
+    assert "Staging 3 dependencies from cached build root" in result.output
+
+    checkout = os.path.join(cli.directory, "checkout")
+    result = cli.run(project=project_dir, args=["artifact", "checkout", "collect.bst", "--directory", checkout])
+    result.assert_success()
+    with open(os.path.join(checkout, "file1"), encoding="utf-8") as f:
+        assert f.read() == "foo\n"
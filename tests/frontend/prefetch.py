@@ -0,0 +1,91 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import os
+import shutil
+
+import pytest
+
+from buildstream import _yaml
+from buildstream._testing import cli  # pylint: disable=unused-import
+
+from tests.testutils import create_artifact_share
+
+
+def create_project(project_dir):
+    for name in ["dep", "other"]:
+        files_dir = os.path.join(project_dir, "files", name)
+        os.makedirs(files_dir, exist_ok=True)
+        with open(os.path.join(files_dir, name), "w", encoding="utf-8") as f:
+            f.write(name)
+    os.makedirs(os.path.join(project_dir, "elements"), exist_ok=True)
+
+    _yaml.roundtrip_dump(
+        {"name": "test", "min-version": "2.0", "element-path": "elements"},
+        os.path.join(project_dir, "project.conf"),
+    )
+    _yaml.roundtrip_dump(
+        {"kind": "import", "sources": [{"kind": "local", "path": "files/dep"}]},
+        os.path.join(project_dir, "elements", "dep.bst"),
+    )
+
+
+# The target also depends on an element which was not built yet,
+# such that it is waiting for a build while its cached dependency
+# can be prefetched
+#
+def create_target(project_dir):
+    _yaml.roundtrip_dump(
+        {"kind": "import", "sources": [{"kind": "local", "path": "files/other"}]},
+        os.path.join(project_dir, "elements", "other.bst"),
+    )
+    _yaml.roundtrip_dump(
+        {"kind": "compose", "build-depends": ["dep.bst", "other.bst"]},
+        os.path.join(project_dir, "elements", "target.bst"),
+    )
+
+
+@pytest.mark.parametrize("lookahead", [8, 0], ids=["enabled", "disabled"])
+def test_prefetch_dependencies(cli, tmpdir, lookahead):
+    project = str(tmpdir.join("project"))
+    create_project(project)
+
+    with create_artifact_share(os.path.join(str(tmpdir), "remote-cache")) as remote_cache:
+        cli.configure(
+            {
+                "cache": {"storage-service": {"url": remote_cache.repo}},
+                "scheduler": {"prefetch-lookahead": lookahead},
+            }
+        )
+
+        result = cli.run(project=project, args=["build", "dep.bst"])
+        result.assert_success()
+
+        # Discard the local CAS cache, the dependency artifact files
+        # are only available in the remote cache now
+        shutil.rmtree(os.path.join(cli.directory, "cas"))
+
+        create_target(project)
+        result = cli.run(project=project, args=["build", "target.bst"])
+        result.assert_success()
+        assert ("Prefetched artifact files" in result.stderr) == bool(lookahead)
+
+        checkout = os.path.join(str(tmpdir), "checkout")
+        result = cli.run(project=project, args=["artifact", "checkout", "target.bst", "--directory", checkout])
+        result.assert_success()
+        assert os.path.exists(os.path.join(checkout, "dep"))
+        assert os.path.exists(os.path.join(checkout, "other"))
@@ -16,6 +16,7 @@
 # pylint: disable=redefined-outer-name
 
 import os
+import re
 import shutil
 import stat
 import pytest
@@ -628,3 +629,58 @@ def test_dynamic_build_plan(cli, tmpdir, datafiles, deps, expected_pulled_elemen
         states = cli.get_element_states(project, all_elements)
         states_flattended = (states[target], states[build_dep], states[runtime_dep])
         assert states_flattended == expected_states
+
+
+def get_fetch_blob_requests(share):
+    match = re.search(r'bst_artifact_server_requests_total{method="FetchBlob"} (\d+)', share.get_metrics())
+    return int(match.group(1)) if match else 0
+
+
+# Tests that artifacts which were missing in a remote are not looked
+# up again in subsequent sessions, until they are pushed
+#
+@pytest.mark.datafiles(DATA_DIR)
+def test_pull_remembers_misses(cli, tmpdir, datafiles):
+    project = str(datafiles)
+    target = "target.bst"
+
+    with create_artifact_share(os.path.join(str(tmpdir), "artifactshare"), metrics=True) as share:
+        cli.configure(
+            {
+                "artifacts": {"servers": [{"url": share.repo, "push": True}]},
+                "cache": {"remote-miss-ttl": 3600},
+            }
+        )
+
+        # Every artifact is looked up once, in addition to
+        # the request checking the remote when connecting
+        requests = get_fetch_blob_requests(share)
+        result = cli.run(project=project, args=["artifact", "pull", "--deps", "all", target])
+        result.assert_success()
+        lookups = get_fetch_blob_requests(share) - requests
+        assert lookups > 1
+
+        # The misses are remembered
+        requests = get_fetch_blob_requests(share)
+        result = cli.run(project=project, args=["artifact", "pull", "--deps", "all", target])
+        result.assert_success()
+        assert get_fetch_blob_requests(share) - requests == 1
+
+        # Unless they are explicitly ignored
+        requests = get_fetch_blob_requests(share)
+        result = cli.run(project=project, args=["--ignore-remote-misses", "artifact", "pull", "--deps", "all", target])
+        result.assert_success()
+        assert get_fetch_blob_requests(share) - requests == lookups
+
+        # Pushing the artifacts forgets about the misses
+        result = cli.run(project=project, args=["build", target])
+        result.assert_success()
+        assert_shared(cli, share, project, target)
+
+        result = cli.run(project=project, args=["artifact", "delete", "--deps", "all", target])
+        result.assert_success()
+        assert cli.get_element_state(project, target) != "cached"
+
+        result = cli.run(project=project, args=["artifact", "pull", "--deps", "all", target])
+        result.assert_success()
+        assert cli.get_element_state(project, target) == "cached"
@@ -0,0 +1,66 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import json
+import os
+
+import pytest
+
+from buildstream._testing import cli  # pylint: disable=unused-import
+
+# Project directory
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "project")
+
+
+@pytest.mark.datafiles(DATA_DIR)
+def test_build_trace(cli, tmpdir, datafiles):
+    project = str(datafiles)
+    trace_file = os.path.join(str(tmpdir), "trace.json")
+
+    result = cli.run(project=project, args=["--builders", "2", "--trace-file", trace_file, "build", "target.bst"])
+    result.assert_success()
+
+    with open(trace_file, encoding="utf-8") as f:
+        events = json.load(f)
+
+    spans = [event for event in events if event["ph"] == "X"]
+    jobs = {(span["args"]["queue"], span["args"]["element"]): span for span in spans if span["cat"] == "job"}
+
+    # Every element was built in a job holding a process resource
+    job = jobs[("Build", "import-bin.bst")]
+    assert job["args"]["outcome"] == "ok"
+    assert "process" in job["args"]["resources"]
+
+    # The phases of the build are nested in the span of its job
+    phases = {
+        span["name"]: span
+        for span in spans
+        if span["cat"] == "activity" and span["tid"] == job["tid"] and span["args"].get("element") == "import-bin.bst"
+    }
+    for name in ("Staging sources", "Caching artifact"):
+        phase = phases[name]
+        assert job["ts"] <= phase["ts"]
+        assert phase["ts"] + phase["dur"] <= job["ts"] + job["dur"]
+
+    # Activities outside of jobs are on the main track
+    assert any(span["name"] == "Loading elements" and span["tid"] == 0 for span in spans)
+
+    # The active jobs never exceeded the number of builders
+    counters = [event["args"] for event in events if event["ph"] == "C" and event["name"] == "Active jobs"]
+    assert counters
+    assert max(counter["process"] for counter in counters) <= 2
+    assert counters[-1] == {"cache": 0, "download": 0, "process": 0, "upload": 0}
@@ -0,0 +1,45 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import asyncio
+import threading
+
+from buildstream._assetcache import AssetRemote
+from buildstream._remotespec import RemoteSpec, RemoteType
+
+
+# A remote miss cache which knows every URI as missing, and
+# records the threads it is accessed in
+class _MissCache:
+    def __init__(self):
+        self.threads = []
+
+    def is_missing(self, spec, uris):
+        self.threads.append(threading.get_ident())
+        return True
+
+
+def test_fetch_blob_async_miss_cache_off_event_loop():
+    miss_cache = _MissCache()
+    remote = AssetRemote(RemoteSpec(RemoteType.ALL, "http://localhost:1"), None, miss_cache=miss_cache)
+
+    async def fetch_blob():
+        return await remote.fetch_blob_async(["urn:test"]), threading.get_ident()
+
+    # Recently missing URIs are not requested from the remote
+    response, loop_thread = asyncio.run(fetch_blob())
+    assert response is None
+
+    # The miss cache is not accessed in the thread of the event loop
+    assert miss_cache.threads
+    assert loop_thread not in miss_cache.threads
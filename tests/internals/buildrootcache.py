@@ -0,0 +1,70 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import os
+
+import pytest
+
+from buildstream import _buildrootcache
+from buildstream._buildrootcache import BuildRootCache
+from buildstream._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
+
+
+# The records are only read and written on disk, the CAS is
+# only used to check whether their trees are present
+class _Context:
+    def __init__(self, cachedir):
+        self.cachedir = cachedir
+
+    def get_cascache(self):
+        return None
+
+
+@pytest.mark.parametrize(
+    "length,checkpoints",
+    [
+        (0, []),
+        (1, [0]),
+        (8, [7]),
+        (9, [7, 8]),
+        (40, [7, 15, 31, 39]),
+        (64, [7, 15, 31, 63]),
+    ],
+)
+def test_checkpoints(length, checkpoints):
+    assert BuildRootCache.checkpoints(length) == checkpoints
+
+
+def test_evict_least_recently_used(tmpdir, monkeypatch):
+    monkeypatch.setattr(_buildrootcache, "BUILDROOT_MAX_RECORDS", 8)
+    buildrootcache = BuildRootCache(_Context(str(tmpdir)))
+    root = remote_execution_pb2.Digest(hash="0" * 64, size_bytes=0)
+
+    for index in range(8):
+        key = "record{}".format(index)
+        buildrootcache.store(key, root, [])
+        os.utime(os.path.join(str(tmpdir), "buildroots", key), (index, index))
+
+    # Using a record makes it the most recently used
+    assert buildrootcache.lookup("record0")[0] == root
+
+    # Exceeding the maximum removes records down to three quarters of it
+    buildrootcache.store("record8", root, [])
+    assert sorted(os.listdir(os.path.join(str(tmpdir), "buildroots"))) == [
+        "record0",
+        "record4",
+        "record5",
+        "record6",
+        "record7",
+        "record8",
+    ]
@@ -17,6 +17,7 @@ from unittest.mock import MagicMock
 
 from buildstream._cas import casdprocessmanager
 from buildstream._messenger import Messenger
+from buildstream.storage._casbaseddirectory import CasBasedDirectory
 from tests.testutils import casd_cache
 
 #
@@ -128,3 +129,46 @@ def test_casd_redirects_stderr_to_file_and_rotate(tmp_path, monkeypatch):
         assert len(existing_log_files) == n_max_log_files
         assert evicted_file not in existing_log_files
         assert existing_log_files[-1].read_text() == "hello\n"
+
+
+def test_missing_blobs_for_directory_skips_present_directories(tmp_path, monkeypatch):
+    files = tmp_path.joinpath("files")
+    files.joinpath("a").mkdir(parents=True)
+    files.joinpath("a", "foo").write_text("foo")
+    files.joinpath("b").mkdir()
+    files.joinpath("b", "bar").write_text("bar")
+
+    with casd_cache(tmp_path.joinpath("casd")) as cascache:
+        vdir = CasBasedDirectory(cascache)
+        vdir.import_files(str(files))
+        digest = vdir._get_digest()
+
+        # The local CAS stands in for the remote
+        remote = MagicMock(local_cas_instance_name="")
+
+        # Record the blobs which are checked on the remote
+        checked = []
+        missing_blobs = cascache.missing_blobs
+
+        def check_blobs(blobs, *, remote=None):
+            blobs = list(blobs)
+            checked.append(len(blobs))
+            return missing_blobs(blobs, remote=remote)
+
+        monkeypatch.setattr(cascache, "missing_blobs", check_blobs)
+
+        # All directories and files are checked
+        assert not cascache.missing_blobs_for_directory(digest, remote=remote)
+
+        # The subtree of "a" is skipped once it is known to be present
+        cascache.mark_directory_present(remote, vdir.open_directory("a")._get_digest())
+        assert not cascache.missing_blobs_for_directory(digest, remote=remote)
+
+        # Nothing is checked once the whole tree is known to be present
+        cascache.mark_directory_present(remote, digest)
+        assert not cascache.missing_blobs_for_directory(digest, remote=remote)
+
+        # Other remotes are still checked
+        assert not cascache.missing_blobs_for_directory(digest)
+
+        assert checked == [5, 3, 0, 5]
@@ -0,0 +1,52 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import asyncio
+import threading
+
+import pytest
+
+from buildstream._coroutines import completed, is_synchronous, run_synchronously, to_thread
+
+
+async def _add(a, b):
+    result = await completed(a + b)
+    thread = await to_thread(threading.get_ident)
+    return result, thread, is_synchronous()
+
+
+def test_run_synchronously():
+    result, thread, synchronous = run_synchronously(_add(1, 2))
+
+    # The coroutine completed in the calling thread
+    assert result == 3
+    assert thread == threading.get_ident()
+    assert synchronous
+    assert not is_synchronous()
+
+
+def test_run_on_event_loop():
+    async def add():
+        return await _add(1, 2), threading.get_ident()
+
+    (result, thread, synchronous), loop_thread = asyncio.run(add())
+
+    # The same coroutine delegates blocking calls to a thread on an event loop
+    assert result == 3
+    assert thread != loop_thread
+    assert not synchronous
+
+
+def test_run_synchronously_suspended():
+    with pytest.raises(RuntimeError):
+        run_synchronously(asyncio.sleep(0.1))
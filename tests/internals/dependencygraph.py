@@ -0,0 +1,128 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import itertools
+import random
+
+import pytest
+from pyroaring import BitMap  # pylint: disable=no-name-in-module
+
+from buildstream._dependencygraph import DependencyGraph
+from buildstream.types import _Scope
+
+_ID_GENERATOR = itertools.count(1)
+
+
+class _Node:
+    def __init__(self, name):
+        self.name = name
+        self._unique_id = next(_ID_GENERATOR)
+        self.build_deps = []
+        self.runtime_deps = []
+
+    def __repr__(self):
+        return self.name
+
+
+# Generate a random DAG where every node only depends on nodes created before it
+#
+def _random_graph(n_nodes, max_deps, seed):
+    rand = random.Random(seed)
+    nodes = []
+    for i in range(n_nodes):
+        node = _Node("node{}".format(i))
+        if nodes:
+            node.build_deps = rand.sample(nodes[-50:], rand.randint(0, min(max_deps, len(nodes[-50:]))))
+            node.runtime_deps = rand.sample(nodes[-50:], rand.randint(0, min(max_deps, len(nodes[-50:]))))
+        nodes.append(node)
+    return nodes
+
+
+def _freeze(roots):
+    return DependencyGraph(roots, lambda node: node.build_deps, lambda node: node.runtime_deps)
+
+
+# The recursive traversal of Element._dependencies(), which the graph
+# must reproduce exactly
+#
+def _reference_dependencies(node, scope, visited):
+    def visit(node, scope):
+        if scope == _Scope.ALL:
+            visited[0].add(node._unique_id)
+            visited[1].add(node._unique_id)
+            for dep in itertools.chain(node.build_deps, node.runtime_deps):
+                if dep._unique_id not in visited[0] and dep._unique_id not in visited[1]:
+                    yield from visit(dep, _Scope.ALL)
+            yield node
+        elif scope == _Scope.BUILD:
+            visited[0].add(node._unique_id)
+            for dep in node.build_deps:
+                if dep._unique_id not in visited[1]:
+                    yield from visit(dep, _Scope.RUN)
+        elif scope == _Scope.RUN:
+            visited[1].add(node._unique_id)
+            for dep in node.runtime_deps:
+                if dep._unique_id not in visited[1]:
+                    yield from visit(dep, _Scope.RUN)
+            yield node
+
+    yield from visit(node, scope)
+
+
+@pytest.mark.parametrize("scope", [_Scope.ALL, _Scope.BUILD, _Scope.RUN])
+@pytest.mark.parametrize("seed", range(5))
+def test_traversal_order(scope, seed):
+    nodes = _random_graph(300, 4, seed)
+    roots = nodes[-3:]
+    graph = _freeze(roots)
+
+    # Traverse several targets sharing the same visited state
+    expected_visited = (BitMap(), BitMap())
+    visited = (BitMap(), BitMap())
+    for root in roots:
+        expected = list(_reference_dependencies(root, scope, expected_visited))
+        assert list(graph.dependencies(root, scope, visited=visited)) == expected
+
+    assert visited == expected_visited
+
+
+def test_direct_dependencies():
+    a, b, c = _Node("a"), _Node("b"), _Node("c")
+    c.build_deps = [a, b]
+    c.runtime_deps = [b]
+    graph = _freeze([c])
+
+    assert len(graph) == 3
+    assert a in graph and _Node("d") not in graph
+    assert graph.build_dependencies(c) == [a, b]
+    assert graph.runtime_dependencies(c) == [b]
+    assert list(graph.dependencies(c, _Scope.BUILD, recurse=False)) == [a, b]
+    assert list(graph.dependencies(c, _Scope.ALL, recurse=False)) == [a, b]
+    assert list(graph.dependencies(c, _Scope.RUN, recurse=False)) == [b]
+
+
+# A 50k node graph, including a dependency chain which
+# is far deeper than the Python recursion limit
+#
+def test_large_graph():
+    nodes = _random_graph(50000, 3, 0)
+    for dep, node in zip(nodes, nodes[1:]):
+        node.runtime_deps.append(dep)
+
+    graph = _freeze([nodes[-1]])
+    assert len(graph) == 50000
+
+    runtime = list(graph.dependencies(nodes[-1], _Scope.RUN))
+    assert runtime == nodes
+
+    assert len(list(graph.dependencies(nodes[-1], _Scope.ALL))) == 50000
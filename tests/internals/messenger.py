@@ -0,0 +1,48 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import os
+
+from buildstream import _messenger
+from buildstream._messenger import _LogBuffer
+
+
+# A log writer which has fallen behind, and never writes out logs
+class _StalledWriter:
+    def schedule(self, log):
+        pass
+
+
+def test_log_buffer_drops_when_full(tmpdir, monkeypatch):
+    monkeypatch.setattr(_messenger, "_MAX_PENDING_LOG_WRITES", 4)
+    filename = os.path.join(str(tmpdir), "test.log")
+
+    with open(filename, "w", encoding="utf-8") as logfile:
+        log = _LogBuffer(_StalledWriter(), logfile)
+        for index in range(6):
+            log.write("line {}\n".format(index))
+        log.flush()
+
+        # Writes are accepted again once the pending text is written out
+        log.write("line 6\n")
+        log.flush()
+
+    with open(filename, encoding="utf-8") as f:
+        assert f.read().splitlines() == [
+            "line 0",
+            "line 1",
+            "line 2",
+            "line 3",
+            "[2 log messages dropped, the log writer fell behind]",
+            "line 6",
+        ]
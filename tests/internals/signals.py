@@ -0,0 +1,80 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import asyncio
+import signal
+
+from buildstream import _signals
+
+
+def noop():
+    pass
+
+
+# An asynchronous job which registers its handlers like a job
+# on the scheduler's event loop, and holds them until released
+#
+async def async_job(name, events, entered, release):
+    with _signals.suspendable(lambda: events.append(("suspend", name)), lambda: events.append(("resume", name))):
+        with _signals.terminator(noop):
+            entered.set()
+            await release.wait()
+
+
+def test_concurrent_async_jobs():
+    events = []
+
+    async def run_jobs():
+        entered = {name: asyncio.Event() for name in ("first", "second")}
+        release = {name: asyncio.Event() for name in ("first", "second")}
+        tasks = {
+            name: asyncio.create_task(async_job(name, events, entered[name], release[name]))
+            for name in ("first", "second")
+        }
+        for event in entered.values():
+            await event.wait()
+
+        # Each job has its own handlers
+        assert len(_signals.task_suspendable_stacks) == 2
+        assert len(_signals.task_terminator_stacks) == 2
+        assert len(_signals.suspenders()) == 3
+
+        # Jobs complete in a different order than they started
+        release["first"].set()
+        await tasks["first"]
+
+        assert list(_signals.task_suspendable_stacks) == [tasks["second"]]
+        assert list(_signals.task_terminator_stacks) == [tasks["second"]]
+        assert signal.getsignal(signal.SIGTERM) is _signals.terminator_handler
+        assert signal.getsignal(signal.SIGTSTP) is _signals.suspend_handler
+
+        # The remaining job is still suspended and resumed
+        for suspender in reversed(_signals.suspenders()):
+            suspender.suspend()
+        for suspender in _signals.suspenders():
+            suspender.resume()
+
+        release["second"].set()
+        await tasks["second"]
+
+    # The outermost handlers are registered outside of the event loop, like the scheduler does
+    with _signals.suspendable(noop, noop), _signals.terminator(noop):
+        asyncio.run(run_jobs())
+
+        assert not _signals.task_suspendable_stacks
+        assert not _signals.task_terminator_stacks
+        assert len(_signals.suspendable_stack) == 1
+        assert len(_signals.terminator_stack) == 1
+
+    assert signal.getsignal(signal.SIGTERM) is not _signals.terminator_handler
+    assert events == [("suspend", "second"), ("resume", "second")]
@@ -0,0 +1,82 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import gzip
+import os
+import pytest
+
+from buildstream import utils
+
+# A log larger than the block size in which its tail is read
+LOG_LINES = ["line {}: {}".format(i, "x" * 100) for i in range(2000)]
+
+
+@pytest.fixture(params=[None, 1024 * 1024, 4096], ids=["plain", "compressed", "compressed-members"])
+def logfile(tmpdir, request, monkeypatch):
+    filename = os.path.join(str(tmpdir), "test.log")
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("\n".join(LOG_LINES) + "\n")
+
+    if request.param:
+        monkeypatch.setattr(utils, "_LOG_MEMBER_SIZE", request.param)
+        compressed = os.path.join(str(tmpdir), "test.log.gz")
+        utils._compress_log(filename, compressed)
+        return compressed
+    return filename
+
+
+def test_open_log(logfile):
+    with utils._open_log(logfile, text=True) as f:
+        assert f.read() == "\n".join(LOG_LINES) + "\n"
+
+
+@pytest.mark.parametrize("n_lines", [0, 1, 20, 1000, 5000])
+def test_read_last_lines(logfile, n_lines):
+    expected = LOG_LINES[-n_lines:] if n_lines else []
+    assert utils._read_last_lines(logfile, n_lines) == "\n".join(expected)
+
+
+# Logs compressed as a single member, like logs of older artifacts
+def test_read_last_lines_single_member(tmpdir):
+    filename = os.path.join(str(tmpdir), "test.log.gz")
+    with gzip.open(filename, "wt", encoding="utf-8") as f:
+        f.write("\n".join(LOG_LINES) + "\n")
+
+    assert utils._read_last_lines(filename, 20) == "\n".join(LOG_LINES[-20:])
+
+
+# Only the last members of a compressed log are decompressed to read its tail
+def test_read_last_lines_decompresses_tail(tmpdir, monkeypatch):
+    filename = os.path.join(str(tmpdir), "test.log")
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("\n".join(LOG_LINES) + "\n")
+    monkeypatch.setattr(utils, "_LOG_MEMBER_SIZE", 4096)
+    compressed = os.path.join(str(tmpdir), "test.log.gz")
+    utils._compress_log(filename, compressed)
+
+    decompressed = []
+
+    def decompress(data):
+        result = gzip_decompress(data)
+        decompressed.append(len(result))
+        return result
+
+    gzip_decompress = gzip.decompress
+    monkeypatch.setattr(gzip, "decompress", decompress)
+
+    assert utils._read_last_lines(compressed, 20) == "\n".join(LOG_LINES[-20:])
+    assert sum(decompressed) <= 2 * 4096
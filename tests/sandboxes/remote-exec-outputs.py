@@ -0,0 +1,109 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import os
+import re
+
+from buildstream._testing.runcli import cli  # pylint: disable=unused-import
+
+from tests.testutils import create_remote_execution_share
+
+# The size of the files added to every output directory by the stand-in
+# remote execution service
+OUTPUT_SIZE = 1024 * 1024
+
+
+def create_project(project):
+    os.makedirs(os.path.join(project, "files", "bin"))
+    with open(os.path.join(project, "files", "bin", "sh"), "w", encoding="utf-8") as f:
+        f.write("#!/bin/sh\n")
+    os.chmod(os.path.join(project, "files", "bin", "sh"), 0o755)
+
+    with open(os.path.join(project, "project.conf"), "w", encoding="utf-8") as f:
+        f.write("name: test\nmin-version: 2.0\nelement-path: elements\n")
+
+    os.makedirs(os.path.join(project, "elements"))
+    with open(os.path.join(project, "elements", "base.bst"), "w", encoding="utf-8") as f:
+        f.write(
+            "kind: import\n"
+            "sources:\n"
+            "- kind: local\n"
+            "  path: files\n"
+            "public:\n"
+            "  bst:\n"
+            "    integration-commands:\n"
+            "    - ldconfig\n"
+        )
+    with open(os.path.join(project, "elements", "target.bst"), "w", encoding="utf-8") as f:
+        f.write(
+            "kind: manual\n"
+            "build-depends:\n"
+            "- base.bst\n"
+            "config:\n"
+            "  build-commands:\n"
+            "  - make\n"
+            "  install-commands:\n"
+            "  - make install\n"
+        )
+
+
+def get_bytes_sent(metrics):
+    total = 0
+    for method in ("Read", "BatchReadBlobs"):
+        match = re.search(r'bst_artifact_server_sent_bytes_total{{method="{}"}} (\d+)'.format(method), metrics)
+        if match:
+            total += int(match.group(1))
+    return total
+
+
+# Test that the outputs of remotely executed commands are left on the
+# remote, and that only the files which end up in the artifact are
+# downloaded
+#
+def test_remote_resident_outputs(cli, tmpdir):
+    project = os.path.join(str(tmpdir), "project")
+    checkout = os.path.join(str(tmpdir), "checkout")
+    create_project(project)
+
+    with create_remote_execution_share(
+        os.path.join(str(tmpdir), "share"), output_size=OUTPUT_SIZE, metrics=True
+    ) as share:
+        cli.configure(
+            {
+                "remote-execution": {
+                    "execution-service": {"url": share.repo},
+                    "storage-service": {"url": share.repo},
+                }
+            }
+        )
+
+        result = cli.run(project=project, args=["build", "target.bst"])
+        result.assert_success()
+
+        bytes_sent = get_bytes_sent(share.get_metrics())
+
+    # The integration commands and the build commands each ran as one action,
+    # adding a file to the sandbox root, and to both the build and install
+    # directories, respectively. Only the file in the install directory was
+    # downloaded, to cache the artifact.
+    assert OUTPUT_SIZE <= bytes_sent < 2 * OUTPUT_SIZE
+
+    result = cli.run(project=project, args=["artifact", "checkout", "target.bst", "--directory", checkout])
+    result.assert_success()
+    outputs = [name for name in os.listdir(checkout) if name.startswith("output-")]
+    assert len(outputs) == 1
+    assert os.path.getsize(os.path.join(checkout, outputs[0])) == OUTPUT_SIZE
@@ -11,23 +11,26 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import asyncio
+import hashlib
 import multiprocessing
 import os
 import shutil
 import signal
+import urllib.request
 from collections import namedtuple
-from contextlib import ExitStack, contextmanager
-from concurrent import futures
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
 from urllib.parse import urlparse
 
 import grpc
 
 from buildstream._cas import CASCache
-from buildstream._cas.casserver import create_server
+from buildstream._cas.casserver import ServerMetrics, create_server, start_metrics_endpoint
 from buildstream._exceptions import CASError
 from buildstream._protos.build.bazel.remote.asset.v1 import remote_asset_pb2, remote_asset_pb2_grpc
-from buildstream._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
+from buildstream._protos.build.bazel.remote.execution.v2 import remote_execution_pb2, remote_execution_pb2_grpc
 from buildstream._protos.buildstream.v2 import artifact_pb2
+from buildstream._protos.google.longrunning import operations_pb2
 from buildstream._protos.google.rpc import code_pb2
 
 REMOTE_ASSET_ARTIFACT_URN_TEMPLATE = "urn:fdc:buildstream.build:2020:artifact:{}"
@@ -39,54 +42,85 @@ class ArtifactSharror(Exception):
 
 
 class BaseArtifactShare:
-    def __init__(self):
+    def __init__(self, *, metrics=False):
         multiprocessing_context = multiprocessing.get_context("forkserver")
 
         q = multiprocessing_context.Queue()
 
-        self.process = multiprocessing_context.Process(target=self.run, args=(q,))
+        self.process = multiprocessing_context.Process(target=self.run, args=(q, metrics))
         self.process.start()
 
-        # Retrieve port from server subprocess
-        port = q.get()
+        # Retrieve ports from server subprocess
+        ports = q.get()
 
-        if port is None:
+        if ports is None:
             raise ArtifactSharror("Error occurred when starting artifact server.")
 
+        port, metrics_port = ports
+
         self.repo = "http://localhost:{}".format(port)
+        self.metrics_url = "http://localhost:{}/metrics".format(metrics_port) if metrics_port else None
 
     # run():
     #
     # Run the artifact server.
     #
-    def run(self, q):
+    def run(self, q, metrics):
         # Block SIGTERM and SIGINT to allow graceful shutdown and cleanup after initialization
         signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGTERM, signal.SIGINT])
 
-        with ExitStack() as stack:
+        asyncio.run(self._run(q, metrics))
+
+    async def _run(self, q, metrics):
+        server_metrics = ServerMetrics() if metrics else None
+
+        async with AsyncExitStack() as stack:
             try:
-                server = stack.enter_context(self._create_server())
+                server = await stack.enter_async_context(self._create_server(server_metrics))
                 port = server.add_insecure_port("127.0.0.1:0")
-                server.start()
+                await server.start()
+
+                metrics_port = None
+                if server_metrics:
+                    endpoint = await start_metrics_endpoint(server_metrics)
+                    stack.push_async_callback(endpoint.wait_closed)
+                    stack.callback(endpoint.close)
+                    metrics_port = endpoint.sockets[0].getsockname()[1]
             except Exception:
                 q.put(None)
                 raise
 
-            # Send port to parent
-            q.put(port)
+            # Send ports to parent
+            q.put((port, metrics_port))
 
-            # Sleep until termination by signal
-            signal.sigwait([signal.SIGTERM, signal.SIGINT])
+            # Sleep until termination by signal, the event loop keeps
+            # serving requests in the meantime
+            await asyncio.get_running_loop().run_in_executor(None, signal.sigwait, [signal.SIGTERM, signal.SIGINT])
 
-            server.stop(0)
+            await server.stop(0)
 
     # _create_server()
     #
     # Create the server that will be run in the process
     #
-    def _create_server(self):
+    # Args:
+    #    metrics (ServerMetrics): Optional metrics to record the requests in
+    #
+    def _create_server(self, metrics):
         raise NotImplementedError()
 
+    # get_metrics():
+    #
+    # Fetch the metrics of the server in the Prometheus text format
+    #
+    # Returns:
+    #    (str): The metrics
+    #
+    def get_metrics(self):
+        assert self.metrics_url, "The share was created without metrics"
+        with urllib.request.urlopen(self.metrics_url) as response:
+            return response.read().decode("utf-8")
+
     # close():
     #
     # Remove the artifact share.
@@ -102,12 +136,9 @@ class BaseArtifactShare:
 # A dummy artifact share without any capabilities
 #
 class DummyArtifactShare(BaseArtifactShare):
-    @contextmanager
-    def _create_server(self):
-        max_workers = (os.cpu_count() or 1) * 5
-        server = grpc.server(futures.ThreadPoolExecutor(max_workers))
-
-        yield server
+    @asynccontextmanager
+    async def _create_server(self, metrics):  # pylint: disable=invalid-overridden-method
+        yield grpc.aio.server()
 
 
 # ArtifactShare()
@@ -121,7 +152,7 @@ class DummyArtifactShare(BaseArtifactShare):
 #    enable_push (bool): Whether the share should allow pushes
 #
 class ArtifactShare(BaseArtifactShare):
-    def __init__(self, directory, *, quota=None, index_only=False):
+    def __init__(self, directory, *, quota=None, index_only=False, metrics=False):
 
         # The working directory for the artifact share (in case it
         # needs to do something outside of its backend's storage folder).
@@ -139,17 +170,18 @@ class ArtifactShare(BaseArtifactShare):
         self.quota = quota
         self.index_only = index_only
 
-        super().__init__()
+        super().__init__(metrics=metrics)
 
         # Set after subprocess creation as it's not picklable
         self.cas = CASCache(self.repodir, casd=None)
 
-    def _create_server(self):
+    def _create_server(self, metrics):
         return create_server(
             self.repodir,
             quota=self.quota,
             enable_push=True,
             index_only=self.index_only,
+            metrics=metrics,
         )
 
     # has_object():
@@ -304,13 +336,113 @@ class ArtifactShare(BaseArtifactShare):
             self._reachable_refs_dir(reachable, dirnode.digest)
 
 
+# RemoteExecutionShare()
+#
+# An ArtifactShare which also provides a stand-in for a remote execution
+# service. Commands are not actually run, instead every output directory
+# of an action is returned with the contents it had in the input root,
+# along with an additional file of `output_size` bytes which is unique
+# to the action, like the outputs of a compiler would be.
+#
+# Args:
+#    directory (str): The base temp directory for the test
+#    output_size (int): The size of the file added to the output directories
+#
+class RemoteExecutionShare(ArtifactShare):
+    def __init__(self, directory, *, output_size, metrics=False):
+        self.output_size = output_size
+
+        super().__init__(directory, metrics=metrics)
+
+    @asynccontextmanager
+    async def _create_server(self, metrics):  # pylint: disable=invalid-overridden-method
+        async with super()._create_server(metrics) as server:
+            cas = CASCache(self.repodir, casd=None)
+            remote_execution_pb2_grpc.add_ExecutionServicer_to_server(
+                _ExecutionServicer(cas, self.output_size), server
+            )
+            yield server
+
+
+class _ExecutionServicer(remote_execution_pb2_grpc.ExecutionServicer):
+    def __init__(self, cas, output_size):
+        super().__init__()
+        self.cas = cas
+        self.output_size = output_size
+
+    async def Execute(self, request, context):  # pylint: disable=invalid-overridden-method
+        action = self._read_message(request.action_digest, remote_execution_pb2.Action)
+        command = self._read_message(action.command_digest, remote_execution_pb2.Command)
+
+        result = remote_execution_pb2.ActionResult(exit_code=0)
+        for path in command.output_paths:
+            directory = self._lookup_directory(
+                action.input_root_digest, os.path.normpath(os.path.join(command.working_directory, path))
+            )
+
+            content = request.action_digest.hash + path
+            content = (content * (self.output_size // len(content) + 1))[: self.output_size]
+            directory.files.add(
+                name="output-{}".format(request.action_digest.hash), digest=self._write(content.encode("utf-8"))
+            )
+
+            result.output_directories.add(path=path, root_directory_digest=self._write(directory.SerializeToString()))
+
+        operation = operations_pb2.Operation(name=request.action_digest.hash, done=True)
+        operation.response.Pack(remote_execution_pb2.ExecuteResponse(result=result))
+        yield operation
+
+    def _read_message(self, digest, message_type):
+        message = message_type()
+        with open(self.cas.objpath(digest), "rb") as f:
+            message.ParseFromString(f.read())
+        return message
+
+    def _lookup_directory(self, digest, path):
+        directory = self._read_message(digest, remote_execution_pb2.Directory)
+        for name in path.split(os.sep):
+            if name in ("", "."):
+                continue
+            for dirnode in directory.directories:
+                if dirnode.name == name:
+                    directory = self._read_message(dirnode.digest, remote_execution_pb2.Directory)
+                    break
+            else:
+                return remote_execution_pb2.Directory()
+        return directory
+
+    # Store objects directly in the storage of buildbox-casd, as
+    # an executor sharing the storage of the server would do
+    def _write(self, data):
+        digest = remote_execution_pb2.Digest(hash=hashlib.sha256(data).hexdigest(), size_bytes=len(data))
+        objpath = self.cas.objpath(digest)
+        os.makedirs(os.path.dirname(objpath), exist_ok=True)
+        with open(objpath + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(objpath + ".tmp", objpath)
+        return digest
+
+
 # create_artifact_share()
 #
 # Create an ArtifactShare for use in a test case
 #
 @contextmanager
-def create_artifact_share(directory, *, quota=None):
-    share = ArtifactShare(directory, quota=quota)
+def create_artifact_share(directory, *, quota=None, metrics=False):
+    share = ArtifactShare(directory, quota=quota, metrics=metrics)
+    try:
+        yield share
+    finally:
+        share.close()
+
+
+# create_remote_execution_share()
+#
+# Create a RemoteExecutionShare for use in a test case
+#
+@contextmanager
+def create_remote_execution_share(directory, *, output_size, metrics=False):
+    share = RemoteExecutionShare(directory, output_size=output_size, metrics=metrics)
     try:
         yield share
     finally:
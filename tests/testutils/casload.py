@@ -0,0 +1,165 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Load test harness for the artifact server.
+#
+# Simulates many builders talking to a CAS server concurrently: every
+# client uploads blobs with BatchUpdateBlobs, checks them with
+# FindMissingBlobs and reads them back with both BatchReadBlobs and
+# ByteStream Read.
+#
+# This can be run against a running server with:
+#
+#     python -m tests.testutils.casload http://localhost:<port>
+#
+import asyncio
+import hashlib
+import os
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import click
+import grpc
+
+from buildstream._protos.build.bazel.remote.execution.v2 import remote_execution_pb2, remote_execution_pb2_grpc
+from buildstream._protos.google.bytestream import bytestream_pb2, bytestream_pb2_grpc
+
+
+# LoadResult()
+#
+# The outcome of a load test run.
+#
+# Attributes:
+#    latencies (dict): Lists of request latencies in seconds by method name
+#    elapsed (float): The wall clock duration of the run in seconds
+#
+class LoadResult:
+    def __init__(self, latencies, elapsed):
+        self.latencies = latencies
+        self.elapsed = elapsed
+
+    # requests():
+    #
+    # Returns:
+    #    (int): The total number of requests issued
+    #
+    def requests(self):
+        return sum(len(samples) for samples in self.latencies.values())
+
+    # percentile():
+    #
+    # Args:
+    #    method (str): The RPC method name
+    #    percent (int): The percentile to compute
+    #
+    # Returns:
+    #    (float): The latency in seconds at the given percentile
+    #
+    def percentile(self, method, percent):
+        samples = sorted(self.latencies[method])
+        index = min(len(samples) - 1, len(samples) * percent // 100)
+        return samples[index]
+
+
+# run_load():
+#
+# Run a load test against a CAS server.
+#
+# Args:
+#    url (str): The URL of the server, e.g. "http://localhost:50051"
+#    clients (int): The number of concurrent clients
+#    rounds (int): The number of rounds every client runs
+#    blobs (int): The number of blobs every client uploads per round
+#    blob_size (int): The size of every blob in bytes
+#
+# Returns:
+#    (LoadResult): The latencies observed by the clients
+#
+def run_load(url, *, clients=16, rounds=4, blobs=8, blob_size=4096):
+    return asyncio.run(_run_load(url, clients, rounds, blobs, blob_size))
+
+
+async def _run_load(url, clients, rounds, blobs, blob_size):
+    parsed = urlparse(url)
+    latencies = defaultdict(list)
+
+    async def timed(method, call):
+        start = time.monotonic()
+        response = await call
+        latencies[method].append(time.monotonic() - start)
+        return response
+
+    async def client():
+        cas = remote_execution_pb2_grpc.ContentAddressableStorageStub(channel)
+        bytestream = bytestream_pb2_grpc.ByteStreamStub(channel)
+
+        for _ in range(rounds):
+            request = remote_execution_pb2.BatchUpdateBlobsRequest()
+            digests = []
+            for _ in range(blobs):
+                data = os.urandom(blob_size)
+                digest = remote_execution_pb2.Digest(hash=hashlib.sha256(data).hexdigest(), size_bytes=len(data))
+                request.requests.add(digest=digest, data=data)
+                digests.append(digest)
+            await timed("BatchUpdateBlobs", cas.BatchUpdateBlobs(request))
+
+            response = await timed(
+                "FindMissingBlobs",
+                cas.FindMissingBlobs(remote_execution_pb2.FindMissingBlobsRequest(blob_digests=digests)),
+            )
+            assert not response.missing_blob_digests
+
+            await timed(
+                "BatchReadBlobs", cas.BatchReadBlobs(remote_execution_pb2.BatchReadBlobsRequest(digests=digests))
+            )
+
+            digest = digests[0]
+            resource_name = "blobs/{}/{}".format(digest.hash, digest.size_bytes)
+            start = time.monotonic()
+            async for _ in bytestream.Read(bytestream_pb2.ReadRequest(resource_name=resource_name)):
+                pass
+            latencies["Read"].append(time.monotonic() - start)
+
+    start = time.monotonic()
+    async with grpc.aio.insecure_channel("{}:{}".format(parsed.hostname, parsed.port)) as channel:
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+    return LoadResult(dict(latencies), time.monotonic() - start)
+
+
+@click.command()
+@click.option("--clients", default=64, show_default=True, help="Number of concurrent clients")
+@click.option("--rounds", default=8, show_default=True, help="Rounds per client")
+@click.option("--blobs", default=16, show_default=True, help="Blobs per round")
+@click.option("--blob-size", default=4096, show_default=True, help="Size of every blob in bytes")
+@click.argument("url")
+def main(clients, rounds, blobs, blob_size, url):
+    result = run_load(url, clients=clients, rounds=rounds, blobs=blobs, blob_size=blob_size)
+
+    click.echo(
+        "{} requests in {:.2f}s ({:.0f} requests/s)".format(
+            result.requests(), result.elapsed, result.requests() / result.elapsed
+        )
+    )
+    for method in sorted(result.latencies):
+        click.echo(
+            "{:<20} p50 {:8.2f}ms  p99 {:8.2f}ms".format(
+                method, result.percentile(method, 50) * 1000, result.percentile(method, 99) * 1000
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,165 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import os
+import random
+import re
+import shutil
+
+from buildstream._cas.chunking import MAX_CHUNK_SIZE, MIN_CHUNK_SIZE, chunk_boundaries
+from buildstream._testing import cli  # pylint: disable=unused-import
+
+from tests.testutils import create_artifact_share
+
+FILE_SIZE = 32 * 1024 * 1024
+
+
+def get_total_bytes(metrics, direction):
+    pattern = r"bst_artifact_server_{}_bytes_total{{method=\"\w+\"}} (\d+)".format(direction)
+    return sum(int(match) for match in re.findall(pattern, metrics))
+
+
+# Assert that the chunk manifests of the given number of large files are kept
+#
+def assert_chunk_manifests(cli, count):
+    chunks = os.path.join(cli.directory, "artifacts", "chunks")
+    assert sum(len(files) for _, _, files in os.walk(chunks)) == count
+
+
+def create_project(project, data):
+    os.makedirs(os.path.join(project, "files"), exist_ok=True)
+    with open(os.path.join(project, "files", "large"), "wb") as f:
+        f.write(data)
+
+    with open(os.path.join(project, "project.conf"), "w", encoding="utf-8") as f:
+        f.write("name: test\nmin-version: 2.0\nelement-path: elements\n")
+
+    os.makedirs(os.path.join(project, "elements"), exist_ok=True)
+    with open(os.path.join(project, "elements", "target.bst"), "w", encoding="utf-8") as f:
+        f.write("kind: import\nsources:\n- kind: local\n  path: files\n")
+
+
+def test_chunk_boundaries_resist_shifts():
+    rng = random.Random(0)
+    data = rng.randbytes(FILE_SIZE)
+    shifted = data[:1000] + rng.randbytes(100) + data[1000:]
+
+    def chunks(buffer):
+        return {bytes(buffer[offset : offset + size]) for offset, size in chunk_boundaries(buffer)}
+
+    original_chunks = chunks(data)
+    shifted_chunks = chunks(shifted)
+
+    assert sum(len(chunk) for chunk in original_chunks) == FILE_SIZE
+    assert all(
+        MIN_CHUNK_SIZE <= len(chunk) <= MAX_CHUNK_SIZE for chunk in original_chunks if chunk != data[-len(chunk) :]
+    )
+
+    # Only the first chunk is affected by the insertion
+    assert len(shifted_chunks - original_chunks) == 1
+
+
+# Test that only the changed chunks of large files are pushed and pulled
+#
+def test_push_pull_changed_chunks(cli, tmpdir):
+    project = os.path.join(str(tmpdir), "project")
+    checkout = os.path.join(str(tmpdir), "checkout")
+
+    rng = random.Random(0)
+    data = bytearray(rng.randbytes(FILE_SIZE))
+    create_project(project, data)
+
+    with create_artifact_share(os.path.join(str(tmpdir), "share"), metrics=True) as share:
+        cli.configure(
+            {
+                "artifacts": {"servers": [{"url": share.repo, "push": True}]},
+                "cache": {"chunk-threshold": "1M"},
+            }
+        )
+
+        result = cli.run(project=project, args=["build", "target.bst"])
+        result.assert_success()
+        first_key = cli.get_element_key(project, "target.bst")
+        first_received = get_total_bytes(share.get_metrics(), "received")
+        assert first_received >= FILE_SIZE
+
+        # Change a few bytes in the middle of the file and push the new artifact
+        data[FILE_SIZE // 2 : FILE_SIZE // 2 + 4096] = rng.randbytes(4096)
+        create_project(project, data)
+
+        result = cli.run(project=project, args=["build", "target.bst"])
+        result.assert_success()
+        second_key = cli.get_element_key(project, "target.bst")
+        assert second_key != first_key
+        assert get_total_bytes(share.get_metrics(), "received") - first_received < FILE_SIZE // 4
+        assert_chunk_manifests(cli, 2)
+
+        # Pull the first artifact, and then the changed one into an empty cache, by
+        # artifact name as the local source would import the changed file
+        shutil.rmtree(os.path.join(cli.directory, "cas"))
+        shutil.rmtree(os.path.join(cli.directory, "artifacts"))
+
+        result = cli.run(project=project, args=["artifact", "pull", "test/target/" + first_key])
+        result.assert_success()
+        first_sent = get_total_bytes(share.get_metrics(), "sent")
+        assert first_sent >= FILE_SIZE
+        assert_chunk_manifests(cli, 1)
+
+        result = cli.run(project=project, args=["artifact", "pull", "test/target/" + second_key])
+        result.assert_success()
+        assert get_total_bytes(share.get_metrics(), "sent") - first_sent < FILE_SIZE // 4
+        assert_chunk_manifests(cli, 2)
+
+    result = cli.run(project=project, args=["artifact", "checkout", "target.bst", "--directory", checkout])
+    result.assert_success()
+    with open(os.path.join(checkout, "large"), "rb") as f:
+        assert f.read() == data
+
+
+# Test that artifacts which were pushed in chunks are not used by clients without chunking
+#
+def test_chunked_artifact_not_used_without_chunking(cli, tmpdir):
+    project = os.path.join(str(tmpdir), "project")
+
+    rng = random.Random(0)
+    create_project(project, rng.randbytes(2 * 1024 * 1024))
+
+    with create_artifact_share(os.path.join(str(tmpdir), "share")) as share:
+        cli.configure(
+            {
+                "artifacts": {"servers": [{"url": share.repo, "push": True}]},
+                "cache": {"chunk-threshold": "1M"},
+            }
+        )
+
+        result = cli.run(project=project, args=["build", "target.bst"])
+        result.assert_success()
+        artifact_name = cli.get_artifact_name(project, "test", "target.bst")
+        assert share.get_artifact_proto(artifact_name) is None
+
+        # Without chunking, the artifact is not found in the remote
+        shutil.rmtree(os.path.join(cli.directory, "cas"))
+        shutil.rmtree(os.path.join(cli.directory, "artifacts"))
+        cli.configure({"cache": {"chunk-threshold": "infinity"}})
+        cli.run(project=project, args=["artifact", "pull", "target.bst"])
+        assert cli.get_element_state(project, "target.bst") == "buildable"
+
+        # With chunking, it is pulled
+        cli.configure({"cache": {"chunk-threshold": "1M"}})
+        result = cli.run(project=project, args=["artifact", "pull", "target.bst"])
+        result.assert_success()
+        assert cli.get_element_state(project, "target.bst") == "cached"
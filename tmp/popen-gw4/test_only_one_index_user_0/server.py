@@ -0,0 +1,350 @@
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import hashlib
+import os
+import re
+import uuid
+import zlib
+from urllib.parse import urlparse
+
+import grpc
+import pytest
+
+from buildstream._cas.casserver import ServerMetrics, _PresenceIndex, _parse_upload_resource_name
+from buildstream._protos.build.bazel.remote.execution.v2 import remote_execution_pb2, remote_execution_pb2_grpc
+from buildstream._protos.google.bytestream import bytestream_pb2, bytestream_pb2_grpc
+
+from tests.testutils.artifactshare import create_artifact_share
+from tests.testutils.casload import run_load
+
+
+# Test that the server handles many concurrent clients and accounts
+# every request in its metrics
+#
+def test_concurrent_clients_metrics(tmpdir):
+    clients, rounds, blobs, blob_size = 32, 2, 4, 1024
+
+    with create_artifact_share(os.path.join(str(tmpdir), "share"), metrics=True) as share:
+        result = run_load(share.repo, clients=clients, rounds=rounds, blobs=blobs, blob_size=blob_size)
+        metrics = share.get_metrics()
+
+    n_requests = clients * rounds
+    for method in ("BatchUpdateBlobs", "FindMissingBlobs", "BatchReadBlobs", "Read"):
+        assert len(result.latencies[method]) == n_requests
+        assert 'bst_artifact_server_requests_total{{method="{}"}} {}'.format(method, n_requests) in metrics
+        assert 'bst_artifact_server_latency_seconds_count{{method="{}"}} {}'.format(method, n_requests) in metrics
+        assert 'bst_artifact_server_failures_total{{method="{}"}} 0'.format(method) in metrics
+
+    # Every blob was read back once through ByteStream
+    assert 'bst_artifact_server_sent_bytes_total{{method="Read"}} {}'.format(n_requests * blob_size) in metrics
+
+    # Every blob is looked up after it was uploaded, which the presence index
+    # answers without asking casd
+    assert "bst_artifact_server_presence_index_hits_total {}".format(n_requests * blobs) in metrics
+    assert "bst_artifact_server_presence_index_misses_total 0" in metrics
+
+
+def test_metrics_histogram():
+    metrics = ServerMetrics()
+    metrics.observe("FindMissingBlobs", 0.003, bytes_received=100, bytes_sent=10)
+    metrics.observe("FindMissingBlobs", 20.0, failed=True)
+
+    text = metrics.render()
+    assert metrics.get_requests("FindMissingBlobs") == 2
+    assert 'bst_artifact_server_failures_total{method="FindMissingBlobs"} 1' in text
+    assert 'bst_artifact_server_received_bytes_total{method="FindMissingBlobs"} 100' in text
+    assert 'bst_artifact_server_latency_seconds_bucket{method="FindMissingBlobs",le="0.0025"} 0' in text
+    assert 'bst_artifact_server_latency_seconds_bucket{method="FindMissingBlobs",le="0.005"} 1' in text
+    assert 'bst_artifact_server_latency_seconds_bucket{method="FindMissingBlobs",le="10.0"} 1' in text
+    assert 'bst_artifact_server_latency_seconds_bucket{method="FindMissingBlobs",le="+Inf"} 2' in text
+
+
+def _digest(n):
+    return remote_execution_pb2.Digest(hash="{:064x}".format(n), size_bytes=n)
+
+
+def test_presence_index_evicts_least_recently_used():
+    presence = _PresenceIndex(ServerMetrics(), quota=None, max_entries=2)
+    presence.add([_digest(1), _digest(2)])
+
+    # Looking up a blob makes it the most recently used one
+    assert not presence.find_unknown([_digest(1)])
+    presence.add([_digest(3)])
+
+    assert presence.find_unknown([_digest(1), _digest(2), _digest(3)]) == [_digest(2)]
+
+
+# With a quota, casd may expire blobs at any time, so lookups are
+# never answered from the index
+#
+def test_presence_index_disabled_with_quota():
+    presence = _PresenceIndex(ServerMetrics(), quota=1024)
+    presence.add([_digest(1)])
+
+    assert presence.find_unknown([_digest(1)]) == [_digest(1)]
+
+
+@pytest.mark.parametrize(
+    "resource_name,expected",
+    [
+        ("uploads/1234/blobs/abcd/42", ("abcd", 42)),
+        ("instance/uploads/1234/blobs/abcd/42/metadata", ("abcd", 42)),
+        ("uploads/1234/compressed-blobs/zstd/abcd/42", None),
+        ("uploads/1234/blobs/abcd", None),
+        ("blobs/abcd/42", None),
+    ],
+)
+def test_parse_upload_resource_name(resource_name, expected):
+    digest = _parse_upload_resource_name(resource_name)
+    if expected is None:
+        assert digest is None
+    else:
+        assert (digest.hash, digest.size_bytes) == expected
+
+
+# Upload a synthetic tree of the given depth to the share, where every
+# directory contains a file and two subdirectories, one of which is
+# shared between all levels.
+#
+# Returns the root digest and the number of distinct directories.
+#
+def _upload_deep_tree(cas, depth):
+    request = remote_execution_pb2.BatchUpdateBlobsRequest()
+
+    def add(data):
+        digest = remote_execution_pb2.Digest(hash=hashlib.sha256(data).hexdigest(), size_bytes=len(data))
+        request.requests.add(digest=digest, data=data)
+        return digest
+
+    shared = remote_execution_pb2.Directory()
+    shared.files.add(name="file", digest=add(b"shared file"))
+    shared_digest = add(shared.SerializeToString())
+
+    digest = add(remote_execution_pb2.Directory().SerializeToString())
+    for level in range(depth):
+        directory = remote_execution_pb2.Directory()
+        directory.directories.add(name="level{}".format(level), digest=digest)
+        directory.directories.add(name="shared", digest=shared_digest)
+        digest = add(directory.SerializeToString())
+
+    response = cas.BatchUpdateBlobs(request)
+    assert all(blob.status.code == 0 for blob in response.responses)
+
+    # The levels, the empty leaf and the shared directory
+    return digest, depth + 2
+
+
+# Count the round trips needed to resolve a deep tree, level by level
+# with BatchReadBlobs versus a single streaming GetTree call
+#
+def test_get_tree_round_trips(tmpdir):
+    depth = 64
+
+    with create_artifact_share(os.path.join(str(tmpdir), "share"), metrics=True) as share:
+        url = urlparse(share.repo)
+        with grpc.insecure_channel("{}:{}".format(url.hostname, url.port)) as channel:
+            cas = remote_execution_pb2_grpc.ContentAddressableStorageStub(channel)
+            root, n_directories = _upload_deep_tree(cas, depth)
+
+            # Walk the tree level by level
+            walked = set()
+            level = [root]
+            while level:
+                response = cas.BatchReadBlobs(remote_execution_pb2.BatchReadBlobsRequest(digests=level))
+                level = []
+                for blob in response.responses:
+                    walked.add(blob.digest.hash)
+                    directory = remote_execution_pb2.Directory.FromString(blob.data)
+                    level.extend(d.digest for d in directory.directories if d.digest.hash not in walked)
+
+            # Fetch the same tree with GetTree
+            responses = list(cas.GetTree(remote_execution_pb2.GetTreeRequest(root_digest=root)))
+            directories = [directory for response in responses for directory in response.directories]
+
+        text = share.get_metrics()
+
+    assert len(walked) == n_directories
+    assert len(directories) == n_directories
+    assert not responses[-1].next_page_token
+
+    assert 'bst_artifact_server_requests_total{{method="BatchReadBlobs"}} {}'.format(depth + 1) in text
+    assert 'bst_artifact_server_requests_total{method="GetTree"} 1' in text
+
+
+def test_get_tree_pagination(tmpdir):
+    with create_artifact_share(os.path.join(str(tmpdir), "share")) as share:
+        url = urlparse(share.repo)
+        with grpc.insecure_channel("{}:{}".format(url.hostname, url.port)) as channel:
+            cas = remote_execution_pb2_grpc.ContentAddressableStorageStub(channel)
+            root, n_directories = _upload_deep_tree(cas, 10)
+
+            # Collect the first page of each call and resume from its token
+            directories = []
+            pages = 0
+            page_token = ""
+            while True:
+                request = remote_execution_pb2.GetTreeRequest(root_digest=root, page_size=5, page_token=page_token)
+                response = next(cas.GetTree(request))
+                assert len(response.directories) <= 5
+                directories.extend(response.directories)
+                pages += 1
+                page_token = response.next_page_token
+                if not page_token:
+                    break
+
+                # The token resumes the walk instead of starting from the root again
+                assert root.hash not in page_token
+
+            # Only the shared directory may be returned again on later pages
+            assert len({directory.SerializeToString() for directory in directories}) == n_directories
+            assert len(directories) <= n_directories + pages - 1
+
+            # A malformed page token
+            with pytest.raises(grpc.RpcError) as exc:
+                list(cas.GetTree(remote_execution_pb2.GetTreeRequest(root_digest=root, page_token="invalid")))
+            assert exc.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+            # A tree which is not in the CAS
+            missing = remote_execution_pb2.Digest(hash="0" * 64, size_bytes=10)
+            with pytest.raises(grpc.RpcError) as exc:
+                list(cas.GetTree(remote_execution_pb2.GetTreeRequest(root_digest=missing)))
+            assert exc.value.code() == grpc.StatusCode.NOT_FOUND
+
+
+def _deflate(data):
+    compressobj = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressobj.compress(data) + compressobj.flush()
+
+
+def _inflate(data):
+    return zlib.decompress(data, wbits=-zlib.MAX_WBITS)
+
+
+# Test that blobs are uploaded and downloaded deflate compressed, with
+# batch requests as well as ByteStream, and that the compressed and
+# uncompressed sizes are recorded in the metrics
+#
+def test_compressed_transfers(tmpdir):
+    deflate = remote_execution_pb2.Compressor.DEFLATE
+    blobs = [
+        "{}: {}\n".format(name, "text which compresses well " * 20).encode("utf-8") * 1000
+        for name in ("batch", "bytestream")
+    ]
+    digests = [
+        remote_execution_pb2.Digest(hash=hashlib.sha256(blob).hexdigest(), size_bytes=len(blob)) for blob in blobs
+    ]
+    compressed = [_deflate(blob) for blob in blobs]
+
+    with create_artifact_share(os.path.join(str(tmpdir), "share"), metrics=True) as share:
+        url = urlparse(share.repo)
+        with grpc.insecure_channel("{}:{}".format(url.hostname, url.port)) as channel:
+            capabilities = remote_execution_pb2_grpc.CapabilitiesStub(channel)
+            response = capabilities.GetCapabilities(remote_execution_pb2.GetCapabilitiesRequest())
+            assert deflate in response.cache_capabilities.supported_compressors
+            assert deflate in response.cache_capabilities.supported_batch_update_compressors
+
+            # Upload one blob in a batch and one with ByteStream
+            cas = remote_execution_pb2_grpc.ContentAddressableStorageStub(channel)
+            request = remote_execution_pb2.BatchUpdateBlobsRequest()
+            request.requests.add(digest=digests[0], data=compressed[0], compressor=deflate)
+            response = cas.BatchUpdateBlobs(request)
+            assert response.responses[0].status.code == 0
+
+            bytestream = bytestream_pb2_grpc.ByteStreamStub(channel)
+            resource_name = "uploads/{}/compressed-blobs/deflate/{}/{}".format(
+                uuid.uuid4(), digests[1].hash, digests[1].size_bytes
+            )
+            half = len(compressed[1]) // 2
+            write_requests = [
+                bytestream_pb2.WriteRequest(resource_name=resource_name, data=compressed[1][:half]),
+                bytestream_pb2.WriteRequest(write_offset=half, data=compressed[1][half:], finish_write=True),
+            ]
+            response = bytestream.Write(iter(write_requests))
+            assert response.committed_size == len(compressed[1])
+
+            # Read both blobs back, uncompressed and compressed
+            response = cas.BatchReadBlobs(remote_execution_pb2.BatchReadBlobsRequest(digests=digests))
+            assert [blob.data for blob in response.responses] == blobs
+
+            request = remote_execution_pb2.BatchReadBlobsRequest(digests=digests, acceptable_compressors=[deflate])
+            response = cas.BatchReadBlobs(request)
+            assert all(blob.compressor == deflate for blob in response.responses)
+            assert [_inflate(blob.data) for blob in response.responses] == blobs
+
+            resource_name = "compressed-blobs/deflate/{}/{}".format(digests[0].hash, digests[0].size_bytes)
+            data = b"".join(
+                response.data for response in bytestream.Read(bytestream_pb2.ReadRequest(resource_name=resource_name))
+            )
+            assert _inflate(data) == blobs[0]
+
+            # The offset of compressed reads refers to the uncompressed blob
+            request = bytestream_pb2.ReadRequest(resource_name=resource_name, read_offset=1000)
+            data = b"".join(response.data for response in bytestream.Read(request))
+            assert _inflate(data) == blobs[0][1000:]
+
+            # A limit is not supported for compressed reads
+            with pytest.raises(grpc.RpcError) as exc:
+                list(bytestream.Read(bytestream_pb2.ReadRequest(resource_name=resource_name, read_limit=1000)))
+            assert exc.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+            # An unsupported compressor is rejected
+            with pytest.raises(grpc.RpcError) as exc:
+                list(bytestream.Read(bytestream_pb2.ReadRequest(resource_name="compressed-blobs/brotli/abcd/42")))
+            assert exc.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+        metrics = share.get_metrics()
+
+    def counter(name):
+        return int(re.search(r"bst_artifact_server_{}_total (\d+)".format(name), metrics).group(1))
+
+    # The first blob was transferred compressed three times and once from an offset,
+    # the second one twice
+    assert counter("deflate_uncompressed_bytes") == 4 * len(blobs[0]) - 1000 + 2 * len(blobs[1])
+    assert counter("deflate_compressed_bytes") * 10 < counter("deflate_uncompressed_bytes")
+    assert 'bst_artifact_server_received_bytes_total{{method="Write"}} {}'.format(len(compressed[1])) in metrics
+
+
+# Test that compressed uploads which expand to more than the size
+# of their blob are rejected
+#
+def test_compressed_upload_size_limit(tmpdir):
+    deflate = remote_execution_pb2.Compressor.DEFLATE
+    blob = b"\0" * 1024
+    digest = remote_execution_pb2.Digest(hash=hashlib.sha256(blob).hexdigest(), size_bytes=len(blob))
+    compressed = _deflate(b"\0" * 64 * 1024 * 1024)
+
+    with create_artifact_share(os.path.join(str(tmpdir), "share")) as share:
+        url = urlparse(share.repo)
+        with grpc.insecure_channel("{}:{}".format(url.hostname, url.port)) as channel:
+            cas = remote_execution_pb2_grpc.ContentAddressableStorageStub(channel)
+            request = remote_execution_pb2.BatchUpdateBlobsRequest()
+            request.requests.add(digest=digest, data=compressed, compressor=deflate)
+            with pytest.raises(grpc.RpcError) as exc:
+                cas.BatchUpdateBlobs(request)
+            assert exc.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+            bytestream = bytestream_pb2_grpc.ByteStreamStub(channel)
+            resource_name = "uploads/{}/compressed-blobs/deflate/{}/{}".format(
+                uuid.uuid4(), digest.hash, digest.size_bytes
+            )
+            write_request = bytestream_pb2.WriteRequest(
+                resource_name=resource_name, data=compressed, finish_write=True
+            )
+            with pytest.raises(grpc.RpcError) as exc:
+                bytestream.Write(iter([write_request]))
+            assert exc.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+            response = cas.FindMissingBlobs(remote_execution_pb2.FindMissingBlobsRequest(blob_digests=[digest]))
+            assert list(response.missing_blob_digests) == [digest]